@@ -0,0 +1,188 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import TRANSLATION_CONFIG
+from instrumentation import record_cache
+
+# GSM 03.38 basic character set; extension characters cost two septets
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENSION = set("^{}\\[~]|€\f")
+
+# (single message limit, per-segment limit when concatenated)
+SEGMENT_LIMITS = {
+    'gsm7': (160, 153),
+    'ucs2': (70, 67)
+}
+
+# Each line is a literal or (label, field, default, unit, translate_value)
+ALERT_TEMPLATES = {
+    'emergency': [
+        "EMERGENCY ALERT",
+        ("Type", 'type', 'Unknown', '', True),
+        ("Location", 'location', 'Unknown', '', False),
+        ("Severity", 'severity', 'Unknown', '', True),
+        ("Description", 'description', 'No description provided', '', True),
+        "Please follow official instructions and stay safe."
+    ],
+    'weather': [
+        "WEATHER ALERT",
+        ("Condition", 'condition', 'Unknown', '', True),
+        ("Temperature", 'temperature', 'Unknown', '°C', False),
+        ("Wind Speed", 'wind_speed', 'Unknown', ' km/h', False),
+        ("Alert", 'alert', 'No alert', '', True),
+        "Stay safe and follow weather updates."
+    ],
+    'evacuation': [
+        "EVACUATION ALERT",
+        ("Zone", 'zone', 'Unknown', '', False),
+        ("Shelter", 'shelter', 'Unknown', '', False),
+        ("Route", 'route', 'Follow official instructions', '', True),
+        ("Estimated Time", 'estimated_time', 'Unknown', ' minutes', False),
+        "Please evacuate immediately and follow the designated route."
+    ]
+}
+
+def sms_encoding(text: str) -> str:
+    """GSM-7 if every character fits the GSM alphabet, otherwise UCS-2"""
+    for char in text:
+        if char not in GSM7_BASIC and char not in GSM7_EXTENSION:
+            return 'ucs2'
+    return 'gsm7'
+
+def _char_units(char: str, encoding: str) -> int:
+    if encoding == 'gsm7':
+        return 2 if char in GSM7_EXTENSION else 1
+    # UTF-16 code units; characters outside the BMP take a surrogate pair
+    return 2 if ord(char) > 0xFFFF else 1
+
+def split_sms(text: str) -> Tuple[str, List[str]]:
+    """Split a message into SMS segments; returns (encoding, segments)
+
+    Segments break at the last whitespace that fits when there is one, and
+    never inside a GSM escape sequence or a UTF-16 surrogate pair.
+    """
+    encoding = sms_encoding(text)
+    single, multi = SEGMENT_LIMITS[encoding]
+    if sum(_char_units(char, encoding) for char in text) <= single:
+        return encoding, [text]
+
+    segments = []
+    start = 0
+    while start < len(text):
+        units = 0
+        end = start
+        last_space = None
+        while end < len(text):
+            units += _char_units(text[end], encoding)
+            if units > multi:
+                break
+            if text[end].isspace():
+                last_space = end
+            end += 1
+        if end < len(text) and last_space is not None and last_space > start:
+            end = last_space + 1
+        segments.append(text[start:end])
+        start = end
+    return encoding, segments
+
+class AlertTemplateCache:
+    """Alert messages rendered once per language and cached.
+
+    Template labels are translated once per language for the lifetime of the
+    cache, and alert field values once per alert. A rendered alert holds the
+    body, its SMS encoding and its segments for every supported language, so
+    sending to any number of recipients is a dictionary lookup.
+    """
+
+    def __init__(self, translator=None, languages: Optional[Sequence[str]] = None,
+                 source_lang: str = 'en', max_entries: int = 256):
+        self.translator = translator
+        self.languages = list(languages or TRANSLATION_CONFIG['supported_languages'])
+        self.source_lang = source_lang
+        self.max_entries = max_entries
+        self._rendered = OrderedDict()
+        self._phrases: Dict[str, Dict[str, str]] = {language: {} for language in self.languages}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def render(self, kind: str, data: Dict) -> Dict[str, Dict]:
+        """Get the alert rendered in every language, keyed by language code"""
+        key = (kind, json.dumps(data, sort_keys=True, default=str))
+        with self._lock:
+            if key in self._rendered:
+                self._rendered.move_to_end(key)
+                self.stats['hits'] += 1
+                record_cache('alert_templates', True)
+                return self._rendered[key]
+            self.stats['misses'] += 1
+        record_cache('alert_templates', False)
+
+        rendered = {language: self._render_language(kind, data, language)
+                    for language in self.languages}
+
+        with self._lock:
+            self._rendered[key] = rendered
+            if len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    def get(self, kind: str, data: Dict, language: str) -> Dict:
+        """Get one rendered language, falling back to the source language"""
+        rendered = self.render(kind, data)
+        return rendered.get(language) or rendered[self.source_lang]
+
+    def _render_language(self, kind: str, data: Dict, language: str) -> Dict:
+        template = ALERT_TEMPLATES[kind]
+        phrases = set()
+        for line in template:
+            if isinstance(line, str):
+                phrases.add(line)
+                continue
+            label, field, default, unit, translate_value = line
+            phrases.add(label)
+            if unit.strip().isalpha():
+                phrases.add(unit.strip())
+            value = data.get(field, default)
+            if translate_value and isinstance(value, str) and value:
+                phrases.add(value)
+        self._translate_phrases(phrases, language)
+
+        lines = []
+        for line in template:
+            if isinstance(line, str):
+                lines.append(self._phrase(line, language))
+                continue
+            label, field, default, unit, translate_value = line
+            value = data.get(field, default)
+            if translate_value and isinstance(value, str) and value:
+                value = self._phrase(value, language)
+            if unit.strip().isalpha():
+                unit = unit.replace(unit.strip(), self._phrase(unit.strip(), language))
+            lines.append(f"{self._phrase(label, language)}: {value}{unit}")
+
+        body = "\n".join(lines)
+        encoding, segments = split_sms(body)
+        return {
+            'language': language,
+            'body': body,
+            'encoding': encoding,
+            'segments': segments
+        }
+
+    def _translate_phrases(self, phrases, language: str) -> None:
+        if language == self.source_lang or self.translator is None:
+            return
+        cache = self._phrases[language]
+        missing = [phrase for phrase in phrases if phrase not in cache]
+        if missing:
+            translated = self.translator.translate_batch(missing, language, self.source_lang)
+            cache.update(zip(missing, translated))
+
+    def _phrase(self, text: str, language: str) -> str:
+        if language == self.source_lang:
+            return text
+        return self._phrases.get(language, {}).get(text, text)
@@ -0,0 +1,256 @@
+import heapq
+import itertools
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from ai.resource_manager import StaleRequestError
+
+# Lower rank is served first
+PRIORITY_RANKS = {
+    'critical': 0,
+    'high': 1,
+    'medium': 2,
+    'low': 3
+}
+
+class AllocationScheduler:
+    """Priority-ordered allocation of pending resource requests.
+
+    Pending requests are kept in an in-memory heap ordered by priority, then
+    age, then distance. The heap is fed incrementally by
+    ``ResourceManager.request_resources`` and drained in batches against a
+    copy of the inventory, reloaded at the start of every drain once
+    attached. Requests deferred while the queue was full are reloaded from
+    the database on the next drain with room for them.
+    """
+
+    def __init__(self, resource_manager=None, batch_size: int = 50, max_pending: int = 10000,
+                 distance_fn: Optional[Callable[[Dict], float]] = None):
+        self.resource_manager = resource_manager
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.distance_fn = distance_fn or (lambda request: 0.0)
+        self.inventory = {}
+        self.logger = logging.getLogger(__name__)
+        self._heap = []
+        self._requests = {}
+        # The live heap entry per request; any other entry for it is stale
+        self._entries = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stop_event = threading.Event()
+        self._attached = False
+        self._deferred = False
+        self.stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'fulfilled': 0,
+            'partial': 0,
+            'allocated_quantity': 0
+        }
+
+    def attach(self, resource_manager) -> None:
+        """Load inventory and pending requests, then follow new requests"""
+        self.resource_manager = resource_manager
+        self.refresh_inventory()
+        self.load_pending()
+        resource_manager.add_request_listener(self.submit)
+        self._attached = True
+
+    def refresh_inventory(self) -> Dict[int, int]:
+        """Reload the live inventory snapshot from the database"""
+        resources = self.resource_manager.get_resource_inventory()
+        with self._lock:
+            self.inventory = {r['id']: r['quantity'] for r in resources}
+        return dict(self.inventory)
+
+    def load_pending(self) -> int:
+        """Seed the heap with requests already pending in the database"""
+        loaded = 0
+        for request in self.resource_manager.get_pending_requests():
+            if self.submit(request):
+                loaded += 1
+        return loaded
+
+    def set_inventory(self, resource_id: int, quantity: int) -> None:
+        """Record a new available quantity for a resource"""
+        with self._lock:
+            self.inventory[resource_id] = quantity
+
+    def submit(self, request: Dict) -> bool:
+        """Queue a request; returns False when rejected for backpressure"""
+        if request.get('status', 'pending') not in ('pending', 'partial'):
+            return False
+
+        remaining = request.get('remaining_quantity')
+        if remaining is None:
+            remaining = request['quantity'] - request.get('fulfilled_quantity', 0)
+        if remaining <= 0:
+            return False
+
+        created_at = request.get('created_at') or datetime.now()
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+
+        entry = (
+            PRIORITY_RANKS.get(str(request.get('priority', '')).lower(), len(PRIORITY_RANKS)),
+            created_at.timestamp(),
+            float(self.distance_fn(request)),
+            next(self._sequence),
+            request['id']
+        )
+
+        with self._lock:
+            if request['id'] in self._requests:
+                return True
+            if len(self._requests) >= self.max_pending:
+                self.stats['rejected'] += 1
+                self._deferred = True
+                self.logger.warning(f"Allocation queue full, deferring request {request['id']}")
+                return False
+            self._requests[request['id']] = dict(request, remaining_quantity=remaining)
+            self._entries[request['id']] = entry
+            heapq.heappush(self._heap, entry)
+            self.stats['submitted'] += 1
+        return True
+
+    def cancel(self, request_id: int) -> bool:
+        """Drop a queued request; its heap entry is discarded lazily"""
+        with self._lock:
+            self._entries.pop(request_id, None)
+            return self._requests.pop(request_id, None) is not None
+
+    def pending_count(self) -> int:
+        """Number of requests waiting for allocation"""
+        return len(self._requests)
+
+    def is_saturated(self) -> bool:
+        """Whether new requests are currently being rejected"""
+        return len(self._requests) >= self.max_pending
+
+    def drain(self) -> List[Dict]:
+        """Allocate as much of the queue as inventory allows, batch by batch
+
+        Each queued request is visited at most once per drain. Requests that
+        can only be partly served are fulfilled up to the available quantity
+        and requeued with the remainder.
+        """
+        allocations = []
+        set_aside = []
+
+        if self._attached:
+            # Stock also changes outside the scheduler
+            self.refresh_inventory()
+            if self._deferred and not self.is_saturated():
+                self._deferred = False
+                self.load_pending()
+
+        while True:
+            batch, batch_entries = self._allocate_batch(set_aside)
+            if not batch_entries:
+                break
+            if batch:
+                try:
+                    if self.resource_manager is not None:
+                        self.resource_manager.apply_allocations(batch)
+                except Exception as e:
+                    self.logger.error(f"Error persisting allocation batch: {str(e)}")
+                    if isinstance(e, StaleRequestError):
+                        # Filled or closed elsewhere, so they must not be retried
+                        for request_id in e.request_ids:
+                            self.cancel(request_id)
+                    self._rollback_batch(batch, batch_entries, set_aside)
+                    if self._attached:
+                        self.refresh_inventory()
+                    break
+                self._record_batch(batch)
+                allocations.extend(batch)
+
+        with self._lock:
+            for entry in set_aside:
+                if self._is_live(entry):
+                    heapq.heappush(self._heap, entry)
+
+        return allocations
+
+    def start(self, interval: float = 5.0) -> None:
+        """Drain the queue periodically in a background thread"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the background drain thread"""
+        self._stop_event.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.drain()
+            except Exception as e:
+                self.logger.error(f"Error draining allocation queue: {str(e)}")
+
+    def _is_live(self, entry: tuple) -> bool:
+        return self._entries.get(entry[-1]) is entry
+
+    def _allocate_batch(self, set_aside: List) -> tuple:
+        """Pop up to batch_size requests and grant what the inventory allows"""
+        batch = []
+        batch_entries = []
+        with self._lock:
+            while self._heap and len(batch_entries) < self.batch_size:
+                entry = heapq.heappop(self._heap)
+                if not self._is_live(entry):
+                    continue
+                request = self._requests[entry[-1]]
+                batch_entries.append(entry)
+
+                available = self.inventory.get(request['resource_id'], 0)
+                granted = min(request['remaining_quantity'], available)
+                if granted <= 0:
+                    set_aside.append(entry)
+                    continue
+
+                self.inventory[request['resource_id']] = available - granted
+                request['remaining_quantity'] -= granted
+                batch.append({
+                    'request_id': request['id'],
+                    'resource_id': request['resource_id'],
+                    'quantity': granted,
+                    'status': 'fulfilled' if request['remaining_quantity'] == 0 else 'partial'
+                })
+
+                if request['remaining_quantity'] > 0:
+                    set_aside.append(entry)
+        return batch, batch_entries
+
+    def _rollback_batch(self, batch: List[Dict], batch_entries: List, set_aside: List) -> None:
+        """Return granted quantities to inventory and requeue the batch"""
+        with self._lock:
+            for allocation in batch:
+                self.inventory[allocation['resource_id']] = (
+                    self.inventory.get(allocation['resource_id'], 0) + allocation['quantity']
+                )
+                request = self._requests.get(allocation['request_id'])
+                if request is not None:
+                    request['remaining_quantity'] += allocation['quantity']
+            set_aside_ids = set(entry[-1] for entry in set_aside)
+            for entry in batch_entries:
+                if self._is_live(entry) and entry[-1] not in set_aside_ids:
+                    heapq.heappush(self._heap, entry)
+
+    def _record_batch(self, batch: List[Dict]) -> None:
+        with self._lock:
+            for allocation in batch:
+                if allocation['status'] == 'fulfilled':
+                    self._requests.pop(allocation['request_id'], None)
+                    self._entries.pop(allocation['request_id'], None)
+                self.stats[allocation['status']] += 1
+                self.stats['allocated_quantity'] += allocation['quantity']
@@ -1,27 +1,33 @@
-import pandas as pd
-import numpy as np
-from typing import Dict, List, Optional
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional
 import json
 from datetime import datetime, timedelta
 from config import DB_CONFIG
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import plotly.graph_objects as go
-import plotly.express as px
 import logging
 import traceback
+from ai.incident_rollup import ROLLUP_QUERY
+from ai.chart_render import ChartRenderer, chart_payload
+from instrumentation import get_service_logger, instrumented
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+def _read_sql(query, conn, params=None) -> 'pd.DataFrame':
+    """pandas.read_sql, importing pandas on first use"""
+    import pandas as pd
+    return pd.read_sql(query, conn, params=params)
 
 class AnalyticsService:
-    def __init__(self):
+    def __init__(self, render_html: bool = False, chart_cache_size: int = 128):
         self.db_config = DB_CONFIG
-        logging.basicConfig(
-            filename='logs/analytics.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
+        # Charts are data-only payloads unless server-rendered HTML is requested
+        self.render_html = render_html
+        self.chart_renderer = ChartRenderer(chart_cache_size)
+        self.logger = get_service_logger(__name__, 'logs/analytics.log')
         self.accuracy_metrics = {
-            'incident_prediction': {'tp': 0, 'fp': 0, 'tn': 0, 'fn': 0},
+            'incident_prediction': {'tp': 0, 'fp': 0, 'tn': 0, 'fn': 0, 'accuracy': 0.0, 'count': 0},
             'resource_allocation': {'accuracy': 0.0, 'count': 0}
         }
 
@@ -33,37 +39,28 @@ class AnalyticsService:
             logging.error(f"Database connection error: {str(e)}\n{traceback.format_exc()}")
             raise
 
-    def get_incident_analytics(self, time_range: str = '7d') -> Dict:
+    @instrumented('db')
+    def get_incident_analytics(self, time_range: str = '7d',
+                               start_date: Optional[datetime] = None,
+                               end_date: Optional[datetime] = None) -> Dict:
         """Get analytics for incidents with enhanced accuracy"""
         conn = None
         try:
             conn = self._get_db_connection()
             self.logger.info("Connected to database for incident analytics")
             
-            # Validate time range
-            valid_ranges = ['7d', '30d']
-            if time_range not in valid_ranges:
-                raise ValueError(f"Invalid time range. Must be one of: {valid_ranges}")
+            # Calculate time range; an explicit start date overrides time_range
+            end_date = end_date or datetime.now()
+            if start_date is None:
+                valid_ranges = {'7d': 7, '30d': 30}
+                if time_range not in valid_ranges:
+                    raise ValueError(f"Invalid time range. Must be one of: {list(valid_ranges)}")
+                start_date = end_date - timedelta(days=valid_ranges[time_range])
+            elif start_date > end_date:
+                raise ValueError("start_date must not be after end_date")
             
-            # Calculate time range
-            end_date = datetime.now()
-            if time_range == '7d':
-                start_date = end_date - timedelta(days=7)
-            else:  # 30d
-                start_date = end_date - timedelta(days=30)
-            
-            # Get incident data with validation
-            df = pd.read_sql("""
-                SELECT 
-                    type,
-                    severity,
-                    EXTRACT(DOW FROM created_at) as day_of_week,
-                    EXTRACT(HOUR FROM created_at) as hour_of_day,
-                    COUNT(*) as count
-                FROM incidents
-                WHERE created_at BETWEEN %s AND %s
-                GROUP BY type, severity, day_of_week, hour_of_day
-            """, conn, params=(start_date, end_date))
+            # Get incident counts from the hourly rollup created by setup_db
+            df = _read_sql(ROLLUP_QUERY, conn, params=(start_date, end_date))
             
             if df.empty:
                 raise ValueError("No incident data found for the specified time range")
@@ -116,7 +113,7 @@ class AnalyticsService:
         """Calculate confidence interval for accuracy"""
         import scipy.stats
         z = scipy.stats.norm.ppf((1 + confidence) / 2)
-        std_error = np.sqrt((accuracy * (1 - accuracy)) / n)
+        std_error = math.sqrt((accuracy * (1 - accuracy)) / n)
         margin_of_error = z * std_error
         return {
             'lower': float(accuracy - margin_of_error),
@@ -139,16 +136,14 @@ class AnalyticsService:
             conn = self._get_db_connection()
             logging.info("Connected to database for resource analytics")
             
-            # Get resource data
-            df = pd.read_sql("""
+            # Get resource data from the per-category summary maintained by ResourceManager
+            df = _read_sql("""
                 SELECT 
-                    r.category,
-                    r.quantity,
-                    COUNT(ra.id) as allocation_count,
-                    SUM(ra.quantity) as allocated_quantity
-                FROM resources r
-                LEFT JOIN resource_allocations ra ON r.id = ra.resource_id
-                GROUP BY r.category, r.quantity
+                    category,
+                    total_quantity as quantity,
+                    allocation_count,
+                    allocated_quantity
+                FROM resource_inventory_summary
             """, conn)
             
             logging.info(f"Retrieved {len(df)} resource records")
@@ -178,7 +173,7 @@ class AnalyticsService:
             logging.info("Connected to database for response analytics")
             
             # Get response team data
-            df = pd.read_sql("""
+            df = _read_sql("""
                 SELECT 
                     t.team_type,
                     COUNT(DISTINCT tm.id) as member_count,
@@ -214,7 +209,7 @@ class AnalyticsService:
         conn = psycopg2.connect(**self.db_config)
         
         # Get weather data
-        df = pd.read_sql("""
+        df = _read_sql("""
             SELECT 
                 weather_condition,
                 temperature,
@@ -235,7 +230,7 @@ class AnalyticsService:
         conn.close()
         return analytics
 
-    def _get_incidents_by_type(self, df: pd.DataFrame) -> Dict:
+    def _get_incidents_by_type(self, df: 'pd.DataFrame') -> Dict:
         """Get incident distribution by type"""
         type_counts = df.groupby('type')['count'].sum().to_dict()
         return {
@@ -243,7 +238,7 @@ class AnalyticsService:
             'chart': self._create_pie_chart(type_counts, 'Incidents by Type')
         }
 
-    def _get_incidents_by_severity(self, df: pd.DataFrame) -> Dict:
+    def _get_incidents_by_severity(self, df: 'pd.DataFrame') -> Dict:
         """Get incident distribution by severity"""
         severity_counts = df.groupby('severity')['count'].sum().to_dict()
         return {
@@ -251,7 +246,7 @@ class AnalyticsService:
             'chart': self._create_bar_chart(severity_counts, 'Incidents by Severity')
         }
 
-    def _get_incidents_by_time(self, df: pd.DataFrame) -> Dict:
+    def _get_incidents_by_time(self, df: 'pd.DataFrame') -> Dict:
         """Get incident distribution by time"""
         hourly_counts = df.groupby('hour_of_day')['count'].sum().to_dict()
         return {
@@ -259,7 +254,7 @@ class AnalyticsService:
             'chart': self._create_line_chart(hourly_counts, 'Incidents by Hour')
         }
 
-    def _get_incident_trends(self, df: pd.DataFrame) -> Dict:
+    def _get_incident_trends(self, df: 'pd.DataFrame') -> Dict:
         """Get incident trends over time"""
         daily_counts = df.groupby('day_of_week')['count'].sum().to_dict()
         return {
@@ -267,7 +262,7 @@ class AnalyticsService:
             'chart': self._create_line_chart(daily_counts, 'Daily Incident Trends')
         }
 
-    def _get_resources_by_category(self, df: pd.DataFrame) -> Dict:
+    def _get_resources_by_category(self, df: 'pd.DataFrame') -> Dict:
         """Get resource distribution by category"""
         category_data = df.groupby('category').agg({
             'quantity': 'sum',
@@ -282,7 +277,7 @@ class AnalyticsService:
             )
         }
 
-    def _get_resource_utilization(self, df: pd.DataFrame) -> Dict:
+    def _get_resource_utilization(self, df: 'pd.DataFrame') -> Dict:
         """Get resource utilization metrics"""
         utilization = df.groupby('category').apply(
             lambda x: (x['allocated_quantity'].sum() / x['quantity'].sum()) * 100
@@ -294,12 +289,9 @@ class AnalyticsService:
 
     def _get_allocation_trends(self, conn) -> Dict:
         """Get resource allocation trends"""
-        df = pd.read_sql("""
-            SELECT 
-                DATE_TRUNC('day', allocated_at) as date,
-                COUNT(*) as count
-            FROM resource_allocations
-            GROUP BY date
+        df = _read_sql("""
+            SELECT date, count
+            FROM resource_allocation_daily
             ORDER BY date
         """, conn)
         return {
@@ -310,7 +302,7 @@ class AnalyticsService:
             )
         }
 
-    def _get_teams_by_type(self, df: pd.DataFrame) -> Dict:
+    def _get_teams_by_type(self, df: 'pd.DataFrame') -> Dict:
         """Get team distribution by type"""
         team_data = df.to_dict('records')
         return {
@@ -321,7 +313,7 @@ class AnalyticsService:
             )
         }
 
-    def _get_response_times(self, df: pd.DataFrame) -> Dict:
+    def _get_response_times(self, df: 'pd.DataFrame') -> Dict:
         """Get response time metrics"""
         response_times = df.groupby('team_type')['avg_response_time'].mean().to_dict()
         return {
@@ -331,7 +323,7 @@ class AnalyticsService:
 
     def _get_team_utilization(self, conn) -> Dict:
         """Get team utilization metrics"""
-        df = pd.read_sql("""
+        df = _read_sql("""
             SELECT 
                 team_type,
                 COUNT(*) as total_assignments,
@@ -349,7 +341,7 @@ class AnalyticsService:
             'chart': self._create_bar_chart(utilization, 'Team Utilization (%)')
         }
 
-    def _get_weather_patterns(self, df: pd.DataFrame) -> Dict:
+    def _get_weather_patterns(self, df: 'pd.DataFrame') -> Dict:
         """Get weather pattern analysis"""
         patterns = df.groupby('weather_condition')['count'].sum().to_dict()
         return {
@@ -357,7 +349,7 @@ class AnalyticsService:
             'chart': self._create_pie_chart(patterns, 'Weather Patterns')
         }
 
-    def _get_temperature_trends(self, df: pd.DataFrame) -> Dict:
+    def _get_temperature_trends(self, df: 'pd.DataFrame') -> Dict:
         """Get temperature trend analysis"""
         temp_stats = df.groupby('temperature')['count'].sum().to_dict()
         return {
@@ -365,7 +357,7 @@ class AnalyticsService:
             'chart': self._create_line_chart(temp_stats, 'Temperature Distribution')
         }
 
-    def _get_wind_patterns(self, df: pd.DataFrame) -> Dict:
+    def _get_wind_patterns(self, df: 'pd.DataFrame') -> Dict:
         """Get wind pattern analysis"""
         wind_stats = df.groupby('wind_speed')['count'].sum().to_dict()
         return {
@@ -373,31 +365,25 @@ class AnalyticsService:
             'chart': self._create_line_chart(wind_stats, 'Wind Speed Distribution')
         }
 
-    def _create_pie_chart(self, data: Dict, title: str) -> str:
+    def _create_chart(self, kind: str, data: Dict, title: str) -> Dict:
+        """Create a chart payload, with memoized HTML if enabled"""
+        payload = chart_payload(kind, data, title)
+        if self.render_html:
+            payload['html'] = self.chart_renderer.render(payload)
+        return payload
+
+    def _create_pie_chart(self, data: Dict, title: str) -> Dict:
         """Create a pie chart"""
-        fig = go.Figure(data=[go.Pie(
-            labels=list(data.keys()),
-            values=list(data.values()),
-            hole=.3
-        )])
-        fig.update_layout(title_text=title)
-        return fig.to_html(full_html=False)
+        return self._create_chart('pie', data, title)
 
-    def _create_bar_chart(self, data: Dict, title: str) -> str:
+    def _create_bar_chart(self, data: Dict, title: str) -> Dict:
         """Create a bar chart"""
-        fig = go.Figure(data=[go.Bar(
-            x=list(data.keys()),
-            y=list(data.values())
-        )])
-        fig.update_layout(title_text=title)
-        return fig.to_html(full_html=False)
+        return self._create_chart('bar', data, title)
 
-    def _create_line_chart(self, data: Dict, title: str) -> str:
+    def _create_line_chart(self, data: Dict, title: str) -> Dict:
         """Create a line chart"""
-        fig = go.Figure(data=[go.Scatter(
-            x=list(data.keys()),
-            y=list(data.values()),
-            mode='lines+markers'
-        )])
-        fig.update_layout(title_text=title)
-        return fig.to_html(full_html=False) 
\ No newline at end of file
+        return self._create_chart('line', data, title)
+
+    def get_render_stats(self) -> Dict:
+        """Get chart cache hits/misses and the render-time histogram"""
+        return self.chart_renderer.get_stats()
@@ -0,0 +1,247 @@
+import json
+import logging
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+
+LANGUAGE_CODES = {
+    'english': 'en',
+    'hindi': 'hi',
+    'urdu': 'ur'
+}
+
+def normalize_phone(phone: str, country_code: str = '91') -> Optional[str]:
+    """Normalize a phone number to E.164, assuming the given country for local numbers"""
+    if not phone:
+        return None
+    digits = re.sub(r'\D', '', phone)
+    if phone.strip().startswith('+'):
+        return f"+{digits}" if len(digits) >= 8 else None
+    if digits.startswith('00'):
+        return f"+{digits[2:]}"
+    if len(digits) == 11 and digits.startswith('0'):
+        digits = digits[1:]
+    if len(digits) == 10:
+        return f"+{country_code}{digits}"
+    if len(digits) == 12 and digits.startswith(country_code):
+        return f"+{digits}"
+    return None
+
+def radius_area(latitude: float, longitude: float, radius_km: float) -> Dict:
+    """Alert area covering a circle around a point"""
+    return {'type': 'radius', 'latitude': latitude, 'longitude': longitude, 'radius_km': radius_km}
+
+def polygon_area(coordinates: Sequence[Tuple[float, float]]) -> Dict:
+    """Alert area covering a polygon given as (latitude, longitude) vertices"""
+    if len(coordinates) < 3:
+        raise ValueError("A polygon needs at least three vertices")
+    return {'type': 'polygon', 'coordinates': list(coordinates)}
+
+def init_subscribers(cur) -> None:
+    """Create the alert subscriber table and its spatial indexes"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS alert_subscribers (
+            id BIGSERIAL PRIMARY KEY,
+            phone VARCHAR(20) NOT NULL UNIQUE,
+            name VARCHAR(100),
+            language VARCHAR(5) NOT NULL DEFAULT 'en',
+            location GEOMETRY(POINT, 4326) NOT NULL,
+            active BOOLEAN NOT NULL DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alert_subscribers_location
+        ON alert_subscribers USING GIST (location)
+    """)
+
+    # Radius queries are in metres, so index the geography form as well
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_alert_subscribers_geography
+        ON alert_subscribers USING GIST ((location::geography))
+    """)
+
+class AudienceResolver:
+    """Resolve the recipients of a geo-targeted alert.
+
+    Subscribers live in ``alert_subscribers`` with a GiST index on their
+    location and one row per normalized phone number, so a recipient set is
+    de-duplicated by construction. Results are streamed in pages from a single
+    server-side cursor, so the spatial predicate is evaluated by one GiST
+    scan however large the audience is, and sending can start as soon as the
+    first page arrives.
+    """
+
+    def __init__(self, db_config: Dict, page_size: int = 5000):
+        self.db_config = db_config
+        self.page_size = page_size
+        self.logger = logging.getLogger(__name__)
+
+    def init_db(self) -> None:
+        """Create the subscriber table and its spatial index"""
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        init_subscribers(cur)
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    def add_subscribers(self, subscribers: List[Dict]) -> int:
+        """Insert or update subscribers; returns the number of rows written
+
+        Each subscriber has phone, latitude, longitude and optionally name
+        and language. Invalid phone numbers are skipped.
+        """
+        rows = {}
+        for subscriber in subscribers:
+            phone = normalize_phone(subscriber.get('phone'))
+            if phone is None:
+                self.logger.warning(f"Skipping subscriber with invalid phone: {subscriber.get('phone')}")
+                continue
+            rows[phone] = (phone, subscriber.get('name'), subscriber.get('language', 'en'),
+                           subscriber['longitude'], subscriber['latitude'])
+        if not rows:
+            return 0
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+
+        execute_values(cur, """
+            INSERT INTO alert_subscribers (phone, name, language, location)
+            VALUES %s
+            ON CONFLICT (phone) DO UPDATE SET
+                name = COALESCE(EXCLUDED.name, alert_subscribers.name),
+                language = EXCLUDED.language,
+                location = EXCLUDED.location,
+                active = TRUE,
+                updated_at = CURRENT_TIMESTAMP
+        """, list(rows.values()), template="(%s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326))",
+            page_size=1000)
+
+        conn.commit()
+        cur.close()
+        conn.close()
+        return len(rows)
+
+    def import_volunteers(self, path: str,
+                          geocode: Callable[[str], Optional[Tuple[float, float]]]) -> int:
+        """Load volunteers.json, geocoding the free-text locations once each"""
+        with open(path) as f:
+            volunteers = json.load(f)
+
+        locations = {}
+        subscribers = []
+        for volunteer in volunteers:
+            place = (volunteer.get('location') or '').strip()
+            if not place:
+                continue
+            if place.lower() not in locations:
+                locations[place.lower()] = geocode(place)
+            coordinates = locations[place.lower()]
+            if coordinates is None:
+                self.logger.warning(f"Could not geocode volunteer location: {place}")
+                continue
+            languages = [LANGUAGE_CODES.get(language.lower()) for language in volunteer.get('languages', [])]
+            # Prefer a regional language when the volunteer speaks one
+            preferred = next((code for code in languages if code and code != 'en'), 'en')
+            subscribers.append({
+                'phone': volunteer.get('phone'),
+                'name': volunteer.get('name'),
+                'language': preferred,
+                'latitude': coordinates[0],
+                'longitude': coordinates[1]
+            })
+        return self.add_subscribers(subscribers)
+
+    def iter_pages(self, area: Dict, languages: Optional[Sequence[str]] = None) -> Iterator[List[Dict]]:
+        """Yield pages of recipients inside the area"""
+        where, params = self._area_clause(area)
+        if languages:
+            where += " AND language = ANY(%s)"
+            params = params + (list(languages),)
+
+        conn = psycopg2.connect(**self.db_config)
+        # Named, so rows stay on the server and arrive page by page
+        cur = conn.cursor(name='alert_audience', cursor_factory=RealDictCursor)
+        cur.itersize = self.page_size
+        try:
+            cur.execute(f"""
+                SELECT id, phone, name, language
+                FROM alert_subscribers
+                WHERE active AND {where}
+            """, params)
+            while True:
+                page = [dict(row) for row in cur.fetchmany(self.page_size)]
+                if not page:
+                    return
+                yield page
+                if len(page) < self.page_size:
+                    return
+        finally:
+            cur.close()
+            conn.close()
+
+    def iter_recipients(self, area: Dict, languages: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """Yield recipients inside the area one at a time, reading page by page"""
+        for page in self.iter_pages(area, languages):
+            yield from page
+
+    def count(self, area: Dict) -> Dict:
+        """Count recipients inside the area by language"""
+        where, params = self._area_clause(area)
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        cur.execute(f"""
+            SELECT language, COUNT(*) as count
+            FROM alert_subscribers
+            WHERE active AND {where}
+            GROUP BY language
+        """, params)
+
+        by_language = {row['language']: row['count'] for row in cur.fetchall()}
+
+        cur.close()
+        conn.close()
+        return {
+            'total': sum(by_language.values()),
+            'by_language': by_language
+        }
+
+    def deactivate(self, phone: str) -> bool:
+        """Stop sending alerts to a phone number"""
+        phone = normalize_phone(phone)
+        if phone is None:
+            return False
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE alert_subscribers
+            SET active = FALSE, updated_at = CURRENT_TIMESTAMP
+            WHERE phone = %s
+        """, (phone,))
+        updated = cur.rowcount
+        conn.commit()
+        cur.close()
+        conn.close()
+        return updated > 0
+
+    def _area_clause(self, area: Dict) -> Tuple[str, tuple]:
+        if area['type'] == 'radius':
+            return ("""ST_DWithin(
+                        location::geography,
+                        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
+                        %s
+                    )""", (area['longitude'], area['latitude'], area['radius_km'] * 1000))
+        if area['type'] == 'polygon':
+            ring = list(area['coordinates'])
+            if ring[0] != ring[-1]:
+                ring.append(ring[0])
+            wkt = "POLYGON((" + ", ".join(f"{lon} {lat}" for lat, lon in ring) + "))"
+            return "ST_Covers(ST_GeomFromText(%s, 4326), location)", (wkt,)
+        raise ValueError(f"Unknown area type: {area['type']}")
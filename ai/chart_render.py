@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict
+import instrumentation
+import tracing
+from instrumentation import Histogram
+
+# Charts are returned as compact data payloads the frontend renders itself.
+# Server-side HTML is optional and memoized by a hash of the payload, so an
+# unchanged chart is rendered once no matter how often analytics are requested.
+
+CHART_TYPES = ('pie', 'bar', 'line')
+
+def _jsonable(value):
+    """Convert numpy and date values into plain JSON types"""
+    # numpy scalars, checked by module so numpy itself need not be imported
+    if type(value).__module__ == 'numpy' and hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def chart_payload(kind: str, data: Dict, title: str) -> Dict:
+    """Build the data-only payload for a chart"""
+    if kind not in CHART_TYPES:
+        raise ValueError(f"Unknown chart type: {kind}")
+    return {
+        'type': kind,
+        'title': title,
+        'labels': [_jsonable(k) for k in data.keys()],
+        'values': [_jsonable(v) for v in data.values()]
+    }
+
+def payload_key(payload: Dict) -> str:
+    """Content hash of a chart payload"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+def build_figure(payload: Dict):
+    """Build the Plotly figure described by a payload"""
+    import plotly.graph_objects as go
+    labels, values = payload['labels'], payload['values']
+    if payload['type'] == 'pie':
+        trace = go.Pie(labels=labels, values=values, hole=.3)
+    elif payload['type'] == 'bar':
+        trace = go.Bar(x=labels, y=values)
+    else:
+        trace = go.Scatter(x=labels, y=values, mode='lines+markers')
+    fig = go.Figure(data=[trace])
+    fig.update_layout(title_text=payload['title'])
+    return fig
+
+class ChartRenderer:
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.histogram = Histogram()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def render(self, payload: Dict) -> str:
+        """Return the HTML for a payload, rendering it only on a cache miss"""
+        key = payload_key(payload)
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                instrumentation.record_cache('chart_render', True)
+                return html
+        instrumentation.record_cache('chart_render', False)
+
+        started = time.perf_counter()
+        with tracing.span(f"chart.{payload['type']}", 'render'):
+            html = build_figure(payload).to_html(full_html=False)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self.histogram.observe(elapsed_ms)
+            self._cache[key] = html
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        if instrumentation.ENABLED:
+            instrumentation.REGISTRY.observe('render', f"chart.{payload['type']}", elapsed_ms)
+        return html
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, cached=len(self._cache),
+                        render_time=self.histogram.snapshot())
@@ -0,0 +1,187 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor, execute_values
+
+# Community and gamification data served by the API. Partnerships, challenges
+# and badges are small reference tables; volunteer_profiles holds the points
+# each volunteer has earned.
+
+PARTNERSHIPS = [
+    ('Local NGO Alliance', 'Community',
+     'Collaboration with local NGOs for disaster preparedness workshops.', 'contact@localngo.org'),
+    ('Uttarakhand Disaster Management Authority', 'Authority',
+     'Official partnership for real-time alert dissemination and resource coordination.', 'info@udma.gov.in'),
+    ('Community Volunteer Network', 'Community',
+     'Network of trained volunteers for immediate disaster response.', 'volunteer@cvn.org')
+]
+
+CHALLENGES = [
+    ('Disaster Preparedness Quiz', 'Test your knowledge on disaster preparedness and earn points.',
+     '2025-05-01', '2025-05-15', 'Certificate of Preparedness'),
+    ('Emergency Kit Assembly Challenge', 'Assemble an emergency kit and share a photo to earn points.',
+     '2025-05-10', '2025-05-24', 'Recognition from Local Authorities'),
+    ('Community Drill Participation', 'Participate in a local disaster drill to prepare for emergencies.',
+     '2025-05-20', '2025-05-27', 'Community Hero Badge')
+]
+
+BADGES = [
+    ('Preparedness Pro', 'Completed basic disaster preparedness training.', 'preparedness-icon',
+     'Complete 2 preparedness challenges'),
+    ('Quick Responder', 'Responded to an alert or incident within 10 minutes.', 'responder-icon',
+     'Respond to 3 alerts quickly'),
+    ('Community Hero', 'Participated in community disaster drills or real incidents.', 'hero-icon',
+     'Participate in 2 community events'),
+    ('Safety Advocate', 'Shared safety information with others in the community.', 'advocate-icon',
+     'Share 5 safety tips or alerts')
+]
+
+def init_community(cur) -> None:
+    """Create the community tables, seeding the reference data if empty"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS community_partnerships (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            type VARCHAR(50) NOT NULL,
+            description TEXT,
+            contact VARCHAR(200),
+            active BOOLEAN NOT NULL DEFAULT TRUE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS community_challenges (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(200) NOT NULL,
+            description TEXT,
+            start_date DATE,
+            end_date DATE,
+            reward VARCHAR(200),
+            participants INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS badges (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(100) UNIQUE NOT NULL,
+            description TEXT,
+            icon VARCHAR(100),
+            criteria TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS volunteer_profiles (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(100) UNIQUE NOT NULL,
+            points INTEGER NOT NULL DEFAULT 0,
+            badges TEXT[] NOT NULL DEFAULT '{}',
+            challenges_completed INTEGER NOT NULL DEFAULT 0,
+            rewards TEXT[] NOT NULL DEFAULT '{}',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_volunteer_profiles_points
+        ON volunteer_profiles (points DESC, id)
+    """)
+
+    cur.execute("SELECT EXISTS (SELECT 1 FROM community_partnerships)")
+    if not cur.fetchone()[0]:
+        execute_values(cur, "INSERT INTO community_partnerships (name, type, description, contact) VALUES %s",
+                       PARTNERSHIPS)
+    cur.execute("SELECT EXISTS (SELECT 1 FROM community_challenges)")
+    if not cur.fetchone()[0]:
+        execute_values(cur, """
+            INSERT INTO community_challenges (title, description, start_date, end_date, reward) VALUES %s
+        """, CHALLENGES)
+    execute_values(cur, """
+        INSERT INTO badges (name, description, icon, criteria) VALUES %s
+        ON CONFLICT (name) DO NOTHING
+    """, BADGES)
+
+def _last_modified(rows: List[Dict]) -> Optional[datetime]:
+    """Newest updated_at among the rows, removed from each row"""
+    stamps = [row.pop('updated_at') for row in rows]
+    stamps = [s for s in stamps if s is not None]
+    return max(stamps) if stamps else None
+
+class CommunityStore:
+    """Read access to community data over a per-process connection pool"""
+
+    def __init__(self, db_config: Dict, pool_size: int = 8):
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        # Created on first use so each forked server worker opens its own connections
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(1, self.pool_size, **self.db_config)
+        return self._pool
+
+    @contextmanager
+    def _cursor(self):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                yield cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+    def get_partnerships(self) -> Tuple[List[Dict], Optional[datetime]]:
+        with self._cursor() as cur:
+            cur.execute("""
+                SELECT id, name, type, description, contact, active, updated_at
+                FROM community_partnerships
+                ORDER BY id
+            """)
+            rows = [dict(row) for row in cur.fetchall()]
+        return rows, _last_modified(rows)
+
+    def get_challenges(self) -> Tuple[List[Dict], Optional[datetime]]:
+        with self._cursor() as cur:
+            cur.execute("""
+                SELECT id, title, description, start_date, end_date, reward, participants, updated_at
+                FROM community_challenges
+                ORDER BY start_date, id
+            """)
+            rows = [dict(row) for row in cur.fetchall()]
+        for row in rows:
+            row['start_date'] = row['start_date'].isoformat() if row['start_date'] else None
+            row['end_date'] = row['end_date'].isoformat() if row['end_date'] else None
+        return rows, _last_modified(rows)
+
+    def get_badges(self) -> Tuple[List[Dict], Optional[datetime]]:
+        with self._cursor() as cur:
+            cur.execute("SELECT id, name, description, icon, criteria, updated_at FROM badges ORDER BY id")
+            rows = [dict(row) for row in cur.fetchall()]
+        return rows, _last_modified(rows)
+
+    def get_profiles(self, user_ids: List[int]) -> Dict[int, Dict]:
+        """Volunteer profiles by id; ranks come from ai.leaderboard"""
+        if not user_ids:
+            return {}
+        with self._cursor() as cur:
+            cur.execute("""
+                SELECT id, username, points, badges, challenges_completed, rewards
+                FROM volunteer_profiles
+                WHERE id = ANY(%s)
+            """, (list(user_ids),))
+            return {row['id']: dict(row) for row in cur.fetchall()}
@@ -1,34 +1,35 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
-import tensorflow as tf
-import tensorflow_hub as hub
 from datetime import datetime, timedelta
-import joblib
 import os
-import logging
+from instrumentation import get_service_logger, instrumented
+
+# scikit-learn, joblib, TensorFlow and TensorFlow Hub are imported where they
+# are used, so importing this module stays cheap for callers that never run a model
+IMAGE_MODEL_URL = 'https://tfhub.dev/google/imagenet/mobilenet_v2_130_224/classification/4'
+TEXT_MODEL_URL = 'https://tfhub.dev/google/universal-sentence-encoder/4'
+
+def _tensorflow():
+    import tensorflow as tf
+    return tf
 
 class DisasterAI:
     def __init__(self):
+        from sklearn.preprocessing import StandardScaler
         self.risk_model = None
         self.resource_model = None
-        self.image_model = None
-        self.text_model = None
+        self._image_model = None
+        self._text_model = None
         self.scaler = StandardScaler()
         self.setup_logging()
         self.load_models()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/disaster_ai.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/disaster_ai.log')
 
     def load_models(self):
         """Load or initialize ML models"""
+        import joblib
+        from sklearn.ensemble import GradientBoostingRegressor, RandomForestClassifier
         try:
             # Load risk assessment model
             if os.path.exists('models/risk_model.joblib'):
@@ -51,14 +52,27 @@ class DisasterAI:
                     random_state=42
                 )
 
-            # Load TensorFlow Hub models
-            self.image_model = hub.load('https://tfhub.dev/google/imagenet/mobilenet_v2_130_224/classification/4')
-            self.text_model = hub.load('https://tfhub.dev/google/universal-sentence-encoder/4')
-
         except Exception as e:
             self.logger.error(f"Error loading models: {str(e)}")
             raise
 
+    @property
+    def image_model(self):
+        """TensorFlow Hub image classifier, downloaded on first use"""
+        if self._image_model is None:
+            import tensorflow_hub as hub
+            self._image_model = hub.load(IMAGE_MODEL_URL)
+        return self._image_model
+
+    @property
+    def text_model(self):
+        """TensorFlow Hub sentence encoder, downloaded on first use"""
+        if self._text_model is None:
+            import tensorflow_hub as hub
+            self._text_model = hub.load(TEXT_MODEL_URL)
+        return self._text_model
+
+    @instrumented('inference')
     def assess_risk(self, location_data, weather_data, historical_data):
         """
         Assess disaster risk for a given location
@@ -101,6 +115,7 @@ class DisasterAI:
             self.logger.error(f"Error in risk assessment: {str(e)}")
             raise
 
+    @instrumented('inference')
     def predict_resource_needs(self, incident_type, severity, population_affected, current_resources):
         """Predict resource requirements for an incident"""
         try:
@@ -133,8 +148,10 @@ class DisasterAI:
             self.logger.error(f"Error in resource prediction: {str(e)}")
             raise
 
+    @instrumented('inference')
     def analyze_image(self, image_data):
         """Analyze disaster-related images for damage assessment"""
+        tf = _tensorflow()
         try:
             # Preprocess image
             img = tf.image.resize(image_data, (224, 224))
@@ -154,6 +171,7 @@ class DisasterAI:
             self.logger.error(f"Error in image analysis: {str(e)}")
             raise
 
+    @instrumented('inference')
     def analyze_text_report(self, text):
         """Analyze text reports for emergency classification"""
         try:
@@ -235,11 +253,11 @@ class DisasterAI:
     def _interpret_damage_level(self, scores):
         """Interpret damage level from image analysis scores"""
         damage_levels = ['none', 'minor', 'moderate', 'severe', 'critical']
-        return damage_levels[tf.argmax(scores)]
+        return damage_levels[_tensorflow().argmax(scores)]
 
     def _get_top_features(self, scores, top_k=5):
         """Get top-k detected features from image analysis"""
-        top_indices = tf.argsort(scores, direction='DESCENDING')[:top_k]
+        top_indices = _tensorflow().argsort(scores, direction='DESCENDING')[:top_k]
         return [f"Feature_{i}: {float(scores[i])}" for i in top_indices]
 
     def _classify_emergency(self, embeddings):
@@ -265,6 +283,7 @@ class DisasterAI:
 
     def save_models(self):
         """Save ML models to disk"""
+        import joblib
         try:
             if not os.path.exists('models'):
                 os.makedirs('models')
@@ -0,0 +1,154 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from ai.location_ingest import LocationIngestor
+from ai.spatial_index import GridIndex
+
+class DispatchEngine:
+    """Nearest-team lookups over the latest known position of every team.
+
+    Only the most recent ping per team is kept, in a GridIndex. Location
+    history is handed to a LocationIngestor, which writes it in batches from
+    a background thread so that ingesting a ping never waits on the database.
+    """
+
+    def __init__(self, team_manager=None, cell_size_deg: float = 0.05,
+                 ingestor: Optional[LocationIngestor] = None):
+        self.team_manager = team_manager
+        self.index = GridIndex(cell_size_deg)
+        self.teams: Dict[int, Dict] = {}
+        self.ingestor = ingestor
+        if self.ingestor is None and team_manager is not None:
+            self.ingestor = LocationIngestor(team_manager.db_config)
+        self._lock = threading.Lock()
+
+    def attach(self, team_manager) -> None:
+        """Load current team positions and follow team and location updates"""
+        self.team_manager = team_manager
+        if self.ingestor is None:
+            self.ingestor = LocationIngestor(team_manager.db_config)
+        self.load_teams()
+        team_manager.add_team_listener(self.update_team)
+        team_manager.set_location_sink(self)
+        self.start()
+
+    def load_teams(self) -> int:
+        """Populate the index from the database"""
+        teams = self.team_manager.get_teams_with_locations()
+        for team in teams:
+            self.update_team(team)
+            if team.get('latitude') is not None and team.get('longitude') is not None:
+                self._index_location(team['id'], team['latitude'], team['longitude'])
+        return len(teams)
+
+    def update_team(self, team: Dict) -> None:
+        """Record team type and status changes"""
+        with self._lock:
+            current = self.teams.setdefault(team['id'], {'id': team['id']})
+            for field in ('name', 'team_type', 'status'):
+                if team.get(field) is not None:
+                    current[field] = team[field]
+
+    def update_location(self, team_id: int, latitude: float, longitude: float,
+                        recorded_at: Optional[datetime] = None) -> Dict:
+        """Move a team in the index and queue the ping for persistence"""
+        recorded_at = recorded_at or datetime.now()
+        self._index_location(team_id, latitude, longitude)
+        return self.ingestor.add_ping(team_id, latitude, longitude, recorded_at)
+
+    def remove_team(self, team_id: int) -> None:
+        """Forget a team entirely"""
+        with self._lock:
+            self.teams.pop(team_id, None)
+            self.index.remove(team_id)
+
+    def nearest_available_teams(self, latitude: float, longitude: float, k: int = 5,
+                                team_type: Optional[str] = None,
+                                max_distance_km: Optional[float] = None) -> List[Dict]:
+        """Get the k nearest available teams, optionally of one type"""
+        with self._lock:
+            return self._nearest_available(latitude, longitude, k, team_type, max_distance_km)
+
+    def nearest_teams_to_incident(self, incident_id, k: int = 5, team_type: Optional[str] = None,
+                                  max_distance_km: Optional[float] = None) -> List[Dict]:
+        """Get the k nearest available teams to an incident"""
+        location = self._get_incident_location(incident_id)
+        if location is None:
+            return []
+        return self.nearest_available_teams(location['latitude'], location['longitude'], k,
+                                            team_type, max_distance_km)
+
+    def dispatch_nearest(self, incident_id, latitude: float, longitude: float,
+                         team_type: Optional[str] = None) -> Dict:
+        """Assign the nearest available team to an incident"""
+        # Pick and take the team out of the candidate pool in one step, so
+        # concurrent dispatches cannot both claim it during the database round trip
+        with self._lock:
+            candidates = self._nearest_available(latitude, longitude, 1, team_type)
+            if not candidates:
+                return {"error": "No available team found"}
+            team = candidates[0]
+            self.teams[team['id']]['status'] = 'assigned'
+        try:
+            assignment = self.team_manager.assign_team(team['id'], str(incident_id))
+        except Exception:
+            self.update_team({'id': team['id'], 'status': 'available'})
+            raise
+        assignment['distance_km'] = team['distance_km']
+        return assignment
+
+    def start(self) -> None:
+        """Start the background history writer and history maintenance"""
+        self.ingestor.start()
+        if self.team_manager is not None:
+            self.team_manager.start()
+
+    def stop(self) -> None:
+        """Flush queued history and stop the writer and history maintenance"""
+        if self.team_manager is not None:
+            self.team_manager.stop()
+        self.ingestor.stop()
+
+    def pending_history(self) -> int:
+        """Number of pings waiting to be persisted"""
+        return self.ingestor.pending_count()
+
+    def _index_location(self, team_id: int, latitude: float, longitude: float) -> None:
+        with self._lock:
+            team = self.teams.setdefault(team_id, {'id': team_id})
+            self.index.upsert(team_id, latitude, longitude, team)
+
+    def _nearest_available(self, latitude: float, longitude: float, k: int,
+                           team_type: Optional[str] = None,
+                           max_distance_km: Optional[float] = None) -> List[Dict]:
+        """Nearest available teams; the caller holds the lock"""
+        def is_candidate(team_id, team):
+            if team.get('status', 'available') != 'available':
+                return False
+            return team_type is None or team.get('team_type') == team_type
+
+        matches = self.index.nearest(latitude, longitude, k, predicate=is_candidate,
+                                     max_km=max_distance_km)
+        results = []
+        for distance, team_id, team in matches:
+            lat, lon, _ = self.index.get(team_id)
+            results.append(dict(team, latitude=lat, longitude=lon, distance_km=distance))
+        return results
+
+    def _get_incident_location(self, incident_id) -> Optional[Dict]:
+        conn = psycopg2.connect(**self.team_manager.db_config)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        cur.execute("""
+            SELECT ST_Y(location) as latitude, ST_X(location) as longitude
+            FROM incidents
+            WHERE id = %s
+        """, (incident_id,))
+
+        location = cur.fetchone()
+
+        cur.close()
+        conn.close()
+        return dict(location) if location else None
@@ -113,7 +113,10 @@ class EvacuationPlanner:
         if not result:
             return {"error": "Zone or shelter not found"}
         
-        zone_coords = json.loads(result['polygon_coordinates'])
+        # psycopg2 already decodes JSONB columns
+        zone_coords = result['polygon_coordinates']
+        if isinstance(zone_coords, str):
+            zone_coords = json.loads(zone_coords)
         shelter_coords = (result['latitude'], result['longitude'])
         
         # Calculate route (simplified version - in reality would use road network)
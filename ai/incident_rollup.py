@@ -0,0 +1,105 @@
+# Hourly incident counts by type and severity, kept current by statement-level
+# triggers on incidents. A statement inserting many rows (e.g. COPY) updates
+# each affected bucket once rather than once per row.
+
+ROLLUP_TRIGGER_SQL = """
+    CREATE OR REPLACE FUNCTION incident_rollup_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO incident_hourly_rollup (bucket, type, severity, count)
+            SELECT date_trunc('hour', created_at), type, severity, COUNT(*)
+            FROM new_rows
+            WHERE created_at IS NOT NULL
+            GROUP BY 1, 2, 3
+            ON CONFLICT (bucket, type, severity) DO UPDATE
+            SET count = incident_hourly_rollup.count + EXCLUDED.count;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE incident_hourly_rollup r
+            SET count = r.count - d.count
+            FROM (
+                SELECT date_trunc('hour', created_at) as bucket, type, severity, COUNT(*) as count
+                FROM old_rows
+                WHERE created_at IS NOT NULL
+                GROUP BY 1, 2, 3
+            ) d
+            WHERE r.bucket = d.bucket AND r.type = d.type AND r.severity = d.severity;
+        ELSE
+            INSERT INTO incident_hourly_rollup (bucket, type, severity, count)
+            SELECT bucket, type, severity, SUM(delta)
+            FROM (
+                SELECT date_trunc('hour', created_at) as bucket, type, severity, -1 as delta
+                FROM old_rows WHERE created_at IS NOT NULL
+                UNION ALL
+                SELECT date_trunc('hour', created_at), type, severity, 1
+                FROM new_rows WHERE created_at IS NOT NULL
+            ) changes
+            GROUP BY 1, 2, 3
+            HAVING SUM(delta) <> 0
+            ON CONFLICT (bucket, type, severity) DO UPDATE
+            SET count = incident_hourly_rollup.count + EXCLUDED.count;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS incidents_rollup_insert ON incidents;
+    CREATE TRIGGER incidents_rollup_insert
+        AFTER INSERT ON incidents
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION incident_rollup_apply();
+
+    DROP TRIGGER IF EXISTS incidents_rollup_update ON incidents;
+    CREATE TRIGGER incidents_rollup_update
+        AFTER UPDATE ON incidents
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION incident_rollup_apply();
+
+    DROP TRIGGER IF EXISTS incidents_rollup_delete ON incidents;
+    CREATE TRIGGER incidents_rollup_delete
+        AFTER DELETE ON incidents
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION incident_rollup_apply();
+"""
+
+def init_rollup(cur) -> None:
+    """Create the rollup table and triggers, backfilling the table if empty"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS incident_hourly_rollup (
+            bucket TIMESTAMP NOT NULL,
+            type VARCHAR(50) NOT NULL,
+            severity INTEGER NOT NULL,
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, type, severity)
+        )
+    """)
+    cur.execute(ROLLUP_TRIGGER_SQL)
+
+    cur.execute("SELECT EXISTS (SELECT 1 FROM incident_hourly_rollup)")
+    if not cur.fetchone()[0]:
+        rebuild_rollup(cur)
+
+def rebuild_rollup(cur) -> None:
+    """Recompute the rollup from the incidents table"""
+    cur.execute("LOCK TABLE incidents IN SHARE MODE")
+    cur.execute("TRUNCATE incident_hourly_rollup")
+    cur.execute("""
+        INSERT INTO incident_hourly_rollup (bucket, type, severity, count)
+        SELECT date_trunc('hour', created_at), type, severity, COUNT(*)
+        FROM incidents
+        WHERE created_at IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+# Hour buckets are selected whole, so a range is widened to the start of its first hour
+ROLLUP_QUERY = """
+    SELECT
+        type,
+        severity,
+        EXTRACT(DOW FROM bucket) as day_of_week,
+        EXTRACT(HOUR FROM bucket) as hour_of_day,
+        SUM(count)::bigint as count
+    FROM incident_hourly_rollup
+    WHERE bucket BETWEEN date_trunc('hour', %s::timestamp) AND %s
+    GROUP BY type, severity, day_of_week, hour_of_day
+    HAVING SUM(count) > 0
+"""
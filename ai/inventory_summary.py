@@ -0,0 +1,119 @@
+from datetime import date
+from typing import Dict, List, Optional
+from psycopg2.extras import execute_values
+
+# Summary tables maintained alongside resources and resource_allocations.
+# All helpers take an open cursor so the summary is updated in the same
+# transaction as the change it describes.
+#
+# Only ResourceManager keeps the summary up to date. Any other write to
+# resources or resource_allocations must be followed by rebuild_summary()
+# (ResourceManager.rebuild_inventory_summary() opens its own transaction),
+# or get_resource_utilization reads stale totals. Such writes include bulk
+# loads and COPY (benchmarks/synthetic_data.py), sample data scripts and
+# manual SQL.
+
+def init_summary_tables(cur) -> None:
+    """Create the inventory summary tables, backfilling them if empty"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resource_inventory_summary (
+            category VARCHAR(50) PRIMARY KEY,
+            total_quantity BIGINT NOT NULL DEFAULT 0,
+            resource_count INTEGER NOT NULL DEFAULT 0,
+            allocated_quantity BIGINT NOT NULL DEFAULT 0,
+            allocation_count INTEGER NOT NULL DEFAULT 0,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resource_allocation_daily (
+            date DATE PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0,
+            quantity BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+
+    cur.execute("SELECT EXISTS (SELECT 1 FROM resource_inventory_summary)")
+    if not cur.fetchone()[0]:
+        rebuild_summary(cur)
+
+def apply_inventory_delta(cur, category: str, quantity_delta: int = 0, resource_count_delta: int = 0,
+                          allocated_delta: int = 0, allocation_count_delta: int = 0) -> None:
+    """Add deltas to the summary row of a category"""
+    apply_inventory_deltas(cur, {
+        category: (quantity_delta, resource_count_delta, allocated_delta, allocation_count_delta)
+    })
+
+def apply_inventory_deltas(cur, deltas: Dict[str, tuple]) -> None:
+    """Add (quantity, resource_count, allocated, allocation_count) deltas per category"""
+    if not deltas:
+        return
+    execute_values(cur, """
+        INSERT INTO resource_inventory_summary
+            (category, total_quantity, resource_count, allocated_quantity, allocation_count)
+        VALUES %s
+        ON CONFLICT (category) DO UPDATE SET
+            total_quantity = resource_inventory_summary.total_quantity + EXCLUDED.total_quantity,
+            resource_count = resource_inventory_summary.resource_count + EXCLUDED.resource_count,
+            allocated_quantity = resource_inventory_summary.allocated_quantity + EXCLUDED.allocated_quantity,
+            allocation_count = resource_inventory_summary.allocation_count + EXCLUDED.allocation_count,
+            last_updated = CURRENT_TIMESTAMP
+    """, [(category,) + tuple(delta) for category, delta in sorted(deltas.items())])
+
+def record_allocations(cur, allocations: List[Dict], allocated_on: Optional[date] = None) -> None:
+    """Account for new allocations, each with category and quantity"""
+    if not allocations:
+        return
+
+    deltas = {}
+    for allocation in allocations:
+        quantity, _, allocated, count = deltas.get(allocation['category'], (0, 0, 0, 0))
+        deltas[allocation['category']] = (
+            quantity - allocation['quantity'],
+            0,
+            allocated + allocation['quantity'],
+            count + 1
+        )
+    apply_inventory_deltas(cur, deltas)
+
+    cur.execute("""
+        INSERT INTO resource_allocation_daily (date, count, quantity)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (date) DO UPDATE SET
+            count = resource_allocation_daily.count + EXCLUDED.count,
+            quantity = resource_allocation_daily.quantity + EXCLUDED.quantity
+    """, (allocated_on or date.today(), len(allocations), sum(a['quantity'] for a in allocations)))
+
+def rebuild_summary(cur) -> None:
+    """Recompute the summary tables from resources and resource_allocations"""
+    cur.execute("DELETE FROM resource_inventory_summary")
+    cur.execute("""
+        INSERT INTO resource_inventory_summary
+            (category, total_quantity, resource_count, allocated_quantity, allocation_count)
+        SELECT
+            r.category,
+            r.total_quantity,
+            r.resource_count,
+            COALESCE(a.allocated_quantity, 0),
+            COALESCE(a.allocation_count, 0)
+        FROM (
+            SELECT category, SUM(quantity) as total_quantity, COUNT(*) as resource_count
+            FROM resources
+            GROUP BY category
+        ) r
+        LEFT JOIN (
+            SELECT res.category, SUM(ra.quantity) as allocated_quantity, COUNT(*) as allocation_count
+            FROM resource_allocations ra
+            JOIN resources res ON ra.resource_id = res.id
+            GROUP BY res.category
+        ) a ON a.category = r.category
+    """)
+
+    cur.execute("DELETE FROM resource_allocation_daily")
+    cur.execute("""
+        INSERT INTO resource_allocation_daily (date, count, quantity)
+        SELECT DATE(allocated_at), COUNT(*), SUM(quantity)
+        FROM resource_allocations
+        GROUP BY DATE(allocated_at)
+    """)
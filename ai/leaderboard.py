@@ -0,0 +1,295 @@
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import psycopg2.pool
+from config import LEADERBOARD_CONFIG
+
+# Points are recorded as append-only rows in point_events; a volunteer's score
+# is the sum of their events. Each server process folds the log into an
+# in-memory Fenwick tree over score buckets, so top-N and a volunteer's rank
+# cost O(log max_score) instead of a sort over volunteer_profiles.
+
+# Writers take this transaction-level advisory lock before inserting, so
+# event ids commit in order and "id > last seen" never skips a late commit
+EVENT_LOCK_KEY = 4917
+
+def init_leaderboard(cur) -> None:
+    """Create the point event log, opening it with each volunteer's current points"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS point_events (
+            id BIGSERIAL PRIMARY KEY,
+            volunteer_id INTEGER NOT NULL REFERENCES volunteer_profiles(id),
+            points INTEGER NOT NULL,
+            reason VARCHAR(200),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_point_events_volunteer
+        ON point_events (volunteer_id)
+    """)
+    # Points granted before the log existed become one opening event each
+    cur.execute("""
+        INSERT INTO point_events (volunteer_id, points, reason)
+        SELECT v.id, v.points - COALESCE(SUM(e.points), 0), 'opening balance'
+        FROM volunteer_profiles v
+        LEFT JOIN point_events e ON e.volunteer_id = v.id
+        GROUP BY v.id, v.points
+        HAVING v.points <> COALESCE(SUM(e.points), 0)
+    """)
+
+class FenwickTree:
+    """Binary indexed tree of counts over indexes 0..size-1"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.total = 0
+
+    @classmethod
+    def from_counts(cls, size: int, counts: Dict[int, int]) -> 'FenwickTree':
+        """Build in O(size) from {index: count}"""
+        fenwick = cls(size)
+        tree = fenwick.tree
+        for index, count in counts.items():
+            tree[index + 1] += count
+            fenwick.total += count
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        return fenwick
+
+    def add(self, index: int, delta: int) -> None:
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> int:
+        """Sum of counts at indexes 0..index"""
+        i = min(index + 1, self.size)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k: int) -> int:
+        """Smallest index whose prefix sum reaches k (1 <= k <= total)"""
+        pos = 0
+        step = 1 << (self.size.bit_length() - 1)
+        while step:
+            if pos + step <= self.size and self.tree[pos + step] < k:
+                pos += step
+                k -= self.tree[pos]
+            step >>= 1
+        return pos
+
+class Standings:
+    """Scores and ranks of every volunteer; not thread-safe on its own.
+
+    Volunteers are bucketed by score, and a Fenwick tree counts the
+    volunteers in each bucket. Negative totals share bucket 0. The tree
+    doubles when a score outgrows it. Ties share the lower rank, as with SQL
+    RANK(), and are listed by volunteer id.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.scores: Dict[int, int] = {}
+        self.buckets: Dict[int, set] = {}
+        self.tree = FenwickTree(capacity)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @staticmethod
+    def _bucket(points: int) -> int:
+        return points if points > 0 else 0
+
+    def _grow(self, bucket: int) -> None:
+        size = self.tree.size
+        while size <= bucket:
+            size *= 2
+        counts = {score: len(users) for score, users in self.buckets.items()}
+        self.tree = FenwickTree.from_counts(size, counts)
+
+    def _place(self, user_id: int, points: int) -> None:
+        bucket = self._bucket(points)
+        if bucket >= self.tree.size:
+            self._grow(bucket)
+        self.buckets.setdefault(bucket, set()).add(user_id)
+        self.tree.add(bucket, 1)
+
+    def _unplace(self, user_id: int, points: int) -> None:
+        bucket = self._bucket(points)
+        users = self.buckets[bucket]
+        users.discard(user_id)
+        if not users:
+            del self.buckets[bucket]
+        self.tree.add(bucket, -1)
+
+    def set(self, user_id: int, points: int) -> None:
+        previous = self.scores.get(user_id)
+        if previous is not None:
+            if self._bucket(previous) == self._bucket(points):
+                self.scores[user_id] = points
+                return
+            self._unplace(user_id, previous)
+        self.scores[user_id] = points
+        self._place(user_id, points)
+
+    def add(self, user_id: int, delta: int) -> None:
+        self.set(user_id, self.scores.get(user_id, 0) + delta)
+
+    def load(self, totals: Iterable[Tuple[int, int]]) -> None:
+        """Replace all standings with (user_id, points) pairs in O(n + max_score)"""
+        self.scores = dict(totals)
+        self.buckets = {}
+        for user_id, points in self.scores.items():
+            self.buckets.setdefault(self._bucket(points), set()).add(user_id)
+        size = self.tree.size
+        top = max(self.buckets, default=0)
+        while size <= top:
+            size *= 2
+        counts = {score: len(users) for score, users in self.buckets.items()}
+        self.tree = FenwickTree.from_counts(size, counts)
+
+    def rank_for_points(self, points: int) -> int:
+        """Rank a score would have: one more than the number of volunteers above it"""
+        return self.tree.total - self.tree.prefix(self._bucket(points)) + 1
+
+    def rank(self, user_id: int) -> int:
+        return self.rank_for_points(self.scores.get(user_id, 0))
+
+    def top(self, n: int) -> List[Tuple[int, int, int]]:
+        """(rank, user_id, points) for the n best volunteers"""
+        results = []
+        remaining = self.tree.total
+        while len(results) < n and remaining > 0:
+            # Highest occupied bucket among the volunteers not yet listed
+            bucket = self.tree.find(remaining)
+            users = self.buckets[bucket]
+            rank = self.tree.total - remaining + 1
+            for user_id in heapq.nsmallest(n - len(results), users):
+                results.append((rank, user_id, self.scores[user_id]))
+            remaining -= len(users)
+        return results
+
+class Leaderboard:
+    """Volunteer standings kept in step with the point event log"""
+
+    def __init__(self, db_config: Dict, pool_size: int = 2, sync_seconds: float = None):
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.sync_seconds = LEADERBOARD_CONFIG['sync_seconds'] if sync_seconds is None else sync_seconds
+        self.standings = Standings()
+        self.last_event_id = None
+        self._synced_at = 0.0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        # Created on first use so each forked server worker opens its own connections
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(1, self.pool_size, **self.db_config)
+        return self._pool
+
+    @contextmanager
+    def _cursor(self):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                yield cur
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+    def rebuild(self) -> None:
+        """Recompute every volunteer's score from the full event log"""
+        with self._cursor() as cur:
+            # Ids commit in order, so every event up to the max is already visible
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM point_events")
+            last_event_id = cur.fetchone()[0]
+            cur.execute("""
+                SELECT v.id, COALESCE(SUM(e.points), 0)
+                FROM volunteer_profiles v
+                LEFT JOIN point_events e ON e.volunteer_id = v.id AND e.id <= %s
+                GROUP BY v.id
+            """, (last_event_id,))
+            totals = cur.fetchall()
+        with self._lock:
+            self.standings.load(totals)
+            self.last_event_id = last_event_id
+            self._synced_at = time.monotonic()
+
+    def sync(self, force: bool = False) -> None:
+        """Apply events recorded since the last sync, by any process"""
+        if self.last_event_id is None:
+            self.rebuild()
+            return
+        if not force and time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        with self._cursor() as cur:
+            cur.execute("""
+                SELECT id, volunteer_id, points FROM point_events
+                WHERE id > %s
+                ORDER BY id
+            """, (self.last_event_id,))
+            events = cur.fetchall()
+        with self._lock:
+            for event_id, volunteer_id, points in events:
+                # Another thread may have applied the same batch meanwhile
+                if event_id > self.last_event_id:
+                    self.standings.add(volunteer_id, points)
+                    self.last_event_id = event_id
+            self._synced_at = time.monotonic()
+
+    def record(self, volunteer_id: int, points: int, reason: Optional[str] = None) -> int:
+        """Append a point event and update the volunteer's total; returns the event id"""
+        with self._cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (EVENT_LOCK_KEY,))
+            cur.execute("""
+                INSERT INTO point_events (volunteer_id, points, reason)
+                VALUES (%s, %s, %s)
+                RETURNING id
+            """, (volunteer_id, points, reason))
+            event_id = cur.fetchone()[0]
+            cur.execute("""
+                UPDATE volunteer_profiles
+                SET points = points + %s, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (points, volunteer_id))
+        self.sync(force=True)
+        return event_id
+
+    def top(self, n: int = 10) -> List[Tuple[int, int, int]]:
+        """(rank, volunteer_id, points) for the n highest scores"""
+        self.sync()
+        with self._lock:
+            return self.standings.top(n)
+
+    def rank(self, volunteer_id: int) -> int:
+        """Rank of a volunteer; volunteers without events rank with zero points"""
+        self.sync()
+        with self._lock:
+            return self.standings.rank(volunteer_id)
+
+    def points(self, volunteer_id: int) -> int:
+        self.sync()
+        with self._lock:
+            return self.standings.scores.get(volunteer_id, 0)
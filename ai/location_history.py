@@ -0,0 +1,300 @@
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor
+
+HISTORY_TABLE = 'team_location_history'
+
+class LocationHistoryStore:
+    """Team location history in daily range partitions.
+
+    ``team_location_history`` is partitioned by ``recorded_at`` with one
+    partition per day and a ``(team_id, recorded_at)`` index, so trail
+    queries only touch the partitions and index ranges they need. Old
+    partitions are downsampled to one point per team per bucket and can be
+    dropped after a retention period.
+    """
+
+    def __init__(self, db_config: Dict, downsample_after: timedelta = timedelta(hours=24),
+                 bucket_seconds: int = 60, retention_days: Optional[int] = None,
+                 days_ahead: int = 7):
+        self.db_config = db_config
+        self.downsample_after = downsample_after
+        self.bucket_seconds = bucket_seconds
+        self.retention_days = retention_days
+        self.days_ahead = days_ahead
+        self.logger = logging.getLogger(__name__)
+        self._worker = None
+        self._stop_event = threading.Event()
+
+    def init_schema(self, cur) -> None:
+        """Create the partitioned history table and its bookkeeping table"""
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS team_location_history (
+                team_id INTEGER NOT NULL,
+                latitude FLOAT NOT NULL,
+                longitude FLOAT NOT NULL,
+                recorded_at TIMESTAMP NOT NULL
+            ) PARTITION BY RANGE (recorded_at)
+        """)
+
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_team_location_history_team_time
+            ON team_location_history (team_id, recorded_at)
+        """)
+
+        # Catch rows outside the pre-created daily ranges
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS team_location_history_default
+            PARTITION OF team_location_history DEFAULT
+        """)
+
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS team_location_partitions (
+                day DATE PRIMARY KEY,
+                name VARCHAR(63) NOT NULL,
+                downsampled_at TIMESTAMP
+            )
+        """)
+
+    def ensure_partitions(self, start: Optional[date] = None, days: Optional[int] = None) -> List[str]:
+        """Create daily partitions from start (default today) for the given number of days
+
+        Rows for a day that already landed in the default partition are
+        moved into the new partition, which Postgres would otherwise refuse
+        to create.
+        """
+        start = start or date.today()
+        days = self.days_ahead if days is None else days
+        created = []
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        try:
+            for offset in range(days + 1):
+                day = start + timedelta(days=offset)
+                name = self._partition_name(day)
+                cur.execute("SELECT 1 FROM team_location_partitions WHERE day = %s", (day,))
+                if cur.fetchone():
+                    continue
+                bounds = (day, day + timedelta(days=1))
+                cur.execute("""
+                    SELECT EXISTS (
+                        SELECT 1 FROM team_location_history_default
+                        WHERE recorded_at >= %s AND recorded_at < %s
+                    )
+                """, bounds)
+                stranded = cur.fetchone()[0]
+                if stranded:
+                    cur.execute("""
+                        CREATE TEMP TABLE team_location_moving
+                        (LIKE team_location_history) ON COMMIT DROP
+                    """)
+                    cur.execute("""
+                        WITH moved AS (
+                            DELETE FROM team_location_history_default
+                            WHERE recorded_at >= %s AND recorded_at < %s
+                            RETURNING team_id, latitude, longitude, recorded_at
+                        )
+                        INSERT INTO team_location_moving SELECT * FROM moved
+                    """, bounds)
+                cur.execute(sql.SQL("""
+                    CREATE TABLE IF NOT EXISTS {} PARTITION OF team_location_history
+                    FOR VALUES FROM (%s) TO (%s)
+                """).format(sql.Identifier(name)), bounds)
+                if stranded:
+                    cur.execute("""
+                        INSERT INTO team_location_history (team_id, latitude, longitude, recorded_at)
+                        SELECT team_id, latitude, longitude, recorded_at FROM team_location_moving
+                    """)
+                    self.logger.info(f"Moved {cur.rowcount} rows from the default partition into {name}")
+                cur.execute("""
+                    INSERT INTO team_location_partitions (day, name)
+                    VALUES (%s, %s)
+                    ON CONFLICT (day) DO NOTHING
+                """, (day, name))
+                conn.commit()
+                created.append(name)
+        except Exception as e:
+            conn.rollback()
+            self.logger.error(f"Error creating location history partitions: {str(e)}")
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        return created
+
+    def downsample(self, now: Optional[datetime] = None) -> int:
+        """Keep one point per team per bucket for history older than the cutoff
+
+        Returns the number of rows removed. Partitions that lie entirely
+        before the cutoff are marked done and never scanned again.
+        """
+        cutoff = (now or datetime.now()) - self.downsample_after
+        removed = 0
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                SELECT day, name FROM team_location_partitions
+                WHERE downsampled_at IS NULL AND day < %s
+                ORDER BY day
+            """, (cutoff.date() + timedelta(days=1),))
+
+            for day, name in cur.fetchall():
+                cur.execute(sql.SQL("""
+                    DELETE FROM {table}
+                    WHERE ctid IN (
+                        SELECT ctid FROM (
+                            SELECT ctid, ROW_NUMBER() OVER (
+                                PARTITION BY team_id,
+                                             FLOOR(EXTRACT(EPOCH FROM recorded_at) / %s)
+                                ORDER BY recorded_at
+                            ) as position
+                            FROM {table}
+                            WHERE recorded_at < %s
+                        ) ranked
+                        WHERE position > 1
+                    )
+                """).format(table=sql.Identifier(name)), (self.bucket_seconds, cutoff))
+                removed += cur.rowcount
+
+                if datetime.combine(day + timedelta(days=1), datetime.min.time()) <= cutoff:
+                    cur.execute("""
+                        UPDATE team_location_partitions
+                        SET downsampled_at = CURRENT_TIMESTAMP
+                        WHERE day = %s
+                    """, (day,))
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            self.logger.error(f"Error downsampling location history: {str(e)}")
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        return removed
+
+    def drop_expired(self, today: Optional[date] = None) -> List[str]:
+        """Drop partitions older than the retention period, if one is set"""
+        if self.retention_days is None:
+            return []
+        oldest_kept = (today or date.today()) - timedelta(days=self.retention_days)
+        dropped = []
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                SELECT day, name FROM team_location_partitions
+                WHERE day < %s
+                ORDER BY day
+            """, (oldest_kept,))
+            for day, name in cur.fetchall():
+                cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(name)))
+                cur.execute("DELETE FROM team_location_partitions WHERE day = %s", (day,))
+                conn.commit()
+                dropped.append(name)
+        finally:
+            cur.close()
+            conn.close()
+        return dropped
+
+    def get_trail(self, team_id: int, start: datetime, end: datetime,
+                  limit: Optional[int] = None) -> List[Dict]:
+        """Get a team's path between two times, oldest point first"""
+        if start > end:
+            raise ValueError("Start time must be before end time")
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        cur.execute("""
+            SELECT latitude, longitude, recorded_at
+            FROM team_location_history
+            WHERE team_id = %s AND recorded_at >= %s AND recorded_at < %s
+            ORDER BY recorded_at
+            LIMIT %s
+        """, (team_id, start, end, limit))
+
+        trail = cur.fetchall()
+
+        cur.close()
+        conn.close()
+        return [dict(point) for point in trail]
+
+    def import_legacy_locations(self) -> int:
+        """Copy rows from the unpartitioned team_locations table into the history
+
+        Rows already in the history (same team and time) are skipped, so the
+        import can be re-run safely.
+        """
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+
+        cur.execute("SELECT MIN(timestamp)::date, MAX(timestamp)::date FROM team_locations")
+        first_day, last_day = cur.fetchone()
+        cur.close()
+        conn.close()
+        if first_day is None:
+            return 0
+
+        self.ensure_partitions(first_day, (last_day - first_day).days)
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO team_location_history (team_id, latitude, longitude, recorded_at)
+            SELECT l.team_id, l.latitude, l.longitude, l.timestamp
+            FROM team_locations l
+            WHERE l.team_id IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM team_location_history h
+                  WHERE h.team_id = l.team_id AND h.recorded_at = l.timestamp
+              )
+        """)
+        imported = cur.rowcount
+        conn.commit()
+        cur.close()
+        conn.close()
+        return imported
+
+    def run_maintenance(self) -> Dict:
+        """Create upcoming partitions, downsample old tracks and drop expired days"""
+        return {
+            'created': self.ensure_partitions(),
+            'downsampled_rows': self.downsample(),
+            'dropped': self.drop_expired()
+        }
+
+    def start_maintenance(self, interval: float = 3600.0) -> None:
+        """Run maintenance periodically in a background thread"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._worker.start()
+
+    def stop_maintenance(self) -> None:
+        """Stop the maintenance thread"""
+        self._stop_event.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self, interval: float) -> None:
+        while True:
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                self.logger.error(f"Error in location history maintenance: {str(e)}")
+            if self._stop_event.wait(interval):
+                return
+
+    @staticmethod
+    def _partition_name(day: date) -> str:
+        return f"{HISTORY_TABLE}_p{day.strftime('%Y%m%d')}"
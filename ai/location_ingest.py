@@ -0,0 +1,281 @@
+import io
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+import psycopg2
+from psycopg2.extras import execute_values
+
+class LocationIngestor:
+    """Buffered, batched ingestion of team GPS pings.
+
+    Pings are buffered in memory and written in batches: history rows go to
+    ``team_location_history`` with ``execute_values`` (or COPY), and the newest ping
+    of each team is upserted into ``team_latest_locations``. Repeated pings for
+    the same team and timestamp are dropped before they reach the database.
+
+    A batch that fails because the database is unreachable is kept for the
+    next flush. A batch that fails for any other reason is retried row by
+    row, and rows the database rejects (e.g. an unknown team_id) are dropped.
+    The buffer holds at most ``max_buffered`` pings; past that the oldest
+    are dropped. Both kinds of drop are counted in ``stats['dropped']``.
+    """
+
+    def __init__(self, db_config: Dict, batch_size: int = 1000, flush_interval: float = 1.0,
+                 use_copy: bool = False, rate_window: int = 60, max_buffered: int = 100000):
+        self.db_config = db_config
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.use_copy = use_copy
+        self.rate_window = rate_window
+        self.max_buffered = max_buffered
+        self.logger = logging.getLogger(__name__)
+        self._buffer: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._worker = None
+        # (second, received, written) buckets for rate reporting
+        self._rates = deque()
+        self.stats = {
+            'received': 0,
+            'duplicates': 0,
+            'written': 0,
+            'flushes': 0,
+            'errors': 0,
+            'dropped': 0,
+            'last_flush_duration': 0.0,
+            'last_flush_lag': 0.0
+        }
+
+    def add_ping(self, team_id: int, latitude: float, longitude: float,
+                 recorded_at: Optional[datetime] = None) -> Dict:
+        """Buffer a location ping"""
+        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+            raise ValueError("Invalid coordinates")
+
+        recorded_at = recorded_at or datetime.now()
+        key = (team_id, recorded_at)
+        with self._lock:
+            self.stats['received'] += 1
+            if key in self._buffer:
+                self.stats['duplicates'] += 1
+            elif len(self._buffer) >= self.max_buffered:
+                del self._buffer[next(iter(self._buffer))]
+                self.stats['dropped'] += 1
+            self._buffer[key] = (team_id, latitude, longitude, recorded_at, time.time())
+            self._count_rate(received=1)
+            buffered = len(self._buffer)
+
+        if buffered >= self.batch_size:
+            self._wakeup.set()
+
+        return {
+            'team_id': team_id,
+            'latitude': latitude,
+            'longitude': longitude,
+            'timestamp': recorded_at
+        }
+
+    def update_location(self, team_id: int, latitude: float, longitude: float,
+                        recorded_at: Optional[datetime] = None) -> Dict:
+        """Location sink interface used by ResponseTeamManager"""
+        return self.add_ping(team_id, latitude, longitude, recorded_at)
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of pings written"""
+        with self._flush_lock:
+            with self._lock:
+                pings = list(self._buffer.values())
+                self._buffer = {}
+            if not pings:
+                return 0
+
+            started = time.time()
+            try:
+                try:
+                    self._write(pings)
+                    written = len(pings)
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    raise
+                except Exception as e:
+                    self.logger.warning(f"Location batch rejected, retrying row by row: {str(e)}")
+                    written = self._write_each(pings)
+            except Exception as e:
+                self.logger.error(f"Error writing location batch: {str(e)}")
+                self._requeue(pings)
+                raise
+
+            finished = time.time()
+            with self._lock:
+                self.stats['written'] += written
+                self.stats['dropped'] += len(pings) - written
+                self.stats['flushes'] += 1
+                self.stats['last_flush_duration'] = finished - started
+                self.stats['last_flush_lag'] = finished - min(ping[4] for ping in pings)
+                self._count_rate(written=written)
+            return written
+
+    def start(self) -> None:
+        """Flush in a background thread on size or interval"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the background thread after a final flush"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def pending_count(self) -> int:
+        """Number of pings buffered but not yet written"""
+        return len(self._buffer)
+
+    def get_stats(self) -> Dict:
+        """Get ingest counters, rates and lag"""
+        now = time.time()
+        with self._lock:
+            self._expire_rates(now)
+            received = sum(bucket[1] for bucket in self._rates)
+            written = sum(bucket[2] for bucket in self._rates)
+            oldest = min((ping[4] for ping in self._buffer.values()), default=None)
+            stats = dict(self.stats)
+            stats['buffered'] = len(self._buffer)
+        window = min(self.rate_window, max(1.0, now - self._rates[0][0])) if self._rates else self.rate_window
+        stats['ingest_rate'] = received / window
+        stats['write_rate'] = written / window
+        stats['buffer_lag'] = now - oldest if oldest is not None else 0.0
+        return stats
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _requeue(self, pings: List[tuple]) -> None:
+        """Put an unwritten batch back, within the buffer limit"""
+        with self._lock:
+            self.stats['errors'] += 1
+            # Keep pings that arrived meanwhile; they are newer
+            room = max(0, self.max_buffered - len(self._buffer))
+            requeued = 0
+            for ping in sorted(pings, key=lambda ping: ping[4], reverse=True):
+                key = (ping[0], ping[3])
+                if key in self._buffer:
+                    continue
+                if requeued >= room:
+                    self.stats['dropped'] += 1
+                    continue
+                self._buffer[key] = ping
+                requeued += 1
+
+    def _write_each(self, pings: List[tuple]) -> int:
+        """Write pings one by one, dropping those the database rejects; returns the number written"""
+        written = 0
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        try:
+            for team_id, lat, lon, recorded_at, _ in sorted(pings, key=lambda ping: (ping[0], ping[3])):
+                cur.execute("SAVEPOINT location_ping")
+                try:
+                    cur.execute("""
+                        INSERT INTO team_location_history (team_id, latitude, longitude, recorded_at)
+                        VALUES (%s, %s, %s, %s)
+                    """, (team_id, lat, lon, recorded_at))
+                    cur.execute("""
+                        INSERT INTO team_latest_locations (team_id, latitude, longitude, recorded_at)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (team_id) DO UPDATE SET
+                            latitude = EXCLUDED.latitude,
+                            longitude = EXCLUDED.longitude,
+                            recorded_at = EXCLUDED.recorded_at
+                        WHERE team_latest_locations.recorded_at < EXCLUDED.recorded_at
+                    """, (team_id, lat, lon, recorded_at))
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    raise
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT location_ping")
+                    self.logger.warning(f"Dropping location ping for team {team_id}: {str(e)}")
+                    continue
+                cur.execute("RELEASE SAVEPOINT location_ping")
+                written += 1
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        return written
+
+    def _write(self, pings: List[tuple]) -> None:
+        history = sorted(((ping[0], ping[1], ping[2], ping[3]) for ping in pings),
+                         key=lambda row: (row[0], row[3]))
+        latest = {}
+        for row in history:
+            latest[row[0]] = row
+
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        try:
+            if self.use_copy:
+                data = io.StringIO(''.join(
+                    f"{team_id}\t{lat}\t{lon}\t{recorded_at.isoformat()}\n"
+                    for team_id, lat, lon, recorded_at in history
+                ))
+                cur.copy_expert(
+                    "COPY team_location_history (team_id, latitude, longitude, recorded_at) FROM STDIN",
+                    data
+                )
+            else:
+                execute_values(cur, """
+                    INSERT INTO team_location_history (team_id, latitude, longitude, recorded_at)
+                    VALUES %s
+                """, history, page_size=self.batch_size)
+
+            execute_values(cur, """
+                INSERT INTO team_latest_locations (team_id, latitude, longitude, recorded_at)
+                VALUES %s
+                ON CONFLICT (team_id) DO UPDATE SET
+                    latitude = EXCLUDED.latitude,
+                    longitude = EXCLUDED.longitude,
+                    recorded_at = EXCLUDED.recorded_at
+                WHERE team_latest_locations.recorded_at < EXCLUDED.recorded_at
+            """, list(latest.values()))
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+    def _count_rate(self, received: int = 0, written: int = 0) -> None:
+        second = int(time.time())
+        if self._rates and self._rates[-1][0] == second:
+            bucket = self._rates[-1]
+            self._rates[-1] = (second, bucket[1] + received, bucket[2] + written)
+        else:
+            self._rates.append((second, received, written))
+        self._expire_rates(second)
+
+    def _expire_rates(self, now: float) -> None:
+        while self._rates and self._rates[0][0] <= now - self.rate_window:
+            self._rates.popleft()
@@ -1,28 +1,41 @@
 from twilio.rest import Client
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Union
 import requests
 import json
-from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
+from config import DB_CONFIG, NOTIFICATION_CONFIG, SMS_CONFIG
+from ai.alert_templates import AlertTemplateCache
+from ai.audience_resolver import AudienceResolver
+from ai.notification_queue import NotificationQueue, create_notification_queue
+from ai.sms_fanout import SmsFanout, TwilioSmsProvider
+from ai.translation_service import TranslationService
 
 class MobileService:
-    def __init__(self):
-        self.twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        self.twilio_phone = TWILIO_PHONE_NUMBER
-        self.push_notifications = []
+    def __init__(self, sms_provider=None, notification_queue: Optional[NotificationQueue] = None,
+                 audience_resolver: Optional[AudienceResolver] = None):
+        self.twilio_client = Client(SMS_CONFIG['account_sid'], SMS_CONFIG['auth_token'])
+        self.twilio_phone = SMS_CONFIG['phone_number']
+        self.sms_provider = sms_provider or TwilioSmsProvider(self.twilio_client, self.twilio_phone)
+        self.fanout = SmsFanout(
+            self.sms_provider,
+            max_workers=SMS_CONFIG['fanout_workers'],
+            rate_per_second=SMS_CONFIG['rate_limit_per_second'],
+            max_retries=SMS_CONFIG['max_retries']
+        )
+        self.notification_queue = notification_queue or create_notification_queue(
+            NOTIFICATION_CONFIG, DB_CONFIG
+        )
+        self.audience_resolver = audience_resolver or AudienceResolver(DB_CONFIG)
+        self.templates = AlertTemplateCache(TranslationService())
 
     def send_sms(self, phone_number: str, message: str) -> Dict:
-        """Send SMS using Twilio"""
+        """Send SMS using the configured provider"""
         try:
-            message = self.twilio_client.messages.create(
-                body=message,
-                from_=self.twilio_phone,
-                to=phone_number
-            )
+            result = self.sms_provider.send(phone_number, message)
             return {
                 'status': 'success',
-                'message_id': message.sid,
-                'to': message.to,
-                'status_code': message.status
+                'message_id': result['message_id'],
+                'to': result['to'],
+                'status_code': result['status_code']
             }
         except Exception as e:
             return {
@@ -30,113 +43,82 @@ class MobileService:
                 'error': str(e)
             }
 
-    def send_emergency_alert(self, phone_numbers: List[str], alert_data: Dict) -> Dict:
-        """Send emergency alert to multiple phone numbers"""
-        results = []
-        message = self._format_emergency_message(alert_data)
-        
-        for phone in phone_numbers:
-            result = self.send_sms(phone, message)
-            results.append({
-                'phone': phone,
-                'status': result['status'],
-                'message_id': result.get('message_id'),
-                'error': result.get('error')
-            })
+    def broadcast_sms(self, phone_numbers: Iterable, message: Union[str, Callable]) -> Dict:
+        """Send a message to many phone numbers (or recipient dicts) concurrently"""
+        summary = self.fanout.send_all(phone_numbers, message)
+        results = [{
+            'phone': result['phone'],
+            'status': result['status'],
+            'message_id': result['message_id'],
+            'error': result['error']
+        } for result in summary['results']]
         
         return {
-            'total_sent': len(phone_numbers),
+            'total_sent': summary['total_sent'],
+            'succeeded': summary['succeeded'],
+            'failed': summary['failed'],
             'results': results
         }
 
-    def send_weather_alert(self, phone_numbers: List[str], weather_data: Dict) -> Dict:
+    def send_emergency_alert(self, phone_numbers: Iterable, alert_data: Dict) -> Dict:
+        """Send emergency alert to multiple phone numbers"""
+        rendered = self.templates.render('emergency', alert_data)
+        return self.broadcast_sms(phone_numbers, self._localized(rendered))
+
+    def send_weather_alert(self, phone_numbers: Iterable, weather_data: Dict) -> Dict:
         """Send weather alert to multiple phone numbers"""
-        results = []
-        message = self._format_weather_message(weather_data)
-        
-        for phone in phone_numbers:
-            result = self.send_sms(phone, message)
-            results.append({
-                'phone': phone,
-                'status': result['status'],
-                'message_id': result.get('message_id'),
-                'error': result.get('error')
-            })
-        
-        return {
-            'total_sent': len(phone_numbers),
-            'results': results
-        }
+        rendered = self.templates.render('weather', weather_data)
+        return self.broadcast_sms(phone_numbers, self._localized(rendered))
 
-    def send_evacuation_alert(self, phone_numbers: List[str], evacuation_data: Dict) -> Dict:
+    def send_evacuation_alert(self, phone_numbers: Iterable, evacuation_data: Dict) -> Dict:
         """Send evacuation alert to multiple phone numbers"""
-        results = []
-        message = self._format_evacuation_message(evacuation_data)
-        
-        for phone in phone_numbers:
-            result = self.send_sms(phone, message)
-            results.append({
-                'phone': phone,
-                'status': result['status'],
-                'message_id': result.get('message_id'),
-                'error': result.get('error')
-            })
-        
-        return {
-            'total_sent': len(phone_numbers),
-            'results': results
-        }
+        rendered = self.templates.render('evacuation', evacuation_data)
+        return self.broadcast_sms(phone_numbers, self._localized(rendered))
 
-    def add_push_notification(self, user_id: str, title: str, message: str, data: Dict = None) -> Dict:
-        """Add a push notification to the queue"""
-        notification = {
-            'user_id': user_id,
-            'title': title,
-            'message': message,
-            'data': data or {},
-            'timestamp': datetime.now().isoformat(),
-            'status': 'pending'
-        }
-        self.push_notifications.append(notification)
+    def send_area_alert(self, area: Dict, alert_data: Dict) -> Dict:
+        """Send an emergency alert to every subscriber inside an area
+
+        Recipients are streamed from the audience resolver, so sending
+        starts with the first page rather than after the whole area resolves.
+        """
+        recipients = self.audience_resolver.iter_recipients(area)
+        return self.send_emergency_alert(recipients, alert_data)
+
+    def add_push_notification(self, user_id: str, title: str, message: str, data: Dict = None,
+                              idempotency_key: Optional[str] = None) -> Dict:
+        """Add a push notification to the durable queue"""
+        notification = self.notification_queue.enqueue(user_id, title, message, data,
+                                                       idempotency_key)
+        notification['timestamp'] = str(notification['created_at'])
         return notification
 
-    def get_pending_notifications(self, user_id: str = None) -> List[Dict]:
+    def get_pending_notifications(self, user_id: str = None, limit: int = 100) -> List[Dict]:
         """Get pending push notifications"""
-        if user_id:
-            return [n for n in self.push_notifications 
-                   if n['status'] == 'pending' and n['user_id'] == user_id]
-        return [n for n in self.push_notifications if n['status'] == 'pending']
+        return self.notification_queue.get_pending(user_id, limit)
 
     def mark_notification_sent(self, notification_id: int) -> bool:
         """Mark a notification as sent"""
-        if 0 <= notification_id < len(self.push_notifications):
-            self.push_notifications[notification_id]['status'] = 'sent'
-            return True
-        return False
+        return self.notification_queue.mark_sent(notification_id)
+
+    def _localized(self, rendered: Dict[str, Dict]) -> Callable:
+        """Pick each recipient's pre-rendered message by their language tag"""
+        default = rendered[self.templates.source_lang]['body']
+        bodies = {language: message['body'] for language, message in rendered.items()}
+
+        def body_for(recipient) -> str:
+            if isinstance(recipient, dict):
+                return bodies.get(recipient.get('language'), default)
+            return default
+        return body_for
 
     def _format_emergency_message(self, alert_data: Dict) -> str:
         """Format emergency alert message"""
-        return f"""EMERGENCY ALERT
-Type: {alert_data.get('type', 'Unknown')}
-Location: {alert_data.get('location', 'Unknown')}
-Severity: {alert_data.get('severity', 'Unknown')}
-Description: {alert_data.get('description', 'No description provided')}
-Please follow official instructions and stay safe."""
+        return self.templates.get('emergency', alert_data, 'en')['body']
 
     def _format_weather_message(self, weather_data: Dict) -> str:
         """Format weather alert message"""
-        return f"""WEATHER ALERT
-Condition: {weather_data.get('condition', 'Unknown')}
-Temperature: {weather_data.get('temperature', 'Unknown')}°C
-Wind Speed: {weather_data.get('wind_speed', 'Unknown')} km/h
-Alert: {weather_data.get('alert', 'No alert')}
-Stay safe and follow weather updates."""
+        return self.templates.get('weather', weather_data, 'en')['body']
 
     def _format_evacuation_message(self, evacuation_data: Dict) -> str:
         """Format evacuation alert message"""
-        return f"""EVACUATION ALERT
-Zone: {evacuation_data.get('zone', 'Unknown')}
-Shelter: {evacuation_data.get('shelter', 'Unknown')}
-Route: {evacuation_data.get('route', 'Follow official instructions')}
-Estimated Time: {evacuation_data.get('estimated_time', 'Unknown')} minutes
-Please evacuate immediately and follow the designated route.""" 
\ No newline at end of file
+        return self.templates.get('evacuation', evacuation_data, 'en')['body']
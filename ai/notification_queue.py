@@ -0,0 +1,418 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+# pending -> processing -> sent, or back to pending on a retryable failure,
+# or failed once max_attempts is reached
+NOTIFICATION_STATUSES = ('pending', 'processing', 'sent', 'failed')
+
+class NotificationQueue(ABC):
+    """Durable outbound notification queue.
+
+    Notifications are appended to an ``outbound_notifications`` table and
+    never held only in memory. A partial index on pending rows keeps per-user
+    pending lookups proportional to that user's pending notifications. Workers
+    claim batches with a lease; a worker that dies without acknowledging its
+    batch loses the lease and the rows are claimed again, so delivery is
+    at-least-once. Enqueueing with an idempotency key is a no-op when the key
+    has been seen before.
+    """
+
+    placeholder = '%s'
+
+    def __init__(self, max_attempts: int = 5, lease_seconds: int = 60):
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.logger = logging.getLogger(__name__)
+
+    def enqueue(self, user_id: str, title: str, message: str, data: Dict = None,
+                idempotency_key: Optional[str] = None) -> Dict:
+        """Append a notification; returns the existing row for a repeated key"""
+        idempotency_key = idempotency_key or uuid.uuid4().hex
+        conn = self._connect()
+        cur = self._cursor(conn)
+        try:
+            cur.execute(self._sql("""
+                INSERT INTO outbound_notifications
+                    (idempotency_key, user_id, title, message, data, status, attempts, created_at)
+                VALUES (?, ?, ?, ?, ?, 'pending', 0, ?)
+                ON CONFLICT (idempotency_key) DO NOTHING
+            """), (idempotency_key, str(user_id), title, message,
+                   json.dumps(data or {}), self._now()))
+            cur.execute(self._sql("""
+                SELECT * FROM outbound_notifications WHERE idempotency_key = ?
+            """), (idempotency_key,))
+            notification = cur.fetchone()
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return self._to_dict(notification)
+
+    def get_pending(self, user_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Get pending notifications, oldest first"""
+        conn = self._connect()
+        cur = self._cursor(conn)
+
+        if user_id is not None:
+            cur.execute(self._sql("""
+                SELECT * FROM outbound_notifications
+                WHERE status = 'pending' AND user_id = ?
+                ORDER BY id
+                LIMIT ?
+            """), (str(user_id), limit))
+        else:
+            cur.execute(self._sql("""
+                SELECT * FROM outbound_notifications
+                WHERE status = 'pending'
+                ORDER BY id
+                LIMIT ?
+            """), (limit,))
+
+        notifications = cur.fetchall()
+
+        cur.close()
+        conn.close()
+        return [self._to_dict(notification) for notification in notifications]
+
+    def get_notification(self, notification_id: int) -> Optional[Dict]:
+        """Get a notification by id"""
+        conn = self._connect()
+        cur = self._cursor(conn)
+        cur.execute(self._sql("SELECT * FROM outbound_notifications WHERE id = ?"),
+                    (notification_id,))
+        notification = cur.fetchone()
+        cur.close()
+        conn.close()
+        return self._to_dict(notification) if notification else None
+
+    @abstractmethod
+    def claim_batch(self, worker_id: str, limit: int = 100) -> List[Dict]:
+        """Lease up to limit deliverable notifications to a worker"""
+
+    def mark_sent(self, notification_id: int, worker_id: Optional[str] = None) -> bool:
+        """Acknowledge delivery; returns False if the row was not in flight"""
+        conn = self._connect()
+        cur = self._cursor(conn)
+        try:
+            cur.execute(self._sql("""
+                UPDATE outbound_notifications
+                SET status = 'sent', sent_at = ?, locked_by = NULL, locked_until = NULL
+                WHERE id = ? AND status IN ('pending', 'processing')
+                  AND (? IS NULL OR locked_by = ?)
+            """), (self._now(), notification_id, worker_id, worker_id))
+            updated = cur.rowcount
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        return updated > 0
+
+    def mark_failed(self, notification_id: int, error: str, retry: bool = True) -> Optional[str]:
+        """Record a failed attempt; returns the new status"""
+        conn = self._connect()
+        cur = self._cursor(conn)
+        try:
+            cur.execute(self._sql("""
+                UPDATE outbound_notifications
+                SET status = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'failed' END,
+                    last_error = ?, locked_by = NULL, locked_until = NULL
+                WHERE id = ? AND status = 'processing'
+            """), (retry, self.max_attempts, error, notification_id))
+            cur.execute(self._sql("SELECT status FROM outbound_notifications WHERE id = ?"),
+                        (notification_id,))
+            row = cur.fetchone()
+            conn.commit()
+        finally:
+            cur.close()
+            conn.close()
+        if row is None:
+            return None
+        return row['status']
+
+    def get_stats(self) -> Dict:
+        """Count notifications by status"""
+        conn = self._connect()
+        cur = self._cursor(conn)
+        cur.execute("""
+            SELECT status, COUNT(*) as count
+            FROM outbound_notifications
+            GROUP BY status
+        """)
+        counts = {row['status']: row['count'] for row in cur.fetchall()}
+        cur.close()
+        conn.close()
+        return {status: counts.get(status, 0) for status in NOTIFICATION_STATUSES}
+
+    @abstractmethod
+    def _connect(self):
+        """Open a connection with a transaction started"""
+
+    @abstractmethod
+    def _cursor(self, conn):
+        """Cursor whose rows support access by column name"""
+
+    def _now(self):
+        return datetime.now()
+
+    def _sql(self, query: str) -> str:
+        return query.replace('?', self.placeholder)
+
+    def _to_dict(self, row) -> Dict:
+        notification = dict(row)
+        if isinstance(notification.get('data'), str):
+            notification['data'] = json.loads(notification['data'])
+        return notification
+
+class SQLiteNotificationQueue(NotificationQueue):
+    """Notification queue in a local SQLite file.
+
+    SQLite has a single writer, so a claim takes the write lock up front with
+    ``BEGIN IMMEDIATE`` instead of skipping locked rows.
+    """
+
+    placeholder = '?'
+
+    def __init__(self, path: str, max_attempts: int = 5, lease_seconds: int = 60):
+        super().__init__(max_attempts, lease_seconds)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    def _connect(self, begin: str = "BEGIN"):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(begin)
+        return conn
+
+    def _now(self):
+        # Stored as ISO text, which sorts chronologically
+        return datetime.now().isoformat(sep=' ')
+
+    def _cursor(self, conn):
+        return conn.cursor()
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbound_notifications (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                user_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                message TEXT NOT NULL,
+                data TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                locked_by TEXT,
+                locked_until TIMESTAMP,
+                created_at TIMESTAMP NOT NULL,
+                sent_at TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbound_notifications_pending_user
+            ON outbound_notifications (user_id, id) WHERE status = 'pending'
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbound_notifications_pending
+            ON outbound_notifications (id) WHERE status = 'pending'
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbound_notifications_lease
+            ON outbound_notifications (locked_until) WHERE status = 'processing'
+        """)
+        conn.commit()
+        conn.close()
+
+    def claim_batch(self, worker_id: str, limit: int = 100) -> List[Dict]:
+        """Lease up to limit deliverable notifications to a worker"""
+        now = datetime.now()
+        lease_end = (now + timedelta(seconds=self.lease_seconds)).isoformat(sep=' ')
+        conn = self._connect("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("""
+                UPDATE outbound_notifications
+                SET status = 'processing', locked_by = ?, locked_until = ?,
+                    attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM outbound_notifications
+                    WHERE status = 'pending'
+                    UNION ALL
+                    SELECT id FROM outbound_notifications
+                    WHERE status = 'processing' AND locked_until < ?
+                    ORDER BY id
+                    LIMIT ?
+                )
+                RETURNING *
+            """, (worker_id, lease_end, now.isoformat(sep=' '), limit)).fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return sorted((self._to_dict(row) for row in rows), key=lambda n: n['id'])
+
+class PostgresNotificationQueue(NotificationQueue):
+    """Notification queue in Postgres; concurrent workers claim with SKIP LOCKED"""
+
+    def __init__(self, db_config: Dict, max_attempts: int = 5, lease_seconds: int = 60):
+        super().__init__(max_attempts, lease_seconds)
+        self.db_config = db_config
+        self._init_db()
+
+    def _connect(self):
+        return psycopg2.connect(**self.db_config)
+
+    def _cursor(self, conn):
+        return conn.cursor(cursor_factory=RealDictCursor)
+
+    def _init_db(self):
+        conn = self._connect()
+        cur = conn.cursor()
+
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS outbound_notifications (
+                id BIGSERIAL PRIMARY KEY,
+                idempotency_key VARCHAR(128) NOT NULL UNIQUE,
+                user_id VARCHAR(64) NOT NULL,
+                title TEXT NOT NULL,
+                message TEXT NOT NULL,
+                data JSONB NOT NULL DEFAULT '{}',
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                locked_by VARCHAR(64),
+                locked_until TIMESTAMP,
+                created_at TIMESTAMP NOT NULL,
+                sent_at TIMESTAMP
+            )
+        """)
+
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbound_notifications_pending_user
+            ON outbound_notifications (user_id, id) WHERE status = 'pending'
+        """)
+
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbound_notifications_pending
+            ON outbound_notifications (id) WHERE status = 'pending'
+        """)
+
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_outbound_notifications_lease
+            ON outbound_notifications (locked_until) WHERE status = 'processing'
+        """)
+
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    def claim_batch(self, worker_id: str, limit: int = 100) -> List[Dict]:
+        """Lease up to limit deliverable notifications to a worker"""
+        conn = self._connect()
+        cur = self._cursor(conn)
+        try:
+            cur.execute("""
+                WITH claimable AS (
+                    SELECT id FROM outbound_notifications
+                    WHERE status = 'pending'
+                       OR (status = 'processing' AND locked_until < CURRENT_TIMESTAMP)
+                    ORDER BY id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE outbound_notifications n
+                SET status = 'processing', locked_by = %s,
+                    locked_until = CURRENT_TIMESTAMP + %s * INTERVAL '1 second',
+                    attempts = n.attempts + 1
+                FROM claimable
+                WHERE n.id = claimable.id
+                RETURNING n.*
+            """, (limit, worker_id, self.lease_seconds))
+            rows = cur.fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        return sorted((self._to_dict(row) for row in rows), key=lambda n: n['id'])
+
+def create_notification_queue(config: Dict, db_config: Optional[Dict] = None) -> NotificationQueue:
+    """Build the queue backend named in the notification config"""
+    if config['backend'] == 'postgres':
+        return PostgresNotificationQueue(db_config, config['max_attempts'], config['lease_seconds'])
+    if config['backend'] == 'sqlite':
+        return SQLiteNotificationQueue(config['sqlite_path'], config['max_attempts'],
+                                       config['lease_seconds'])
+    raise ValueError(f"Unknown notification queue backend: {config['backend']}")
+
+class NotificationWorker:
+    """Claims batches from a queue and hands each notification to a sender"""
+
+    def __init__(self, queue: NotificationQueue, sender, batch_size: int = 100,
+                 poll_interval: float = 1.0, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.logger = logging.getLogger(__name__)
+        self._stop_event = threading.Event()
+        self._worker = None
+
+    def process_batch(self) -> Dict:
+        """Deliver one claimed batch; returns counts by outcome"""
+        outcome = {'claimed': 0, 'sent': 0, 'retrying': 0, 'failed': 0}
+        batch = self.queue.claim_batch(self.worker_id, self.batch_size)
+        outcome['claimed'] = len(batch)
+        for notification in batch:
+            try:
+                self.sender(notification)
+            except Exception as e:
+                status = self.queue.mark_failed(notification['id'], str(e))
+                outcome['retrying' if status == 'pending' else 'failed'] += 1
+                continue
+            if self.queue.mark_sent(notification['id'], self.worker_id):
+                outcome['sent'] += 1
+        return outcome
+
+    def start(self) -> None:
+        """Poll the queue in a background thread"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop polling after the current batch"""
+        self._stop_event.set()
+        if self._worker:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                outcome = self.process_batch()
+            except Exception as e:
+                self.logger.error(f"Error processing notification batch: {str(e)}")
+                outcome = {'claimed': 0}
+            if outcome['claimed'] < self.batch_size:
+                self._stop_event.wait(self.poll_interval)
@@ -1,14 +1,32 @@
 from datetime import datetime
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from config import DB_CONFIG
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from ai.inventory_summary import (
+    apply_inventory_delta, init_summary_tables, rebuild_summary, record_allocations
+)
+
+class InsufficientInventoryError(Exception):
+    """A batch of allocations asked for more than a resource has in stock"""
+
+    def __init__(self, resource_ids: List[int]):
+        super().__init__(f"Insufficient quantity for resources: {sorted(resource_ids)}")
+        self.resource_ids = resource_ids
+
+class StaleRequestError(Exception):
+    """A batch of allocations targets requests that are no longer open for that quantity"""
+
+    def __init__(self, request_ids: List[int]):
+        super().__init__(f"Requests already fulfilled or changed: {sorted(request_ids)}")
+        self.request_ids = request_ids
 
 class ResourceManager:
     def __init__(self):
         self.db_config = DB_CONFIG
+        self.request_listeners: List[Callable[[Dict], None]] = []
         self._init_database()
 
     def _init_database(self):
@@ -42,6 +60,17 @@ class ResourceManager:
             )
         """)
         
+        # Track partial fulfillment of requests
+        cur.execute("""
+            ALTER TABLE resource_requests
+            ADD COLUMN IF NOT EXISTS fulfilled_quantity INTEGER DEFAULT 0
+        """)
+        
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_resource_requests_status
+            ON resource_requests (status)
+        """)
+        
         # Create resource allocations table
         cur.execute("""
             CREATE TABLE IF NOT EXISTS resource_allocations (
@@ -54,6 +83,9 @@ class ResourceManager:
             )
         """)
         
+        # Create inventory summary tables maintained on every change
+        init_summary_tables(cur)
+        
         conn.commit()
         cur.close()
         conn.close()
@@ -70,6 +102,7 @@ class ResourceManager:
         """, (name, category, quantity, location))
         
         resource = cur.fetchone()
+        apply_inventory_delta(cur, category, quantity_delta=quantity, resource_count_delta=1)
         conn.commit()
         cur.close()
         conn.close()
@@ -81,17 +114,23 @@ class ResourceManager:
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         cur.execute("""
-            UPDATE resources
+            WITH old AS (
+                SELECT id, quantity FROM resources WHERE id = %s FOR UPDATE
+            )
+            UPDATE resources r
             SET quantity = %s, last_updated = CURRENT_TIMESTAMP
-            WHERE id = %s
-            RETURNING *
-        """, (quantity, resource_id))
+            FROM old
+            WHERE r.id = old.id
+            RETURNING r.*, old.quantity as previous_quantity
+        """, (resource_id, quantity))
         
-        resource = cur.fetchone()
+        resource = dict(cur.fetchone())
+        previous_quantity = resource.pop('previous_quantity')
+        apply_inventory_delta(cur, resource['category'], quantity_delta=quantity - previous_quantity)
         conn.commit()
         cur.close()
         conn.close()
-        return dict(resource)
+        return resource
 
     def request_resources(self, resource_id: int, requester: str, quantity: int, priority: str) -> Dict:
         """Create a new resource request"""
@@ -108,35 +147,55 @@ class ResourceManager:
         conn.commit()
         cur.close()
         conn.close()
-        return dict(request)
+        
+        request = dict(request)
+        for listener in self.request_listeners:
+            listener(request)
+        return request
+
+    def add_request_listener(self, listener: Callable[[Dict], None]) -> None:
+        """Register a callback invoked with each newly created request"""
+        self.request_listeners.append(listener)
 
     def allocate_resources(self, request_id: int) -> Dict:
-        """Allocate resources for a request"""
+        """Allocate the unfulfilled remainder of a request"""
         conn = psycopg2.connect(**self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        # Get request details
+        # Get request details, locking both rows against concurrent allocation
         cur.execute("""
-            SELECT r.*, res.quantity as available_quantity
+            SELECT r.*, res.quantity as available_quantity, res.category,
+                   r.quantity - COALESCE(r.fulfilled_quantity, 0) as remaining_quantity
             FROM resource_requests r
             JOIN resources res ON r.resource_id = res.id
             WHERE r.id = %s
+            FOR UPDATE OF r, res
         """, (request_id,))
         
         request = cur.fetchone()
         
         if not request:
-            return {"error": "Request not found"}
+            error = "Request not found"
+        elif request['status'] not in ('pending', 'partial') or request['remaining_quantity'] <= 0:
+            error = "Request already fulfilled"
+        elif request['remaining_quantity'] > request['available_quantity']:
+            error = "Insufficient resources available"
+        else:
+            error = None
+        if error:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return {"error": error}
         
-        if request['quantity'] > request['available_quantity']:
-            return {"error": "Insufficient resources available"}
+        quantity = request['remaining_quantity']
         
         # Create allocation
         cur.execute("""
             INSERT INTO resource_allocations (request_id, resource_id, quantity)
             VALUES (%s, %s, %s)
             RETURNING *
-        """, (request_id, request['resource_id'], request['quantity']))
+        """, (request_id, request['resource_id'], quantity))
         
         allocation = cur.fetchone()
         
@@ -145,20 +204,93 @@ class ResourceManager:
             UPDATE resources
             SET quantity = quantity - %s
             WHERE id = %s
-        """, (request['quantity'], request['resource_id']))
+        """, (quantity, request['resource_id']))
         
         # Update request status
         cur.execute("""
             UPDATE resource_requests
-            SET status = 'fulfilled', fulfilled_at = CURRENT_TIMESTAMP
+            SET status = 'fulfilled', fulfilled_quantity = quantity,
+                fulfilled_at = CURRENT_TIMESTAMP
             WHERE id = %s
         """, (request_id,))
         
+        record_allocations(cur, [{'category': request['category'], 'quantity': quantity}])
+        
         conn.commit()
         cur.close()
         conn.close()
         return dict(allocation)
 
+    def apply_allocations(self, allocations: List[Dict]) -> List[Dict]:
+        """Persist a batch of allocations in a single transaction
+
+        Each allocation has request_id, resource_id, quantity and a status of
+        'fulfilled' or 'partial'. If any resource no longer holds the quantity
+        the batch uses, nothing is written and InsufficientInventoryError is
+        raised; if any request is no longer pending or has less left to fill
+        than its allocation, StaleRequestError is raised instead.
+        """
+        if not allocations:
+            return []
+        
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+        try:
+            created = execute_values(cur, """
+                INSERT INTO resource_allocations (request_id, resource_id, quantity)
+                VALUES %s
+                RETURNING *
+            """, [(a['request_id'], a['resource_id'], a['quantity']) for a in allocations],
+                fetch=True)
+            
+            # Update resource quantities, never below zero
+            used = {}
+            for a in allocations:
+                used[a['resource_id']] = used.get(a['resource_id'], 0) + a['quantity']
+            categories = execute_values(cur, """
+                UPDATE resources r
+                SET quantity = r.quantity - v.used, last_updated = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v(id, used)
+                WHERE r.id = v.id AND r.quantity >= v.used
+                RETURNING r.id, r.category
+            """, list(used.items()), fetch=True)
+            category_of = {row['id']: row['category'] for row in categories}
+            if len(category_of) < len(used):
+                raise InsufficientInventoryError([i for i in used if i not in category_of])
+            
+            # Update request status and fulfilled quantity, only while still open for it
+            updated = execute_values(cur, """
+                UPDATE resource_requests r
+                SET fulfilled_quantity = COALESCE(r.fulfilled_quantity, 0) + v.quantity,
+                    status = v.status,
+                    fulfilled_at = CASE WHEN v.status = 'fulfilled'
+                                        THEN CURRENT_TIMESTAMP ELSE r.fulfilled_at END
+                FROM (VALUES %s) AS v(id, quantity, status)
+                WHERE r.id = v.id
+                  AND r.status IN ('pending', 'partial')
+                  AND r.quantity - COALESCE(r.fulfilled_quantity, 0) >= v.quantity
+                RETURNING r.id
+            """, [(a['request_id'], a['quantity'], a['status']) for a in allocations], fetch=True)
+            open_ids = set(row['id'] for row in updated)
+            if len(open_ids) < len(allocations):
+                raise StaleRequestError([a['request_id'] for a in allocations
+                                         if a['request_id'] not in open_ids])
+            
+            record_allocations(cur, [
+                {'category': category_of[a['resource_id']], 'quantity': a['quantity']}
+                for a in allocations
+            ])
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        return [dict(allocation) for allocation in created]
+
     def get_resource_inventory(self) -> List[Dict]:
         """Get current resource inventory"""
         conn = psycopg2.connect(**self.db_config)
@@ -172,15 +304,16 @@ class ResourceManager:
         return [dict(resource) for resource in resources]
 
     def get_pending_requests(self) -> List[Dict]:
-        """Get all pending resource requests"""
+        """Get all pending and partially fulfilled resource requests"""
         conn = psycopg2.connect(**self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         cur.execute("""
-            SELECT r.*, res.name as resource_name
+            SELECT r.*, res.name as resource_name,
+                   r.quantity - COALESCE(r.fulfilled_quantity, 0) as remaining_quantity
             FROM resource_requests r
             JOIN resources res ON r.resource_id = res.id
-            WHERE r.status = 'pending'
+            WHERE r.status IN ('pending', 'partial')
         """)
         
         requests = cur.fetchall()
@@ -189,6 +322,32 @@ class ResourceManager:
         conn.close()
         return [dict(request) for request in requests]
 
+    def get_inventory_summary(self) -> List[Dict]:
+        """Get per-category inventory totals from the summary table"""
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+        cur.execute("""
+            SELECT * FROM resource_inventory_summary
+            ORDER BY category
+        """)
+        summary = cur.fetchall()
+        
+        cur.close()
+        conn.close()
+        return [dict(row) for row in summary]
+
+    def rebuild_inventory_summary(self) -> None:
+        """Recompute the inventory summary tables from scratch"""
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor()
+        
+        rebuild_summary(cur)
+        
+        conn.commit()
+        cur.close()
+        conn.close()
+
     def get_resource_utilization(self) -> Dict:
         """Get resource utilization statistics"""
         conn = psycopg2.connect(**self.db_config)
@@ -197,10 +356,11 @@ class ResourceManager:
         cur.execute("""
             SELECT 
                 category,
-                SUM(quantity) as total_quantity,
-                COUNT(*) as resource_count
-            FROM resources
-            GROUP BY category
+                total_quantity,
+                resource_count,
+                allocated_quantity,
+                allocation_count
+            FROM resource_inventory_summary
         """)
         
         utilization = cur.fetchall()
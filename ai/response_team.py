@@ -1,15 +1,33 @@
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
 import json
 import os
-from config import DB_CONFIG
+from config import DB_CONFIG, LOCATION_HISTORY_CONFIG
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from ai.location_history import LocationHistoryStore
 
 class ResponseTeamManager:
     def __init__(self):
         self.db_config = DB_CONFIG
+        self.team_listeners: List[Callable[[Dict], None]] = []
+        self.location_sink = None
+        self.location_history = LocationHistoryStore(
+            self.db_config,
+            bucket_seconds=LOCATION_HISTORY_CONFIG['bucket_seconds'],
+            retention_days=LOCATION_HISTORY_CONFIG['retention_days'],
+            days_ahead=LOCATION_HISTORY_CONFIG['days_ahead']
+        )
         self._init_database()
+        self.location_history.ensure_partitions(date.today() - timedelta(days=1))
+
+    def start(self) -> None:
+        """Keep partitions ahead of time, downsample and enforce retention in the background"""
+        self.location_history.start_maintenance(LOCATION_HISTORY_CONFIG['maintenance_interval'])
+
+    def stop(self) -> None:
+        """Stop location history maintenance"""
+        self.location_history.stop_maintenance()
 
     def _init_database(self):
         """Initialize database tables for response team management"""
@@ -52,7 +70,7 @@ class ResponseTeamManager:
             )
         """)
         
-        # Create team locations table
+        # Legacy unpartitioned location table; new pings go to team_location_history
         cur.execute("""
             CREATE TABLE IF NOT EXISTS team_locations (
                 id SERIAL PRIMARY KEY,
@@ -63,6 +81,28 @@ class ResponseTeamManager:
             )
         """)
         
+        # Create partitioned team location history
+        self.location_history.init_schema(cur)
+        
+        # Create latest team location table, one row per team
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS team_latest_locations (
+                team_id INTEGER PRIMARY KEY REFERENCES response_teams(id),
+                latitude FLOAT NOT NULL,
+                longitude FLOAT NOT NULL,
+                recorded_at TIMESTAMP NOT NULL
+            )
+        """)
+        
+        # Backfill latest locations from existing history
+        cur.execute("""
+            INSERT INTO team_latest_locations (team_id, latitude, longitude, recorded_at)
+            SELECT DISTINCT ON (team_id) team_id, latitude, longitude, timestamp
+            FROM team_locations
+            WHERE NOT EXISTS (SELECT 1 FROM team_latest_locations)
+            ORDER BY team_id, timestamp DESC
+        """)
+        
         conn.commit()
         cur.close()
         conn.close()
@@ -82,7 +122,26 @@ class ResponseTeamManager:
         conn.commit()
         cur.close()
         conn.close()
-        return dict(team)
+        
+        team = dict(team)
+        self._notify_team_listeners(team)
+        return team
+
+    def add_team_listener(self, listener: Callable[[Dict], None]) -> None:
+        """Register a callback invoked when a team is created or changes status"""
+        self.team_listeners.append(listener)
+
+    def set_location_sink(self, sink) -> None:
+        """Route location updates to a sink with an update_location method
+
+        With a sink set, update_team_location hands pings to the sink, which
+        takes over persisting them, instead of inserting them directly.
+        """
+        self.location_sink = sink
+
+    def _notify_team_listeners(self, team: Dict) -> None:
+        for listener in self.team_listeners:
+            listener(team)
 
     def add_team_member(self, team_id: int, name: str, role: str, contact: str) -> Dict:
         """Add a member to a response team"""
@@ -124,20 +183,36 @@ class ResponseTeamManager:
         conn.commit()
         cur.close()
         conn.close()
+        
+        self._notify_team_listeners({'id': team_id, 'status': 'assigned'})
         return dict(assignment)
 
     def update_team_location(self, team_id: int, latitude: float, longitude: float) -> Dict:
         """Update team's current location"""
+        if self.location_sink is not None:
+            return self.location_sink.update_location(team_id, latitude, longitude)
+        
         conn = psycopg2.connect(**self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         cur.execute("""
-            INSERT INTO team_locations (team_id, latitude, longitude)
-            VALUES (%s, %s, %s)
-            RETURNING *
+            INSERT INTO team_location_history (team_id, latitude, longitude, recorded_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            RETURNING team_id, latitude, longitude, recorded_at as timestamp
         """, (team_id, latitude, longitude))
         
         location = cur.fetchone()
+        
+        cur.execute("""
+            INSERT INTO team_latest_locations (team_id, latitude, longitude, recorded_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (team_id) DO UPDATE SET
+                latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude,
+                recorded_at = EXCLUDED.recorded_at
+            WHERE team_latest_locations.recorded_at < EXCLUDED.recorded_at
+        """, (team_id, latitude, longitude, location['timestamp']))
+        
         conn.commit()
         cur.close()
         conn.close()
@@ -148,16 +223,14 @@ class ResponseTeamManager:
         conn = psycopg2.connect(**self.db_config)
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
-        # Get team details
+        # Get team details with the latest known location
         cur.execute("""
             SELECT t.*, 
-                   COUNT(tm.id) as member_count,
+                   (SELECT COUNT(*) FROM team_members tm WHERE tm.team_id = t.id) as member_count,
                    tl.latitude, tl.longitude
             FROM response_teams t
-            LEFT JOIN team_members tm ON t.id = tm.team_id
-            LEFT JOIN team_locations tl ON t.id = tl.team_id
+            LEFT JOIN team_latest_locations tl ON tl.team_id = t.id
             WHERE t.id = %s
-            GROUP BY t.id, tl.latitude, tl.longitude
         """, (team_id,))
         
         team = cur.fetchone()
@@ -177,6 +250,11 @@ class ResponseTeamManager:
         result['members'] = [dict(member) for member in members]
         return result
 
+    def get_team_trail(self, team_id: int, start: datetime, end: Optional[datetime] = None,
+                       limit: Optional[int] = None) -> List[Dict]:
+        """Get a team's recorded path over a time window"""
+        return self.location_history.get_trail(team_id, start, end or datetime.now(), limit)
+
     def get_available_teams(self) -> List[Dict]:
         """Get all available response teams"""
         conn = psycopg2.connect(**self.db_config)
@@ -184,13 +262,28 @@ class ResponseTeamManager:
         
         cur.execute("""
             SELECT t.*, 
-                   COUNT(tm.id) as member_count,
+                   (SELECT COUNT(*) FROM team_members tm WHERE tm.team_id = t.id) as member_count,
                    tl.latitude, tl.longitude
             FROM response_teams t
-            LEFT JOIN team_members tm ON t.id = tm.team_id
-            LEFT JOIN team_locations tl ON t.id = tl.team_id
+            LEFT JOIN team_latest_locations tl ON tl.team_id = t.id
             WHERE t.status = 'available'
-            GROUP BY t.id, tl.latitude, tl.longitude
+        """)
+        
+        teams = cur.fetchall()
+        
+        cur.close()
+        conn.close()
+        return [dict(team) for team in teams]
+
+    def get_teams_with_locations(self) -> List[Dict]:
+        """Get every team with its latest known location"""
+        conn = psycopg2.connect(**self.db_config)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        
+        cur.execute("""
+            SELECT t.id, t.name, t.team_type, t.status, tl.latitude, tl.longitude
+            FROM response_teams t
+            LEFT JOIN team_latest_locations tl ON tl.team_id = t.id
         """)
         
         teams = cur.fetchall()
@@ -235,4 +328,6 @@ class ResponseTeamManager:
         conn.commit()
         cur.close()
         conn.close()
+        
+        self._notify_team_listeners({'id': assignment['team_id'], 'status': 'available'})
         return dict(updated_assignment) 
\ No newline at end of file
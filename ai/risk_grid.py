@@ -0,0 +1,96 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# District headquarters the prediction grid is evaluated at: (name, lat, lon, terrain)
+GRID_POINTS = [
+    ('Dehradun', 30.3165, 78.0322, 'plains'),
+    ('Haridwar', 29.9457, 78.1642, 'plains'),
+    ('Udham Singh Nagar', 28.9750, 79.4000, 'plains'),
+    ('Nainital', 29.3919, 79.4542, 'hills'),
+    ('Pauri Garhwal', 30.1470, 78.7800, 'hills'),
+    ('Almora', 29.5971, 79.6591, 'hills'),
+    ('Tehri Garhwal', 30.3800, 78.4300, 'hills'),
+    ('Pithoragarh', 29.5829, 80.2182, 'hills'),
+    ('Chamoli', 30.4000, 79.3200, 'hills'),
+    ('Uttarkashi', 30.7268, 78.4354, 'hills'),
+    ('Bageshwar', 29.8370, 79.7710, 'hills'),
+    ('Champawat', 29.3360, 80.0910, 'hills'),
+    ('Rudraprayag', 30.2844, 78.9811, 'hills')
+]
+
+# Heavy rain floods the plains and brings slopes down in the hills
+DISASTER_BY_TERRAIN = {'plains': 'Floods', 'hills': 'Landslides'}
+
+class RiskGrid:
+    """District risk predictions, recomputed at most once per ttl"""
+
+    def __init__(self, risk_service=None, points: List[tuple] = None, ttl_seconds: int = 600,
+                 max_workers: int = 8):
+        if risk_service is None:
+            from services.risk_services import WeatherRiskService
+            risk_service = WeatherRiskService()
+        self.risk_service = risk_service
+        self.points = points or GRID_POINTS
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._predictions = None
+        self._computed_at = None
+
+    def predictions(self) -> Tuple[List[Dict], datetime]:
+        """Current predictions and when they were computed"""
+        # One refresh at a time; concurrent requests wait for it instead of repeating it
+        with self._lock:
+            if self._computed_at is None or datetime.now() - self._computed_at >= self.ttl:
+                self._refresh()
+            return self._predictions, self._computed_at
+
+    def _refresh(self) -> None:
+        computed_at = datetime.now().replace(microsecond=0)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._assess, self.points))
+
+        predictions = []
+        for i, (point, assessment) in enumerate(zip(self.points, results)):
+            if assessment is not None:
+                predictions.append(self._prediction(i + 1, point, assessment, computed_at))
+
+        if not predictions:
+            if self._predictions is None:
+                raise RuntimeError("Risk assessment failed for every grid point")
+            # Keep serving the last good grid until the weather feed recovers
+            logging.warning("Risk grid refresh failed, serving previous predictions")
+            return
+        self._predictions = predictions
+        self._computed_at = computed_at
+
+    def _assess(self, point: tuple) -> Optional[Dict]:
+        name, lat, lon, _ = point
+        try:
+            return self.risk_service.get_risk_assessment(lat, lon)
+        except Exception as e:
+            logging.error(f"Risk assessment failed for {name}: {str(e)}")
+            return None
+
+    def _prediction(self, prediction_id: int, point: tuple, assessment: Dict, computed_at: datetime) -> Dict:
+        name, lat, lon, terrain = point
+        scores = [assessment['current']['risk_score']] + list(assessment['forecast']['daily_risks'])
+        peak_day = max(range(len(scores)), key=scores.__getitem__)
+        peak = scores[peak_day]
+        level = self.risk_service._get_risk_level(peak).capitalize()
+        return {
+            'id': prediction_id,
+            'district': name,
+            'disasterType': DISASTER_BY_TERRAIN.get(terrain, 'Floods'),
+            'date': (computed_at.date() + timedelta(days=peak_day)).isoformat(),
+            'probability': round(peak * 100, 1),
+            'impactLevel': level,
+            'riskLevel': level,
+            'trend': assessment['forecast']['trend'],
+            'lastUpdated': computed_at.isoformat(),
+            'lat': lat,
+            'lng': lon
+        }
@@ -0,0 +1,252 @@
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, Optional, Union
+from instrumentation import instrumented
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+_EXHAUSTED = object()
+
+class SmsProviderError(Exception):
+    """Error returned by an SMS provider, with the HTTP status when known"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code is None or self.status_code in RETRYABLE_STATUS_CODES
+
+class TwilioSmsProvider:
+    """SMS provider backed by the Twilio REST client"""
+
+    name = 'twilio'
+
+    def __init__(self, client, from_number: str):
+        self.client = client
+        self.from_number = from_number
+
+    @instrumented('http', 'twilio.messages.create')
+    def send(self, to: str, body: str) -> Dict:
+        from twilio.base.exceptions import TwilioRestException
+        try:
+            message = self.client.messages.create(body=body, from_=self.from_number, to=to)
+        except TwilioRestException as e:
+            raise SmsProviderError(str(e), status_code=e.status)
+        return {
+            'message_id': message.sid,
+            'to': message.to,
+            'status_code': message.status
+        }
+
+class MockSmsProvider:
+    """Local stand-in provider for offline runs and throughput benchmarks
+
+    Each send sleeps for ``latency`` seconds and fails with a 429 or 503 at
+    the configured rates, so retry and rate-limit behaviour can be exercised
+    without network access.
+    """
+
+    name = 'mock'
+
+    def __init__(self, latency: float = 0.05, throttle_rate: float = 0.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.sent = 0
+
+    def send(self, to: str, body: str) -> Dict:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                raise SmsProviderError("Too many requests", status_code=429)
+            if roll < self.throttle_rate + self.failure_rate:
+                raise SmsProviderError("Service unavailable", status_code=503)
+            self.sent += 1
+            message_id = f"MOCK{self.sent:010d}"
+        return {
+            'message_id': message_id,
+            'to': to,
+            'status_code': 'queued'
+        }
+
+class RateLimiter:
+    """Thread-safe token bucket"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        if rate_per_second <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate_per_second
+        self.capacity = burst or max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+class SmsFanout:
+    """Concurrent bulk SMS delivery through a bounded worker pool.
+
+    Recipients are consumed lazily, so they may come from a generator that is
+    still resolving the audience. Results are yielded as each message
+    completes; retryable failures (429, 5xx, connection errors) are retried
+    with exponential backoff and full jitter.
+    """
+
+    def __init__(self, provider, max_workers: int = 32, rate_per_second: Optional[float] = None,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 10.0):
+        self.provider = provider
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_per_second) if rate_per_second else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = logging.getLogger(__name__)
+        self._random = random.Random()
+
+    def send_one(self, phone: str, body: str) -> Dict:
+        """Send a single message with rate limiting and retries"""
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                result = self.provider.send(phone, body)
+                return {
+                    'phone': phone,
+                    'status': 'success',
+                    'message_id': result.get('message_id'),
+                    'error': None,
+                    'attempts': attempt + 1
+                }
+            except Exception as e:
+                retryable = e.retryable if isinstance(e, SmsProviderError) else True
+                if not retryable or attempt >= self.max_retries:
+                    return {
+                        'phone': phone,
+                        'status': 'error',
+                        'message_id': None,
+                        'error': str(e),
+                        'attempts': attempt + 1
+                    }
+                delay = self._backoff(attempt)
+                if isinstance(e, SmsProviderError) and e.retry_after:
+                    delay = max(delay, e.retry_after)
+                time.sleep(delay)
+                attempt += 1
+
+    def stream(self, recipients: Iterable[Union[str, Dict]],
+               message: Union[str, Callable[[Union[str, Dict]], str]]) -> Iterator[Dict]:
+        """Send to every recipient, yielding per-recipient results as they complete
+
+        A recipient is a phone number or a dict with a 'phone' key. The
+        message is either a fixed body or a function of the recipient.
+        """
+        body_for = message if callable(message) else (lambda recipient: message)
+        recipients = iter(recipients)
+        max_in_flight = self.max_workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    recipient = next(recipients, _EXHAUSTED)
+                    if recipient is _EXHAUSTED:
+                        exhausted = True
+                        break
+                    phone = recipient['phone'] if isinstance(recipient, dict) else recipient
+                    in_flight.add(executor.submit(self.send_one, phone, body_for(recipient)))
+                if not in_flight:
+                    return
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def send_all(self, recipients: Iterable[Union[str, Dict]],
+                 message: Union[str, Callable[[Union[str, Dict]], str]],
+                 keep_results: bool = True) -> Dict:
+        """Send to every recipient and aggregate the outcome"""
+        summary = {'total_sent': 0, 'succeeded': 0, 'failed': 0, 'retries': 0}
+        results = []
+        started = time.monotonic()
+
+        for result in self.stream(recipients, message):
+            summary['total_sent'] += 1
+            summary['retries'] += result['attempts'] - 1
+            if result['status'] == 'success':
+                summary['succeeded'] += 1
+            else:
+                summary['failed'] += 1
+            if keep_results:
+                results.append(result)
+
+        summary['elapsed_seconds'] = time.monotonic() - started
+        summary['messages_per_second'] = (
+            summary['total_sent'] / summary['elapsed_seconds'] if summary['elapsed_seconds'] else 0.0
+        )
+        if summary['failed']:
+            self.logger.warning(f"{summary['failed']} of {summary['total_sent']} messages failed")
+        summary['results'] = results
+        return summary
+
+    def _backoff(self, attempt: int) -> float:
+        return self._random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+def benchmark(recipients: int = 10000, workers: int = 64, latency: float = 0.05,
+              rate: Optional[float] = None, throttle_rate: float = 0.0, failure_rate: float = 0.0) -> Dict:
+    """Measure fan-out throughput against the mock provider"""
+    provider = MockSmsProvider(latency=latency, throttle_rate=throttle_rate,
+                               failure_rate=failure_rate, seed=42)
+    fanout = SmsFanout(provider, max_workers=workers, rate_per_second=rate,
+                       backoff_base=0.01, backoff_max=0.1)
+    phones = (f"+9190000{i:05d}" for i in range(recipients))
+    summary = fanout.send_all(phones, "Benchmark alert", keep_results=False)
+    summary.pop('results')
+    return summary
+
+if __name__ == '__main__':
+    from config import init_config
+    from profiler import FORMATS, PROFILER, install_signal_toggle
+
+    parser = argparse.ArgumentParser(description="Benchmark SMS fan-out against the mock provider")
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--rate', type=float, default=None)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--profile', choices=FORMATS, help="Sample stacks during the run")
+    args = parser.parse_args()
+
+    init_config(validate=False)
+    install_signal_toggle()
+    if args.profile:
+        PROFILER.start(args.profile)
+    print(json.dumps(benchmark(args.recipients, args.workers, args.latency, args.rate,
+                               args.throttle_rate, args.failure_rate), indent=2))
+    if PROFILER.running:
+        print(f"Profile written to {PROFILER.stop()}")
@@ -0,0 +1,184 @@
+import heapq
+import math
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Widens search spans so rounding never drops a point on the circle's edge
+SPAN_PADDING = 1e-6
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def radius_spans(lat: float, radius_km: float) -> Tuple[float, float]:
+    """Latitude and longitude half-widths in degrees of a box covering a radius
+
+    The longitude span is the widest east-west extent of the circle, which
+    lies poleward of its centre; a circle reaching a pole spans every
+    longitude.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    lat_span = math.degrees(angle) + SPAN_PADDING
+    if angle >= math.pi / 2 or abs(lat) + lat_span >= 90.0:
+        return lat_span, 180.0
+    lon_span = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+    return lat_span, lon_span + SPAN_PADDING
+
+class GridIndex:
+    """In-memory point index over a uniform lat/lon grid.
+
+    Each key has exactly one position; upserting a key moves it. Nearest
+    neighbour queries search outward ring by ring and stop as soon as no
+    unvisited cell can hold a closer point.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.05):
+        if cell_size_deg <= 0:
+            raise ValueError("Cell size must be positive")
+        self.cell_size_deg = cell_size_deg
+        self.cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float, Any]]] = {}
+        self.positions: Dict[Hashable, Tuple[float, float, Tuple[int, int]]] = {}
+        # Bounding box of every cell ever occupied, in cell coordinates
+        self._bounds = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.positions
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (int(math.floor(lat / self.cell_size_deg)), int(math.floor(lon / self.cell_size_deg)))
+
+    def upsert(self, key: Hashable, lat: float, lon: float, data: Any = None) -> None:
+        """Insert a point or move an existing one"""
+        if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+            raise ValueError("Invalid coordinates")
+        cell = self._cell(lat, lon)
+        previous = self.positions.get(key)
+        if previous and previous[2] != cell:
+            self._discard(key, previous[2])
+        self.cells.setdefault(cell, {})[key] = (lat, lon, data)
+        self.positions[key] = (lat, lon, cell)
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[0], cell[1], cell[1]]
+        else:
+            bounds = self._bounds
+            bounds[0] = min(bounds[0], cell[0])
+            bounds[1] = max(bounds[1], cell[0])
+            bounds[2] = min(bounds[2], cell[1])
+            bounds[3] = max(bounds[3], cell[1])
+
+    def remove(self, key: Hashable) -> bool:
+        """Remove a point; returns False if the key was not indexed"""
+        previous = self.positions.pop(key, None)
+        if previous is None:
+            return False
+        self._discard(key, previous[2])
+        return True
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, float, Any]]:
+        """Get (lat, lon, data) for a key"""
+        position = self.positions.get(key)
+        if position is None:
+            return None
+        return self.cells[position[2]][key]
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                predicate: Optional[Callable[[Hashable, Any], bool]] = None,
+                max_km: Optional[float] = None) -> List[Tuple[float, Hashable, Any]]:
+        """Get up to k (distance_km, key, data) tuples closest to a point"""
+        if k <= 0 or not self.cells:
+            return []
+
+        center = self._cell(lat, lon)
+        max_ring = self._max_ring(center)
+        best = []  # max-heap of (-distance, key) limited to k entries
+        found = {}
+
+        for ring in range(max_ring + 1):
+            for cell in self._ring_cells(center, ring):
+                for key, (plat, plon, data) in self.cells.get(cell, {}).items():
+                    if predicate and not predicate(key, data):
+                        continue
+                    distance = haversine_km(lat, lon, plat, plon)
+                    if max_km is not None and distance > max_km:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, id(key), key))
+                        found[key] = (distance, data)
+                    elif distance < -best[0][0]:
+                        _, _, dropped = heapq.heappushpop(best, (-distance, id(key), key))
+                        found.pop(dropped, None)
+                        found[key] = (distance, data)
+
+            # Points in unvisited rings are at least this far away
+            reach = ring * self._min_cell_km(lat, ring)
+            if max_km is not None and reach > max_km:
+                break
+            if len(best) == k and -best[0][0] <= reach:
+                break
+
+        results = [(distance, key, data) for key, (distance, data) in found.items()]
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               predicate: Optional[Callable[[Hashable, Any], bool]] = None) -> List[Tuple[float, Hashable, Any]]:
+        """Get all (distance_km, key, data) tuples within a radius, nearest first"""
+        lat_span, lon_span = radius_spans(lat, radius_km)
+        low = self._cell(max(-90.0, lat - lat_span), max(-180.0, lon - lon_span))
+        high = self._cell(min(90.0, lat + lat_span), min(180.0, lon + lon_span))
+
+        results = []
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(self.cells):
+            candidate_cells = [cell for cell in self.cells
+                               if low[0] <= cell[0] <= high[0] and low[1] <= cell[1] <= high[1]]
+        else:
+            candidate_cells = [(i, j) for i in range(low[0], high[0] + 1) for j in range(low[1], high[1] + 1)]
+
+        for cell in candidate_cells:
+            for key, (plat, plon, data) in self.cells.get(cell, {}).items():
+                if predicate and not predicate(key, data):
+                    continue
+                distance = haversine_km(lat, lon, plat, plon)
+                if distance <= radius_km:
+                    results.append((distance, key, data))
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def _discard(self, key: Hashable, cell: Tuple[int, int]) -> None:
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.cells[cell]
+
+    def _max_ring(self, center: Tuple[int, int]) -> int:
+        """Ring count needed to cover every occupied cell"""
+        min_i, max_i, min_j, max_j = self._bounds
+        return max(center[0] - min_i, max_i - center[0], center[1] - min_j, max_j - center[1], 0)
+
+    def _min_cell_km(self, lat: float, ring: int) -> float:
+        """Smallest cell side in km within the first rings around a latitude"""
+        edge_lat = min(89.0, abs(lat) + (ring + 1) * self.cell_size_deg)
+        return self.cell_size_deg * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+
+    @staticmethod
+    def _ring_cells(center: Tuple[int, int], ring: int):
+        ci, cj = center
+        if ring == 0:
+            yield center
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield (ci - ring, j)
+            yield (ci + ring, j)
+        for i in range(ci - ring + 1, ci + ring):
+            yield (i, cj - ring)
+            yield (i, cj + ring)
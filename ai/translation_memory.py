@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+from instrumentation import record_cache
+
+class TranslationMemory:
+    """Persistent translation memory with an in-process LRU in front.
+
+    Translations are stored in SQLite keyed by (source, target, text), so
+    they survive restarts and are shared by every process on the host. The
+    most recently used entries are also kept in memory, bounded by lru_size.
+    """
+
+    def __init__(self, path: Optional[str] = None, lru_size: int = 10000):
+        self.path = path or ':memory:'
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        if path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                translated_text TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (source_lang, target_lang, source_text)
+            )
+        """)
+        self._conn.commit()
+        self.stats = {'lru_hits': 0, 'db_hits': 0, 'misses': 0}
+
+    def get_many(self, texts: Iterable[str], target_lang: str, source_lang: str = 'en') -> Dict[str, str]:
+        """Look up translations; returns only the texts that are known"""
+        found = {}
+        missing = []
+        with self._lock:
+            for text in texts:
+                key = (source_lang, target_lang, text)
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[text] = self._lru[key]
+                    self.stats['lru_hits'] += 1
+                else:
+                    missing.append(text)
+
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = self._conn.execute(f"""
+                    SELECT source_text, translated_text FROM translations
+                    WHERE source_lang = ? AND target_lang = ?
+                      AND source_text IN ({','.join('?' * len(chunk))})
+                """, [source_lang, target_lang] + chunk).fetchall()
+                for source_text, translated_text in rows:
+                    found[source_text] = translated_text
+                    self._remember((source_lang, target_lang, source_text), translated_text)
+                self.stats['db_hits'] += len(rows)
+            misses = len(missing) - sum(1 for text in missing if text in found)
+            self.stats['misses'] += misses
+        record_cache('translation_memory', True, len(found))
+        record_cache('translation_memory', False, misses)
+        return found
+
+    def get(self, text: str, target_lang: str, source_lang: str = 'en') -> Optional[str]:
+        """Look up a single translation"""
+        return self.get_many([text], target_lang, source_lang).get(text)
+
+    def put_many(self, translations: Dict[str, str], target_lang: str, source_lang: str = 'en') -> None:
+        """Store translations"""
+        if not translations:
+            return
+        with self._lock:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO translations (source_lang, target_lang, source_text, translated_text)
+                VALUES (?, ?, ?, ?)
+            """, [(source_lang, target_lang, text, translated)
+                  for text, translated in translations.items()])
+            self._conn.commit()
+            for text, translated in translations.items():
+                self._remember((source_lang, target_lang, text), translated)
+
+    def put(self, text: str, translated: str, target_lang: str, source_lang: str = 'en') -> None:
+        """Store a single translation"""
+        self.put_many({text: translated}, target_lang, source_lang)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, key, translated: str) -> None:
+        self._lru[key] = translated
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
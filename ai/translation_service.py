@@ -1,72 +1,127 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from config import TRANSLATION_CONFIG
+from ai.translation_memory import TranslationMemory
+from ai.ui_catalogue import load_catalogues
+from instrumentation import instrumented
 
 # Use the configuration values
 LIBRETRANSLATE_API_URL = TRANSLATION_CONFIG['base_url']
 SUPPORTED_LANGUAGES = TRANSLATION_CONFIG['supported_languages']
 
+# Common UI texts that need translation
+UI_TRANSLATIONS = {
+    'en': {
+        'emergency_alert': 'Emergency Alert',
+        'risk_assessment': 'Risk Assessment',
+        'volunteer_registration': 'Volunteer Registration',
+        'send_alert': 'Send Emergency Alert',
+        'assess_risk': 'Assess Risk',
+        'register_volunteer': 'Register as Volunteer',
+        'name': 'Name',
+        'phone': 'Phone Number',
+        'location': 'Location',
+        'type': 'Type',
+        'severity': 'Severity',
+        'description': 'Description',
+        'submit': 'Submit',
+        'status': 'Status',
+        'resources': 'Resources',
+        'teams': 'Response Teams',
+        'evacuation': 'Evacuation Plan',
+        'weather': 'Weather',
+        'alerts': 'Alerts',
+        'dashboard': 'Dashboard'
+    },
+    'hi': {
+        'emergency_alert': 'आपातकालीन अलर्ट',
+        'risk_assessment': 'जोखिम मूल्यांकन',
+        'volunteer_registration': 'स्वयंसेवक पंजीकरण',
+        'send_alert': 'आपातकालीन अलर्ट भेजें',
+        'assess_risk': 'जोखिम का आकलन करें',
+        'register_volunteer': 'स्वयंसेवक के रूप में पंजीकृत करें',
+        'name': 'नाम',
+        'phone': 'फोन नंबर',
+        'location': 'स्थान',
+        'type': 'प्रकार',
+        'severity': 'गंभीरता',
+        'description': 'विवरण',
+        'submit': 'जमा करें',
+        'status': 'स्थिति',
+        'resources': 'संसाधन',
+        'teams': 'प्रतिक्रिया टीमें',
+        'evacuation': 'निकासी योजना',
+        'weather': 'मौसम',
+        'alerts': 'अलर्ट',
+        'dashboard': 'डैशबोर्ड'
+    }
+}
+
 class TranslationService:
-    def __init__(self):
+    def __init__(self, memory: Optional[TranslationMemory] = None, catalogue_dir: Optional[str] = None):
         self.api_url = LIBRETRANSLATE_API_URL
+        self.api_key = TRANSLATION_CONFIG['api_key']
         self.supported_languages = SUPPORTED_LANGUAGES
-        self.cache = {}
+        self.batch_size = TRANSLATION_CONFIG['batch_size']
+        self.max_workers = TRANSLATION_CONFIG['max_workers']
+        if memory is None:
+            memory = TranslationMemory(TRANSLATION_CONFIG['memory_path'], TRANSLATION_CONFIG['lru_size'])
+        self.memory = memory
+        # Pre-translated UI catalogues built by ai/ui_catalogue.py
+        self.ui_catalogues = load_catalogues(catalogue_dir or TRANSLATION_CONFIG['catalogue_dir'],
+                                             self.supported_languages)
 
     def translate_text(self, text: str, target_lang: str, source_lang: str = 'en') -> str:
         """Translate text to target language"""
-        if target_lang not in self.supported_languages:
-            return text
-        
-        cache_key = f"{source_lang}_{target_lang}_{text}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-        
-        try:
-            response = requests.post(
-                f"{self.api_url}/translate",
-                json={
-                    "q": text,
-                    "source": source_lang,
-                    "target": target_lang
-                }
-            )
-            response.raise_for_status()
-            translated_text = response.json()["translatedText"]
-            
-            # Cache the result
-            self.cache[cache_key] = translated_text
-            return translated_text
-        except requests.exceptions.RequestException as e:
-            print(f"Translation error: {e}")
-            return text
+        return self.translate_batch([text], target_lang, source_lang)[0]
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: str = 'en') -> List[str]:
+        """Translate many strings, sending only unknown ones to the API
+
+        Unique strings missing from the translation memory go out in chunks
+        of batch_size, concurrently, one request per chunk. Strings that
+        fail to translate are returned unchanged.
+        """
+        if target_lang not in self.supported_languages or target_lang == source_lang:
+            return list(texts)
+
+        unique = [text for text in dict.fromkeys(texts) if text and text.strip()]
+        known = self.memory.get_many(unique, target_lang, source_lang)
+        missing = [text for text in unique if text not in known]
+
+        if missing:
+            chunks = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            if len(chunks) == 1:
+                results = [self._request_translations(chunks[0], target_lang, source_lang)]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                    results = list(executor.map(
+                        lambda chunk: self._request_translations(chunk, target_lang, source_lang),
+                        chunks
+                    ))
+            translated = {}
+            for result in results:
+                translated.update(result)
+            self.memory.put_many(translated, target_lang, source_lang)
+            known.update(translated)
+
+        return [known.get(text, text) for text in texts]
 
     def translate_dict(self, data: Dict, target_lang: str, source_lang: str = 'en') -> Dict:
         """Translate all string values in a dictionary"""
-        translated = {}
-        for key, value in data.items():
-            if isinstance(value, str):
-                translated[key] = self.translate_text(value, target_lang, source_lang)
-            elif isinstance(value, dict):
-                translated[key] = self.translate_dict(value, target_lang, source_lang)
-            elif isinstance(value, list):
-                translated[key] = self.translate_list(value, target_lang, source_lang)
-            else:
-                translated[key] = value
-        return translated
+        return self.translate_payload(data, target_lang, source_lang)
 
     def translate_list(self, items: List, target_lang: str, source_lang: str = 'en') -> List:
         """Translate all string items in a list"""
-        translated = []
-        for item in items:
-            if isinstance(item, str):
-                translated.append(self.translate_text(item, target_lang, source_lang))
-            elif isinstance(item, dict):
-                translated.append(self.translate_dict(item, target_lang, source_lang))
-            elif isinstance(item, list):
-                translated.append(self.translate_list(item, target_lang, source_lang))
-            else:
-                translated.append(item)
-        return translated
+        return self.translate_payload(items, target_lang, source_lang)
+
+    def translate_payload(self, payload, target_lang: str, source_lang: str = 'en'):
+        """Translate every string in a nested payload with one batched lookup"""
+        strings = []
+        self._collect_strings(payload, strings)
+        translations = dict(zip(strings, self.translate_batch(strings, target_lang, source_lang)))
+        return self._replace_strings(payload, translations)
 
     def get_supported_languages(self) -> List[str]:
         """Get list of supported languages"""
@@ -85,56 +140,70 @@ class TranslationService:
             print(f"Language detection error: {e}")
             return 'en'  # Default to English if detection fails
 
-    def translate_ui_texts(self, ui_texts: Dict, target_lang: str) -> Dict:
-        """Translate UI texts for the application"""
-        # Common UI texts that need translation
-        ui_translations = {
-            'en': {
-                'emergency_alert': 'Emergency Alert',
-                'risk_assessment': 'Risk Assessment',
-                'volunteer_registration': 'Volunteer Registration',
-                'send_alert': 'Send Emergency Alert',
-                'assess_risk': 'Assess Risk',
-                'register_volunteer': 'Register as Volunteer',
-                'name': 'Name',
-                'phone': 'Phone Number',
-                'location': 'Location',
-                'type': 'Type',
-                'severity': 'Severity',
-                'description': 'Description',
-                'submit': 'Submit',
-                'status': 'Status',
-                'resources': 'Resources',
-                'teams': 'Response Teams',
-                'evacuation': 'Evacuation Plan',
-                'weather': 'Weather',
-                'alerts': 'Alerts',
-                'dashboard': 'Dashboard'
-            },
-            'hi': {
-                'emergency_alert': 'आपातकालीन अलर्ट',
-                'risk_assessment': 'जोखिम मूल्यांकन',
-                'volunteer_registration': 'स्वयंसेवक पंजीकरण',
-                'send_alert': 'आपातकालीन अलर्ट भेजें',
-                'assess_risk': 'जोखिम का आकलन करें',
-                'register_volunteer': 'स्वयंसेवक के रूप में पंजीकृत करें',
-                'name': 'नाम',
-                'phone': 'फोन नंबर',
-                'location': 'स्थान',
-                'type': 'प्रकार',
-                'severity': 'गंभीरता',
-                'description': 'विवरण',
-                'submit': 'जमा करें',
-                'status': 'स्थिति',
-                'resources': 'संसाधन',
-                'teams': 'प्रतिक्रिया टीमें',
-                'evacuation': 'निकासी योजना',
-                'weather': 'मौसम',
-                'alerts': 'अलर्ट',
-                'dashboard': 'डैशबोर्ड'
-            }
+    def translate_ui_texts(self, ui_texts: Dict, target_lang: str, use_catalogue: bool = True) -> Dict:
+        """Translate UI texts for the application
+
+        Entries from the pre-built catalogue for the language (or the curated
+        translations above) are used as they are; everything else, including
+        extra texts passed in, is translated in one batch.
+        """
+        ui_texts = ui_texts or {}
+        catalogue = dict(UI_TRANSLATIONS['en'], **ui_texts)
+        if target_lang not in self.supported_languages:
+            return catalogue
+
+        # Texts identical to the catalogue's English need no new translation
+        ui_texts = {key: text for key, text in ui_texts.items()
+                    if UI_TRANSLATIONS['en'].get(key) != text}
+        if use_catalogue and target_lang in self.ui_catalogues:
+            curated = self.ui_catalogues[target_lang].to_dict()
+        else:
+            curated = UI_TRANSLATIONS.get(target_lang, {})
+
+        keys = [key for key in catalogue
+                if key not in curated or key in ui_texts]
+        translated = self.translate_batch([catalogue[key] for key in keys], target_lang)
+
+        result = {key: curated.get(key, catalogue[key]) for key in catalogue}
+        result.update(zip(keys, translated))
+        return result
+
+    @instrumented('http', 'libretranslate.translate')
+    def _request_translations(self, texts: List[str], target_lang: str, source_lang: str) -> Dict[str, str]:
+        payload = {
+            "q": texts,
+            "source": source_lang,
+            "target": target_lang,
+            "format": "text"
         }
-        
-        if target_lang in ui_translations:
-            return ui_translations[target_lang]
-        return ui_translations['en']  # Default to English if language not supported 
\ No newline at end of file
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        try:
+            response = requests.post(f"{self.api_url}/translate", json=payload, timeout=10)
+            response.raise_for_status()
+            translated = response.json()["translatedText"]
+            if isinstance(translated, str):
+                translated = [translated]
+            return dict(zip(texts, translated))
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            print(f"Translation error: {e}")
+            return {}
+
+    def _collect_strings(self, value, strings: List[str]) -> None:
+        if isinstance(value, str):
+            strings.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                self._collect_strings(item, strings)
+        elif isinstance(value, list):
+            for item in value:
+                self._collect_strings(item, strings)
+
+    def _replace_strings(self, value, translations: Dict[str, str]):
+        if isinstance(value, str):
+            return translations.get(value, value)
+        if isinstance(value, dict):
+            return {key: self._replace_strings(item, translations) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._replace_strings(item, translations) for item in value]
+        return value
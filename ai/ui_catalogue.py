@@ -0,0 +1,140 @@
+import argparse
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, Optional
+
+# File layout: magic, entry count, then one (key offset, key length,
+# value offset, value length) record per entry sorted by key, then the
+# UTF-8 string data. Lookups binary-search the records in place.
+MAGIC = b'UIC1'
+HEADER = struct.Struct('<4sI')
+RECORD = struct.Struct('<IIII')
+
+def catalogue_path(directory: str, language: str) -> str:
+    return os.path.join(directory, f"ui_{language}.cat")
+
+def write_catalogue(path: str, texts: Dict[str, str]) -> int:
+    """Write a lookup file atomically; returns its size in bytes"""
+    entries = sorted((key.encode('utf-8'), value.encode('utf-8')) for key, value in texts.items())
+    data_start = HEADER.size + RECORD.size * len(entries)
+
+    records = []
+    blob = bytearray()
+    for key, value in entries:
+        key_offset = data_start + len(blob)
+        blob += key
+        value_offset = data_start + len(blob)
+        blob += value
+        records.append(RECORD.pack(key_offset, len(key), value_offset, len(value)))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        f.write(b''.join(records))
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return data_start + len(blob)
+
+class MmapCatalogue:
+    """Read-only UI text lookup backed by a memory-mapped catalogue file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a UI catalogue file: {path}")
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Look up one text by key"""
+        target = key.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = self._record(middle)
+            current = self._map[key_offset:key_offset + key_length]
+            if current < target:
+                low = middle + 1
+            elif current > target:
+                high = middle
+            else:
+                return self._map[value_offset:value_offset + value_length].decode('utf-8')
+        return default
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self) -> Iterator:
+        for index in range(self._count):
+            key_offset, key_length, value_offset, value_length = self._record(index)
+            yield (self._map[key_offset:key_offset + key_length].decode('utf-8'),
+                   self._map[value_offset:value_offset + value_length].decode('utf-8'))
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self.items())
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _record(self, index: int) -> tuple:
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+def load_catalogues(directory: str, languages) -> Dict[str, MmapCatalogue]:
+    """Map every catalogue present in the directory; missing languages are skipped"""
+    catalogues = {}
+    for language in languages:
+        path = catalogue_path(directory, language)
+        if os.path.exists(path):
+            catalogues[language] = MmapCatalogue(path)
+    return catalogues
+
+def build_catalogues(directory: str, translator, languages=None) -> Dict[str, int]:
+    """Pre-translate the UI catalogue for every language; returns entries written per language
+
+    Texts that came back as their English source, because the translation
+    request failed, are left out so they are translated again at runtime
+    instead of being pinned as English in the catalogue.
+    """
+    from ai.translation_service import UI_TRANSLATIONS
+
+    languages = languages or translator.get_supported_languages()
+    written = {}
+    for language in languages:
+        curated = UI_TRANSLATIONS.get(language, {})
+        texts = {key: text for key, text in
+                 translator.translate_ui_texts({}, language, use_catalogue=False).items()
+                 if key in curated or language == 'en' or text != UI_TRANSLATIONS['en'].get(key)}
+        write_catalogue(catalogue_path(directory, language), texts)
+        written[language] = len(texts)
+    return written
+
+if __name__ == '__main__':
+    from config import TRANSLATION_CONFIG, init_config
+    from ai.translation_service import TranslationService
+
+    init_config(validate=False)
+
+    parser = argparse.ArgumentParser(description="Pre-translate the UI string catalogue")
+    parser.add_argument('--output', default=TRANSLATION_CONFIG['catalogue_dir'])
+    parser.add_argument('--languages', nargs='*', default=None)
+    args = parser.parse_args()
+
+    service = TranslationService()
+    for language, count in build_catalogues(args.output, service, args.languages).items():
+        print(f"{language}: {count} texts -> {catalogue_path(args.output, language)}")
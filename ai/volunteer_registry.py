@@ -0,0 +1,299 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from ai.audience_resolver import normalize_phone
+from ai.risk_grid import GRID_POINTS
+from ai.spatial_index import haversine_km, radius_spans
+from config import GEOCODING_CONFIG, VOLUNTEER_CONFIG
+
+def normalize_term(value: str) -> str:
+    """Case- and whitespace-insensitive form of a free-text value"""
+    return ' '.join(str(value).lower().split())
+
+class Geocoder:
+    """Free-text place names to coordinates, looked up once per place.
+
+    District headquarters resolve from GRID_POINTS without a request. Other
+    places go to Nominatim at most once a second, as its usage policy asks.
+    Every answer is kept in SQLite, including places that could not be
+    found, so restarts and other processes never repeat a lookup.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, session=None, min_interval: float = 1.0):
+        self.path = cache_path or ':memory:'
+        if cache_path:
+            directory = os.path.dirname(cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.session = session
+        self.min_interval = min_interval
+        self.logger = logging.getLogger(__name__)
+        self._known = {normalize_term(name): (lat, lon) for name, lat, lon, _ in GRID_POINTS}
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                place TEXT PRIMARY KEY,
+                latitude REAL,
+                longitude REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self._conn.commit()
+        self.stats = {'hits': 0, 'lookups': 0, 'failures': 0}
+
+    def geocode(self, place: str) -> Optional[Tuple[float, float]]:
+        """(latitude, longitude) for a place name, or None if it cannot be found"""
+        key = normalize_term(place)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._known:
+                self.stats['hits'] += 1
+                return self._known[key]
+            row = self._conn.execute("SELECT latitude, longitude FROM geocodes WHERE place = ?", (key,)).fetchone()
+            if row is not None:
+                self.stats['hits'] += 1
+                coordinates = self._known[key] = (row[0], row[1]) if row[0] is not None else None
+                return coordinates
+
+            try:
+                coordinates = self._lookup(key)
+            except Exception as e:
+                # Not cached, so the place is retried on the next request
+                self.stats['failures'] += 1
+                self.logger.error(f"Geocoding failed for {place}: {str(e)}")
+                return None
+            self._conn.execute("INSERT OR REPLACE INTO geocodes (place, latitude, longitude) VALUES (?, ?, ?)",
+                               (key,) + (coordinates or (None, None)))
+            self._conn.commit()
+            self._known[key] = coordinates
+            return coordinates
+
+    def _lookup(self, place: str) -> Optional[Tuple[float, float]]:
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+        wait = self._last_request + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.stats['lookups'] += 1
+        try:
+            response = self.session.get(GEOCODING_CONFIG['url'], params={
+                'q': f"{place}, {GEOCODING_CONFIG['region']}",
+                'format': 'json',
+                'limit': 1,
+                'countrycodes': GEOCODING_CONFIG['country_codes']
+            }, headers={'User-Agent': GEOCODING_CONFIG['user_agent']}, timeout=GEOCODING_CONFIG['timeout'])
+            response.raise_for_status()
+            results = response.json()
+        finally:
+            self._last_request = time.monotonic()
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+    def close(self) -> None:
+        self._conn.close()
+
+def iter_slots(bitmap: int) -> Iterator[int]:
+    """Positions of the set bits, lowest first"""
+    bits = bin(bitmap)[:1:-1]
+    i = bits.find('1')
+    while i != -1:
+        yield i
+        i = bits.find('1', i + 1)
+
+class VolunteerRegistry:
+    """In-memory volunteer index for matching volunteers to incidents.
+
+    Each volunteer gets a slot number. Every indexed value (a skill, a
+    language, an availability, a grid cell) maps to an int bitmap of the
+    slots that have it. A query ORs the bitmaps within each field, ANDs the
+    fields together with the cells around the search point, and checks
+    exact distances only for the slots left. Values match case- and
+    whitespace-insensitively. Volunteers are keyed by normalized phone
+    number, falling back to email; adding a known key replaces the entry.
+    """
+
+    FIELDS = ('skills', 'languages', 'availability')
+
+    def __init__(self, geocode: Optional[Callable[[str], Optional[Tuple[float, float]]]] = None,
+                 cell_size_deg: Optional[float] = None):
+        if geocode is None:
+            geocode = Geocoder(GEOCODING_CONFIG['cache_path']).geocode
+        self.geocode = geocode
+        self.cell_size_deg = cell_size_deg or VOLUNTEER_CONFIG['cell_size_deg']
+        self.logger = logging.getLogger(__name__)
+        self.volunteers: List[Optional[Dict]] = []
+        self.positions: List[Optional[Tuple[float, float]]] = []
+        self.slots: Dict[str, int] = {}
+        self.indexes: Dict[str, Dict[str, int]] = {field: {} for field in self.FIELDS}
+        self.cells: Dict[Tuple[int, int], int] = {}
+        self.live = 0
+        self._free: List[int] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size_deg), math.floor(lon / self.cell_size_deg))
+
+    @staticmethod
+    def _key(volunteer: Dict) -> Optional[str]:
+        phone = normalize_phone(volunteer.get('phone') or '')
+        if phone:
+            return phone
+        email = (volunteer.get('email') or '').strip().lower()
+        return email or None
+
+    @staticmethod
+    def _terms(value) -> set:
+        if value is None:
+            return set()
+        if isinstance(value, str):
+            value = value.split(',')
+        return {normalize_term(v) for v in value if normalize_term(v)}
+
+    def add(self, volunteer: Dict) -> Optional[int]:
+        """Index a volunteer record; returns its slot, or None without a phone or email"""
+        key = self._key(volunteer)
+        if key is None:
+            self.logger.warning(f"Skipping volunteer without phone or email: {volunteer.get('name')}")
+            return None
+
+        place = (volunteer.get('location') or '').strip()
+        position = self.geocode(place) if place else None
+        if place and position is None:
+            self.logger.warning(f"Could not geocode volunteer location: {place}")
+
+        with self._lock:
+            self.remove(key)
+            slot = self._free.pop() if self._free else len(self.volunteers)
+            if slot == len(self.volunteers):
+                self.volunteers.append(None)
+                self.positions.append(None)
+            bit = 1 << slot
+            self.volunteers[slot] = volunteer
+            self.positions[slot] = position
+            self.slots[key] = slot
+            self.live |= bit
+            for field in self.FIELDS:
+                index = self.indexes[field]
+                for term in self._terms(volunteer.get(field)):
+                    index[term] = index.get(term, 0) | bit
+            if position is not None:
+                cell = self._cell(*position)
+                self.cells[cell] = self.cells.get(cell, 0) | bit
+            return slot
+
+    def remove(self, key: str) -> bool:
+        """Drop a volunteer by key; returns False if unknown"""
+        with self._lock:
+            slot = self.slots.pop(key, None)
+            if slot is None:
+                return False
+            bit = 1 << slot
+            volunteer, position = self.volunteers[slot], self.positions[slot]
+            for field in self.FIELDS:
+                index = self.indexes[field]
+                for term in self._terms(volunteer.get(field)):
+                    index[term] &= ~bit
+                    if not index[term]:
+                        del index[term]
+            if position is not None:
+                cell = self._cell(*position)
+                self.cells[cell] &= ~bit
+                if not self.cells[cell]:
+                    del self.cells[cell]
+            self.live &= ~bit
+            self.volunteers[slot] = None
+            self.positions[slot] = None
+            self._free.append(slot)
+            return True
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Index every volunteer in a volunteers.json file; returns the number indexed"""
+        with open(path or VOLUNTEER_CONFIG['path']) as f:
+            volunteers = json.load(f)
+        return sum(1 for volunteer in volunteers if self.add(volunteer) is not None)
+
+    def _field_bitmap(self, field: str, values: Iterable[str]) -> int:
+        index = self.indexes[field]
+        bitmap = 0
+        for term in self._terms(values):
+            bitmap |= index.get(term, 0)
+        return bitmap
+
+    def _area_bitmap(self, lat: float, lon: float, radius_km: float) -> int:
+        lat_span, lon_span = radius_spans(lat, radius_km)
+        low = self._cell(lat - lat_span, lon - lon_span)
+        high = self._cell(lat + lat_span, lon + lon_span)
+
+        bitmap = 0
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(self.cells):
+            for cell, cell_bitmap in self.cells.items():
+                if low[0] <= cell[0] <= high[0] and low[1] <= cell[1] <= high[1]:
+                    bitmap |= cell_bitmap
+        else:
+            for i in range(low[0], high[0] + 1):
+                for j in range(low[1], high[1] + 1):
+                    bitmap |= self.cells.get((i, j), 0)
+        return bitmap
+
+    def match(self, skills: Optional[Iterable[str]] = None, languages: Optional[Iterable[str]] = None,
+              availability: Optional[Iterable[str]] = None) -> int:
+        """Bitmap of volunteers with any of the skills, any of the languages and any of the availabilities"""
+        with self._lock:
+            bitmap = self.live
+            for field, values in (('skills', skills), ('languages', languages), ('availability', availability)):
+                if values is not None:
+                    bitmap &= self._field_bitmap(field, values)
+                    if not bitmap:
+                        break
+            return bitmap
+
+    def query(self, lat: Optional[float] = None, lon: Optional[float] = None,
+              radius_km: Optional[float] = None, skills: Optional[Iterable[str]] = None,
+              languages: Optional[Iterable[str]] = None, availability: Optional[Iterable[str]] = None,
+              limit: Optional[int] = None) -> List[Tuple[Optional[float], Dict]]:
+        """Find matching volunteers as (distance_km, volunteer) pairs.
+
+        With a point and radius the results are the volunteers inside it,
+        nearest first. Without one, distance is None and results are in
+        slot order.
+        """
+        with self._lock:
+            bitmap = self.match(skills, languages, availability)
+            if radius_km is None:
+                results = [(None, self.volunteers[slot]) for slot in iter_slots(bitmap)]
+                return results[:limit] if limit is not None else results
+
+            if bitmap:
+                bitmap &= self._area_bitmap(lat, lon, radius_km)
+            results = []
+            for slot in iter_slots(bitmap):
+                plat, plon = self.positions[slot]
+                distance = haversine_km(lat, lon, plat, plon)
+                if distance <= radius_km:
+                    results.append((distance, self.volunteers[slot]))
+        results.sort(key=lambda item: item[0])
+        return results[:limit] if limit is not None else results
+
+    def count(self, skills: Optional[Iterable[str]] = None, languages: Optional[Iterable[str]] = None,
+              availability: Optional[Iterable[str]] = None) -> int:
+        """Number of matching volunteers anywhere, from the bitmaps alone"""
+        return bin(self.match(skills, languages, availability)).count('1')
+
+    def facets(self) -> Dict[str, Dict[str, int]]:
+        """Volunteer counts for every indexed skill, language and availability"""
+        with self._lock:
+            return {field: {term: bin(bitmap).count('1') for term, bitmap in sorted(index.items())}
+                    for field, index in self.indexes.items()}
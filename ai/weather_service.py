@@ -2,9 +2,9 @@ import requests
 import json
 from datetime import datetime, timedelta
 from config import WEATHER_CONFIG
-import logging
 from collections import deque
 import time
+from instrumentation import get_service_logger, timer
 
 class WeatherService:
     def __init__(self):
@@ -28,12 +28,7 @@ class WeatherService:
         self.total_requests = 0
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/weather_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/weather_service.log')
 
     def _track_accuracy_metrics(self, weather_data):
         """Track accuracy metrics for weather data"""
@@ -105,7 +100,8 @@ class WeatherService:
         self._check_rate_limit()
         
         try:
-            response = requests.get(url, params=params, timeout=10)  # Add timeout
+            with timer('http', 'openweather'):
+                response = requests.get(url, params=params, timeout=10)  # Add timeout
             response.raise_for_status()
             return response.json()
         except requests.Timeout:
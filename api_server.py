@@ -0,0 +1,214 @@
+"""Production API server.
+
+Serves the endpoints simple_app.py stubs out, backed by the real services:
+predictions from the district risk grid, realtime weather from the weather
+gateway plus recent earthquakes from the incidents table, and community and
+gamification data from Postgres.
+
+Run it under gunicorn, which forks the worker processes and keeps
+connections alive (see gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py api_server:app
+
+Every successful GET gets a strong ETag over its body and, where the data
+has a modification time, a Last-Modified header. Repeat requests carrying
+If-None-Match or If-Modified-Since get a bodiless 304. Bodies over
+API_CONFIG['gzip_min_bytes'] are gzipped when the client accepts it.
+
+The read-mostly endpoints are served from response_cache.ResponseCache in
+front of Flask, with precomputed gzip and brotli bodies and per-endpoint
+TTLs. Writes to the tables behind them invalidate the cache in every
+worker.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+import instrumentation
+import profiler
+import tracing
+from config import API_CONFIG, DB_CONFIG, RESPONSE_CACHE_CONFIG, init_config
+from response_cache import ResponseCache
+
+COMPRESSIBLE_TYPES = {'application/json', 'text/plain', 'text/html', 'text/csv', 'image/svg+xml'}
+
+# Headers a 304 must repeat from the full response
+NOT_MODIFIED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary', 'Expires')
+
+def json_response(payload, last_modified: Optional[datetime] = None, max_age: int = 0):
+    """JSON response carrying the caching metadata finalize_response acts on"""
+    response = jsonify(payload)
+    if last_modified is not None:
+        # HTTP dates have one-second resolution
+        response.last_modified = last_modified.replace(microsecond=0)
+    response.headers['Cache-Control'] = f"public, max-age={max_age}, must-revalidate"
+    return response
+
+def _accepts_gzip() -> bool:
+    return request.accept_encodings.quality('gzip') > 0
+
+def _not_modified(response, etag: str) -> bool:
+    if request.if_none_match:
+        # Either encoding of the same body counts as a match
+        return (request.if_none_match.contains_weak(etag)
+                or request.if_none_match.contains_weak(f"{etag}-gzip"))
+    since = request.if_modified_since
+    return since is not None and response.last_modified is not None and response.last_modified <= since
+
+def finalize_response(response):
+    """Add an ETag, answer conditional requests with 304 and gzip the body"""
+    if (request.method not in ('GET', 'HEAD') or response.status_code != 200
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or 'ETag' in response.headers):
+        return response
+
+    body = response.get_data()
+    etag = hashlib.sha1(body).hexdigest()[:32]
+    compress = (len(body) >= API_CONFIG['gzip_min_bytes']
+                and response.mimetype in COMPRESSIBLE_TYPES and _accepts_gzip())
+    response.set_etag(f"{etag}-gzip" if compress else etag)
+    response.vary.add('Accept-Encoding')
+
+    if _not_modified(response, etag):
+        not_modified = response.__class__(status=304)
+        for header in NOT_MODIFIED_HEADERS:
+            if header in response.headers:
+                not_modified.headers[header] = response.headers[header]
+        return not_modified
+
+    if compress:
+        response.set_data(gzip.compress(body, compresslevel=API_CONFIG['gzip_level'], mtime=0))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def create_app(risk_grid=None, weather=None, incidents=None, store=None, leaderboard=None,
+               cache: Optional[bool] = None) -> Flask:
+    """Build the API app; the services are created on first use unless passed in"""
+    app = Flask(__name__)
+    app.json.sort_keys = False
+    CORS(app)
+    tracing.init_app(app)
+    profiler.init_app(app)
+    instrumentation.init_app(app)
+
+    services: Dict = {'risk_grid': risk_grid, 'weather': weather, 'incidents': incidents, 'store': store,
+                      'leaderboard': leaderboard}
+    services_lock = threading.Lock()
+
+    def service(name: str):
+        if services[name] is not None:
+            return services[name]
+        with services_lock:
+            if services[name] is not None:
+                return services[name]
+            if name == 'risk_grid':
+                from ai.risk_grid import RiskGrid
+                services[name] = RiskGrid(ttl_seconds=API_CONFIG['prediction_ttl'])
+            elif name == 'weather':
+                from ai.weather_service import WeatherService
+                services[name] = WeatherService()
+            elif name == 'incidents':
+                from services.incident_service import IncidentService
+                services[name] = IncidentService()
+            elif name == 'leaderboard':
+                from ai.leaderboard import Leaderboard
+                services[name] = Leaderboard(DB_CONFIG)
+            else:
+                from ai.community_store import CommunityStore
+                services[name] = CommunityStore(DB_CONFIG, API_CONFIG['db_pool_size'])
+        return services[name]
+
+    @app.errorhandler(Exception)
+    def handle_error(e):
+        if isinstance(e, HTTPException):
+            return jsonify({'error': e.description}), e.code
+        logging.error(f"Error serving {request.path}: {str(e)}")
+        return jsonify({'error': 'Service temporarily unavailable'}), 503
+
+    @app.route('/healthz', methods=['GET'])
+    def healthz():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/api/predictions', methods=['GET'])
+    def get_predictions():
+        predictions, computed_at = service('risk_grid').predictions()
+        return json_response(predictions, computed_at, max_age=60)
+
+    @app.route('/api/realtime-data', methods=['GET'])
+    def get_realtime_data():
+        default_lat, default_lon = API_CONFIG['default_location']
+        lat = request.args.get('lat', default_lat, type=float)
+        lon = request.args.get('lon', default_lon, type=float)
+        earthquakes = service('incidents').get_recent_incidents('earthquake', hours=24)
+        data = {
+            'weather': service('weather').get_current_weather(lat, lon),
+            'seismic': [{
+                'time': quake['timestamp'].isoformat() if quake['timestamp'] else None,
+                'severity': quake['severity'],
+                'status': quake['status'],
+                'description': quake['description'],
+                'lat': quake['latitude'],
+                'lng': quake['longitude']
+            } for quake in earthquakes]
+        }
+        return json_response(data, max_age=30)
+
+    @app.route('/api/community/partnerships', methods=['GET'])
+    def get_community_partnerships():
+        partnerships, last_modified = service('store').get_partnerships()
+        return json_response(partnerships, last_modified, max_age=300)
+
+    @app.route('/api/community/challenges', methods=['GET'])
+    def get_community_challenges():
+        challenges, last_modified = service('store').get_challenges()
+        return json_response(challenges, last_modified, max_age=300)
+
+    @app.route('/api/gamification/leaderboard', methods=['GET'])
+    def get_leaderboard():
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        standings = service('leaderboard').top(limit)
+        profiles = service('store').get_profiles([user_id for _, user_id, _ in standings])
+        leaderboard = [{
+            'id': user_id,
+            'username': profiles[user_id]['username'],
+            'points': points,
+            'badges': profiles[user_id]['badges'],
+            'rank': rank
+        } for rank, user_id, points in standings if user_id in profiles]
+        return json_response(leaderboard, max_age=30)
+
+    @app.route('/api/gamification/user/<int:user_id>', methods=['GET'])
+    def get_user_gamification(user_id):
+        user = service('store').get_profiles([user_id]).get(user_id)
+        if user is None:
+            return jsonify({'error': 'User not found'}), 404
+        user['points'] = service('leaderboard').points(user_id)
+        user['rank'] = service('leaderboard').rank(user_id)
+        return json_response(user, max_age=30)
+
+    @app.route('/api/gamification/badges', methods=['GET'])
+    def get_available_badges():
+        badges, last_modified = service('store').get_badges()
+        return json_response(badges, last_modified, max_age=3600)
+
+    app.after_request(finalize_response)
+
+    if RESPONSE_CACHE_CONFIG['enabled'] if cache is None else cache:
+        listen_db = DB_CONFIG if RESPONSE_CACHE_CONFIG['listen'] and store is None else None
+        app.wsgi_app = ResponseCache(app.wsgi_app, listen_db=listen_db)
+        app.response_cache = app.wsgi_app
+    return app
+
+app = create_app()
+
+if __name__ == '__main__':
+    # Local runs only; production goes through gunicorn
+    from werkzeug.serving import WSGIRequestHandler, run_simple
+    init_config()
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'  # keep-alive
+    run_simple('0.0.0.0', 8000, app, threaded=True)
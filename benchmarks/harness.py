@@ -0,0 +1,131 @@
+import json
+import math
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile of unsorted samples, q in [0, 100]"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize(latencies_ms: List[float], wall_seconds: float, errors: int = 0,
+              units_per_call: int = 1) -> Dict:
+    """Latency percentiles and throughput for one scenario run"""
+    calls = len(latencies_ms)
+    summary = {
+        'calls': calls,
+        'errors': errors,
+        'wall_seconds': round(wall_seconds, 4),
+        'throughput_per_second': round(calls / wall_seconds, 2) if wall_seconds > 0 else None,
+        'mean_ms': round(sum(latencies_ms) / calls, 3) if calls else None,
+        'max_ms': round(max(latencies_ms), 3) if calls else None
+    }
+    for q in (50, 95, 99):
+        value = percentile(latencies_ms, q)
+        summary[f'p{q}_ms'] = round(value, 3) if value is not None else None
+    if units_per_call != 1 and wall_seconds > 0:
+        summary['units_per_second'] = round(calls * units_per_call / wall_seconds, 2)
+    return summary
+
+def run_scenario(fn: Callable[[int], object], iterations: int = 100, warmup: int = 5,
+                 concurrency: int = 1, units_per_call: int = 1) -> Dict:
+    """Call fn(i) ``iterations`` times across ``concurrency`` threads and time each call
+
+    Failed calls are counted but not timed. The first error message is kept so
+    a broken scenario is visible in the results rather than silently fast.
+    """
+    for i in range(warmup):
+        fn(-1 - i)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(iterations))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            try:
+                fn(i)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed_ms)
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        worker()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(worker)
+    wall = time.perf_counter() - started
+
+    summary = summarize(latencies, wall, len(errors), units_per_call)
+    summary['concurrency'] = concurrency
+    if errors:
+        summary['first_error'] = errors[0]
+    return summary
+
+def environment_info() -> Dict:
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine()
+    }
+
+def write_results(path: str, results: Dict[str, Dict], settings: Optional[Dict] = None) -> Dict:
+    document = {
+        'environment': environment_info(),
+        'settings': settings or {},
+        'scenarios': results
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+def load_results(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.2,
+            metrics: tuple = ('p50_ms', 'p95_ms', 'p99_ms')) -> List[Dict]:
+    """Latency metrics that grew by more than ``tolerance`` over the baseline"""
+    regressions = []
+    base_scenarios = baseline.get('scenarios', {})
+    for name, result in current.get('scenarios', {}).items():
+        before = base_scenarios.get(name)
+        if not before or result.get('status') != 'ok' or before.get('status') != 'ok':
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > tolerance:
+                regressions.append({
+                    'scenario': name,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': round(change, 3)
+                })
+    return regressions
@@ -0,0 +1,112 @@
+"""Run the hot-path benchmark suite and record latency percentiles to JSON.
+
+Database scenarios run against the Postgres/PostGIS database in DB_CONFIG,
+seeded at scale with ``python insert_sample_data.py --scale 10000``. Weather,
+SMS and translation calls go to an in-process stub server
+(stubs/service_stub.py), so no external API is contacted.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --only translation sms_fanout --baseline results.json
+
+With --baseline the run exits non-zero if any p50/p95/p99 grew by more than
+--tolerance over the baseline file.
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+from werkzeug.serving import make_server
+from config import DB_CONFIG, init_config
+from profiler import FORMATS, PROFILER, install_signal_toggle
+from benchmarks.harness import compare, load_results, run_scenario, write_results
+from benchmarks.scenarios import SCENARIOS, query_points
+from stubs.service_stub import create_app
+
+def start_stub_server(latency: float = 0.0) -> tuple:
+    """Serve the combined stub on an ephemeral local port"""
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, create_app(latency), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def database_available() -> bool:
+    import psycopg2
+    try:
+        psycopg2.connect(connect_timeout=3, **DB_CONFIG).close()
+        return True
+    except Exception as e:
+        logging.warning(f"Database unavailable, skipping database scenarios: {str(e)}")
+        return False
+
+def run_suite(names, iterations=None, concurrency=None, stub_latency: float = 0.0,
+              use_db: bool = True) -> dict:
+    """Run the named scenarios; unavailable or failing ones are recorded, not raised"""
+    server, stub_url = start_stub_server(stub_latency)
+    available = {'stub'}
+    if use_db and database_available():
+        available.add('db')
+    ctx = {'stub_url': stub_url, 'points': query_points()}
+
+    results = {}
+    try:
+        for name in names:
+            scenario = SCENARIOS[name]
+            missing = scenario['requires'] - available
+            if missing:
+                results[name] = {'status': 'skipped', 'reason': f"requires {', '.join(sorted(missing))}"}
+                continue
+            try:
+                fn = scenario['build'](ctx)
+                result = run_scenario(
+                    fn,
+                    iterations=iterations or scenario.get('iterations', 100),
+                    warmup=scenario.get('warmup', 5),
+                    concurrency=concurrency or scenario.get('concurrency', 1),
+                    units_per_call=scenario.get('units_per_call', 1)
+                )
+            except Exception as e:
+                results[name] = {'status': 'error', 'reason': f"{type(e).__name__}: {e}"}
+                continue
+            result['status'] = 'ok' if result['calls'] else 'error'
+            results[name] = result
+            print(f"{name:24} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                  f"p99={result['p99_ms']}ms {result['throughput_per_second']}/s", file=sys.stderr)
+    finally:
+        server.shutdown()
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the main hot paths")
+    parser.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help="Scenarios to run")
+    parser.add_argument('--iterations', type=int, help="Override per-scenario iteration counts")
+    parser.add_argument('--concurrency', type=int, help="Override per-scenario concurrency")
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help="Seconds of artificial latency per stub request")
+    parser.add_argument('--no-db', action='store_true', help="Skip database scenarios")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--profile', choices=FORMATS, help="Sample stacks during the run")
+    args = parser.parse_args()
+
+    init_config(required_vars=() if args.no_db else ('DB_NAME',))
+    install_signal_toggle()
+    if args.profile:
+        PROFILER.start(args.profile)
+    names = args.only or list(SCENARIOS)
+    results = run_suite(names, args.iterations, args.concurrency, args.stub_latency,
+                        use_db=not args.no_db)
+    if PROFILER.running:
+        print(f"Profile written to {PROFILER.stop()}", file=sys.stderr)
+    document = write_results(args.output, results, {
+        'iterations': args.iterations,
+        'concurrency': args.concurrency,
+        'stub_latency': args.stub_latency
+    })
+
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), document, args.tolerance)
+        print(json.dumps({'regressions': regressions}, indent=2))
+        sys.exit(1 if regressions else 0)
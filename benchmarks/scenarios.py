@@ -0,0 +1,168 @@
+import random
+from typing import Callable, Dict, List
+import numpy as np
+from benchmarks.synthetic_data import sample_points
+
+# Each scenario is a dict with the resources it needs ('db' and/or 'stub'),
+# default iteration/concurrency settings and a ``build(ctx)`` function that
+# does any setup and returns the callable to time. ``ctx`` carries the stub
+# URL and a fixed list of query points so every run issues the same queries.
+
+def query_points(count: int = 256, seed: int = 42) -> List[tuple]:
+    """Query locations clustered like the generated data"""
+    _, lat, lon = sample_points(np.random.default_rng([seed, 1000]), count)
+    return [(float(la), float(lo)) for la, lo in zip(lat, lon)]
+
+def _point(ctx: Dict, i: int) -> tuple:
+    points = ctx['points']
+    return points[i % len(points)]
+
+def build_nearby_resources(ctx: Dict) -> Callable[[int], object]:
+    from services.resource_service import ResourceService
+    service = ResourceService()
+    return lambda i: service.get_nearby_resources(*_point(ctx, i))
+
+def build_nearby_teams(ctx: Dict) -> Callable[[int], object]:
+    from services.team_service import TeamService
+    service = TeamService()
+    return lambda i: service.get_nearby_teams(*_point(ctx, i))
+
+def build_incidents_by_location(ctx: Dict) -> Callable[[int], object]:
+    from services.incident_service import IncidentService
+    service = IncidentService()
+    return lambda i: service.get_incidents_by_location(*_point(ctx, i))
+
+def build_quick_stats(ctx: Dict) -> Callable[[int], object]:
+    from services.analytics_service import AnalyticsService
+    service = AnalyticsService()
+    return lambda i: service.get_quick_stats(*_point(ctx, i))
+
+def build_risk_scoring(ctx: Dict) -> Callable[[int], object]:
+    """Score pre-fetched forecast days; isolates the CPU cost from HTTP"""
+    from services.risk_services import WeatherRiskService
+    from stubs.service_stub import daily_forecast
+    service = WeatherRiskService()
+    days = [day for lat, lon in ctx['points'][:32] for day in daily_forecast(lat, lon)]
+
+    def score(i):
+        return [service.calculate_risk_score(day) for day in days]
+    return score
+
+def build_risk_assessment(ctx: Dict) -> Callable[[int], object]:
+    from services.risk_services import WeatherRiskService
+    service = WeatherRiskService()
+    service.weather_base_url = f"{ctx['stub_url']}/data/2.5"
+    return lambda i: service.get_risk_assessment(*_point(ctx, i))
+
+def build_evacuation_planning(ctx: Dict) -> Callable[[int], object]:
+    from ai.evacuation_planner import EvacuationPlanner
+    import psycopg2
+    planner = EvacuationPlanner()
+    conn = psycopg2.connect(**planner.db_config)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM evacuation_zones ORDER BY id LIMIT 64")
+            zones = [row[0] for row in cur.fetchall()]
+            cur.execute("SELECT id FROM shelters ORDER BY id LIMIT 64")
+            shelters = [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+    if not zones or not shelters:
+        raise RuntimeError("No evacuation zones or shelters; run insert_sample_data.py --scale")
+
+    def plan(i):
+        zone_id = zones[i % len(zones)]
+        planner.plan_evacuation_route(zone_id, shelters[i % len(shelters)])
+        return planner.get_evacuation_plan(zone_id)
+    return plan
+
+def build_allocation_contention(ctx: Dict) -> Callable[[int], object]:
+    """Concurrent request + allocate against a handful of hot resources"""
+    from ai.resource_manager import ResourceManager
+    manager = ResourceManager()
+    hot = [manager.add_resource(f"Benchmark stock {n}", 'benchmark', 10 ** 7, 'Dehradun')['id']
+           for n in range(4)]
+
+    def allocate(i):
+        request = manager.request_resources(hot[i % len(hot)], f"bench-{i}", 1, 'high')
+        result = manager.allocate_resources(request['id'])
+        if 'error' in result:
+            raise RuntimeError(result['error'])
+        return result
+    return allocate
+
+def build_allocation_scheduler(ctx: Dict) -> Callable[[int], object]:
+    """In-memory priority scheduling of a burst of requests"""
+    from ai.allocation_scheduler import AllocationScheduler, PRIORITY_RANKS
+    priorities = list(PRIORITY_RANKS)
+    rng = random.Random(7)
+    burst = [{'id': n, 'resource_id': n % 20, 'quantity': rng.randint(1, 50),
+              'priority': priorities[n % len(priorities)]} for n in range(2000)]
+
+    def drain(i):
+        scheduler = AllocationScheduler(batch_size=100)
+        for resource_id in range(20):
+            scheduler.set_inventory(resource_id, 2000)
+        for request in burst:
+            scheduler.submit(request)
+        return scheduler.drain()
+    return drain
+
+SMS_RECIPIENTS = 200
+
+def build_sms_fanout(ctx: Dict) -> Callable[[int], object]:
+    from twilio.rest import Client
+    from ai.sms_fanout import SmsFanout, TwilioSmsProvider
+    client = Client('ACbenchmark', 'benchmark-token')
+    client.api.base_url = ctx['stub_url']
+    fanout = SmsFanout(TwilioSmsProvider(client, '+15005550006'), max_workers=32,
+                       backoff_base=0.01, backoff_max=0.1)
+
+    def send(i):
+        phones = [f"+91900{(i * SMS_RECIPIENTS + n) % 10 ** 7:07d}" for n in range(SMS_RECIPIENTS)]
+        summary = fanout.send_all(phones, "Benchmark flood alert", keep_results=False)
+        if summary['failed']:
+            raise RuntimeError(f"{summary['failed']} messages failed")
+        return summary
+    return send
+
+TRANSLATION_BATCH = 50
+
+def build_translation(ctx: Dict) -> Callable[[int], object]:
+    """Batches where half the strings repeat, exercising memory hits and misses"""
+    from ai.translation_memory import TranslationMemory
+    from ai.translation_service import TranslationService
+    service = TranslationService(memory=TranslationMemory())
+    service.api_url = ctx['stub_url']
+    repeated = [f"Shelter {n} is open" for n in range(TRANSLATION_BATCH // 2)]
+
+    def translate(i):
+        fresh = [f"Road {i}-{n} closed due to landslide" for n in range(TRANSLATION_BATCH // 2)]
+        return service.translate_batch(repeated + fresh, 'hi')
+    return translate
+
+def build_incident_analytics(ctx: Dict) -> Callable[[int], object]:
+    from ai.analytics_service import AnalyticsService
+    service = AnalyticsService()
+    ranges = ['7d', '30d']
+    return lambda i: service.get_incident_analytics(ranges[i % 2])
+
+SCENARIOS = {
+    'nearby_resources': {'requires': {'db'}, 'build': build_nearby_resources},
+    'nearby_teams': {'requires': {'db'}, 'build': build_nearby_teams},
+    'incidents_by_location': {'requires': {'db'}, 'build': build_incidents_by_location},
+    'quick_stats': {'requires': {'db'}, 'build': build_quick_stats},
+    'risk_scoring': {'requires': set(), 'build': build_risk_scoring},
+    'risk_assessment': {'requires': {'stub'}, 'build': build_risk_assessment},
+    'evacuation_planning': {'requires': {'db'}, 'build': build_evacuation_planning},
+    'allocation_contention': {'requires': {'db'}, 'build': build_allocation_contention,
+                              'concurrency': 8},
+    'allocation_scheduler': {'requires': set(), 'build': build_allocation_scheduler,
+                             'iterations': 20},
+    'sms_fanout': {'requires': {'stub'}, 'build': build_sms_fanout, 'iterations': 10,
+                   'warmup': 1, 'units_per_call': SMS_RECIPIENTS},
+    'translation': {'requires': {'stub'}, 'build': build_translation,
+                    'units_per_call': TRANSLATION_BATCH},
+    'incident_analytics': {'requires': {'db'}, 'build': build_incident_analytics,
+                           'iterations': 20}
+}
@@ -0,0 +1,442 @@
+"""Deterministic synthetic data for load testing.
+
+Generates incidents, resources, response teams, team location pings,
+shelters, evacuation zones, resource requests and weather alerts clustered
+around the Uttarakhand district headquarters, weighted by district
+population. Rows are produced in fixed-size chunks, each from its own seeded
+generator, so the data depends only on the seed and counts, never on the
+number of workers. Chunks are loaded with COPY over parallel connections.
+
+    python -m benchmarks.synthetic_data --incidents 2000000 --workers 8
+    python -m benchmarks.synthetic_data --incidents 100000 --tables incidents resources
+
+Explicit ids are assigned above the current maximum so child rows can
+reference parents, and sequences are advanced afterwards, as are the
+inventory summary and latest team positions the managers normally maintain.
+Tables that do not exist yet are skipped; run setup_db.py and initialise the
+managers first.
+"""
+import argparse
+import io
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional
+import numpy as np
+import psycopg2
+from ai.inventory_summary import rebuild_summary
+
+# name, latitude, longitude, population (millions), terrain
+DISTRICTS = [
+    ('Dehradun', 30.3165, 78.0322, 1.70, 'plains'),
+    ('Haridwar', 29.9457, 78.1642, 1.89, 'plains'),
+    ('Udham Singh Nagar', 28.9750, 79.4000, 1.65, 'plains'),
+    ('Nainital', 29.3919, 79.4542, 0.95, 'hills'),
+    ('Pauri Garhwal', 30.1470, 78.7800, 0.69, 'hills'),
+    ('Almora', 29.5971, 79.6591, 0.62, 'hills'),
+    ('Tehri Garhwal', 30.3800, 78.4300, 0.62, 'hills'),
+    ('Pithoragarh', 29.5829, 80.2182, 0.48, 'hills'),
+    ('Chamoli', 30.4000, 79.3200, 0.39, 'hills'),
+    ('Uttarkashi', 30.7268, 78.4354, 0.33, 'hills'),
+    ('Bageshwar', 29.8370, 79.7710, 0.26, 'hills'),
+    ('Champawat', 29.3360, 80.0910, 0.26, 'hills'),
+    ('Rudraprayag', 30.2844, 78.9811, 0.24, 'hills')
+]
+
+LAT_RANGE = (28.7, 31.4)
+LON_RANGE = (77.6, 81.0)
+SPREAD_KM = 12.0
+
+INCIDENT_TYPES = {
+    'plains': (['Flood', 'Fire', 'Medical Emergency', 'Landslide', 'Earthquake', 'Cloudburst'],
+               [0.35, 0.2, 0.3, 0.05, 0.05, 0.05]),
+    'hills': (['Flood', 'Fire', 'Medical Emergency', 'Landslide', 'Earthquake', 'Cloudburst'],
+              [0.15, 0.15, 0.15, 0.35, 0.08, 0.12])
+}
+RESOURCE_TYPES = ['Medical Kit', 'Food Packets', 'Blankets', 'Water Bottles', 'Tents', 'Generators']
+TEAM_TYPES = ['Medical', 'Rescue', 'Logistics', 'Fire']
+PRIORITIES = ['critical', 'high', 'medium', 'low']
+ALERT_TYPES = ['Heavy Rain', 'Strong Winds', 'Snowfall', 'Thunderstorm']
+
+# Rows per generated chunk; also the unit of parallelism
+CHUNK_SIZE = 50000
+
+# Parents are loaded before the tables that reference them
+LOAD_ORDER = [
+    ['resources', 'response_teams', 'shelters', 'evacuation_zones', 'weather_alerts'],
+    ['incidents', 'team_location_history', 'resource_requests']
+]
+
+PARENTS = {
+    'team_location_history': 'response_teams',
+    'resource_requests': 'resources'
+}
+
+# Row counts per incident used by counts_for_scale
+SCALE_RATIOS = {
+    'incidents': 1.0,
+    'resources': 0.5,
+    'response_teams': 0.01,
+    'team_location_history': 2.0,
+    'shelters': 0.005,
+    'evacuation_zones': 0.005,
+    'resource_requests': 0.2,
+    'weather_alerts': 0.05
+}
+
+TABLE_KEYS = {table: n for n, table in enumerate(sorted(SCALE_RATIOS))}
+
+def counts_for_scale(incidents: int) -> Dict[str, int]:
+    """Row counts for every table in proportion to the number of incidents"""
+    return {table: max(int(incidents * ratio), 10) for table, ratio in SCALE_RATIOS.items()}
+
+def chunk_rng(seed: int, table: str, chunk: int) -> np.random.Generator:
+    return np.random.default_rng([seed, TABLE_KEYS[table], chunk])
+
+def sample_points(rng: np.random.Generator, n: int) -> tuple:
+    """District indices and coordinates clustered around district headquarters"""
+    weights = np.array([d[3] for d in DISTRICTS])
+    district = rng.choice(len(DISTRICTS), size=n, p=weights / weights.sum())
+    base_lat = np.array([d[1] for d in DISTRICTS])[district]
+    base_lon = np.array([d[2] for d in DISTRICTS])[district]
+    spread = SPREAD_KM / 111.0
+    lat = np.clip(base_lat + rng.normal(0, spread, n), *LAT_RANGE)
+    lon = np.clip(base_lon + rng.normal(0, spread, n) / np.cos(np.radians(base_lat)), *LON_RANGE)
+    return district, np.round(lat, 6), np.round(lon, 6)
+
+@lru_cache(maxsize=4)
+def team_homes(seed: int, teams: int) -> tuple:
+    """Home positions of all generated teams; pings are scattered around them"""
+    return sample_points(np.random.default_rng([seed, len(TABLE_KEYS), 0]), teams)
+
+def _ewkt(lat: float, lon: float) -> str:
+    return f"SRID=4326;POINT({lon} {lat})"
+
+def _timestamps(rng: np.random.Generator, n: int, anchor: datetime, days: int) -> List[str]:
+    seconds = rng.integers(0, days * 86400, n)
+    return [(anchor - timedelta(seconds=int(s))).isoformat(sep=' ') for s in seconds]
+
+# Row builders return (columns, rows) for one chunk. ``start_id`` is the id of
+# the chunk's first row; ``ctx`` holds the seed, anchor, the (first id, count)
+# range of each parent table and the column layout of tables that exist in
+# more than one schema.
+
+def build_resources(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    district, lat, lon = sample_points(rng, n)
+    kinds = rng.choice(len(RESOURCE_TYPES), n)
+    quantity = rng.integers(10, 1000, n)
+    status = rng.choice(['available', 'available', 'allocated'], n)
+    ids = range(start_id, start_id + n)
+    if ctx['layouts'].get('resources') == 'inventory':
+        columns = ['id', 'name', 'category', 'quantity', 'location']
+        rows = [(i, f"{RESOURCE_TYPES[k]} {i}", RESOURCE_TYPES[k], q, DISTRICTS[d][0])
+                for i, k, q, d in zip(ids, kinds, quantity, district)]
+    else:
+        columns = ['id', 'type', 'quantity', 'status', 'location']
+        rows = [(i, RESOURCE_TYPES[k], q, s, _ewkt(la, lo))
+                for i, k, q, s, la, lo in zip(ids, kinds, quantity, status, lat, lon)]
+    return columns, rows
+
+def build_response_teams(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    first_id, teams = ctx['refs']['response_teams']
+    offset = start_id - first_id
+    district, lat, lon = (a[offset:offset + n] for a in team_homes(ctx['seed'], teams))
+    kinds = rng.choice(len(TEAM_TYPES), n)
+    status = rng.choice(['available', 'active', 'deployed'], n, p=[0.5, 0.3, 0.2])
+    ids = range(start_id, start_id + n)
+    if ctx['layouts'].get('response_teams') == 'roster':
+        columns = ['id', 'name', 'team_type', 'location', 'status']
+        rows = [(i, f"{TEAM_TYPES[k]} Team {i}", TEAM_TYPES[k], DISTRICTS[d][0], s)
+                for i, k, d, s in zip(ids, kinds, district, status)]
+    else:
+        capacity = rng.integers(4, 13, n)
+        members = np.minimum(rng.integers(2, 13, n), capacity)
+        response_time = rng.integers(15, 121, n)
+        columns = ['id', 'name', 'type', 'status', 'capacity', 'members', 'response_time', 'location']
+        rows = [(i, f"{TEAM_TYPES[k]} Team {i}", TEAM_TYPES[k], s, c, m, r, _ewkt(la, lo))
+                for i, k, s, c, m, r, la, lo in zip(ids, kinds, status, capacity, members,
+                                                     response_time, lat, lon)]
+    return columns, rows
+
+def build_incidents(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    district, lat, lon = sample_points(rng, n)
+    terrain = np.array([DISTRICTS[d][4] == 'hills' for d in district])
+    types = {}
+    for key, hills in (('plains', False), ('hills', True)):
+        names, p = INCIDENT_TYPES[key]
+        types[hills] = rng.choice(names, n, p=p)
+    severity = rng.choice([1, 2, 3, 4, 5], n, p=[0.3, 0.3, 0.2, 0.15, 0.05])
+    status = rng.choice(['active', 'resolved'], n, p=[0.3, 0.7])
+    created = _timestamps(rng, n, ctx['anchor'], ctx['days'])
+    columns = ['id', 'type', 'severity', 'status', 'description', 'location', 'timestamp', 'created_at']
+    rows = []
+    for j, i in enumerate(range(start_id, start_id + n)):
+        kind = types[bool(terrain[j])][j]
+        rows.append((i, kind, severity[j], status[j], f"{kind} reported near {DISTRICTS[district[j]][0]}",
+                     _ewkt(lat[j], lon[j]), created[j], created[j]))
+    return columns, rows
+
+def build_team_location_history(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    first_id, teams = ctx['refs']['response_teams']
+    _, home_lat, home_lon = team_homes(ctx['seed'], teams)
+    team = rng.integers(0, teams, n)
+    lat = np.round(home_lat[team] + rng.normal(0, 0.02, n), 6)
+    lon = np.round(home_lon[team] + rng.normal(0, 0.02, n), 6)
+    recorded = _timestamps(rng, n, ctx['anchor'], min(ctx['days'], 7))
+    team_ids = team + first_id
+    columns = ['team_id', 'latitude', 'longitude', 'recorded_at']
+    return columns, list(zip(team_ids, lat, lon, recorded))
+
+def build_shelters(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    _, lat, lon = sample_points(rng, n)
+    capacity = rng.integers(100, 2000, n)
+    columns = ['id', 'name', 'latitude', 'longitude', 'capacity', 'facilities']
+    rows = [(i, f"Shelter {i}", la, lo, c, '{water,medical,power}')
+            for i, la, lo, c in zip(range(start_id, start_id + n), lat, lon, capacity)]
+    return columns, rows
+
+def build_evacuation_zones(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    district, lat, lon = sample_points(rng, n)
+    population = rng.integers(500, 50000, n)
+    risk = rng.choice(['low', 'moderate', 'high'], n)
+    rows = []
+    for j, i in enumerate(range(start_id, start_id + n)):
+        polygon = [{'latitude': round(lat[j] + dlat, 6), 'longitude': round(lon[j] + dlon, 6)}
+                   for dlat, dlon in ((0, 0), (0.04, 0), (0.04, 0.04), (0, 0.04))]
+        rows.append((i, f"{DISTRICTS[district[j]][0]} Zone {i}", json.dumps(polygon), population[j], risk[j]))
+    return ['id', 'name', 'polygon_coordinates', 'population', 'risk_level'], rows
+
+def build_resource_requests(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    first_id, resources = ctx['refs']['resources']
+    resource = rng.integers(0, resources, n) + first_id
+    quantity = rng.integers(1, 100, n)
+    priority = rng.choice(PRIORITIES, n, p=[0.1, 0.2, 0.4, 0.3])
+    status = rng.choice(['pending', 'fulfilled', 'partial'], n, p=[0.5, 0.4, 0.1])
+    created = _timestamps(rng, n, ctx['anchor'], ctx['days'])
+    columns = ['id', 'resource_id', 'requester', 'quantity', 'priority', 'status', 'created_at']
+    rows = [(i, r, f"requester-{i % 5000}", q, p, s, c)
+            for i, r, q, p, s, c in zip(range(start_id, start_id + n), resource, quantity,
+                                        priority, status, created)]
+    return columns, rows
+
+def build_weather_alerts(rng, start_id: int, n: int, ctx: Dict) -> tuple:
+    _, lat, lon = sample_points(rng, n)
+    kinds = rng.choice(ALERT_TYPES, n)
+    severity = rng.integers(1, 6, n)
+    issued = _timestamps(rng, n, ctx['anchor'], min(ctx['days'], 30))
+    columns = ['id', 'type', 'severity', 'description', 'location', 'timestamp', 'created_at']
+    rows = [(i, k, sv, f"{k} warning", _ewkt(la, lo), t, t)
+            for i, k, sv, la, lo, t in zip(range(start_id, start_id + n), kinds, severity, lat, lon, issued)]
+    return columns, rows
+
+BUILDERS = {
+    'resources': build_resources,
+    'response_teams': build_response_teams,
+    'incidents': build_incidents,
+    'team_location_history': build_team_location_history,
+    'shelters': build_shelters,
+    'evacuation_zones': build_evacuation_zones,
+    'resource_requests': build_resource_requests,
+    'weather_alerts': build_weather_alerts
+}
+
+def _copy_value(value) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, (float, np.floating)):
+        return repr(float(value))
+    return str(value)
+
+def copy_buffer(rows) -> io.StringIO:
+    """Rows in COPY text format; generated values never contain tabs or newlines"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(v) for v in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+def plan_chunks(table: str, count: int, id_base: int, chunk_size: int = CHUNK_SIZE) -> List[tuple]:
+    """(table, chunk index, first id, rows) for every chunk of a table"""
+    return [(table, chunk, id_base + start + 1, min(chunk_size, count - start))
+            for chunk, start in enumerate(range(0, count, chunk_size))]
+
+def generate_chunk(task: tuple, ctx: Dict) -> tuple:
+    table, chunk, start_id, n = task
+    return BUILDERS[table](chunk_rng(ctx['seed'], table, chunk), start_id, n, ctx)
+
+def load_chunk(task: tuple, ctx: Dict, db_config: Dict) -> int:
+    """Generate one chunk and COPY it in its own transaction"""
+    columns, rows = generate_chunk(task, ctx)
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cur:
+            cur.copy_expert(f"COPY {task[0]} ({', '.join(columns)}) FROM STDIN", copy_buffer(rows))
+        conn.commit()
+    finally:
+        conn.close()
+    return len(rows)
+
+def _table_layouts(cur) -> Dict[str, str]:
+    """Detect which of the repo's two schemas resources and response_teams use"""
+    cur.execute("""
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_name IN ('resources', 'response_teams')
+    """)
+    columns = {}
+    for table, column in cur.fetchall():
+        columns.setdefault(table, set()).add(column)
+    return {
+        'resources': 'inventory' if 'category' in columns.get('resources', ()) else 'spatial',
+        'response_teams': 'roster' if 'team_type' in columns.get('response_teams', ()) else 'spatial'
+    }
+
+def prepare(db_config: Dict, counts: Dict[str, int], seed: int = 42,
+            anchor: Optional[datetime] = None, days: int = 60) -> Dict:
+    """Look up existing tables, id bases and schema layouts"""
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cur:
+            existing = set()
+            id_base = {}
+            for table in counts:
+                cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+                if not cur.fetchone()[0]:
+                    continue
+                existing.add(table)
+                if table != 'team_location_history':
+                    cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+                    id_base[table] = cur.fetchone()[0]
+            layouts = _table_layouts(cur)
+    finally:
+        conn.close()
+
+    # Children reference the rows loaded in this run, or existing rows otherwise
+    refs = {}
+    for parent in ('resources', 'response_teams'):
+        if parent not in id_base:
+            continue
+        if parent in counts:
+            refs[parent] = (id_base[parent] + 1, counts[parent])
+        elif id_base[parent]:
+            refs[parent] = (1, id_base[parent])
+
+    return {
+        'seed': seed,
+        'anchor': anchor or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
+        'days': days,
+        'counts': dict(counts),
+        'existing': existing,
+        'id_base': id_base,
+        'refs': refs,
+        'layouts': layouts
+    }
+
+def _refresh_derived(cur, tables: List[str]) -> List[str]:
+    """Bring tables maintained by the application up to date after COPY
+
+    COPY bypasses the managers, so the inventory summary and the latest team
+    positions are recomputed from the loaded rows. Returns the tables refreshed.
+    """
+    refreshed = []
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", ('resource_inventory_summary',))
+    if 'resources' in tables and cur.fetchone()[0]:
+        rebuild_summary(cur)
+        refreshed += ['resource_inventory_summary', 'resource_allocation_daily']
+
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", ('team_latest_locations',))
+    if 'team_location_history' in tables and cur.fetchone()[0]:
+        cur.execute("""
+            INSERT INTO team_latest_locations (team_id, latitude, longitude, recorded_at)
+            SELECT DISTINCT ON (team_id) team_id, latitude, longitude, recorded_at
+            FROM team_location_history
+            ORDER BY team_id, recorded_at DESC
+            ON CONFLICT (team_id) DO UPDATE
+            SET latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude,
+                recorded_at = EXCLUDED.recorded_at
+            WHERE team_latest_locations.recorded_at < EXCLUDED.recorded_at
+        """)
+        refreshed.append('team_latest_locations')
+    return refreshed
+
+def _finish(db_config: Dict, tables: List[str]) -> None:
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cur:
+            refreshed = _refresh_derived(cur, tables)
+        conn.commit()
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for table in tables:
+                if table != 'team_location_history':
+                    cur.execute(f"""
+                        SELECT setval(pg_get_serial_sequence('{table}', 'id'),
+                                      (SELECT COALESCE(MAX(id), 1) FROM {table}))
+                    """)
+            for table in tables + refreshed:
+                cur.execute(f"ANALYZE {table}")
+    finally:
+        conn.close()
+
+def generate(db_config: Dict, counts: Dict[str, int], seed: int = 42, workers: int = 4,
+             anchor: Optional[datetime] = None, days: int = 60,
+             chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """Load generated rows into every existing table; returns rows loaded per table"""
+    logger = logging.getLogger(__name__)
+    ctx = prepare(db_config, counts, seed, anchor, days)
+    loaded = {}
+
+    for phase in LOAD_ORDER:
+        tasks = []
+        for table in phase:
+            if table not in counts:
+                continue
+            if table not in ctx['existing']:
+                logger.warning(f"Skipping {table}: table does not exist")
+                continue
+            parent = PARENTS.get(table)
+            if parent and parent not in ctx['refs']:
+                logger.warning(f"Skipping {table}: no {parent} to reference")
+                continue
+            tasks += plan_chunks(table, counts[table], ctx['id_base'].get(table, 0), chunk_size)
+
+        started = time.perf_counter()
+        if workers <= 1:
+            results = [load_chunk(task, ctx, db_config) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(load_chunk, tasks, [ctx] * len(tasks),
+                                            [db_config] * len(tasks)))
+        for task, rows in zip(tasks, results):
+            loaded[task[0]] = loaded.get(task[0], 0) + rows
+        phase_tables = sorted(set(task[0] for task in tasks))
+        if phase_tables:
+            _finish(db_config, phase_tables)
+            logger.info(f"Loaded {', '.join(phase_tables)} in {time.perf_counter() - started:.1f}s")
+
+    return loaded
+
+if __name__ == '__main__':
+    from config import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Load deterministic synthetic data")
+    parser.add_argument('--incidents', type=int, default=100000,
+                        help="Incidents to generate; other tables scale with it")
+    parser.add_argument('--tables', nargs='+', choices=sorted(BUILDERS), help="Only load these tables")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--days', type=int, default=60, help="Spread timestamps over this many days")
+    parser.add_argument('--anchor', type=datetime.fromisoformat,
+                        help="Latest timestamp (ISO format); defaults to today's midnight")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    counts = counts_for_scale(args.incidents)
+    if args.tables:
+        counts = {table: counts[table] for table in args.tables}
+    print(json.dumps(generate(DB_CONFIG, counts, args.seed, args.workers, args.anchor, args.days), indent=2))
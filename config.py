@@ -23,14 +23,30 @@ WEATHER_CONFIG = {
 # Geocoding Configuration
 GEOCODING_CONFIG = {
     'service': os.getenv('GEOCODING_SERVICE', 'nominatim'),
-    'user_agent': os.getenv('NOMINATIM_USER_AGENT', 'uttarakhand_safe')
+    'user_agent': os.getenv('NOMINATIM_USER_AGENT', 'uttarakhand_safe'),
+    'url': os.getenv('NOMINATIM_URL', 'https://nominatim.openstreetmap.org/search'),
+    'region': os.getenv('GEOCODING_REGION', 'Uttarakhand, India'),
+    'country_codes': os.getenv('GEOCODING_COUNTRY_CODES', 'in'),
+    'timeout': int(os.getenv('GEOCODING_TIMEOUT', 10)),
+    'cache_path': os.getenv('GEOCODE_CACHE_PATH', 'data/geocode_cache.db')
+}
+
+# Volunteer Registry Configuration
+VOLUNTEER_CONFIG = {
+    'path': os.getenv('VOLUNTEERS_PATH', 'volunteers.json'),
+    'cell_size_deg': float(os.getenv('VOLUNTEER_CELL_SIZE_DEG', 0.1))
 }
 
 # Translation Configuration
 TRANSLATION_CONFIG = {
     'base_url': os.getenv('TRANSLATE_API_URL', 'https://libretranslate.com/translate'),
     'api_key': os.getenv('TRANSLATE_API_KEY'),
-    'supported_languages': ['en', 'hi', 'ur']  # English, Hindi, Urdu
+    'supported_languages': ['en', 'hi', 'ur'],  # English, Hindi, Urdu
+    'memory_path': os.getenv('TRANSLATION_MEMORY_PATH', 'data/translation_memory.db'),
+    'lru_size': int(os.getenv('TRANSLATION_LRU_SIZE', 10000)),
+    'batch_size': int(os.getenv('TRANSLATION_BATCH_SIZE', 50)),
+    'max_workers': int(os.getenv('TRANSLATION_MAX_WORKERS', 4)),
+    'catalogue_dir': os.getenv('UI_CATALOGUE_DIR', 'data/ui_catalogue')
 }
 
 # SMS Configuration
@@ -38,7 +54,36 @@ SMS_CONFIG = {
     'account_sid': os.getenv('TWILIO_ACCOUNT_SID'),
     'auth_token': os.getenv('TWILIO_AUTH_TOKEN'),
     'phone_number': os.getenv('TWILIO_PHONE_NUMBER'),
-    'base_url': 'https://api.twilio.com/2010-04-01/Accounts'
+    'base_url': 'https://api.twilio.com/2010-04-01/Accounts',
+    'fanout_workers': int(os.getenv('SMS_FANOUT_WORKERS', 32)),
+    'rate_limit_per_second': float(os.getenv('SMS_RATE_LIMIT_PER_SECOND', 30)),
+    'max_retries': int(os.getenv('SMS_MAX_RETRIES', 3))
+}
+
+# Outbound Notification Queue
+NOTIFICATION_CONFIG = {
+    'backend': os.getenv('NOTIFICATION_QUEUE_BACKEND', 'sqlite'),  # sqlite or postgres
+    'sqlite_path': os.getenv('NOTIFICATION_QUEUE_PATH', 'data/notifications.db'),
+    'max_attempts': int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', 5)),
+    'lease_seconds': int(os.getenv('NOTIFICATION_LEASE_SECONDS', 60))
+}
+
+# Live Feed (SSE/WebSocket) Configuration
+LIVE_FEED_CONFIG = {
+    'host': os.getenv('LIVE_FEED_HOST', '0.0.0.0'),
+    'port': int(os.getenv('LIVE_FEED_PORT', 8765)),
+    'region_size_deg': float(os.getenv('LIVE_FEED_REGION_SIZE_DEG', 0.5)),
+    'max_queue': int(os.getenv('LIVE_FEED_MAX_QUEUE', 256))
+}
+
+# Team Location History Configuration
+LOCATION_HISTORY_CONFIG = {
+    'days_ahead': int(os.getenv('LOCATION_HISTORY_DAYS_AHEAD', 7)),
+    'bucket_seconds': int(os.getenv('LOCATION_HISTORY_BUCKET_SECONDS', 60)),
+    # Unset keeps every day's (downsampled) partition forever
+    'retention_days': int(os.getenv('LOCATION_HISTORY_RETENTION_DAYS')) if os.getenv('LOCATION_HISTORY_RETENTION_DAYS') else None,
+    # Must stay well under days_ahead so partitions exist before pings arrive
+    'maintenance_interval': float(os.getenv('LOCATION_HISTORY_MAINTENANCE_INTERVAL', 3600))
 }
 
 # Alert Configuration
@@ -73,28 +118,95 @@ ML_CONFIG = {
     'max_prediction_history': int(os.getenv('MAX_PREDICTION_HISTORY', 1000))
 }
 
+# Production API Server Configuration (server process settings live in gunicorn.conf.py)
+API_CONFIG = {
+    'db_pool_size': int(os.getenv('API_DB_POOL_SIZE', 8)),
+    'prediction_ttl': int(os.getenv('API_PREDICTION_TTL', 600)),  # seconds
+    'default_location': (
+        float(os.getenv('API_DEFAULT_LAT', 30.3165)),
+        float(os.getenv('API_DEFAULT_LON', 78.0322))
+    ),
+    'gzip_min_bytes': int(os.getenv('API_GZIP_MIN_BYTES', 500)),
+    'gzip_level': int(os.getenv('API_GZIP_LEVEL', 6))
+}
+
+# Response Cache Configuration (per-endpoint TTLs are in response_cache.CACHE_RULES)
+RESPONSE_CACHE_CONFIG = {
+    'enabled': os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+    'max_entries': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 2048)),
+    'brotli_quality': int(os.getenv('RESPONSE_CACHE_BROTLI_QUALITY', 9)),
+    'listen': os.getenv('RESPONSE_CACHE_LISTEN', 'true').lower() in ('1', 'true', 'yes')
+}
+
+# Leaderboard Configuration
+LEADERBOARD_CONFIG = {
+    # Longest a worker serves standings without checking the point event log
+    'sync_seconds': float(os.getenv('LEADERBOARD_SYNC_SECONDS', 1.0))
+}
+
 # Logging Configuration
 LOG_CONFIG = {
     'level': os.getenv('LOG_LEVEL', 'INFO'),
     'file_path': os.getenv('LOG_FILE_PATH', 'logs/app.log')
 }
 
-# Create required directories
-os.makedirs('logs', exist_ok=True)
-os.makedirs('models', exist_ok=True)
-
-# Validate required configurations
-def validate_config():
-    required_vars = [
-        ('OPENWEATHER_API_KEY', WEATHER_CONFIG['api_key']),
-        ('DB_NAME', DB_CONFIG['dbname']),
-        ('SECRET_KEY', APP_CONFIG['secret_key'])
-    ]
-    
-    missing_vars = [var for var, value in required_vars if not value]
-    
+# Instrumentation Configuration
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'host': os.getenv('METRICS_HOST', '127.0.0.1'),
+    'port': int(os.getenv('METRICS_PORT', 9102))
+}
+
+# Tracing Configuration
+TRACING_CONFIG = {
+    'enabled': os.getenv('TRACING_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'service_name': os.getenv('TRACING_SERVICE_NAME', 'usafe'),
+    'sample_rate': float(os.getenv('TRACING_SAMPLE_RATE', 1.0)),
+    'file': os.getenv('TRACING_FILE', 'logs/traces.jsonl'),
+    'collector_url': os.getenv('TRACING_COLLECTOR_URL')  # Zipkin v2 endpoint, e.g. http://localhost:9411/api/v2/spans
+}
+
+# Profiler Configuration
+PROFILER_CONFIG = {
+    'enabled': os.getenv('PROFILER_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'interval_ms': float(os.getenv('PROFILER_INTERVAL_MS', 10)),
+    'window_seconds': float(os.getenv('PROFILER_WINDOW_SECONDS', 60)),
+    'format': os.getenv('PROFILER_FORMAT', 'collapsed'),  # collapsed or speedscope
+    'output_dir': os.getenv('PROFILER_OUTPUT_DIR', 'logs/profiles'),
+    'token': os.getenv('PROFILER_TOKEN')  # required for remote toggling over HTTP
+}
+
+# Directories the application writes to
+REQUIRED_DIRS = ('logs', 'models')
+
+# Environment variables a full deployment cannot run without
+REQUIRED_VARS = ('OPENWEATHER_API_KEY', 'DB_NAME', 'SECRET_KEY')
+
+_initialized = False
+
+def validate_config(required_vars=REQUIRED_VARS):
+    values = {
+        'OPENWEATHER_API_KEY': WEATHER_CONFIG['api_key'],
+        'DB_NAME': DB_CONFIG['dbname'],
+        'SECRET_KEY': APP_CONFIG['secret_key']
+    }
+
+    missing_vars = [var for var in required_vars if not values.get(var, os.getenv(var))]
+
     if missing_vars:
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-# Validate configuration on import
-validate_config() 
\ No newline at end of file
+def init_config(validate: bool = True, required_vars=REQUIRED_VARS):
+    """Create the working directories and validate settings.
+
+    Called once by application entry points. Importing this module has no
+    side effects beyond reading the environment, so libraries, tests and
+    single-purpose workers can import it without every API key being set.
+    """
+    global _initialized
+    if validate:
+        validate_config(required_vars)
+    if not _initialized:
+        for directory in REQUIRED_DIRS:
+            os.makedirs(directory, exist_ok=True)
+        _initialized = True
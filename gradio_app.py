@@ -2,6 +2,7 @@ import gradio as gr
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
+from config import init_config
 
 # Create a placeholder model (in a real scenario, you would load a trained model)
 def create_model():
@@ -90,4 +91,5 @@ with gr.Blocks(title="Landslide Risk Prediction") as demo:
     )
 
 if __name__ == "__main__":
+    init_config(validate=False)
     demo.launch() 
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""gunicorn settings for the production API server.
+
+    gunicorn -c gunicorn.conf.py api_server:app
+
+Threaded workers keep client connections alive between requests; the sync
+worker closes every connection after one response. Each worker opens its own
+database pool on first use, after the fork.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('API_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('API_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('API_THREADS', 4))
+keepalive = int(os.getenv('API_KEEPALIVE', 5))
+timeout = int(os.getenv('API_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Recycle workers periodically so slow leaks cannot accumulate
+max_requests = int(os.getenv('API_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('API_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+def on_starting(server):
+    # Fail fast in the master if the deployment is missing required settings
+    from config import init_config
+    init_config()
+
+def post_worker_init(worker):
+    # Worker.init_signals resets SIGUSR2 to its default action, which kills
+    # the worker, so the toggle is installed after it has run. The master
+    # keeps SIGUSR2 for binary upgrades; signal workers by their own pid.
+    import profiler
+    profiler.install_signal_toggle()
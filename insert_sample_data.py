@@ -1,18 +1,21 @@
+import argparse
 import psycopg2
 import os
 import logging
 from datetime import datetime, timedelta
+from config import init_config
 
-def insert_sample_data():
+def insert_sample_data(scale: int = 0, seed: int = 42, workers: int = 4):
     try:
         # Connect to PostgreSQL
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT'),
-            database=os.getenv('DB_NAME'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD')
-        )
+        db_config = {
+            'host': os.getenv('DB_HOST'),
+            'port': os.getenv('DB_PORT'),
+            'database': os.getenv('DB_NAME'),
+            'user': os.getenv('DB_USER'),
+            'password': os.getenv('DB_PASSWORD')
+        }
+        conn = psycopg2.connect(**db_config)
         cursor = conn.cursor()
         
         # Insert sample resources
@@ -54,6 +57,12 @@ def insert_sample_data():
         cursor.close()
         conn.close()
         
+        # Load generated data at benchmark scale
+        if scale:
+            from benchmarks.synthetic_data import counts_for_scale, generate
+            loaded = generate(db_config, counts_for_scale(scale), seed, workers)
+            print(f"Generated rows: {loaded}")
+        
         print("Sample data inserted successfully!")
         
     except Exception as e:
@@ -61,4 +70,11 @@ def insert_sample_data():
         raise
 
 if __name__ == "__main__":
-    insert_sample_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Insert sample data")
+    parser.add_argument('--scale', type=int, default=0,
+                        help="Also generate this many incidents, with resources, teams and alerts in proportion")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=4, help="Parallel COPY streams")
+    args = parser.parse_args()
+    init_config(required_vars=('DB_NAME',))
+    insert_sample_data(args.scale, args.seed, args.workers) 
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""Shared logging and hot-path instrumentation.
+
+``get_service_logger`` gives each service its own log file. The old
+per-service ``logging.basicConfig`` calls only honoured the first one.
+
+Latency is recorded per (kind, name) in fixed-bucket histograms. Kinds in
+use are 'db', 'http', 'inference' and 'render'; cache lookups are counted
+separately as hits and misses. Recording is off unless METRICS_ENABLED is
+set or ``enable()`` is called. When off, a decorated call costs one global
+check. Metrics are served in Prometheus text format on /metrics and as JSON
+on /metrics.json, by the Flask apps through ``init_app`` or standalone by
+``start_metrics_server``. Each process keeps its own registry, so under
+gunicorn a scrape reports the worker that answered it.
+
+    @instrumented('db')
+    def get_nearby_resources(self, lat, lon): ...
+
+    with timer('http', 'openweather.current'):
+        response = requests.get(url, params=params, timeout=10)
+
+    record_cache('translation_memory', hit=True)
+"""
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+import tracing
+from config import LOG_CONFIG, METRICS_CONFIG
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+def get_service_logger(name: str, filename: str, level: Optional[str] = None) -> logging.Logger:
+    """Logger writing to its own file; repeated calls reuse the same handler"""
+    logger = logging.getLogger(name)
+    path = os.path.abspath(filename)
+    with _handlers_lock:
+        handler = _handlers.get(path)
+        if handler is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            _handlers[path] = handler
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+    logger.setLevel(level or LOG_CONFIG['level'])
+    return logger
+
+class Histogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+
+    BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-th observation"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(self.BOUNDS_MS[i]) if i < len(self.BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict:
+        labels = [f"<={b}" for b in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}"]
+        return {
+            'count': self.total,
+            'sum_ms': round(self.sum_ms, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.errors = {}
+        self.cache = {}
+
+    def observe(self, kind: str, name: str, elapsed_ms: float, error: bool = False) -> None:
+        key = (kind, name)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(elapsed_ms)
+            if error:
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def record_cache(self, name: str, hit: bool, count: int = 1) -> None:
+        with self._lock:
+            counts = self.cache.setdefault(name, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += count
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.errors.clear()
+            self.cache.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latency = {}
+            for (kind, name), histogram in sorted(self.histograms.items()):
+                entry = histogram.snapshot()
+                entry['errors'] = self.errors.get((kind, name), 0)
+                latency.setdefault(kind, {})[name] = entry
+            return {'enabled': ENABLED, 'latency': latency,
+                    'cache': {name: dict(counts) for name, counts in sorted(self.cache.items())}}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of all histograms and counters"""
+        lines = [
+            '# TYPE usafe_latency_ms histogram'
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self.histograms.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                cumulative = 0
+                for bound, count in zip(histogram.BOUNDS_MS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'usafe_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'usafe_latency_ms_bucket{{{labels},le="+Inf"}} {histogram.total}')
+                lines.append(f'usafe_latency_ms_sum{{{labels}}} {histogram.sum_ms:.3f}')
+                lines.append(f'usafe_latency_ms_count{{{labels}}} {histogram.total}')
+            lines.append('# TYPE usafe_errors_total counter')
+            for (kind, name), count in sorted(self.errors.items()):
+                lines.append(f'usafe_errors_total{{kind="{kind}",name="{name}"}} {count}')
+            lines.append('# TYPE usafe_cache_total counter')
+            for name, counts in sorted(self.cache.items()):
+                lines.append(f'usafe_cache_total{{name="{name}",result="hit"}} {counts["hits"]}')
+                lines.append(f'usafe_cache_total{{name="{name}",result="miss"}} {counts["misses"]}')
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+ENABLED = METRICS_CONFIG['enabled']
+
+def enable() -> None:
+    global ENABLED
+    ENABLED = True
+
+def disable() -> None:
+    global ENABLED
+    ENABLED = False
+
+def instrumented(kind: str, name: Optional[str] = None):
+    """Decorator recording the latency of every call under (kind, qualname)
+
+    Calls made inside a request trace also become spans of that trace.
+    """
+    def decorator(fn):
+        label = name or fn.__qualname__
+        call = tracing.traced(kind, label)(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return call(*args, **kwargs)
+            started = time.perf_counter()
+            error = False
+            try:
+                return call(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                REGISTRY.observe(kind, label, (time.perf_counter() - started) * 1000, error)
+        return wrapper
+    return decorator
+
+@contextmanager
+def _timed_block(kind: str, name: str):
+    started = time.perf_counter()
+    error = False
+    try:
+        with tracing.span(name, kind):
+            yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        if ENABLED:
+            REGISTRY.observe(kind, name, (time.perf_counter() - started) * 1000, error)
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(kind: str, name: str):
+    """Context manager timing a block; a shared no-op while disabled and untraced"""
+    if not ENABLED and tracing.current_span() is None:
+        return _NULL_TIMER
+    return _timed_block(kind, name)
+
+def record_cache(name: str, hit: bool, count: int = 1) -> None:
+    """Count cache hits or misses"""
+    if ENABLED and count:
+        REGISTRY.record_cache(name, hit, count)
+
+def _metrics_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body = REGISTRY.render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body = json.dumps(REGISTRY.snapshot()).encode('utf-8')
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+def init_app(app):
+    """Add GET /metrics and /metrics.json to a Flask app; 404 while metrics are off"""
+    from flask import Response, jsonify
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        if not ENABLED:
+            return jsonify({'error': 'Metrics are disabled'}), 404
+        return Response(REGISTRY.render_prometheus(), content_type='text/plain; version=0.0.4')
+
+    @app.route('/metrics.json', methods=['GET'])
+    def metrics_json():
+        if not ENABLED:
+            return jsonify({'error': 'Metrics are disabled'}), 404
+        return jsonify(REGISTRY.snapshot())
+
+    return app
+
+def start_metrics_server(host: Optional[str] = None, port: Optional[int] = None):
+    """Serve /metrics and /metrics.json from a daemon thread"""
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer((host or METRICS_CONFIG['host'],
+                                  METRICS_CONFIG['port'] if port is None else port), _metrics_handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,286 @@
+"""Opt-in sampling profiler for long-running workers and batch jobs.
+
+A daemon thread wakes every ``interval_ms``, reads the Python stack of every
+other thread with ``sys._current_frames()`` and counts identical stacks. The
+profiled code is never touched, so the cost is the sampler's own time, which
+is reported in ``status()``. Threads parked in a lock, queue or select are
+skipped unless ``include_idle`` is set.
+
+Every ``window_seconds`` the counts are written to ``output_dir`` as
+collapsed stacks (flamegraph.pl, speedscope, inferno) or speedscope JSON.
+Samples taken inside a function decorated with
+``instrumentation.instrumented`` or ``tracing.traced`` get that function's
+label as their root frame, e.g. ``[ResourceService.get_nearby_resources]``.
+
+Toggle at runtime with ``POST /debug/profiler`` on an app passed to
+``init_app``, or with SIGUSR2 after ``install_signal_toggle()``. Under a
+multi-worker server each worker has its own profiler; signal the workers to
+profile all of them.
+"""
+import hmac
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+from config import PROFILER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('collapsed', 'speedscope')
+
+# Innermost frames of threads that are waiting rather than working
+IDLE_LEAVES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('socketserver.py', 'serve_forever'),
+    ('socket.py', 'accept'),
+    ('socket.py', 'readinto'),
+    ('ssl.py', 'read'),
+    ('time.py', 'sleep')
+}
+
+def _tagging_codes() -> set:
+    """Code objects of the instrumentation wrappers, whose 'label' names the active method"""
+    import instrumentation
+    import tracing
+    codes = set()
+    for decorate in (instrumentation.instrumented('profile'), tracing.traced('profile')):
+        codes.add(decorate(lambda: None).__code__)
+    return codes
+
+class Profiler:
+    def __init__(self, interval_ms: float = None, window_seconds: float = None,
+                 output_dir: str = None, fmt: str = None, include_idle: bool = False):
+        self.interval = (interval_ms or PROFILER_CONFIG['interval_ms']) / 1000
+        self.window_seconds = window_seconds or PROFILER_CONFIG['window_seconds']
+        self.output_dir = output_dir or PROFILER_CONFIG['output_dir']
+        self.format = fmt or PROFILER_CONFIG['format']
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown profile format: {self.format}")
+        self.include_idle = include_idle
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._counts = Counter()
+        self._frames = {}
+        self._tag_codes = None
+        self._window_started = None
+        self.stats = {'samples': 0, 'windows': 0, 'sampling_ms': 0.0, 'last_file': None}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, fmt: Optional[str] = None) -> bool:
+        """Start sampling; returns False if already running"""
+        with self._lock:
+            if self.running:
+                return False
+            if fmt is not None:
+                if fmt not in FORMATS:
+                    raise ValueError(f"Unknown profile format: {fmt}")
+                self.format = fmt
+            if self._tag_codes is None:
+                self._tag_codes = _tagging_codes()
+            self._stop.clear()
+            self._window_started = time.time()
+            self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+            self._thread.start()
+        logger.info(f"Profiler started ({self.format}, {self.interval * 1000:g} ms interval)")
+        return True
+
+    def stop(self) -> Optional[str]:
+        """Stop sampling and write the partial window; returns its path"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return None
+        self._stop.set()
+        thread.join()
+        logger.info("Profiler stopped")
+        return self.flush()
+
+    def toggle(self) -> bool:
+        """Start if stopped, stop if running; returns the new state"""
+        if self.running:
+            self.stop()
+            return False
+        return self.start()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            self.sample(exclude=own_id)
+            self.stats['sampling_ms'] += (time.perf_counter() - started) * 1000
+            if time.time() - self._window_started >= self.window_seconds:
+                self.flush()
+
+    def _frame_key(self, code) -> tuple:
+        key = self._frames.get(code)
+        if key is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            key = self._frames[code] = (name, code.co_filename, code.co_firstlineno)
+        return key
+
+    def sample(self, exclude: Optional[int] = None) -> None:
+        """Record the current stack of every thread except ``exclude``"""
+        tag_codes = self._tag_codes or ()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == exclude:
+                continue
+            leaf = frame.f_code
+            if not self.include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                continue
+            stack = []
+            tag = None
+            while frame is not None:
+                if frame.f_code in tag_codes:
+                    if tag is None:
+                        tag = frame.f_locals.get('label')
+                else:
+                    stack.append(self._frame_key(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            if tag is not None:
+                stack.insert(0, (f"[{tag}]", '', 0))
+            with self._lock:
+                self._counts[tuple(stack)] += 1
+                self.stats['samples'] += 1
+
+    def flush(self) -> Optional[str]:
+        """Write the current window and start a new one"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            started, self._window_started = self._window_started, time.time()
+        if not counts:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(started).strftime('%Y%m%dT%H%M%S')
+        extension = 'collapsed' if self.format == 'collapsed' else 'speedscope.json'
+        path = os.path.join(self.output_dir, f"profile-{os.getpid()}-{stamp}.{extension}")
+        with open(path, 'w') as f:
+            if self.format == 'collapsed':
+                f.write(collapsed(counts))
+            else:
+                json.dump(speedscope(counts, self.interval * 1000, f"usafe {os.getpid()} {stamp}"), f)
+        self.stats['windows'] += 1
+        self.stats['last_file'] = path
+        return path
+
+    def top(self, n: int = 20) -> list:
+        """Functions with the most samples in the current window, leaf or not"""
+        totals = Counter()
+        with self._lock:
+            for stack, count in self._counts.items():
+                for frame in set(stack):
+                    totals[frame[0]] += count
+        return totals.most_common(n)
+
+    def status(self) -> Dict:
+        return dict(self.stats, running=self.running, format=self.format,
+                    interval_ms=self.interval * 1000, window_seconds=self.window_seconds,
+                    sampling_ms=round(self.stats['sampling_ms'], 3))
+
+def collapsed(counts: Counter) -> str:
+    """Brendan Gregg's collapsed stack format, one 'a;b;c count' line per stack"""
+    lines = []
+    for stack, count in sorted(counts.items(), key=lambda item: -item[1]):
+        names = [name.replace(';', ':').replace(' ', '_') for name, _, _ in stack]
+        lines.append(f"{';'.join(names)} {count}")
+    return '\n'.join(lines) + '\n'
+
+def speedscope(counts: Counter, interval_ms: float, name: str) -> Dict:
+    """Speedscope sampled profile with one weighted sample per distinct stack"""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in counts.items():
+        sample = []
+        for frame in stack:
+            i = index.get(frame)
+            if i is None:
+                i = index[frame] = len(frames)
+                entry = {'name': frame[0]}
+                if frame[1]:
+                    entry.update(file=frame[1], line=frame[2])
+                frames.append(entry)
+            sample.append(i)
+        samples.append(sample)
+        weights.append(count * interval_ms)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights
+        }],
+        'name': name,
+        'exporter': 'usafe profiler'
+    }
+
+PROFILER = Profiler()
+
+def start_from_config() -> None:
+    """Start the shared profiler if PROFILER_ENABLED is set"""
+    if PROFILER_CONFIG['enabled']:
+        PROFILER.start()
+
+def install_signal_toggle(signum: int = getattr(signal, 'SIGUSR2', None)) -> bool:
+    """Toggle the shared profiler on ``kill -USR2 <pid>``; main thread only"""
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def _toggle(received, frame):
+        # Stopping joins the sampler and writes a file, so do it off the signal handler
+        threading.Thread(target=PROFILER.toggle, daemon=True).start()
+
+    signal.signal(signum, _toggle)
+    return True
+
+def _authorized(request) -> bool:
+    token = PROFILER_CONFIG['token']
+    if token:
+        return hmac.compare_digest(request.headers.get('X-Profiler-Token', ''), token)
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+def init_app(app):
+    """Add GET/POST /debug/profiler to a Flask app and honour PROFILER_ENABLED"""
+    from flask import jsonify, request
+
+    @app.route('/debug/profiler', methods=['GET', 'POST'])
+    def profiler_control():
+        if not _authorized(request):
+            return jsonify({'error': 'forbidden'}), 403
+        if request.method == 'POST':
+            body = request.get_json(silent=True) or {}
+            action = body.get('action') or request.args.get('action')
+            try:
+                if action == 'start':
+                    PROFILER.start(body.get('format') or request.args.get('format'))
+                elif action == 'stop':
+                    PROFILER.stop()
+                elif action == 'flush':
+                    PROFILER.flush()
+                else:
+                    return jsonify({'error': "action must be 'start', 'stop' or 'flush'"}), 400
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        status = PROFILER.status()
+        status['top'] = PROFILER.top(10)
+        return jsonify(status)
+
+    start_from_config()
+    return app
@@ -0,0 +1,322 @@
+"""Response cache for the read-mostly API endpoints.
+
+``ResponseCache`` is WSGI middleware that sits in front of the Flask app.
+On a miss it calls the app once with an identity-encoded, unconditional
+request. It then stores the body with its gzip and brotli encodings, the
+ETag for each encoding and the finished header lists. A hit never enters
+Flask: it costs one dict lookup, an expiry and version check, and a socket
+write, or a 304 when If-None-Match matches.
+
+Each cached path belongs to a namespace with its own TTL (CACHE_RULES).
+Writes invalidate a namespace by bumping its version, and entries filled
+under an older version are ignored. The database tables behind each
+namespace NOTIFY on every write (``init_cache_triggers``). Each server
+process listens for those messages (``start_invalidation_listener``), so a
+write made through any worker, a script or psql reaches every worker.
+"""
+import gzip
+import hashlib
+import logging
+import select
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from config import RESPONSE_CACHE_CONFIG
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+NOTIFY_CHANNEL = 'response_cache'
+
+# path (exact, or prefix when ending in '/') -> (namespace, ttl seconds)
+CACHE_RULES = {
+    '/api/predictions': ('predictions', 60),
+    '/api/community/': ('community', 300),
+    '/api/gamification/leaderboard': ('gamification', 15),
+    '/api/gamification/user/': ('gamification', 15),
+    '/api/gamification/badges': ('gamification', 3600)
+}
+
+# table -> namespace whose cached responses it feeds
+INVALIDATING_TABLES = {
+    'community_partnerships': 'community',
+    'community_challenges': 'community',
+    'badges': 'gamification',
+    'volunteer_profiles': 'gamification',
+    'point_events': 'gamification'
+}
+
+MIN_COMPRESS_BYTES = 256
+
+# Request headers that would make the app answer differently from the cached entry
+_FILL_STRIPPED = ('HTTP_ACCEPT_ENCODING', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+# Response headers stored with an entry; the rest are rebuilt per encoding
+_KEPT_HEADERS = {'content-type', 'cache-control', 'last-modified', 'expires'}
+
+def init_cache_triggers(cur) -> None:
+    """Create statement-level NOTIFY triggers on the tables behind cached endpoints"""
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION notify_response_cache() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('response_cache', TG_ARGV[0]);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table, namespace in INVALIDATING_TABLES.items():
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_response_cache ON {table}")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_response_cache
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_response_cache('{namespace}')
+        """)
+
+def notify_invalidation(cur, namespace: str) -> None:
+    """Invalidate a namespace in every process once the current transaction commits"""
+    cur.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, namespace))
+
+class CachedResponse:
+    __slots__ = ('namespace', 'version', 'expires', 'etags', 'variants', 'not_modified', 'last_modified')
+
+    def __init__(self, namespace: str, version: int, expires: float, variants: Dict[str, Tuple[bytes, List]],
+                 etags: set, not_modified: List, last_modified: Optional[str]):
+        self.namespace = namespace
+        self.version = version
+        self.expires = expires
+        self.variants = variants
+        self.etags = etags
+        self.not_modified = not_modified
+        self.last_modified = last_modified
+
+def _parse_accept_encoding(header: str) -> str:
+    """Best stored encoding the client accepts: 'br', 'gzip' or ''"""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q=') and float(params[2:] or 0) == 0:
+            continue
+        accepted.add(name.strip().lower())
+    if 'br' in accepted and brotli is not None:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return ''
+
+class ResponseCache:
+    def __init__(self, app, rules: Dict = None, max_entries: int = None,
+                 brotli_quality: int = None, listen_db: Optional[Dict] = None, clock=time.monotonic):
+        self.app = app
+        self.rules = rules or CACHE_RULES
+        self._exact = {path: rule for path, rule in self.rules.items() if not path.endswith('/')}
+        self._prefixes = [(path, rule) for path, rule in self.rules.items() if path.endswith('/')]
+        self.max_entries = max_entries or RESPONSE_CACHE_CONFIG['max_entries']
+        self.brotli_quality = brotli_quality or RESPONSE_CACHE_CONFIG['brotli_quality']
+        self.clock = clock
+        self.versions = {namespace: 0 for namespace, _ in self.rules.values()}
+        self._entries: Dict[str, CachedResponse] = {}
+        self._encodings: Dict[str, str] = {}
+        self._fill_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+        # The listener starts with the first request so it runs in the serving worker, not a pre-fork parent
+        self._listen_db = listen_db
+        self._listener = None
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drop one namespace, or everything when namespace is None"""
+        with self._lock:
+            for name in ([namespace] if namespace else list(self.versions)):
+                if name in self.versions:
+                    self.versions[name] += 1
+            self.stats['invalidations'] += 1
+
+    def _rule(self, path: str) -> Optional[tuple]:
+        rule = self._exact.get(path)
+        if rule is None:
+            for prefix, prefix_rule in self._prefixes:
+                if path.startswith(prefix):
+                    return prefix_rule
+        return rule
+
+    def __call__(self, environ, start_response):
+        if self._listen_db is not None and self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = start_invalidation_listener(self, self._listen_db)
+        method = environ['REQUEST_METHOD']
+        rule = self._rule(environ.get('PATH_INFO', '')) if method in ('GET', 'HEAD') else None
+        if rule is None:
+            return self.app(environ, start_response)
+
+        namespace, ttl = rule
+        query = environ.get('QUERY_STRING')
+        key = f"{environ['PATH_INFO']}?{query}" if query else environ['PATH_INFO']
+        entry = self._entries.get(key)
+        if entry is None or entry.expires <= self.clock() or entry.version != self.versions[namespace]:
+            entry, passthrough = self._fill(key, namespace, ttl, environ)
+            if entry is None:
+                status, headers, body = passthrough
+                start_response(status, headers)
+                return [body]
+            outcome = 'MISS'
+        else:
+            outcome = 'HIT'
+
+        extra = [('X-Cache', outcome)]
+        if 'HTTP_ORIGIN' in environ:
+            # Same answer flask_cors gives the uncached endpoints
+            extra.append(('Access-Control-Allow-Origin', '*'))
+
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            matched = if_none_match.strip() == '*' or any(
+                tag.strip() in entry.etags for tag in if_none_match.split(','))
+        else:
+            matched = entry.last_modified is not None and environ.get('HTTP_IF_MODIFIED_SINCE') == entry.last_modified
+        if matched:
+            self.stats['not_modified'] += 1
+            start_response('304 Not Modified', entry.not_modified + extra)
+            return []
+
+        accept = environ.get('HTTP_ACCEPT_ENCODING', '')
+        encoding = self._encodings.get(accept)
+        if encoding is None:
+            encoding = self._encodings[accept] = _parse_accept_encoding(accept)
+        body, headers = entry.variants.get(encoding) or entry.variants['']
+        self.stats['hits' if outcome == 'HIT' else 'misses'] += 1
+        start_response('200 OK', headers + extra)
+        return [] if method == 'HEAD' else [body]
+
+    def _fill(self, key: str, namespace: str, ttl: int, environ) -> tuple:
+        with self._lock:
+            fill_lock = self._fill_locks.setdefault(key, threading.Lock())
+        # One request per key renders; the rest wait and reuse its entry
+        with fill_lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > self.clock() and entry.version == self.versions[namespace]:
+                return entry, None
+
+            version = self.versions[namespace]
+            try:
+                status, headers, body = self._render(environ)
+            except Exception:
+                self._forget_fill_lock(key, fill_lock)
+                raise
+            if not status.startswith('200') or any(k.lower() == 'content-encoding' for k, _ in headers):
+                # Nothing is cached, so the lock would otherwise outlive the request
+                self._forget_fill_lock(key, fill_lock)
+                return None, (status, headers, body)
+
+            entry = self._build(namespace, version, self.clock() + ttl, headers, body)
+            with self._lock:
+                if len(self._entries) >= self.max_entries and key not in self._entries:
+                    self._evict()
+                self._entries[key] = entry
+            return entry, None
+
+    def _forget_fill_lock(self, key: str, fill_lock: threading.Lock) -> None:
+        with self._lock:
+            if key not in self._entries and self._fill_locks.get(key) is fill_lock:
+                del self._fill_locks[key]
+
+    def _render(self, environ) -> tuple:
+        """Run the app for an identity-encoded, unconditional request"""
+        inner = {k: v for k, v in environ.items() if k not in _FILL_STRIPPED}
+        inner['REQUEST_METHOD'] = 'GET'
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'], captured['headers'] = status, headers
+            return lambda data: None
+
+        result = self.app(inner, capture)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return captured['status'], captured['headers'], body
+
+    def _build(self, namespace: str, version: int, expires: float, headers: List, body: bytes) -> CachedResponse:
+        kept = [(k, v) for k, v in headers if k.lower() in _KEPT_HEADERS]
+        etag = next((v for k, v in headers if k.lower() == 'etag'), None)
+        base = etag.strip('"') if etag else None
+        if base is None:
+            base = hashlib.sha1(body).hexdigest()[:32]
+        last_modified = next((v for k, v in headers if k.lower() == 'last-modified'), None)
+
+        bodies = {'': body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            bodies['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                bodies['br'] = brotli.compress(body, quality=self.brotli_quality)
+
+        variants, etags = {}, set()
+        for encoding, data in bodies.items():
+            tag = f'"{base}-{encoding}"' if encoding else f'"{base}"'
+            etags.update((tag, f"W/{tag}"))
+            variant_headers = kept + [('ETag', tag), ('Vary', 'Accept-Encoding'),
+                                      ('Content-Length', str(len(data)))]
+            if encoding:
+                variant_headers.append(('Content-Encoding', encoding))
+            variants[encoding] = (data, variant_headers)
+
+        not_modified = [(k, v) for k, v in kept if k.lower() != 'content-type']
+        not_modified += [('ETag', f'"{base}"'), ('Vary', 'Accept-Encoding')]
+        return CachedResponse(namespace, version, expires, variants, etags, not_modified, last_modified)
+
+    def _evict(self) -> None:
+        """Drop expired and superseded entries, or the oldest half if none are"""
+        now = self.clock()
+        stale = [key for key, entry in self._entries.items()
+                 if entry.expires <= now or entry.version != self.versions[entry.namespace]]
+        if not stale:
+            stale = list(self._entries)[:max(1, len(self._entries) // 2)]
+        for key in stale:
+            del self._entries[key]
+            self._fill_locks.pop(key, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), versions=dict(self.versions),
+                        brotli=brotli is not None)
+
+def start_invalidation_listener(cache: ResponseCache, db_config: Dict,
+                                retry_seconds: float = 5.0) -> threading.Thread:
+    """LISTEN for invalidations on a daemon thread, reconnecting on failure"""
+    def listen():
+        import psycopg2
+        import psycopg2.extensions
+        logger = logging.getLogger(__name__)
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**db_config)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # Anything written while we were not listening is unknown
+                cache.invalidate()
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    namespaces = set()
+                    while conn.notifies:
+                        namespaces.add(conn.notifies.pop(0).payload)
+                    for namespace in namespaces:
+                        cache.invalidate(namespace)
+            except Exception as e:
+                logger.error(f"Response cache listener error: {str(e)}")
+                time.sleep(retry_seconds)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    thread = threading.Thread(target=listen, name='response-cache-listener', daemon=True)
+    thread.start()
+    return thread
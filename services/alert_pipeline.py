@@ -0,0 +1,338 @@
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from ai.spatial_index import GridIndex
+from instrumentation import get_service_logger
+
+# Common 1-5 scale for the labels used by the different alert sources
+SEVERITY_SCALE = {
+    'low': 1,
+    'minor': 1,
+    'moderate': 2,
+    'medium': 2,
+    'high': 3,
+    'severe': 4,
+    'extreme': 5,
+    'critical': 5
+}
+SEVERITY_LABELS = {1: 'low', 2: 'moderate', 3: 'high', 4: 'severe', 5: 'extreme'}
+
+# Keywords that identify a hazard in a type, event name or title; first match wins
+HAZARD_KEYWORDS = [
+    ('flood', ('flood', 'inundation', 'cloudburst')),
+    ('landslide', ('landslide', 'mudslide', 'debris')),
+    ('earthquake', ('earthquake', 'seismic', 'tremor')),
+    ('avalanche', ('avalanche',)),
+    ('snow', ('snow', 'blizzard', 'frost')),
+    ('storm', ('thunder', 'storm', 'cyclone', 'pressure', 'lightning', 'hail')),
+    ('rain', ('rain', 'precipitation', 'shower')),
+    ('wind', ('wind', 'gale', 'squall')),
+    ('temperature', ('temperature', 'heat', 'cold', 'freez'))
+]
+
+def normalize_hazard(*texts: Optional[str]) -> str:
+    """Map free-text alert types onto a fixed set of hazards"""
+    for text in texts:
+        if not text:
+            continue
+        text = text.lower()
+        for hazard, keywords in HAZARD_KEYWORDS:
+            if any(keyword in text for keyword in keywords):
+                return hazard
+    return 'other'
+
+def normalize_severity(severity) -> int:
+    """Map a severity label or number onto the 1-5 scale"""
+    if isinstance(severity, (int, float)):
+        return max(1, min(5, int(severity)))
+    if isinstance(severity, str):
+        if severity.strip().isdigit():
+            return max(1, min(5, int(severity)))
+        return SEVERITY_SCALE.get(severity.strip().lower(), 2)
+    return 2
+
+def _parse_time(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    return datetime.fromisoformat(str(value).replace('Z', ''))
+
+def _coordinates(location) -> tuple:
+    if isinstance(location, dict):
+        lat = location.get('lat', location.get('latitude'))
+        lon = location.get('lon', location.get('longitude'))
+        if lat is not None and lon is not None:
+            return float(lat), float(lon)
+    return None, None
+
+def _normalized(source: str, hazard: str, severity: int, description: str,
+                latitude: Optional[float], longitude: Optional[float], start: datetime,
+                end: datetime, title: Optional[str] = None, source_id=None,
+                radius_km: Optional[float] = None, raw: Dict = None) -> Dict:
+    return {
+        'source': source,
+        'source_id': source_id,
+        'hazard': hazard,
+        'severity': severity,
+        'severity_label': SEVERITY_LABELS[severity],
+        'title': title or f"{hazard.capitalize()} alert",
+        'description': description or '',
+        'latitude': latitude,
+        'longitude': longitude,
+        'radius_km': radius_km,
+        'start': start,
+        'end': end,
+        'raw': raw
+    }
+
+def normalize_openweather_alert(alert: Dict, latitude: float, longitude: float) -> Dict:
+    """WeatherAlertService.get_weather_alerts (OpenWeatherMap One Call alerts)"""
+    tags = ' '.join(alert.get('tags', []))
+    start = _parse_time(alert.get('start')) or datetime.now()
+    return _normalized(
+        'openweather', normalize_hazard(alert.get('event'), tags), 3,
+        alert.get('description'), latitude, longitude, start,
+        _parse_time(alert.get('end')) or start + timedelta(hours=6),
+        title=alert.get('event'), source_id=alert.get('sender_name'), raw=alert
+    )
+
+def normalize_forecast_alert(alert: Dict, latitude: float, longitude: float) -> Dict:
+    """WeatherAlertForecastService._analyze_forecast_for_alerts (one per day and hazard)"""
+    day = _parse_time(alert.get('date')) or datetime.now()
+    start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    return _normalized(
+        'forecast', normalize_hazard(alert.get('type')), normalize_severity(alert.get('severity')),
+        alert.get('description'), latitude, longitude, start, start + timedelta(days=1), raw=alert
+    )
+
+def normalize_service_alert(alert: Dict) -> Dict:
+    """AlertService and WeatherAlertService alerts from the alert API"""
+    latitude, longitude = _coordinates(alert.get('location'))
+    start = _parse_time(alert.get('start_time') or alert.get('created_at')) or datetime.now()
+    return _normalized(
+        'alert_api', normalize_hazard(alert.get('type'), alert.get('title'), alert.get('description')),
+        normalize_severity(alert.get('severity')), alert.get('description'), latitude, longitude,
+        start, _parse_time(alert.get('end_time')) or start + timedelta(hours=12),
+        title=alert.get('title'), source_id=alert.get('id'), radius_km=alert.get('radius_km'), raw=alert
+    )
+
+def normalize_risk_alert(alert: Dict, latitude: float, longitude: float) -> Dict:
+    """WeatherAlertRiskService.get_active_alerts"""
+    start = _parse_time(alert.get('start_time') or alert.get('start')) or datetime.now()
+    return _normalized(
+        'risk', normalize_hazard(alert.get('type'), alert.get('event'), alert.get('description')),
+        normalize_severity(alert.get('severity')), alert.get('description'), latitude, longitude,
+        start, _parse_time(alert.get('end_time') or alert.get('end')) or start + timedelta(hours=12),
+        source_id=alert.get('id'), raw=alert
+    )
+
+def normalize_weather_alert_row(row: Dict) -> Dict:
+    """A row of the weather_alerts table, selected with latitude and longitude"""
+    start = _parse_time(row.get('timestamp')) or datetime.now()
+    return _normalized(
+        'weather_alerts', normalize_hazard(row.get('type'), row.get('description')),
+        normalize_severity(row.get('severity')), row.get('description'),
+        row.get('latitude'), row.get('longitude'), start, start + timedelta(hours=12),
+        source_id=row.get('id'), raw=dict(row)
+    )
+
+NORMALIZERS = {
+    'openweather': normalize_openweather_alert,
+    'forecast': normalize_forecast_alert,
+    'alert_api': normalize_service_alert,
+    'risk': normalize_risk_alert,
+    'weather_alerts': normalize_weather_alert_row
+}
+
+class AlertPipeline:
+    """Normalize, deduplicate and merge alerts from every alert source.
+
+    Two alerts describe the same event when they share a hazard, their time
+    windows overlap (within ``time_slack``) and their areas overlap. Matching
+    alerts are merged: the window is widened, the sources are accumulated and
+    the highest severity wins. Only the first sighting of an event and any
+    later increase in its severity are emitted downstream.
+
+    Events that ended more than ``retention`` ago are swept out by ``add``
+    at most once every ``expire_interval`` (10 minutes by default), so a
+    long-running pipeline holds only recent events.
+    """
+
+    def __init__(self, default_radius_km: float = 25.0,
+                 time_slack: timedelta = timedelta(hours=3),
+                 retention: timedelta = timedelta(hours=6),
+                 expire_interval: timedelta = timedelta(minutes=10),
+                 clock: Callable[[], datetime] = datetime.now):
+        self.default_radius_km = default_radius_km
+        self.time_slack = time_slack
+        self.retention = retention
+        self.expire_interval = expire_interval
+        self.clock = clock
+        self._next_expiry = clock() + expire_interval
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.events: Dict[int, Dict] = {}
+        # One index per hazard over located events; unlocated events are kept per hazard
+        self._indexes: Dict[str, GridIndex] = {}
+        self._unlocated: Dict[str, set] = {}
+        self._max_radius = default_radius_km
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.stats = {'received': 0, 'new': 0, 'escalated': 0, 'suppressed': 0, 'expired': 0}
+        self.setup_logging()
+
+    def setup_logging(self):
+        self.logger = get_service_logger(__name__, 'logs/alert_pipeline.log')
+
+    def add_listener(self, listener: Callable[[Dict], None]) -> None:
+        """Call listener with every new or escalated alert"""
+        self.listeners.append(listener)
+
+    def ingest(self, source: str, alerts: Iterable[Dict], **context) -> List[Dict]:
+        """Normalize raw alerts from a known source and process them
+
+        Point-based sources need the latitude and longitude they were
+        queried for, passed as keyword arguments.
+        """
+        normalize = NORMALIZERS[source]
+        return list(self.process(normalize(alert, **context) for alert in alerts))
+
+    def process(self, alerts: Iterable[Dict]) -> Iterator[Dict]:
+        """Process normalized alerts, yielding only new or escalated ones"""
+        for alert in alerts:
+            try:
+                emitted = self.add(alert)
+            except Exception as e:
+                self.logger.error(f"Error processing alert from {alert.get('source')}: {str(e)}")
+                continue
+            if emitted is not None:
+                yield emitted
+
+    def add(self, alert: Dict) -> Optional[Dict]:
+        """Merge one normalized alert; returns the downstream event or None"""
+        now = self.clock()
+        if now >= self._next_expiry:
+            self._next_expiry = now + self.expire_interval
+            self.expire(now)
+
+        with self._lock:
+            self.stats['received'] += 1
+            event = self._find_match(alert)
+            if event is None:
+                emitted = self._create(alert)
+            else:
+                emitted = self._merge(event, alert)
+            if emitted is None:
+                self.stats['suppressed'] += 1
+            else:
+                self.stats[emitted['change']] += 1
+
+        if emitted is not None:
+            for listener in self.listeners:
+                try:
+                    listener(emitted)
+                except Exception as e:
+                    self.logger.error(f"Alert listener failed: {str(e)}")
+        return emitted
+
+    def expire(self, now: Optional[datetime] = None) -> int:
+        """Forget events that ended more than the retention period ago"""
+        cutoff = (now or self.clock()) - self.retention
+        with self._lock:
+            expired = [event_id for event_id, event in self.events.items() if event['end'] < cutoff]
+            for event_id in expired:
+                event = self.events.pop(event_id)
+                if event['latitude'] is None:
+                    self._unlocated[event['hazard']].discard(event_id)
+                else:
+                    self._indexes[event['hazard']].remove(event_id)
+            self.stats['expired'] += len(expired)
+        return len(expired)
+
+    def active_events(self, hazard: Optional[str] = None) -> List[Dict]:
+        """Get merged events, most severe first"""
+        with self._lock:
+            events = [dict(event, sources=sorted(event['sources'])) for event in self.events.values()
+                      if hazard is None or event['hazard'] == hazard]
+        return sorted(events, key=lambda event: (-event['severity'], event['start']))
+
+    def ingest_weather_alert_table(self, db_config: Dict, since: datetime) -> List[Dict]:
+        """Read recent weather_alerts rows and process them"""
+        conn = psycopg2.connect(**db_config)
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute("""
+                SELECT id, type, severity, description, timestamp,
+                       ST_Y(location) as latitude, ST_X(location) as longitude
+                FROM weather_alerts
+                WHERE timestamp >= %s
+                ORDER BY timestamp
+            """, (since,))
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+            conn.close()
+        return self.ingest('weather_alerts', rows)
+
+    def _find_match(self, alert: Dict) -> Optional[Dict]:
+        hazard = alert['hazard']
+        radius = alert['radius_km'] or self.default_radius_km
+
+        def overlaps_in_time(event_id, _):
+            event = self.events[event_id]
+            return (alert['start'] <= event['end'] + self.time_slack and
+                    event['start'] <= alert['end'] + self.time_slack)
+
+        if alert['latitude'] is None:
+            candidates = [self.events[event_id] for event_id in self._unlocated.get(hazard, ())
+                          if overlaps_in_time(event_id, None)]
+            return max(candidates, key=lambda event: event['severity'], default=None)
+
+        index = self._indexes.get(hazard)
+        if index is None:
+            return None
+        for distance, event_id, _ in index.within(alert['latitude'], alert['longitude'],
+                                                  radius + self._max_radius, overlaps_in_time):
+            # Circles overlap when centres are closer than the sum of the radii
+            if distance <= radius + self.events[event_id]['radius_km']:
+                return self.events[event_id]
+        return None
+
+    def _create(self, alert: Dict) -> Dict:
+        event_id = next(self._ids)
+        radius = alert['radius_km'] or self.default_radius_km
+        event = dict(alert, id=event_id, radius_km=radius, sources={alert['source']},
+                     reports=1, raw=None)
+        self.events[event_id] = event
+        if alert['latitude'] is None:
+            self._unlocated.setdefault(alert['hazard'], set()).add(event_id)
+        else:
+            self._indexes.setdefault(alert['hazard'], GridIndex(cell_size_deg=0.25)).upsert(
+                event_id, alert['latitude'], alert['longitude']
+            )
+            self._max_radius = max(self._max_radius, radius)
+        return self._event(event, 'new', None)
+
+    def _merge(self, event: Dict, alert: Dict) -> Optional[Dict]:
+        previous = event['severity']
+        event['start'] = min(event['start'], alert['start'])
+        event['end'] = max(event['end'], alert['end'])
+        event['sources'].add(alert['source'])
+        event['reports'] += 1
+        if alert['severity'] <= previous:
+            return None
+
+        event['severity'] = alert['severity']
+        event['severity_label'] = alert['severity_label']
+        event['title'] = alert['title']
+        event['description'] = alert['description']
+        return self._event(event, 'escalated', previous)
+
+    def _event(self, event: Dict, change: str, previous_severity: Optional[int]) -> Dict:
+        return dict(event, sources=sorted(event['sources']), change=change,
+                    previous_severity=previous_severity)
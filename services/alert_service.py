@@ -2,8 +2,8 @@ import requests
 import json
 from datetime import datetime
 from config import ALERT_CONFIG, SMS_CONFIG
-import logging
 from typing import Dict, List, Optional
+from instrumentation import get_service_logger
 
 class AlertService:
     def __init__(self):
@@ -13,12 +13,7 @@ class AlertService:
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/alert_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/alert_service.log')
 
     def create_alert(self, alert_data: Dict) -> Dict:
         """Create a new alert"""
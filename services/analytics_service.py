@@ -1,6 +1,7 @@
 import psycopg2
 import os
 import logging
+from instrumentation import instrumented
 
 class AnalyticsService:
     def __init__(self):
@@ -12,6 +13,7 @@ class AnalyticsService:
             'password': os.getenv('DB_PASSWORD')
         }
         
+    @instrumented('db')
     def get_quick_stats(self, lat, lon):
         try:
             conn = psycopg2.connect(**self.db_config)
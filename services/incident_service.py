@@ -1,6 +1,7 @@
 import psycopg2
 import os
 import logging
+from instrumentation import instrumented
 
 class IncidentService:
     def __init__(self):
@@ -12,6 +13,7 @@ class IncidentService:
             'password': os.getenv('DB_PASSWORD')
         }
         
+    @instrumented('db')
     def get_incidents_by_location(self, lat, lon):
         try:
             conn = psycopg2.connect(**self.db_config)
@@ -55,4 +57,47 @@ class IncidentService:
             
         except Exception as e:
             logging.error(f"Error getting incidents: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+    @instrumented('db')
+    def get_recent_incidents(self, incident_type, hours=24, limit=20):
+        try:
+            conn = psycopg2.connect(**self.db_config)
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT 
+                    id,
+                    severity,
+                    status,
+                    description,
+                    timestamp,
+                    ST_Y(location) as latitude,
+                    ST_X(location) as longitude
+                FROM incidents 
+                WHERE type = %s
+                  AND timestamp >= NOW() - make_interval(hours => %s)
+                ORDER BY timestamp DESC
+                LIMIT %s
+            """, (incident_type, hours, limit))
+            
+            incidents = []
+            for row in cursor.fetchall():
+                incidents.append({
+                    'id': row[0],
+                    'severity': row[1],
+                    'status': row[2],
+                    'description': row[3],
+                    'timestamp': row[4],
+                    'latitude': row[5],
+                    'longitude': row[6]
+                })
+            
+            cursor.close()
+            conn.close()
+            
+            return incidents
+            
+        except Exception as e:
+            logging.error(f"Error getting recent incidents: {str(e)}")
+            return []
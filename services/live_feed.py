@@ -0,0 +1,421 @@
+import asyncio
+import json
+import logging
+import math
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor
+from aiohttp import WSMsgType, web
+from instrumentation import get_service_logger
+
+CHANNELS = ('incidents', 'alerts', 'team_locations')
+
+# Postgres NOTIFY channel -> feed channel
+NOTIFY_CHANNELS = {
+    'live_incidents': 'incidents',
+    'live_alerts': 'alerts',
+    'live_team_locations': 'team_locations'
+}
+
+TRIGGER_SQL = """
+    CREATE OR REPLACE FUNCTION notify_live_incident() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('live_incidents', json_build_object(
+            'op', TG_OP, 'id', NEW.id, 'type', NEW.type, 'severity', NEW.severity,
+            'status', NEW.status, 'latitude', ST_Y(NEW.location), 'longitude', ST_X(NEW.location),
+            'timestamp', NEW.timestamp
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS incidents_live_feed ON incidents;
+    CREATE TRIGGER incidents_live_feed
+        AFTER INSERT OR UPDATE ON incidents
+        FOR EACH ROW EXECUTE FUNCTION notify_live_incident();
+
+    CREATE OR REPLACE FUNCTION notify_live_alert() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('live_alerts', json_build_object(
+            'op', TG_OP, 'id', NEW.id, 'type', NEW.type, 'severity', NEW.severity,
+            'description', LEFT(NEW.description, 500),
+            'latitude', ST_Y(NEW.location), 'longitude', ST_X(NEW.location),
+            'timestamp', NEW.timestamp
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS weather_alerts_live_feed ON weather_alerts;
+    CREATE TRIGGER weather_alerts_live_feed
+        AFTER INSERT ON weather_alerts
+        FOR EACH ROW EXECUTE FUNCTION notify_live_alert();
+
+    CREATE OR REPLACE FUNCTION notify_live_team_location() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('live_team_locations', json_build_object(
+            'team_id', NEW.team_id, 'latitude', NEW.latitude, 'longitude', NEW.longitude,
+            'recorded_at', NEW.recorded_at
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS team_latest_locations_live_feed ON team_latest_locations;
+    CREATE TRIGGER team_latest_locations_live_feed
+        AFTER INSERT OR UPDATE ON team_latest_locations
+        FOR EACH ROW EXECUTE FUNCTION notify_live_team_location();
+"""
+
+def install_triggers(db_config: Dict) -> None:
+    """Create the NOTIFY triggers that feed the hub"""
+    conn = psycopg2.connect(**db_config)
+    cur = conn.cursor()
+    cur.execute(TRIGGER_SQL)
+    conn.commit()
+    cur.close()
+    conn.close()
+
+def region_for(latitude: float, longitude: float, size_deg: float) -> str:
+    """Name of the square region tile containing a point"""
+    return f"{math.floor(latitude / size_deg)}:{math.floor(longitude / size_deg)}"
+
+def regions_for_bbox(min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                     size_deg: float) -> Set[str]:
+    """Names of all region tiles touching a bounding box"""
+    return {
+        f"{i}:{j}"
+        for i in range(math.floor(min_lat / size_deg), math.floor(max_lat / size_deg) + 1)
+        for j in range(math.floor(min_lon / size_deg), math.floor(max_lon / size_deg) + 1)
+    }
+
+class Subscriber:
+    """One connected client with its topics and a bounded outbound buffer.
+
+    Incident and alert events queue up to ``max_queue``; past that the oldest
+    are dropped and the client is told how many it missed, so it can resync
+    over REST; a ``resync`` event asks the same after the feed itself lost
+    events. Team locations are coalesced per team instead of queued, so a
+    slow client only ever receives the newest position of each team.
+    """
+
+    def __init__(self, channels: Iterable[str], regions: Optional[Set[str]] = None,
+                 max_queue: int = 256):
+        self.channels = set(channels) & set(CHANNELS)
+        self.regions = regions
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.stale = False
+        self._queue = deque()
+        self._locations: Dict = {}
+        self._ready = asyncio.Event()
+
+    def wants(self, channel: str, region: Optional[str]) -> bool:
+        if channel not in self.channels:
+            return False
+        return self.regions is None or region is None or region in self.regions
+
+    def offer(self, channel: str, payload: Dict) -> None:
+        if channel == 'team_locations':
+            self._locations[payload.get('team_id')] = payload
+        else:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append((channel, payload))
+        self._ready.set()
+
+    def mark_stale(self) -> None:
+        """Tell the client that events may have been missed and it should resync"""
+        self.stale = True
+        self._ready.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[tuple]:
+        """Wait for events and take everything buffered"""
+        if not self._queue and not self._locations and not self.stale:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        batch = []
+        if self.stale:
+            batch.append(('resync', {}))
+            self.stale = False
+        if self.dropped:
+            batch.append(('lagged', {'dropped': self.dropped}))
+            self.dropped = 0
+        while self._queue:
+            batch.append(self._queue.popleft())
+        if self._locations:
+            batch.extend(('team_locations', payload) for payload in self._locations.values())
+            self._locations = {}
+        return batch
+
+class LiveFeedHub:
+    """Fan-out of live events to subscribers by channel and region"""
+
+    def __init__(self, region_size_deg: float = 0.5, max_queue: int = 256):
+        self.region_size_deg = region_size_deg
+        self.max_queue = max_queue
+        self.subscribers: Set[Subscriber] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {'published': 0, 'delivered': 0}
+        self.setup_logging()
+
+    def setup_logging(self):
+        self.logger = get_service_logger(__name__, 'logs/live_feed.log')
+
+    def subscribe(self, channels: Iterable[str], regions: Optional[Set[str]] = None) -> Subscriber:
+        subscriber = Subscriber(channels, regions, self.max_queue)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def publish(self, channel: str, payload: Dict) -> int:
+        """Deliver an event to matching subscribers; must run on the hub's loop"""
+        region = None
+        if payload.get('latitude') is not None and payload.get('longitude') is not None:
+            region = region_for(payload['latitude'], payload['longitude'], self.region_size_deg)
+            payload = dict(payload, region=region)
+
+        delivered = 0
+        for subscriber in self.subscribers:
+            if subscriber.wants(channel, region):
+                subscriber.offer(channel, payload)
+                delivered += 1
+        self.stats['published'] += 1
+        self.stats['delivered'] += delivered
+        return delivered
+
+    def request_resync(self) -> None:
+        """Ask every subscriber to reload state over REST"""
+        for subscriber in self.subscribers:
+            subscriber.mark_stale()
+
+    def publish_threadsafe(self, channel: str, payload: Dict) -> None:
+        """Publish from another thread, e.g. as an AlertPipeline listener"""
+        if self.loop is None:
+            raise RuntimeError("Hub is not attached to a running event loop")
+        self.loop.call_soon_threadsafe(self.publish, channel, payload)
+
+    def parse_subscription(self, params) -> Subscriber:
+        """Build a subscriber from channels/regions/bbox request parameters"""
+        channels = params.get('channels')
+        channels = channels.split(',') if isinstance(channels, str) else (channels or CHANNELS)
+        regions = params.get('regions')
+        if isinstance(regions, str):
+            regions = set(regions.split(','))
+        elif regions is not None:
+            regions = set(regions)
+        bbox = params.get('bbox')
+        if bbox:
+            if isinstance(bbox, str):
+                bbox = [float(value) for value in bbox.split(',')]
+            regions = (regions or set()) | regions_for_bbox(*bbox, self.region_size_deg)
+        return self.subscribe(channels, regions)
+
+class PgNotifyListener:
+    """Forwards Postgres NOTIFY messages into the hub without a polling loop
+
+    A lost connection is re-established with exponential backoff. Events
+    published while it was down are gone, so after reconnecting the latest
+    team positions are re-read and every subscriber is told to resync.
+    """
+
+    def __init__(self, db_config: Dict, hub: LiveFeedHub, retry_seconds: float = 1.0,
+                 max_retry_seconds: float = 60.0):
+        self.db_config = db_config
+        self.hub = hub
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.conn = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.disconnected_at = None
+        self._reconnecting = None
+        self.logger = logging.getLogger(__name__)
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._listen(self._connect())
+
+    def stop(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            self._reconnecting = None
+        self._disconnect()
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            cur = conn.cursor()
+            for channel in NOTIFY_CHANNELS:
+                cur.execute(f"LISTEN {channel}")
+            cur.close()
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _listen(self, conn) -> None:
+        self.conn = conn
+        self.loop.add_reader(conn.fileno(), self._on_readable)
+
+    def _disconnect(self) -> None:
+        if self.conn is not None:
+            try:
+                self.loop.remove_reader(self.conn.fileno())
+            except (ValueError, psycopg2.Error):
+                pass
+            self.conn.close()
+            self.conn = None
+
+    def _on_readable(self) -> None:
+        try:
+            self.conn.poll()
+        except psycopg2.Error as e:
+            self.logger.error(f"Live feed listener lost its connection: {str(e)}")
+            self._disconnect()
+            self.disconnected_at = datetime.now()
+            self._reconnecting = self.loop.create_task(self._reconnect())
+            return
+        while self.conn.notifies:
+            notify = self.conn.notifies.pop(0)
+            try:
+                payload = json.loads(notify.payload)
+            except ValueError:
+                self.logger.error(f"Invalid payload on {notify.channel}: {notify.payload[:100]}")
+                continue
+            self.hub.publish(NOTIFY_CHANNELS[notify.channel], payload)
+
+    async def _reconnect(self) -> None:
+        delay = self.retry_seconds
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                conn = await self.loop.run_in_executor(None, self._connect)
+                locations = await self.loop.run_in_executor(None, self._latest_locations, conn)
+            except psycopg2.Error as e:
+                self.logger.error(f"Live feed listener reconnect failed: {str(e)}")
+                delay = min(delay * 2, self.max_retry_seconds)
+                continue
+            break
+
+        self._reconnecting = None
+        self._listen(conn)
+        for location in locations:
+            self.hub.publish('team_locations', location)
+        self.hub.request_resync()
+        self.logger.info(f"Live feed listener reconnected, resent {len(locations)} team locations")
+
+    def _latest_locations(self, conn) -> List[Dict]:
+        """Team positions recorded since the connection was lost"""
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("""
+            SELECT team_id, latitude, longitude, recorded_at
+            FROM team_latest_locations
+            WHERE recorded_at >= %s
+        """, (self.disconnected_at,))
+        locations = [dict(row) for row in cur.fetchall()]
+        cur.close()
+        return locations
+
+def _encode(channel: str, payload: Dict) -> str:
+    return json.dumps({'channel': channel, 'data': payload}, default=str)
+
+async def sse_handler(request: web.Request) -> web.StreamResponse:
+    """Server-sent events: GET /live/sse?channels=alerts,incidents&bbox=29.5,77.5,31.5,81.0"""
+    hub = request.app['hub']
+    subscriber = hub.parse_subscription(request.query)
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    await response.prepare(request)
+    try:
+        while True:
+            batch = await subscriber.next_batch(timeout=request.app['heartbeat'])
+            if not batch:
+                await response.write(b": keep-alive\n\n")
+                continue
+            chunk = ''.join(f"event: {channel}\ndata: {_encode(channel, payload)}\n\n"
+                            for channel, payload in batch)
+            await response.write(chunk.encode('utf-8'))
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        hub.unsubscribe(subscriber)
+    return response
+
+async def websocket_handler(request: web.Request) -> web.WebSocketResponse:
+    """WebSocket feed; clients send {"channels": [...], "regions": [...], "bbox": [...]} to subscribe"""
+    hub = request.app['hub']
+    ws = web.WebSocketResponse(heartbeat=request.app['heartbeat'])
+    await ws.prepare(request)
+    subscriber = hub.parse_subscription(request.query)
+
+    async def sender():
+        while not ws.closed:
+            batch = await subscriber.next_batch(timeout=request.app['heartbeat'])
+            for channel, payload in batch:
+                await ws.send_str(_encode(channel, payload))
+
+    sending = asyncio.ensure_future(sender())
+    try:
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            try:
+                params = json.loads(message.data)
+            except ValueError:
+                await ws.send_str(json.dumps({'error': 'Invalid subscription message'}))
+                continue
+            # Re-subscribing replaces the client's topics
+            hub.unsubscribe(subscriber)
+            subscriber = hub.parse_subscription(params)
+            sending.cancel()
+            sending = asyncio.ensure_future(sender())
+    finally:
+        sending.cancel()
+        hub.unsubscribe(subscriber)
+    return ws
+
+def create_feed_app(hub: LiveFeedHub, db_config: Optional[Dict] = None,
+                    heartbeat: float = 15.0) -> web.Application:
+    """aiohttp application serving the live feed; listens to Postgres when db_config is given"""
+    app = web.Application()
+    app['hub'] = hub
+    app['heartbeat'] = heartbeat
+    app.router.add_get('/live/sse', sse_handler)
+    app.router.add_get('/live/ws', websocket_handler)
+
+    async def on_startup(app):
+        hub.loop = asyncio.get_running_loop()
+        if db_config is not None:
+            app['listener'] = PgNotifyListener(db_config, hub)
+            app['listener'].start(hub.loop)
+
+    async def on_cleanup(app):
+        if 'listener' in app:
+            app['listener'].stop(hub.loop)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+if __name__ == '__main__':
+    from config import DB_CONFIG, LIVE_FEED_CONFIG, init_config
+
+    init_config(required_vars=('DB_NAME',))
+    install_triggers(DB_CONFIG)
+    hub = LiveFeedHub(LIVE_FEED_CONFIG['region_size_deg'], LIVE_FEED_CONFIG['max_queue'])
+    web.run_app(create_feed_app(hub, DB_CONFIG), host=LIVE_FEED_CONFIG['host'],
+                port=LIVE_FEED_CONFIG['port'])
@@ -3,8 +3,8 @@ import requests
 import json
 from datetime import datetime, timedelta
 from config import WEATHER_CONFIG, ALERT_CONFIG, ML_CONFIG
-import logging
-import numpy as np
+import math
+from instrumentation import get_service_logger, instrumented
 
 class WeatherRiskService:
     def __init__(self):
@@ -14,12 +14,7 @@ class WeatherRiskService:
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/weather_risk_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/weather_risk_service.log')
 
     def calculate_risk_score(self, weather_data: Dict) -> float:
         """Calculate risk score based on weather conditions"""
@@ -40,7 +35,7 @@ class WeatherRiskService:
                 for feature in weights
             )
             
-            risk_score = 1 / (1 + np.exp(-risk_score))
+            risk_score = 1 / (1 + math.exp(-risk_score))
             
             return float(risk_score)
             
@@ -79,11 +74,15 @@ class WeatherRiskService:
 
     # Helper methods
     def _extract_features(self, weather_data: Dict) -> Dict:
+        # Current weather carries a plain amount, forecast days a dict
+        precipitation = weather_data['precipitation']
+        if isinstance(precipitation, dict):
+            precipitation = precipitation['amount']
         return {
             'temperature': weather_data['temperature']['avg'],
             'humidity': weather_data['humidity'],
             'wind_speed': weather_data['wind_speed'],
-            'precipitation': weather_data['precipitation']['amount'],
+            'precipitation': precipitation,
             'pressure': weather_data['pressure']
         }
 
@@ -95,6 +94,7 @@ class WeatherRiskService:
         features['pressure'] = (features['pressure'] - 950) / 100
         return features
 
+    @instrumented('http', 'openweather.current')
     def _get_current_weather(self, lat: float, lon: float) -> Dict:
         url = f"{self.weather_base_url}/weather"
         params = {
@@ -122,6 +122,7 @@ class WeatherRiskService:
             'precipitation': data.get('rain', {}).get('1h', 0.0)
         }
 
+    @instrumented('http', 'openweather.forecast')
     def _get_weather_forecast(self, lat: float, lon: float) -> Dict:
         url = f"{self.weather_base_url}/onecall"
         params = {
@@ -192,12 +193,7 @@ class WeatherAlertRiskService:
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/weather_alert_risk_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(f"{__name__}.alerts", 'logs/weather_alert_risk_service.log')
 
     def get_alert_risk_assessment(self, lat: float, lon: float) -> Dict:
         """Get risk assessment based on weather alerts"""
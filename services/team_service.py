@@ -1,6 +1,7 @@
 import psycopg2
 import os
 import logging
+from instrumentation import instrumented
 
 class TeamService:
     def __init__(self):
@@ -12,6 +13,7 @@ class TeamService:
             'password': os.getenv('DB_PASSWORD')
         }
         
+    @instrumented('db')
     def get_nearby_teams(self, lat, lon, radius=50000):
         try:
             conn = psycopg2.connect(**self.db_config)
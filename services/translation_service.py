@@ -1,23 +1,21 @@
 import requests
 import json
 from config import TRANSLATION_CONFIG
-import logging
 from typing import Dict, List, Optional
+from ai.translation_memory import TranslationMemory
+from instrumentation import get_service_logger
 
 class TranslationService:
     def __init__(self):
         self.api_key = TRANSLATION_CONFIG['api_key']
         self.base_url = TRANSLATION_CONFIG['base_url']
         self.supported_languages = TRANSLATION_CONFIG['supported_languages']
+        self.memory = TranslationMemory(TRANSLATION_CONFIG['memory_path'],
+                                        TRANSLATION_CONFIG['lru_size'])
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/translation_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/translation_service.log')
 
     def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
         """Translate text from source language to target language"""
@@ -27,6 +25,10 @@ class TranslationService:
             if target_lang not in self.supported_languages:
                 raise ValueError(f"Target language {target_lang} not supported")
 
+            cached = self.memory.get(text, target_lang, source_lang)
+            if cached is not None:
+                return cached
+
             url = f"{self.base_url}/translate"
             params = {
                 'api_key': self.api_key,
@@ -40,6 +42,7 @@ class TranslationService:
             result = response.json()
 
             if 'translation' in result:
+                self.memory.put(text, result['translation'], target_lang, source_lang)
                 return result['translation']
             else:
                 raise ValueError("Translation not found in response")
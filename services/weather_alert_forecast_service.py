@@ -2,8 +2,8 @@ import requests
 import json
 from datetime import datetime, timedelta
 from config import WEATHER_CONFIG, ALERT_CONFIG
-import logging
 from typing import Dict, List, Optional
+from instrumentation import get_service_logger
 
 class WeatherAlertForecastService:
     def __init__(self):
@@ -14,12 +14,7 @@ class WeatherAlertForecastService:
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/weather_alert_forecast_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/weather_alert_forecast_service.log')
 
     def get_alert_forecast(self, lat: float, lon: float) -> Dict:
         """Get forecast of weather alerts for a location"""
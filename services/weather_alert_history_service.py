@@ -2,8 +2,8 @@ import requests
 import json
 from datetime import datetime, timedelta
 from config import ALERT_CONFIG
-import logging
 from typing import Dict, List, Optional
+from instrumentation import get_service_logger
 
 class WeatherAlertHistoryService:
     def __init__(self):
@@ -12,12 +12,7 @@ class WeatherAlertHistoryService:
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/weather_alert_history_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/weather_alert_history_service.log')
 
     def get_alert_history(self, location: str = None, start_date: datetime = None, end_date: datetime = None) -> List[Dict]:
         """Get weather alert history with optional filters"""
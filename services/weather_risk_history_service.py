@@ -2,8 +2,8 @@ import requests
 import json
 from datetime import datetime, timedelta
 from config import WEATHER_CONFIG, ML_CONFIG
-import logging
 from typing import Dict, List, Optional
+from instrumentation import get_service_logger
 
 class WeatherRiskHistoryService:
     def __init__(self):
@@ -13,12 +13,7 @@ class WeatherRiskHistoryService:
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/weather_risk_history_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/weather_risk_history_service.log')
 
     def get_risk_history(self, lat: float, lon: float, days: int = 30) -> Dict:
         """Get historical risk assessments for a location"""
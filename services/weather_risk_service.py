@@ -2,9 +2,9 @@ import requests
 import json
 from datetime import datetime, timedelta
 from config import WEATHER_CONFIG, ML_CONFIG
-import logging
-import numpy as np
+import math
 from typing import Dict, List, Optional
+from instrumentation import get_service_logger, instrumented
 
 class WeatherRiskService:
     def __init__(self):
@@ -14,12 +14,7 @@ class WeatherRiskService:
         self.setup_logging()
 
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename='logs/weather_risk_service.log'
-        )
-        self.logger = logging.getLogger(__name__)
+        self.logger = get_service_logger(__name__, 'logs/weather_risk_service.log')
 
     def calculate_risk_score(self, weather_data: Dict) -> float:
         """Calculate risk score based on weather conditions"""
@@ -45,7 +40,7 @@ class WeatherRiskService:
             )
             
             # Apply sigmoid function to get score between 0 and 1
-            risk_score = 1 / (1 + np.exp(-risk_score))
+            risk_score = 1 / (1 + math.exp(-risk_score))
             
             return float(risk_score)
             
@@ -55,11 +50,15 @@ class WeatherRiskService:
 
     def _extract_features(self, weather_data: Dict) -> Dict:
         """Extract relevant weather features for risk calculation"""
+        # Current weather carries a plain amount, forecast days a dict
+        precipitation = weather_data['precipitation']
+        if isinstance(precipitation, dict):
+            precipitation = precipitation['amount']
         return {
             'temperature': weather_data['temperature']['avg'],
             'humidity': weather_data['humidity'],
             'wind_speed': weather_data['wind_speed'],
-            'precipitation': weather_data['precipitation']['amount'],
+            'precipitation': precipitation,
             'pressure': weather_data['pressure']
         }
 
@@ -116,6 +115,7 @@ class WeatherRiskService:
             self.logger.error(f"Error getting risk assessment: {str(e)}")
             raise
 
+    @instrumented('http', 'openweather.current')
     def _get_current_weather(self, lat: float, lon: float) -> Dict:
         """Get current weather data"""
         url = f"{self.weather_base_url}/weather"
@@ -145,6 +145,7 @@ class WeatherRiskService:
             'precipitation': data.get('rain', {}).get('1h', 0.0)
         }
 
+    @instrumented('http', 'openweather.forecast')
     def _get_weather_forecast(self, lat: float, lon: float) -> Dict:
         """Get weather forecast data"""
         url = f"{self.weather_base_url}/onecall"
@@ -2,6 +2,12 @@ import psycopg2
 import os
 import logging
 from dotenv import load_dotenv
+from ai.audience_resolver import init_subscribers
+from ai.community_store import init_community
+from ai.leaderboard import init_leaderboard
+from ai.incident_rollup import init_rollup
+from response_cache import init_cache_triggers
+from config import init_config
 
 def setup_database():
     try:
@@ -105,6 +111,21 @@ def setup_database():
             ON weather_alerts USING GIST (location)
         """)
         
+        # Create the hourly incident rollup used by analytics
+        init_rollup(cursor)
+        
+        # Create the subscriber table geo-targeted alerts are resolved against
+        init_subscribers(cursor)
+        
+        # Create the community and gamification tables served by the API
+        init_community(cursor)
+        
+        # Create the point event log the leaderboard is built from
+        init_leaderboard(cursor)
+        
+        # Invalidate cached API responses whenever those tables change
+        init_cache_triggers(cursor)
+        
         # Commit changes
         conn.commit()
         
@@ -119,4 +140,5 @@ def setup_database():
         raise
 
 if __name__ == "__main__":
+    init_config(required_vars=('DB_NAME',))
     setup_database() 
\ No newline at end of file
@@ -1,9 +1,16 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 import random
+import instrumentation
+import profiler
+import tracing
+from config import init_config
 
 app = Flask(__name__)
 CORS(app)
+tracing.init_app(app)
+profiler.init_app(app)
+instrumentation.init_app(app)
 
 @app.route('/api/predictions', methods=['GET'])
 def get_predictions():
@@ -177,5 +184,6 @@ def get_available_badges():
     return jsonify(badges)
 
 if __name__ == '__main__':
+    init_config(validate=False)
     print("Starting simple Flask app on port 8000...")
     app.run(host='0.0.0.0', port=8000, debug=True)
@@ -0,0 +1,82 @@
+"""Local LibreTranslate-compatible stub for offline runs and load tests.
+
+Implements /translate, /detect and /languages with the same request and
+response shapes as LibreTranslate. Translations are deterministic: the text
+tagged with the target language, e.g. "[hi] Flood warning". An artificial
+per-request latency can be set to mimic a remote server.
+
+    python -m stubs.libretranslate_stub --port 5005 --latency 0.05
+    TRANSLATE_API_URL=http://127.0.0.1:5005 python -m ai.ui_catalogue
+"""
+import argparse
+import threading
+import time
+from flask import Flask, jsonify, request
+
+LANGUAGES = [
+    {'code': 'en', 'name': 'English', 'targets': ['hi', 'ur']},
+    {'code': 'hi', 'name': 'Hindi', 'targets': ['en', 'ur']},
+    {'code': 'ur', 'name': 'Urdu', 'targets': ['en', 'hi']}
+]
+
+def fake_translate(text: str, source: str, target: str) -> str:
+    if source == target or not text.strip():
+        return text
+    return f"[{target}] {text}"
+
+def create_app(latency: float = 0.0) -> Flask:
+    app = Flask(__name__)
+    lock = threading.Lock()
+    stats = {'requests': 0, 'texts': 0}
+
+    @app.route('/translate', methods=['POST'])
+    def translate():
+        payload = request.get_json(silent=True) or request.form.to_dict()
+        q = payload.get('q')
+        source = payload.get('source', 'auto')
+        target = payload.get('target')
+        if q is None or not target:
+            return jsonify({'error': "Invalid request: missing q or target"}), 400
+
+        if latency:
+            time.sleep(latency)
+        texts = q if isinstance(q, list) else [q]
+        with lock:
+            stats['requests'] += 1
+            stats['texts'] += len(texts)
+
+        source = 'en' if source == 'auto' else source
+        translated = [fake_translate(text, source, target) for text in texts]
+        return jsonify({'translatedText': translated if isinstance(q, list) else translated[0]})
+
+    @app.route('/detect', methods=['POST'])
+    def detect():
+        payload = request.get_json(silent=True) or {}
+        text = payload.get('q', '')
+        # Devanagari and Arabic script blocks
+        if any('ऀ' <= char <= 'ॿ' for char in text):
+            language = 'hi'
+        elif any('؀' <= char <= 'ۿ' for char in text):
+            language = 'ur'
+        else:
+            language = 'en'
+        return jsonify([{'language': language, 'confidence': 90.0}])
+
+    @app.route('/languages', methods=['GET'])
+    def languages():
+        return jsonify(LANGUAGES)
+
+    @app.route('/stats', methods=['GET'])
+    def get_stats():
+        with lock:
+            return jsonify(dict(stats))
+
+    return app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a local LibreTranslate stub")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5005)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    create_app(args.latency).run(host=args.host, port=args.port, threaded=True)
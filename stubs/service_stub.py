@@ -0,0 +1,139 @@
+"""Combined OpenWeather, Twilio and LibreTranslate stub for benchmarks.
+
+Extends the LibreTranslate stub with the OpenWeather endpoints used by the
+weather and risk services (/data/2.5/weather, /data/2.5/onecall and
+/data/2.5/forecast) and Twilio's Messages resource. Responses are derived
+deterministically from the request so runs are comparable.
+
+    python -m stubs.service_stub --port 5006 --latency 0.02
+"""
+import argparse
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import jsonify, request
+from stubs.libretranslate_stub import create_app as create_translate_app
+
+def _conditions(lat: float, lon: float, offset: int = 0) -> dict:
+    """Plausible weather values that vary smoothly with location and day"""
+    seed = (abs(lat) * 7 + abs(lon) * 3 + offset * 11) % 20
+    return {
+        'temp': round(12 + seed, 1),
+        'humidity': int(55 + seed * 2),
+        'pressure': int(1000 + seed),
+        'wind_speed': round(2 + seed / 2, 1),
+        'wind_deg': int(seed * 18),
+        'rain': round(seed * 1.5, 1)
+    }
+
+def current_weather(lat: float, lon: float) -> dict:
+    c = _conditions(lat, lon)
+    return {
+        'coord': {'lat': lat, 'lon': lon},
+        'weather': [{'id': 500, 'main': 'Rain', 'description': 'light rain', 'icon': '10d'}],
+        'main': {'temp': c['temp'], 'feels_like': c['temp'], 'temp_min': c['temp'] - 2,
+                 'temp_max': c['temp'] + 2, 'pressure': c['pressure'], 'humidity': c['humidity']},
+        'visibility': 10000,
+        'wind': {'speed': c['wind_speed'], 'deg': c['wind_deg']},
+        'rain': {'1h': c['rain']},
+        'clouds': {'all': 75},
+        'dt': int(time.time()),
+        'name': 'Stub'
+    }
+
+def daily_forecast(lat: float, lon: float, days: int = 8) -> list:
+    start = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    daily = []
+    for day in range(days):
+        c = _conditions(lat, lon, day)
+        daily.append({
+            'dt': int((start + timedelta(days=day)).timestamp()),
+            'temperature': {'min': c['temp'] - 4, 'max': c['temp'] + 4, 'avg': c['temp']},
+            'temp': {'min': c['temp'] - 4, 'max': c['temp'] + 4, 'day': c['temp']},
+            'humidity': c['humidity'],
+            'pressure': c['pressure'],
+            'wind_speed': c['wind_speed'],
+            'wind_deg': c['wind_deg'],
+            'precipitation': {'amount': c['rain'], 'probability': 0.6},
+            'rain': c['rain'],
+            'weather': [{'id': 500, 'main': 'Rain', 'description': 'light rain', 'icon': '10d'}]
+        })
+    return daily
+
+def create_app(latency: float = 0.0):
+    app = create_translate_app(latency)
+    lock = threading.Lock()
+    stats = {'weather': 0, 'sms': 0}
+
+    def _delay(kind: str) -> None:
+        if latency:
+            time.sleep(latency)
+        with lock:
+            stats[kind] += 1
+
+    def _location():
+        return float(request.args.get('lat', 30.3)), float(request.args.get('lon', 78.0))
+
+    @app.route('/data/2.5/weather', methods=['GET'])
+    def weather():
+        _delay('weather')
+        return jsonify(current_weather(*_location()))
+
+    @app.route('/data/2.5/onecall', methods=['GET'])
+    def onecall():
+        _delay('weather')
+        lat, lon = _location()
+        return jsonify({'lat': lat, 'lon': lon, 'daily': daily_forecast(lat, lon)})
+
+    @app.route('/data/2.5/forecast', methods=['GET'])
+    def forecast():
+        _delay('weather')
+        lat, lon = _location()
+        entries = []
+        for step in range(40):
+            c = _conditions(lat, lon, step // 8)
+            entries.append({
+                'dt': int(time.time()) + step * 3 * 3600,
+                'main': {'temp': c['temp'], 'humidity': c['humidity'], 'pressure': c['pressure']},
+                'wind': {'speed': c['wind_speed'], 'deg': c['wind_deg']},
+                'rain': {'3h': c['rain']},
+                'weather': [{'main': 'Rain', 'description': 'light rain'}]
+            })
+        return jsonify({'list': entries})
+
+    @app.route('/2010-04-01/Accounts/<account_sid>/Messages.json', methods=['POST'])
+    def send_message(account_sid):
+        _delay('sms')
+        to = request.form.get('To')
+        if not to:
+            return jsonify({'code': 21604, 'message': "A 'To' phone number is required.",
+                            'status': 400}), 400
+        now = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
+        return jsonify({
+            'sid': 'SM' + uuid.uuid4().hex,
+            'account_sid': account_sid,
+            'to': to,
+            'from': request.form.get('From'),
+            'body': request.form.get('Body', ''),
+            'status': 'queued',
+            'num_segments': '1',
+            'date_created': now,
+            'date_updated': now,
+            'uri': f"/2010-04-01/Accounts/{account_sid}/Messages.json"
+        }), 201
+
+    @app.route('/stub-stats', methods=['GET'])
+    def service_stats():
+        with lock:
+            return jsonify(dict(stats))
+
+    return app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the combined weather/SMS/translation stub")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5006)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+    create_app(args.latency).run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,102 @@
+import unittest
+from datetime import datetime, timedelta
+from services.alert_pipeline import AlertPipeline, normalize_hazard, normalize_severity
+
+class TestAlertPipeline(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.pipeline = AlertPipeline(default_radius_km=25)
+        self.day = datetime(2026, 7, 14, 9, 0)
+        self.rain = {
+            'type': 'rain',
+            'severity': 'high',
+            'description': 'Heavy rainfall expected on 2026-07-14',
+            'date': self.day.isoformat()
+        }
+
+    def test_normalization(self):
+        """Test mapping of source-specific types and severities"""
+        self.assertEqual(normalize_hazard('Heavy Rain Warning'), 'rain')
+        self.assertEqual(normalize_hazard('pressure'), 'storm')
+        self.assertEqual(normalize_hazard(None, 'Flash flood in valley'), 'flood')
+        self.assertEqual(normalize_severity('Severe'), 4)
+        self.assertEqual(normalize_severity(7), 5)
+
+    def test_forecast_points_are_deduplicated(self):
+        """Test that the same rain alert forecast at nearby points is emitted once"""
+        emitted = []
+        for lat, lon in [(30.32, 78.03), (30.35, 78.10), (30.40, 78.05)]:
+            emitted += self.pipeline.ingest('forecast', [self.rain], latitude=lat, longitude=lon)
+
+        self.assertEqual(len(emitted), 1)
+        self.assertEqual(emitted[0]['change'], 'new')
+        self.assertEqual(self.pipeline.active_events()[0]['reports'], 3)
+        self.assertEqual(self.pipeline.stats['suppressed'], 2)
+
+    def test_escalation_is_emitted(self):
+        """Test that a more severe overlapping alert from another source is re-emitted"""
+        received = []
+        self.pipeline.add_listener(received.append)
+        self.pipeline.ingest('forecast', [self.rain], latitude=30.32, longitude=78.03)
+
+        emitted = self.pipeline.ingest('openweather', [{
+            'sender_name': 'IMD',
+            'event': 'Extremely heavy rain',
+            'start': (self.day + timedelta(hours=2)).timestamp(),
+            'end': (self.day + timedelta(hours=8)).timestamp(),
+            'description': 'Red alert',
+            'tags': ['Rain']
+        }], latitude=30.33, longitude=78.04)
+        self.pipeline.ingest('risk', [{'severity': 'moderate', 'description': 'Rain',
+                                       'start_time': self.day.isoformat()}],
+                             latitude=30.33, longitude=78.04)
+
+        self.assertEqual([event['change'] for event in received], ['new'])
+        self.assertEqual(emitted, [])
+
+        emitted = self.pipeline.ingest('risk', [{'severity': 'severe', 'description': 'Rain',
+                                                 'start_time': self.day.isoformat()}],
+                                       latitude=30.33, longitude=78.04)
+        self.assertEqual(emitted[0]['change'], 'escalated')
+        self.assertEqual(emitted[0]['previous_severity'], 3)
+        self.assertEqual(emitted[0]['sources'], ['forecast', 'openweather', 'risk'])
+
+    def test_distinct_events_are_kept_apart(self):
+        """Test that other hazards, distant areas and later days are separate events"""
+        self.pipeline.ingest('forecast', [self.rain], latitude=30.32, longitude=78.03)
+        wind = dict(self.rain, type='wind')
+        next_week = dict(self.rain, date=(self.day + timedelta(days=7)).isoformat())
+
+        emitted = self.pipeline.ingest('forecast', [wind, next_week], latitude=30.32, longitude=78.03)
+        emitted += self.pipeline.ingest('forecast', [self.rain], latitude=29.0, longitude=80.0)
+
+        self.assertEqual(len(emitted), 3)
+        self.assertEqual(len(self.pipeline.active_events('rain')), 3)
+
+    def test_expired_events_are_dropped(self):
+        """Test that events past their retention are forgotten"""
+        self.pipeline.ingest('forecast', [self.rain], latitude=30.32, longitude=78.03)
+
+        self.assertEqual(self.pipeline.expire(self.day + timedelta(days=2)), 1)
+        emitted = self.pipeline.ingest('forecast', [self.rain], latitude=30.32, longitude=78.03)
+        self.assertEqual(emitted[0]['change'], 'new')
+
+    def test_expired_events_are_swept_on_add(self):
+        """Test that adding alerts periodically forgets events past retention"""
+        now = {'value': self.day}
+        pipeline = AlertPipeline(retention=timedelta(hours=6), expire_interval=timedelta(minutes=10),
+                                 clock=lambda: now['value'])
+        pipeline.ingest('forecast', [self.rain], latitude=30.32, longitude=78.03)
+
+        now['value'] = self.day + timedelta(days=2)
+        later = dict(self.rain, date=now['value'].isoformat())
+        pipeline.ingest('forecast', [later], latitude=29.0, longitude=79.5)
+
+        self.assertEqual(pipeline.stats['expired'], 1)
+        self.assertEqual(len(pipeline.active_events()), 1)
+
+        pipeline.ingest('forecast', [later], latitude=29.5, longitude=80.0)
+        self.assertEqual(pipeline.stats['expired'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import MagicMock
+from ai.alert_templates import AlertTemplateCache, split_sms, sms_encoding
+
+class TestSmsSegments(unittest.TestCase):
+    def test_short_gsm_message_is_one_segment(self):
+        """Test that a plain ASCII message up to 160 characters is not split"""
+        encoding, segments = split_sms("A" * 160)
+
+        self.assertEqual(encoding, 'gsm7')
+        self.assertEqual(segments, ["A" * 160])
+
+    def test_long_message_uses_concatenated_limits(self):
+        """Test 153-unit GSM and 67-unit UCS-2 segments"""
+        _, segments = split_sms("A" * 161)
+        self.assertEqual([len(s) for s in segments], [153, 8])
+
+        encoding, segments = split_sms("बाढ़ " * 40)
+        self.assertEqual(encoding, 'ucs2')
+        self.assertTrue(all(len(s) <= 67 for s in segments))
+        self.assertEqual("".join(segments), "बाढ़ " * 40)
+
+    def test_extension_characters_count_double(self):
+        """Test that GSM extension characters use two septets"""
+        self.assertEqual(sms_encoding("Cost: 5€ [approx]"), 'gsm7')
+        _, segments = split_sms("€" * 81)
+        self.assertEqual(len(segments), 2)
+
+class TestAlertTemplateCache(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.translator = MagicMock()
+        self.translator.translate_batch.side_effect = (
+            lambda texts, target, source: [f"[{target}]{text}" for text in texts]
+        )
+        self.cache = AlertTemplateCache(self.translator, languages=['en', 'hi', 'ur'])
+        self.alert = {'type': 'Flood', 'location': 'Rishikesh', 'severity': 'High',
+                      'description': 'River above danger mark'}
+
+    def test_renders_every_language_once(self):
+        """Test that repeated renders of the same alert hit the cache"""
+        first = self.cache.render('emergency', self.alert)
+        calls = self.translator.translate_batch.call_count
+        second = self.cache.render('emergency', dict(self.alert))
+
+        self.assertIs(first, second)
+        self.assertEqual(calls, 2)
+        self.assertEqual(self.translator.translate_batch.call_count, calls)
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1})
+        self.assertIn('[hi]Type: [hi]Flood', first['hi']['body'])
+        self.assertIn('Location: Rishikesh', first['en']['body'])
+
+    def test_labels_are_translated_once_per_language(self):
+        """Test that a new alert only translates its new field values"""
+        self.cache.render('emergency', self.alert)
+        self.translator.translate_batch.reset_mock()
+
+        self.cache.render('emergency', dict(self.alert, description='Landslide on NH-58'))
+
+        for call in self.translator.translate_batch.call_args_list:
+            self.assertEqual(call.args[0], ['Landslide on NH-58'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta
+from ai.allocation_scheduler import AllocationScheduler
+from ai.resource_manager import InsufficientInventoryError, ResourceManager, StaleRequestError
+
+class TestAllocationScheduler(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.resource_manager = MagicMock()
+        self.scheduler = AllocationScheduler(self.resource_manager, batch_size=2, max_pending=5)
+        self.now = datetime.now()
+
+    def _request(self, request_id, resource_id, quantity, priority, age_minutes=0):
+        return {
+            'id': request_id,
+            'resource_id': resource_id,
+            'quantity': quantity,
+            'priority': priority,
+            'status': 'pending',
+            'created_at': self.now - timedelta(minutes=age_minutes)
+        }
+
+    def test_priority_then_age_order(self):
+        """Test that higher priority and older requests are served first"""
+        self.scheduler.set_inventory(1, 10)
+        self.scheduler.submit(self._request(1, 1, 5, 'low', age_minutes=30))
+        self.scheduler.submit(self._request(2, 1, 5, 'critical'))
+        self.scheduler.submit(self._request(3, 1, 5, 'critical', age_minutes=10))
+
+        allocations = self.scheduler.drain()
+
+        self.assertEqual([a['request_id'] for a in allocations], [3, 2])
+        self.assertEqual(self.scheduler.inventory[1], 0)
+        self.assertEqual(self.scheduler.pending_count(), 1)
+
+    def test_partial_fulfillment(self):
+        """Test that a request is partly served and requeued with the remainder"""
+        self.scheduler.set_inventory(1, 3)
+        self.scheduler.submit(self._request(1, 1, 5, 'high'))
+
+        allocations = self.scheduler.drain()
+
+        self.assertEqual(allocations[0]['quantity'], 3)
+        self.assertEqual(allocations[0]['status'], 'partial')
+        self.assertEqual(self.scheduler.pending_count(), 1)
+
+        self.scheduler.set_inventory(1, 10)
+        allocations = self.scheduler.drain()
+        self.assertEqual(allocations[0]['quantity'], 2)
+        self.assertEqual(allocations[0]['status'], 'fulfilled')
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+    def test_exhausted_resource_does_not_block_others(self):
+        """Test that requests for other resources are served past a blocked one"""
+        self.scheduler.set_inventory(2, 4)
+        self.scheduler.submit(self._request(1, 1, 5, 'critical'))
+        self.scheduler.submit(self._request(2, 1, 5, 'critical'))
+        self.scheduler.submit(self._request(3, 2, 4, 'low'))
+
+        allocations = self.scheduler.drain()
+
+        self.assertEqual([a['request_id'] for a in allocations], [3])
+        self.assertEqual(self.resource_manager.apply_allocations.call_count, 1)
+        self.assertEqual(self.scheduler.pending_count(), 2)
+
+    def test_backpressure(self):
+        """Test that submissions are rejected once the queue is full"""
+        for request_id in range(5):
+            self.assertTrue(self.scheduler.submit(self._request(request_id, 1, 1, 'medium')))
+
+        self.assertTrue(self.scheduler.is_saturated())
+        self.assertFalse(self.scheduler.submit(self._request(99, 1, 1, 'critical')))
+        self.assertEqual(self.scheduler.stats['rejected'], 1)
+
+    def test_failed_persist_rolls_back(self):
+        """Test that inventory and queue are restored when persisting fails"""
+        self.resource_manager.apply_allocations.side_effect = Exception("db down")
+        self.scheduler.set_inventory(1, 10)
+        self.scheduler.submit(self._request(1, 1, 4, 'high'))
+
+        allocations = self.scheduler.drain()
+
+        self.assertEqual(allocations, [])
+        self.assertEqual(self.scheduler.inventory[1], 10)
+        self.assertEqual(self.scheduler.pending_count(), 1)
+
+        self.resource_manager.apply_allocations.side_effect = None
+        self.assertEqual(len(self.scheduler.drain()), 1)
+
+    def test_drain_reloads_inventory_and_deferred_requests(self):
+        """Test that an attached scheduler works from fresh stock and requeues deferred requests"""
+        self.resource_manager.get_resource_inventory.return_value = [{'id': 1, 'quantity': 10}]
+        self.resource_manager.get_pending_requests.return_value = []
+        self.scheduler.attach(self.resource_manager)
+        for request_id in range(5):
+            self.scheduler.submit(self._request(request_id, 1, 1, 'medium'))
+        self.assertFalse(self.scheduler.submit(self._request(99, 1, 1, 'critical')))
+
+        # Stock was used elsewhere since the snapshot
+        self.resource_manager.get_resource_inventory.return_value = [{'id': 1, 'quantity': 3}]
+        self.resource_manager.get_pending_requests.return_value = [self._request(99, 1, 1, 'critical')]
+        allocations = self.scheduler.drain()
+
+        self.assertEqual(sum(a['quantity'] for a in allocations), 3)
+        self.assertEqual(self.scheduler.pending_count(), 2)
+
+        self.resource_manager.get_resource_inventory.return_value = [{'id': 1, 'quantity': 10}]
+        allocations = self.scheduler.drain()
+        self.assertIn(99, [a['request_id'] for a in allocations])
+
+    def test_resubmitted_request_uses_its_new_entry(self):
+        """Test that cancelling and resubmitting leaves a single live heap entry"""
+        self.scheduler.set_inventory(1, 2)
+        self.scheduler.submit(self._request(1, 1, 2, 'critical'))
+        self.scheduler.cancel(1)
+        self.scheduler.submit(self._request(1, 1, 2, 'low'))
+        self.scheduler.submit(self._request(2, 1, 2, 'medium'))
+
+        allocations = self.scheduler.drain()
+
+        self.assertEqual([a['request_id'] for a in allocations], [2])
+        self.assertEqual(self.scheduler.pending_count(), 1)
+        self.scheduler.set_inventory(1, 10)
+        self.assertEqual([a['request_id'] for a in self.scheduler.drain()], [1])
+        self.assertEqual(self.scheduler.drain(), [])
+
+    def test_stale_requests_are_dropped(self):
+        """Test that requests filled elsewhere leave the queue after a rejected batch"""
+        self.scheduler.set_inventory(1, 10)
+        self.scheduler.submit(self._request(1, 1, 2, 'high'))
+        self.scheduler.submit(self._request(2, 1, 3, 'low'))
+        self.resource_manager.apply_allocations.side_effect = [StaleRequestError([1]), None]
+
+        self.assertEqual(self.scheduler.drain(), [])
+        self.assertEqual(self.scheduler.pending_count(), 1)
+        self.assertEqual(self.scheduler.inventory[1], 10)
+
+        allocations = self.scheduler.drain()
+        self.assertEqual([a['request_id'] for a in allocations], [2])
+
+class TestApplyAllocations(unittest.TestCase):
+    @patch('ai.resource_manager.execute_values')
+    @patch('ai.resource_manager.psycopg2.connect')
+    def test_shortfall_rolls_back(self, mock_connect, mock_execute_values):
+        """Test that a batch exceeding current stock writes nothing"""
+        conn = mock_connect.return_value
+        # The guarded UPDATE returns only the resources that still had enough stock
+        mock_execute_values.side_effect = [[{'id': 7}], [{'id': 1, 'category': 'Water'}]]
+        with patch.object(ResourceManager, '_init_database'):
+            manager = ResourceManager()
+
+        with self.assertRaises(InsufficientInventoryError) as raised:
+            manager.apply_allocations([
+                {'request_id': 1, 'resource_id': 1, 'quantity': 2, 'status': 'fulfilled'},
+                {'request_id': 2, 'resource_id': 2, 'quantity': 9, 'status': 'fulfilled'}
+            ])
+
+        self.assertEqual(raised.exception.resource_ids, [2])
+        self.assertIn('r.quantity >= v.used', mock_execute_values.call_args_list[1].args[1])
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
+
+    @patch('ai.resource_manager.execute_values')
+    @patch('ai.resource_manager.psycopg2.connect')
+    def test_already_fulfilled_request_rolls_back(self, mock_connect, mock_execute_values):
+        """Test that a batch touching a request no longer open writes nothing"""
+        conn = mock_connect.return_value
+        mock_execute_values.side_effect = [
+            [{'id': 7}, {'id': 8}],
+            [{'id': 1, 'category': 'Water'}],
+            [{'id': 1}]
+        ]
+        with patch.object(ResourceManager, '_init_database'):
+            manager = ResourceManager()
+
+        with self.assertRaises(StaleRequestError) as raised:
+            manager.apply_allocations([
+                {'request_id': 1, 'resource_id': 1, 'quantity': 2, 'status': 'fulfilled'},
+                {'request_id': 2, 'resource_id': 1, 'quantity': 3, 'status': 'partial'}
+            ])
+
+        self.assertEqual(raised.exception.request_ids, [2])
+        self.assertIn("r.status IN ('pending', 'partial')", mock_execute_values.call_args_list[2].args[1])
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
+
+    @patch('ai.resource_manager.psycopg2.connect')
+    def test_allocate_resources_uses_remaining_quantity(self, mock_connect):
+        """Test that a direct allocation fills only the remainder and refuses closed requests"""
+        conn = mock_connect.return_value
+        cur = conn.cursor.return_value
+        with patch.object(ResourceManager, '_init_database'):
+            manager = ResourceManager()
+
+        cur.fetchone.side_effect = [
+            {'status': 'fulfilled', 'remaining_quantity': 0, 'available_quantity': 10},
+        ]
+        self.assertEqual(manager.allocate_resources(1), {'error': 'Request already fulfilled'})
+        conn.commit.assert_not_called()
+
+        cur.fetchone.side_effect = [
+            {'status': 'partial', 'remaining_quantity': 3, 'available_quantity': 10,
+             'resource_id': 4, 'category': 'Water'},
+            {'id': 9, 'quantity': 3}
+        ]
+        with patch('ai.resource_manager.record_allocations') as mock_record:
+            manager.allocate_resources(1)
+
+        self.assertEqual(cur.execute.call_args_list[-3].args[1], (1, 4, 3))
+        mock_record.assert_called_once_with(cur, [{'category': 'Water', 'quantity': 3}])
+        conn.commit.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
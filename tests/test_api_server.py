@@ -0,0 +1,144 @@
+import gzip
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from ai.risk_grid import RiskGrid
+from api_server import create_app
+
+class FakeRiskService:
+    def __init__(self, fail=()):
+        self.calls = 0
+        self.fail = set(fail)
+
+    def get_risk_assessment(self, lat, lon):
+        self.calls += 1
+        if lat in self.fail:
+            raise RuntimeError("weather feed down")
+        return {
+            'current': {'risk_score': 0.2},
+            'forecast': {'daily_risks': [0.3, 0.7, 0.4], 'trend': 'increasing'}
+        }
+
+    def _get_risk_level(self, risk_score):
+        return 'high' if risk_score >= 0.6 else 'low'
+
+POINTS = [('Dehradun', 30.3165, 78.0322, 'plains'), ('Chamoli', 30.4, 79.32, 'hills')]
+
+class TestRiskGrid(unittest.TestCase):
+    def test_predictions_are_cached_for_ttl(self):
+        """Test that the grid is computed once per ttl and reports the peak day"""
+        service = FakeRiskService()
+        grid = RiskGrid(service, POINTS, ttl_seconds=600)
+
+        predictions, computed_at = grid.predictions()
+        grid.predictions()
+
+        self.assertEqual(service.calls, 2)
+        self.assertEqual([p['disasterType'] for p in predictions], ['Floods', 'Landslides'])
+        self.assertEqual(predictions[0]['probability'], 70.0)
+        self.assertEqual(predictions[0]['riskLevel'], 'High')
+        self.assertEqual(predictions[0]['date'], (computed_at.date() + timedelta(days=2)).isoformat())
+
+    def test_failed_points_are_skipped(self):
+        """Test that one failing district does not fail the grid"""
+        grid = RiskGrid(FakeRiskService(fail={30.4}), POINTS)
+
+        predictions, _ = grid.predictions()
+
+        self.assertEqual([p['district'] for p in predictions], ['Dehradun'])
+
+class TestApiServer(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.store = MagicMock()
+        self.store.get_partnerships.return_value = (
+            [{'id': i, 'name': f"Partner {i}", 'description': 'x' * 100} for i in range(10)],
+            datetime(2026, 5, 1, 12, 0, 0)
+        )
+        self.store.get_profiles.return_value = {}
+        self.weather = MagicMock()
+        self.incidents = MagicMock()
+        self.leaderboard = MagicMock()
+        app = create_app(RiskGrid(FakeRiskService(), POINTS), self.weather, self.incidents, self.store,
+                         self.leaderboard)
+        self.client = app.test_client()
+
+    def test_etag_round_trip(self):
+        """Test that an unchanged payload returns 304 on revalidation"""
+        first = self.client.get('/api/community/partnerships')
+        second = self.client.get('/api/community/partnerships', headers={'If-None-Match': first.headers['ETag']})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(second.headers['Cache-Control'], first.headers['Cache-Control'])
+
+    def test_last_modified_round_trip(self):
+        """Test If-Modified-Since against the newest row"""
+        first = self.client.get('/api/community/partnerships')
+        second = self.client.get('/api/community/partnerships',
+                                 headers={'If-Modified-Since': first.headers['Last-Modified']})
+
+        self.assertEqual(first.headers['Last-Modified'], 'Fri, 01 May 2026 12:00:00 GMT')
+        self.assertEqual(second.status_code, 304)
+
+    def test_gzip_and_etag_variants(self):
+        """Test that gzip bodies decode to the same payload and revalidate either way"""
+        plain = self.client.get('/api/community/partnerships')
+        zipped = self.client.get('/api/community/partnerships', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(zipped.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', zipped.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(zipped.data)), plain.get_json())
+        self.assertEqual(zipped.headers['ETag'], plain.headers['ETag'][:-1] + '-gzip"')
+        revalidated = self.client.get('/api/community/partnerships',
+                                      headers={'Accept-Encoding': 'gzip', 'If-None-Match': plain.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_predictions_from_risk_grid(self):
+        """Test predictions served from the grid with its computation time"""
+        response = self.client.get('/api/predictions')
+
+        self.assertEqual(len(response.get_json()), 2)
+        self.assertIn('Last-Modified', response.headers)
+
+    def test_realtime_data(self):
+        """Test weather from the gateway and recent earthquakes"""
+        self.weather.get_current_weather.return_value = {'temperature': 21.5}
+        self.incidents.get_recent_incidents.return_value = [{
+            'timestamp': datetime(2026, 5, 1, 10, 30), 'severity': 2, 'status': 'active',
+            'description': 'Tremor', 'latitude': 30.7, 'longitude': 78.4
+        }]
+
+        data = self.client.get('/api/realtime-data?lat=30.1&lon=79.0').get_json()
+
+        self.weather.get_current_weather.assert_called_once_with(30.1, 79.0)
+        self.assertEqual(data['seismic'][0]['time'], '2026-05-01T10:30:00')
+
+    def test_errors(self):
+        """Test 404 for unknown users and 503 when a backing service fails"""
+        self.store.get_badges.side_effect = RuntimeError("database down")
+
+        self.assertEqual(self.client.get('/api/gamification/user/7').status_code, 404)
+        failed = self.client.get('/api/gamification/badges')
+        self.assertEqual(failed.status_code, 503)
+        self.assertNotIn('ETag', failed.headers)
+
+    def test_leaderboard_joins_profiles(self):
+        """Test that ranks come from the leaderboard and names from the profiles"""
+        self.leaderboard.top.return_value = [(1, 4, 120), (2, 9, 80)]
+        self.store.get_profiles.return_value = {
+            4: {'id': 4, 'username': 'asha', 'points': 110, 'badges': ['Quick Responder']},
+            9: {'id': 9, 'username': 'ravi', 'points': 80, 'badges': []}
+        }
+
+        board = json.loads(self.client.get('/api/gamification/leaderboard?limit=2').data)
+
+        self.leaderboard.top.assert_called_once_with(2)
+        self.assertEqual([(row['rank'], row['username'], row['points']) for row in board],
+                         [(1, 'asha', 120), (2, 'ravi', 80)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from ai.audience_resolver import AudienceResolver, normalize_phone, radius_area, polygon_area
+
+class TestNormalizePhone(unittest.TestCase):
+    def test_local_and_international_forms(self):
+        """Test that common ways of writing the same number normalize identically"""
+        for phone in ('07037177342', '7037177342', '+91 70371-77342', '917037177342', '00917037177342'):
+            self.assertEqual(normalize_phone(phone), '+917037177342')
+
+    def test_invalid_numbers(self):
+        """Test that unusable numbers are rejected"""
+        self.assertIsNone(normalize_phone(''))
+        self.assertIsNone(normalize_phone('12345'))
+
+class TestAudienceResolver(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.resolver = AudienceResolver({'dbname': 'test'}, page_size=2)
+
+    @patch('ai.audience_resolver.psycopg2.connect')
+    def test_pages_stream_from_one_server_side_cursor(self, mock_connect):
+        """Test that the area query runs once and pages are fetched from its cursor"""
+        cursor = mock_connect.return_value.cursor.return_value
+        cursor.fetchmany.side_effect = [
+            [{'id': 1, 'phone': '+911', 'name': None, 'language': 'hi'},
+             {'id': 5, 'phone': '+915', 'name': None, 'language': 'en'}],
+            [{'id': 9, 'phone': '+919', 'name': None, 'language': 'ur'}]
+        ]
+
+        pages = list(self.resolver.iter_pages(radius_area(30.3, 78.0, 10)))
+
+        self.assertEqual([[r['id'] for r in page] for page in pages], [[1, 5], [9]])
+        self.assertEqual(mock_connect.return_value.cursor.call_args.kwargs['name'], 'alert_audience')
+        self.assertEqual(cursor.itersize, 2)
+        cursor.execute.assert_called_once()
+        self.assertEqual(cursor.execute.call_args.args[1], (78.0, 30.3, 10000))
+        cursor.fetchmany.assert_called_with(2)
+        mock_connect.return_value.close.assert_called_once()
+
+    def test_polygon_is_closed(self):
+        """Test that polygon areas become closed WKT rings in lon/lat order"""
+        area = polygon_area([(30.0, 78.0), (30.0, 79.0), (31.0, 79.0)])
+
+        clause, params = self.resolver._area_clause(area)
+
+        self.assertIn('ST_Covers', clause)
+        self.assertEqual(params[0], 'POLYGON((78.0 30.0, 79.0 30.0, 79.0 31.0, 78.0 30.0))')
+
+    @patch('ai.audience_resolver.execute_values')
+    @patch('ai.audience_resolver.psycopg2.connect')
+    def test_add_subscribers_deduplicates(self, mock_connect, mock_execute_values):
+        """Test that the same phone written two ways is stored once"""
+        written = self.resolver.add_subscribers([
+            {'phone': '07037177342', 'latitude': 30.3, 'longitude': 78.0, 'language': 'hi'},
+            {'phone': '+91 7037177342', 'latitude': 30.4, 'longitude': 78.1, 'language': 'hi'},
+            {'phone': 'n/a', 'latitude': 30.4, 'longitude': 78.1}
+        ])
+
+        self.assertEqual(written, 1)
+        rows = mock_execute_values.call_args.args[2]
+        self.assertEqual(rows, [('+917037177342', None, 'hi', 78.1, 30.4)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from benchmarks.harness import compare, percentile, run_scenario
+from benchmarks.run import run_suite
+from services.risk_services import WeatherRiskService
+from stubs.service_stub import create_app
+
+class TestBenchmarkHarness(unittest.TestCase):
+    def test_percentiles(self):
+        """Test interpolated percentiles"""
+        samples = [float(n) for n in range(1, 101)]
+        self.assertEqual(percentile(samples, 50), 50.5)
+        self.assertAlmostEqual(percentile(samples, 99), 99.01)
+        self.assertIsNone(percentile([], 95))
+
+    def test_run_scenario_counts_errors(self):
+        """Test that failures are counted and reported, not timed"""
+        def flaky(i):
+            if i % 5 == 0:
+                raise RuntimeError("stub down")
+
+        result = run_scenario(flaky, iterations=50, warmup=0, concurrency=4)
+
+        self.assertEqual(result['calls'] + result['errors'], 50)
+        self.assertEqual(result['errors'], 10)
+        self.assertEqual(result['first_error'], "RuntimeError: stub down")
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_compare_flags_regressions(self):
+        """Test that only metrics beyond the tolerance are reported"""
+        baseline = {'scenarios': {'translation': {'status': 'ok', 'p50_ms': 10.0, 'p95_ms': 20.0}}}
+        current = {'scenarios': {'translation': {'status': 'ok', 'p50_ms': 11.0, 'p95_ms': 30.0}}}
+
+        regressions = compare(baseline, current, tolerance=0.2)
+
+        self.assertEqual([(r['metric'], r['change']) for r in regressions], [('p95_ms', 0.5)])
+
+class TestServiceStub(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.client = create_app().test_client()
+
+    def test_weather_feeds_risk_service(self):
+        """Test that stub weather has the shape the risk service expects"""
+        service = WeatherRiskService()
+        service.weather_base_url = 'http://stub/data/2.5'
+        current = self.client.get('/data/2.5/weather?lat=30.3&lon=78.0').get_json()
+        daily = self.client.get('/data/2.5/onecall?lat=30.3&lon=78.0').get_json()['daily']
+
+        self.assertEqual(len(daily), 8)
+        for day in daily:
+            self.assertTrue(0 <= service.calculate_risk_score(day) <= 1)
+        self.assertIn('temp_min', current['main'])
+
+    def test_twilio_messages(self):
+        """Test the Twilio Messages resource"""
+        response = self.client.post('/2010-04-01/Accounts/AC1/Messages.json',
+                                    data={'To': '+919000000001', 'From': '+15005550006', 'Body': 'Hi'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.get_json()['sid'].startswith('SM'))
+        self.assertEqual(self.client.post('/2010-04-01/Accounts/AC1/Messages.json').status_code, 400)
+
+    def test_offline_suite(self):
+        """Test a stub-only run end to end"""
+        results = run_suite(['risk_assessment', 'sms_fanout', 'translation', 'nearby_teams'],
+                            iterations=3, use_db=False)
+
+        for name in ('risk_assessment', 'sms_fanout', 'translation'):
+            self.assertEqual(results[name]['status'], 'ok', results[name])
+            self.assertEqual(results[name]['errors'], 0)
+        self.assertEqual(results['nearby_teams']['status'], 'skipped')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import unittest
+from datetime import date
+from unittest.mock import patch
+import numpy as np
+from ai.analytics_service import AnalyticsService
+from ai.chart_render import ChartRenderer, build_figure, chart_payload
+from instrumentation import Histogram
+
+class TestChartRender(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.data = {'flood': np.int64(12), 'fire': np.int64(3)}
+
+    def test_payload_is_compact_json(self):
+        """Test that payloads carry only plain chart data"""
+        payload = chart_payload('line', {date(2026, 7, 1): np.int64(4)}, 'Allocations')
+
+        self.assertEqual(payload, {'type': 'line', 'title': 'Allocations',
+                                   'labels': ['2026-07-01'], 'values': [4]})
+        json.dumps(payload)
+        with self.assertRaises(ValueError):
+            chart_payload('radar', self.data, 'Bad')
+
+    def test_render_is_memoized_by_content(self):
+        """Test that identical data is rendered once"""
+        renderer = ChartRenderer(max_entries=2)
+        with patch('ai.chart_render.build_figure', wraps=build_figure) as mock_build:
+            first = renderer.render(chart_payload('pie', self.data, 'Incidents by Type'))
+            second = renderer.render(chart_payload('pie', dict(self.data), 'Incidents by Type'))
+            renderer.render(chart_payload('pie', {'flood': 13}, 'Incidents by Type'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_build.call_count, 2)
+        stats = renderer.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['render_time']['count'], 2)
+
+    def test_histogram_quantiles(self):
+        """Test bucket counts and quantile bounds"""
+        histogram = Histogram()
+        for elapsed in [0.5, 3, 3, 4, 40, 4000]:
+            histogram.observe(elapsed)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['buckets']['<=5'], 3)
+        self.assertEqual(snapshot['buckets']['>2500'], 1)
+        self.assertEqual(snapshot['p50_ms'], 5.0)
+        self.assertEqual(snapshot['p95_ms'], 4000)
+
+    def test_analytics_html_is_optional(self):
+        """Test that analytics charts include HTML only when enabled"""
+        self.assertNotIn('html', AnalyticsService()._create_bar_chart(self.data, 'Severity'))
+
+        service = AnalyticsService(render_html=True)
+        chart = service._create_bar_chart(self.data, 'Severity')
+        service._create_bar_chart(self.data, 'Severity')
+        self.assertIn('<div', chart['html'])
+        self.assertEqual(service.get_render_stats()['hits'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
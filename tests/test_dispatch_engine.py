@@ -0,0 +1,147 @@
+import math
+import unittest
+import random
+import threading
+from unittest.mock import MagicMock
+from ai.spatial_index import EARTH_RADIUS_KM, GridIndex, haversine_km
+from ai.dispatch_engine import DispatchEngine
+
+class TestGridIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        rng = random.Random(42)
+        self.index = GridIndex(cell_size_deg=0.05)
+        self.points = {}
+        for key in range(500):
+            lat = rng.uniform(28.7, 31.4)
+            lon = rng.uniform(77.5, 81.0)
+            self.points[key] = (lat, lon)
+            self.index.upsert(key, lat, lon)
+
+    def test_nearest_matches_brute_force(self):
+        """Test that ring search returns the same neighbours as a full scan"""
+        query = (30.3165, 78.0322)  # Dehradun
+        expected = sorted(self.points, key=lambda k: haversine_km(*query, *self.points[k]))[:10]
+
+        result = [key for _, key, _ in self.index.nearest(*query, k=10)]
+
+        self.assertEqual(result, expected)
+
+    def test_upsert_moves_point(self):
+        """Test that re-inserting a key keeps only its latest position"""
+        self.index.upsert(0, 30.0, 79.0)
+        self.index.upsert(0, 29.0, 80.0)
+
+        self.assertEqual(len(self.index), 500)
+        self.assertEqual(self.index.get(0)[:2], (29.0, 80.0))
+
+    def test_within_radius(self):
+        """Test radius queries against a full scan"""
+        query = (30.0, 79.0)
+        expected = {k for k, p in self.points.items() if haversine_km(*query, *p) <= 25}
+
+        result = {key for _, key, _ in self.index.within(*query, radius_km=25)}
+
+        self.assertEqual(result, expected)
+
+    def test_within_radius_at_cell_edges(self):
+        """Test that points just inside the radius are found across cell boundaries"""
+        def destination(lat, lon, bearing_deg, distance_km):
+            angle = distance_km / EARTH_RADIUS_KM
+            phi, theta = math.radians(lat), math.radians(bearing_deg)
+            lat2 = math.asin(math.sin(phi) * math.cos(angle) +
+                             math.cos(phi) * math.sin(angle) * math.cos(theta))
+            lon2 = math.radians(lon) + math.atan2(math.sin(theta) * math.sin(angle) * math.cos(phi),
+                                                  math.cos(angle) - math.sin(phi) * math.sin(lat2))
+            return math.degrees(lat2), math.degrees(lon2)
+
+        # Due north of the query lies just past the 30.25 cell boundary
+        query = (30.0253, 78.0)
+        index = GridIndex(cell_size_deg=0.05)
+        for bearing in range(0, 360, 5):
+            index.upsert(bearing, *destination(*query, bearing, 24.999))
+
+        found = {key for _, key, _ in index.within(*query, radius_km=25)}
+
+        self.assertEqual(found, set(range(0, 360, 5)))
+        self.assertEqual(index.within(*query, radius_km=24.99), [])
+
+class TestDispatchEngine(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.team_manager = MagicMock()
+        self.engine = DispatchEngine(self.team_manager)
+        self.engine.update_team({'id': 1, 'team_type': 'Medical', 'status': 'available'})
+        self.engine.update_team({'id': 2, 'team_type': 'Rescue', 'status': 'available'})
+        self.engine.update_team({'id': 3, 'team_type': 'Medical', 'status': 'assigned'})
+        self.engine.update_location(1, 30.10, 78.30)
+        self.engine.update_location(2, 30.07, 78.27)
+        self.engine.update_location(3, 30.07, 78.27)
+
+    def test_nearest_available_by_type(self):
+        """Test filtering by team type and availability"""
+        teams = self.engine.nearest_available_teams(30.0668, 78.2676, k=5, team_type='Medical')
+
+        self.assertEqual([team['id'] for team in teams], [1])
+        self.assertGreater(teams[0]['distance_km'], 0)
+
+    def test_status_change_updates_candidates(self):
+        """Test that status updates take effect without re-indexing"""
+        self.engine.update_team({'id': 3, 'status': 'available'})
+
+        teams = self.engine.nearest_available_teams(30.0668, 78.2676, k=2)
+
+        self.assertEqual({team['id'] for team in teams}, {2, 3})
+
+    def test_history_is_queued(self):
+        """Test that pings are queued for asynchronous persistence"""
+        self.assertEqual(self.engine.pending_history(), 3)
+        self.assertEqual(self.engine.ingestor.get_stats()['received'], 3)
+
+    def test_dispatch_nearest_assigns_team(self):
+        """Test that dispatch assigns the closest team and removes it from the pool"""
+        self.team_manager.assign_team.return_value = {'id': 10, 'team_id': 2}
+
+        assignment = self.engine.dispatch_nearest('INC-1', 30.0668, 78.2676)
+
+        self.team_manager.assign_team.assert_called_once_with(2, 'INC-1')
+        self.assertEqual(self.engine.teams[2]['status'], 'assigned')
+        self.assertIn('distance_km', assignment)
+
+    def test_attach_runs_history_maintenance(self):
+        """Test that attaching starts location history maintenance and stop ends it"""
+        self.team_manager.get_teams_with_locations.return_value = []
+        engine = DispatchEngine(ingestor=MagicMock())
+
+        engine.attach(self.team_manager)
+        self.team_manager.start.assert_called_once()
+        engine.stop()
+
+        self.team_manager.stop.assert_called_once()
+        engine.ingestor.stop.assert_called_once()
+
+    def test_concurrent_dispatches_claim_distinct_teams(self):
+        """Test that simultaneous dispatches never assign the same team twice"""
+        barrier = threading.Barrier(4)
+
+        def assign_team(team_id, incident_id):
+            return {'team_id': team_id, 'incident_id': incident_id}
+
+        self.team_manager.assign_team.side_effect = assign_team
+        results = []
+
+        def dispatch(incident_id):
+            barrier.wait()
+            results.append(self.engine.dispatch_nearest(incident_id, 30.0668, 78.2676))
+
+        threads = [threading.Thread(target=dispatch, args=(f"INC-{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assigned = [result['team_id'] for result in results if 'team_id' in result]
+        self.assertEqual(len(assigned), len(set(assigned)))
+
+if __name__ == '__main__':
+    unittest.main()
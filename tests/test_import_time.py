@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A worker serving spatial queries should import in tens of milliseconds
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', 150))
+
+HEAVY_MODULES = ('tensorflow', 'tensorflow_hub', 'sklearn', 'pandas', 'plotly', 'numpy', 'requests', 'flask')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({'elapsed_ms': elapsed_ms, 'modules': sorted(sys.modules)}))
+"""
+
+def probe_imports(*modules, cwd=None):
+    """Import modules in a fresh interpreter without API keys in the environment"""
+    env = {k: v for k, v in os.environ.items() if k not in ('OPENWEATHER_API_KEY', 'SECRET_KEY')}
+    env['PYTHONPATH'] = REPO_ROOT
+    # Ignore the repo's .env so the probe sees only the variables above
+    env['PYTHON_DOTENV_DISABLED'] = '1'
+    output = subprocess.run([sys.executable, '-c', PROBE, *modules], cwd=cwd or REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+class TestImportTime(unittest.TestCase):
+    def test_spatial_worker_imports_within_budget(self):
+        """Test that the spatial query services import fast and without heavy dependencies"""
+        modules = ('services.resource_service', 'services.team_service', 'services.incident_service')
+        probe_imports(*modules)  # warm the bytecode cache
+        result = min((probe_imports(*modules) for _ in range(3)), key=lambda r: r['elapsed_ms'])
+
+        loaded = [m for m in HEAVY_MODULES if m in result['modules']]
+        self.assertEqual(loaded, [])
+        self.assertLess(result['elapsed_ms'], IMPORT_BUDGET_MS)
+
+    def test_model_and_chart_modules_defer_heavy_imports(self):
+        """Test that ML, analytics and chart modules load their libraries on first use"""
+        modules = probe_imports('ai.disaster_ai', 'ai.analytics_service', 'ai.chart_render',
+                                'services.risk_services')['modules']
+
+        for name in ('tensorflow', 'tensorflow_hub', 'sklearn', 'joblib', 'pandas', 'plotly'):
+            self.assertNotIn(name, modules)
+
+    def test_sms_fanout_leaves_profiler_to_its_cli(self):
+        """Test that importing the SMS fan-out does not load the profiler"""
+        self.assertNotIn('profiler', probe_imports('ai.sms_fanout')['modules'])
+
+    def test_config_import_has_no_side_effects(self):
+        """Test that importing config neither validates nor creates directories"""
+        with tempfile.TemporaryDirectory() as tmp:
+            probe_imports('config', 'instrumentation', cwd=tmp)
+            self.assertEqual(os.listdir(tmp), [])
+
+class TestInitConfig(unittest.TestCase):
+    def test_init_config_validates_and_creates_directories(self):
+        """Test explicit initialisation at an entry point"""
+        import config
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                with self.assertRaises(ValueError) as ctx:
+                    config.validate_config(('OPENWEATHER_API_KEY', 'USAFE_TEST_UNSET_VAR'))
+                self.assertIn('USAFE_TEST_UNSET_VAR', str(ctx.exception))
+
+                config._initialized = False
+                config.init_config(validate=False)
+                self.assertTrue(os.path.isdir('logs'))
+                self.assertTrue(os.path.isdir('models'))
+            finally:
+                os.chdir(cwd)
+
+if __name__ == '__main__':
+    unittest.main()
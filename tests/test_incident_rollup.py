@@ -0,0 +1,69 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+import pandas as pd
+from ai.analytics_service import AnalyticsService
+from ai.incident_rollup import init_rollup
+
+class TestIncidentRollup(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.rows = pd.DataFrame([
+            {'type': 'flood', 'severity': 4, 'day_of_week': 1, 'hour_of_day': 9, 'count': 12},
+            {'type': 'fire', 'severity': 2, 'day_of_week': 3, 'hour_of_day': 17, 'count': 3}
+        ])
+        self.service = AnalyticsService()
+        patcher = patch.object(self.service, '_calculate_confidence_interval',
+                               return_value={'lower': 0.0, 'upper': 1.0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_init_backfills_empty_rollup(self):
+        """Test that the rollup is rebuilt from incidents only when empty"""
+        cur = MagicMock()
+        cur.fetchone.return_value = (False,)
+        init_rollup(cur)
+        statements = [call.args[0] for call in cur.execute.call_args_list]
+        self.assertTrue(any('REFERENCING NEW TABLE AS new_rows' in sql for sql in statements))
+        self.assertTrue(any('FROM incidents' in sql for sql in statements))
+
+        cur = MagicMock()
+        cur.fetchone.return_value = (True,)
+        init_rollup(cur)
+        statements = [call.args[0] for call in cur.execute.call_args_list]
+        self.assertFalse(any('TRUNCATE' in sql for sql in statements))
+
+    @patch('pandas.read_sql')
+    @patch('ai.analytics_service.psycopg2.connect')
+    def test_analytics_read_from_rollup(self, mock_connect, mock_read_sql):
+        """Test that analytics sum the rollup over the requested window"""
+        mock_read_sql.return_value = self.rows
+
+        analytics = self.service.get_incident_analytics('30d')
+
+        sql, _ = mock_read_sql.call_args.args
+        start, end = mock_read_sql.call_args.kwargs['params']
+        self.assertIn('FROM incident_hourly_rollup', sql)
+        self.assertEqual((end - start).days, 30)
+        self.assertEqual(analytics['total_incidents'], 15)
+        self.assertEqual(analytics['by_type']['data']['flood'], 12)
+        mock_connect.return_value.cursor.assert_not_called()
+        mock_connect.return_value.commit.assert_not_called()
+
+    @patch('pandas.read_sql')
+    @patch('ai.analytics_service.psycopg2.connect')
+    def test_custom_range(self, mock_connect, mock_read_sql):
+        """Test explicit start and end dates and range validation"""
+        mock_read_sql.return_value = self.rows
+        start, end = datetime(2026, 6, 1), datetime(2026, 6, 15, 12)
+
+        self.service.get_incident_analytics(start_date=start, end_date=end)
+
+        self.assertEqual(mock_read_sql.call_args.kwargs['params'], (start, end))
+        with self.assertRaises(ValueError):
+            self.service.get_incident_analytics('90d')
+        with self.assertRaises(ValueError):
+            self.service.get_incident_analytics(start_date=end, end_date=start)
+
+if __name__ == '__main__':
+    unittest.main()
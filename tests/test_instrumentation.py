@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+import instrumentation
+from instrumentation import (
+    REGISTRY, get_service_logger, instrumented, record_cache, start_metrics_server, timer
+)
+
+class TestServiceLogging(unittest.TestCase):
+    def test_each_service_gets_its_own_file(self):
+        """Test that two services log to separate files"""
+        with tempfile.TemporaryDirectory() as tmp:
+            first = get_service_logger('tests.first', os.path.join(tmp, 'first.log'))
+            second = get_service_logger('tests.second', os.path.join(tmp, 'second.log'))
+            get_service_logger('tests.first', os.path.join(tmp, 'first.log'))
+
+            first.warning("from first")
+            second.warning("from second")
+            for logger in (first, second):
+                for handler in logger.handlers:
+                    handler.flush()
+
+            with open(os.path.join(tmp, 'first.log')) as f:
+                content = f.read()
+            self.assertEqual(content.count("from first"), 1)
+            self.assertNotIn("from second", content)
+            self.assertEqual(len(first.handlers), 1)
+
+            for logger in (first, second):
+                for handler in list(logger.handlers):
+                    handler.close()
+                    logger.removeHandler(handler)
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        REGISTRY.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        REGISTRY.reset()
+
+    def test_decorator_records_latency_and_errors(self):
+        """Test that calls and failures are recorded per name"""
+        @instrumented('db', 'nearby')
+        def query(fail=False):
+            if fail:
+                raise RuntimeError("db down")
+            return 42
+
+        self.assertEqual(query(), 42)
+        with self.assertRaises(RuntimeError):
+            query(fail=True)
+
+        entry = REGISTRY.snapshot()['latency']['db']['nearby']
+        self.assertEqual(entry['count'], 2)
+        self.assertEqual(entry['errors'], 1)
+
+    def test_disabled_records_nothing(self):
+        """Test that nothing is recorded while metrics are off"""
+        instrumentation.disable()
+
+        @instrumented('http')
+        def call():
+            return 'ok'
+
+        call()
+        with timer('http', 'block'):
+            pass
+        record_cache('templates', True)
+
+        snapshot = REGISTRY.snapshot()
+        self.assertEqual(snapshot['latency'], {})
+        self.assertEqual(snapshot['cache'], {})
+
+    def test_prometheus_output(self):
+        """Test cumulative buckets and cache counters in the text format"""
+        with timer('http', 'openweather'):
+            pass
+        record_cache('templates', True)
+        record_cache('templates', False, 3)
+
+        text = REGISTRY.render_prometheus()
+
+        self.assertIn('usafe_latency_ms_bucket{kind="http",name="openweather",le="+Inf"} 1', text)
+        self.assertIn('usafe_latency_ms_count{kind="http",name="openweather"} 1', text)
+        self.assertIn('usafe_cache_total{name="templates",result="miss"} 3', text)
+
+    def test_metrics_endpoint(self):
+        """Test the /metrics and /metrics.json endpoints"""
+        record_cache('translation_memory', True)
+        server = start_metrics_server('127.0.0.1', 0)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{base}/metrics") as response:
+                self.assertIn(b'usafe_cache_total', response.read())
+            with urllib.request.urlopen(f"{base}/metrics.json") as response:
+                payload = json.loads(response.read())
+            self.assertEqual(payload['cache']['translation_memory'], {'hits': 1, 'misses': 0})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_flask_metrics_routes(self):
+        """Test that the API app serves the registry on /metrics"""
+        from api_server import create_app
+
+        record_cache('translation_memory', False)
+        client = create_app(cache=False).test_client()
+
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn(b'usafe_cache_total{name="translation_memory",result="miss"} 1', response.data)
+        self.assertEqual(client.get('/metrics.json').get_json()['cache']['translation_memory'],
+                         {'hits': 0, 'misses': 1})
+
+        instrumentation.disable()
+        self.assertEqual(client.get('/metrics').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+from ai.inventory_summary import apply_inventory_delta, rebuild_summary, record_allocations
+
+class TestInventorySummary(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.cur = MagicMock()
+
+    @patch('ai.inventory_summary.execute_values')
+    def test_apply_inventory_delta(self, mock_execute_values):
+        """Test that a single delta becomes one upsert row"""
+        apply_inventory_delta(self.cur, 'Water', quantity_delta=50, resource_count_delta=1)
+
+        sql, rows = mock_execute_values.call_args.args[1:]
+        self.assertIn('ON CONFLICT (category) DO UPDATE', sql)
+        self.assertEqual(rows, [('Water', 50, 1, 0, 0)])
+
+    @patch('ai.inventory_summary.execute_values')
+    def test_record_allocations_aggregates_by_category(self, mock_execute_values):
+        """Test that allocations move stock to allocated and count per day"""
+        record_allocations(self.cur, [
+            {'category': 'Water', 'quantity': 5},
+            {'category': 'Food', 'quantity': 2},
+            {'category': 'Water', 'quantity': 3}
+        ], allocated_on=date(2026, 5, 1))
+
+        rows = mock_execute_values.call_args.args[2]
+        self.assertEqual(rows, [('Food', -2, 0, 2, 1), ('Water', -8, 0, 8, 2)])
+        sql, params = self.cur.execute.call_args.args
+        self.assertIn('resource_allocation_daily', sql)
+        self.assertEqual(params, (date(2026, 5, 1), 3, 10))
+
+    @patch('ai.inventory_summary.execute_values')
+    def test_record_allocations_empty(self, mock_execute_values):
+        """Test that an empty batch writes nothing"""
+        record_allocations(self.cur, [])
+
+        mock_execute_values.assert_not_called()
+        self.cur.execute.assert_not_called()
+
+    def test_rebuild_summary(self):
+        """Test that a rebuild replaces both tables from the base tables"""
+        rebuild_summary(self.cur)
+
+        statements = [' '.join(call.args[0].split()) for call in self.cur.execute.call_args_list]
+        self.assertEqual(statements[0], 'DELETE FROM resource_inventory_summary')
+        self.assertIn('FROM resources GROUP BY category', statements[1])
+        self.assertIn('FROM resource_allocations', statements[1])
+        self.assertEqual(statements[2], 'DELETE FROM resource_allocation_daily')
+        self.assertIn('GROUP BY DATE(allocated_at)', statements[3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import random
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+from ai.leaderboard import FenwickTree, Leaderboard, Standings
+
+def brute_force_ranks(scores):
+    return {user_id: 1 + sum(1 for other in scores.values() if max(other, 0) > max(points, 0))
+            for user_id, points in scores.items()}
+
+class TestFenwickTree(unittest.TestCase):
+    def test_prefix_and_find(self):
+        """Test prefix sums and the inverse lookup"""
+        tree = FenwickTree.from_counts(16, {0: 2, 3: 1, 9: 4})
+        tree.add(15, 1)
+
+        self.assertEqual(tree.total, 8)
+        self.assertEqual(tree.prefix(2), 2)
+        self.assertEqual(tree.prefix(9), 7)
+        self.assertEqual(tree.find(3), 3)
+        self.assertEqual(tree.find(7), 9)
+        self.assertEqual(tree.find(8), 15)
+
+class TestStandings(unittest.TestCase):
+    def test_matches_sorting(self):
+        """Test ranks and top-N against a full sort after random updates"""
+        rng = random.Random(7)
+        standings = Standings(capacity=8)
+        scores = {}
+        for _ in range(2000):
+            user_id = rng.randrange(200)
+            delta = rng.choice([-5, 1, 10, 25, 400])
+            standings.add(user_id, delta)
+            scores[user_id] = scores.get(user_id, 0) + delta
+
+        ranks = brute_force_ranks(scores)
+        for user_id in scores:
+            self.assertEqual(standings.rank(user_id), ranks[user_id])
+
+        expected = sorted(scores, key=lambda user_id: (-max(scores[user_id], 0), user_id))[:15]
+        top = standings.top(15)
+        self.assertEqual([user_id for _, user_id, _ in top], expected)
+        self.assertEqual([rank for rank, _, _ in top], [ranks[user_id] for user_id in expected])
+
+    def test_ties_share_rank(self):
+        """Test RANK() semantics for equal scores"""
+        standings = Standings()
+        standings.load([(1, 50), (2, 80), (3, 50), (4, 10)])
+
+        self.assertEqual(standings.top(10), [(1, 2, 80), (2, 1, 50), (2, 3, 50), (4, 4, 10)])
+        self.assertEqual(standings.rank_for_points(50), 2)
+        self.assertEqual(standings.rank(99), 5)
+
+    def test_grows_past_capacity(self):
+        """Test that a score beyond the tree size is ranked correctly"""
+        standings = Standings(capacity=4)
+        standings.add(1, 3)
+        standings.add(2, 1000)
+
+        self.assertGreater(standings.tree.size, 1000)
+        self.assertEqual(standings.top(1), [(1, 2, 1000)])
+        self.assertEqual(standings.rank(1), 2)
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.cur = MagicMock()
+        self.leaderboard = Leaderboard({}, sync_seconds=0)
+
+        @contextmanager
+        def cursor():
+            yield self.cur
+
+        self.leaderboard._cursor = cursor
+
+    def test_rebuild_then_sync(self):
+        """Test that new events are folded in incrementally after a rebuild"""
+        self.cur.fetchone.return_value = (10,)
+        self.cur.fetchall.side_effect = [
+            [(1, 40), (2, 25), (3, 0)],
+            [(11, 3, 30), (12, 1, -20)]
+        ]
+
+        self.assertEqual(self.leaderboard.rank(2), 2)
+        top = self.leaderboard.top(3)
+
+        self.assertEqual(top, [(1, 3, 30), (2, 2, 25), (3, 1, 20)])
+        self.assertEqual(self.leaderboard.last_event_id, 12)
+        self.assertEqual(self.cur.execute.call_args.args[1], (10,))
+
+    def test_record_appends_event(self):
+        """Test that a recorded event is applied to the local standings"""
+        self.leaderboard.last_event_id = 0
+        self.cur.fetchone.return_value = (1,)
+        self.cur.fetchall.return_value = [(1, 5, 15)]
+
+        event_id = self.leaderboard.record(5, 15, 'Quiz completed')
+
+        statements = [call.args[0] for call in self.cur.execute.call_args_list]
+        self.assertEqual(event_id, 1)
+        self.assertIn('pg_advisory_xact_lock', statements[0])
+        self.assertIn('INSERT INTO point_events', statements[1])
+        self.assertEqual(self.leaderboard.points(5), 15)
+
+if __name__ == '__main__':
+    unittest.main()
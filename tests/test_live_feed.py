@@ -0,0 +1,101 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+import psycopg2
+from aiohttp.test_utils import TestClient, TestServer
+from services.live_feed import LiveFeedHub, PgNotifyListener, create_feed_app, region_for
+
+class TestLiveFeedHub(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.hub = LiveFeedHub(region_size_deg=0.5, max_queue=3)
+
+    async def test_region_and_channel_filtering(self):
+        """Test that subscribers only receive their channels and regions"""
+        dehradun = self.hub.subscribe(['incidents'], {region_for(30.31, 78.03, 0.5)})
+        everything = self.hub.subscribe(['incidents', 'alerts'])
+
+        self.hub.publish('incidents', {'id': 1, 'latitude': 30.32, 'longitude': 78.04})
+        self.hub.publish('incidents', {'id': 2, 'latitude': 29.38, 'longitude': 79.45})
+        self.hub.publish('alerts', {'id': 3, 'latitude': 30.32, 'longitude': 78.04})
+
+        self.assertEqual([p['id'] for _, p in await dehradun.next_batch(0)], [1])
+        self.assertEqual([p['id'] for _, p in await everything.next_batch(0)], [1, 2, 3])
+
+    async def test_slow_subscriber_backpressure(self):
+        """Test that overflow drops the oldest events and team locations coalesce"""
+        subscriber = self.hub.subscribe(['incidents', 'team_locations'])
+        for incident_id in range(5):
+            self.hub.publish('incidents', {'id': incident_id})
+        for step in range(100):
+            self.hub.publish('team_locations', {'team_id': step % 2, 'latitude': 30.0 + step / 1000,
+                                                'longitude': 78.0})
+
+        batch = await subscriber.next_batch(0)
+
+        self.assertEqual(batch[0], ('lagged', {'dropped': 2}))
+        self.assertEqual([p['id'] for channel, p in batch if channel == 'incidents'], [2, 3, 4])
+        locations = [p for channel, p in batch if channel == 'team_locations']
+        self.assertEqual(len(locations), 2)
+        self.assertAlmostEqual(locations[1]['latitude'], 30.099)
+
+    async def test_notify_is_forwarded(self):
+        """Test that Postgres notifications are published on the matching channel"""
+        listener = PgNotifyListener({}, self.hub)
+        listener.conn = MagicMock()
+        listener.conn.notifies = [MagicMock(channel='live_alerts', payload='{"id": 7, "type": "rain"}')]
+        subscriber = self.hub.subscribe(['alerts'])
+
+        listener._on_readable()
+
+        self.assertEqual(await subscriber.next_batch(0), [('alerts', {'id': 7, 'type': 'rain'})])
+
+    async def test_listener_reconnects_and_resyncs(self):
+        """Test that a lost LISTEN connection is re-established and subscribers resync"""
+        listener = PgNotifyListener({}, self.hub, retry_seconds=0.01)
+        listener.loop = asyncio.get_running_loop()
+        listener.conn = MagicMock()
+        listener.conn.poll.side_effect = psycopg2.OperationalError('server closed the connection')
+        listener.loop.add_reader = MagicMock()
+        listener.loop.remove_reader = MagicMock()
+        subscriber = self.hub.subscribe(['team_locations'])
+        new_conn = MagicMock()
+        location = {'team_id': 4, 'latitude': 30.1, 'longitude': 78.2}
+
+        with patch.object(listener, '_connect', side_effect=[psycopg2.OperationalError('refused'), new_conn]), \
+                patch.object(listener, '_latest_locations', return_value=[location]):
+            listener._on_readable()
+            self.assertIsNone(listener.conn)
+            await listener._reconnecting
+
+        self.assertIs(listener.conn, new_conn)
+        listener.loop.add_reader.assert_called_once_with(new_conn.fileno(), listener._on_readable)
+        batch = await subscriber.next_batch(0)
+        self.assertEqual(batch[0], ('resync', {}))
+        self.assertEqual(batch[1][1]['team_id'], 4)
+
+    async def test_sse_stream(self):
+        """Test the SSE endpoint end to end"""
+        client = TestClient(TestServer(create_feed_app(self.hub, heartbeat=0.1)))
+        await client.start_server()
+        try:
+            response = await client.get('/live/sse?channels=alerts&bbox=30,78,30.4,78.4')
+            while not self.hub.subscribers:
+                await asyncio.sleep(0.01)
+            self.hub.publish('alerts', {'id': 9, 'latitude': 29.0, 'longitude': 80.0})
+            self.hub.publish('alerts', {'id': 10, 'latitude': 30.2, 'longitude': 78.2})
+
+            while True:
+                line = (await response.content.readline()).decode()
+                if line.startswith('data: '):
+                    break
+            event = json.loads(line[len('data: '):])
+            self.assertEqual(event['channel'], 'alerts')
+            self.assertEqual(event['data']['id'], 10)
+            response.close()
+        finally:
+            await client.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from ai.location_history import LocationHistoryStore
+
+def statements(cur):
+    return [' '.join(str(call.args[0]).split()) for call in cur.execute.call_args_list]
+
+class TestLocationHistoryStore(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.store = LocationHistoryStore({'dbname': 'test'}, bucket_seconds=60, retention_days=30)
+        patcher = patch('ai.location_history.psycopg2.connect')
+        self.mock_connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.conn = self.mock_connect.return_value
+        self.cur = self.conn.cursor.return_value
+
+    def test_ensure_partitions_skips_existing_days(self):
+        """Test that only days without a partition are created"""
+        # Day 1 exists; day 2 is new with an empty default partition
+        self.cur.fetchone.side_effect = [(1,), None, (False,)]
+
+        created = self.store.ensure_partitions(date(2026, 5, 1), days=1)
+
+        self.assertEqual(created, ['team_location_history_p20260502'])
+        self.assertFalse(any('team_location_moving' in s for s in statements(self.cur)))
+        self.conn.commit.assert_called_once()
+
+    def test_ensure_partitions_moves_default_rows(self):
+        """Test that rows stranded in the default partition are moved before the CREATE"""
+        self.cur.fetchone.side_effect = [None, (True,)]
+
+        self.store.ensure_partitions(date(2026, 5, 1), days=0)
+
+        executed = statements(self.cur)
+        moved = next(i for i, s in enumerate(executed) if s.startswith('WITH moved AS'))
+        created = next(i for i, s in enumerate(executed) if 'PARTITION OF team_location_history' in s)
+        reinserted = next(i for i, s in enumerate(executed) if 'FROM team_location_moving' in s)
+        self.assertLess(moved, created)
+        self.assertLess(created, reinserted)
+        self.assertIn('DELETE FROM team_location_history_default', executed[moved])
+
+    def test_downsample_marks_finished_partitions(self):
+        """Test that only partitions wholly before the cutoff are marked done"""
+        now = datetime(2026, 5, 3, 12, 0)
+        self.cur.fetchall.return_value = [
+            (date(2026, 5, 1), 'team_location_history_p20260501'),
+            (date(2026, 5, 2), 'team_location_history_p20260502')
+        ]
+        self.cur.rowcount = 4
+
+        removed = self.store.downsample(now)
+
+        self.assertEqual(removed, 8)
+        marked = [call.args[1] for call in self.cur.execute.call_args_list
+                  if 'SET downsampled_at' in str(call.args[0])]
+        self.assertEqual(marked, [(date(2026, 5, 1),)])
+
+    def test_drop_expired(self):
+        """Test that partitions past retention are dropped and forgotten"""
+        self.cur.fetchall.return_value = [(date(2026, 3, 1), 'team_location_history_p20260301')]
+
+        dropped = self.store.drop_expired(date(2026, 5, 1))
+
+        self.assertEqual(dropped, ['team_location_history_p20260301'])
+        self.assertEqual(self.cur.execute.call_args_list[0].args[1], (date(2026, 4, 1),))
+        self.assertIn('DELETE FROM team_location_partitions WHERE day = %s', statements(self.cur))
+
+    def test_drop_expired_without_retention(self):
+        """Test that nothing is dropped when retention is unset"""
+        store = LocationHistoryStore({'dbname': 'test'})
+
+        self.assertEqual(store.drop_expired(), [])
+        self.mock_connect.assert_not_called()
+
+    def test_get_trail(self):
+        """Test that a trail is read by team and time range"""
+        start = datetime(2026, 5, 1, 8, 0)
+        self.cur.fetchall.return_value = [{'latitude': 30.0, 'longitude': 78.0, 'recorded_at': start}]
+
+        trail = self.store.get_trail(7, start, start + timedelta(hours=1), limit=100)
+
+        self.assertEqual(trail[0]['latitude'], 30.0)
+        self.assertEqual(self.cur.execute.call_args.args[1], (7, start, start + timedelta(hours=1), 100))
+        with self.assertRaises(ValueError):
+            self.store.get_trail(7, start, start - timedelta(hours=1))
+
+    def test_import_legacy_locations_is_idempotent(self):
+        """Test that the import skips rows already in the history"""
+        self.cur.fetchone.return_value = (None, None)
+
+        self.assertEqual(self.store.import_legacy_locations(), 0)
+
+        self.cur.fetchone.return_value = (date(2026, 5, 1), date(2026, 5, 1))
+        self.cur.rowcount = 3
+        with patch.object(self.store, 'ensure_partitions') as mock_ensure:
+            self.assertEqual(self.store.import_legacy_locations(), 3)
+
+        mock_ensure.assert_called_once_with(date(2026, 5, 1), 0)
+        insert = statements(self.cur)[-1]
+        self.assertIn('NOT EXISTS', insert)
+        self.assertIn('h.recorded_at = l.timestamp', insert)
+
+    def test_maintenance_thread(self):
+        """Test that maintenance runs on start and the thread exits on stop"""
+        with patch.object(self.store, 'run_maintenance') as mock_run:
+            self.store.start_maintenance(interval=3600)
+            self.store.stop_maintenance()
+
+        mock_run.assert_called_once_with()
+        self.assertIsNone(self.store._worker)
+
+if __name__ == '__main__':
+    unittest.main()
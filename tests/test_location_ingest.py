@@ -0,0 +1,94 @@
+import unittest
+import psycopg2
+from unittest.mock import patch, MagicMock
+from datetime import datetime, timedelta
+from ai.location_ingest import LocationIngestor
+
+class TestLocationIngestor(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.ingestor = LocationIngestor({'dbname': 'test'}, batch_size=100)
+        self.now = datetime.now()
+
+    def test_duplicate_pings_are_dropped(self):
+        """Test that repeated pings for the same team and time are merged"""
+        self.ingestor.add_ping(1, 30.0, 78.0, self.now)
+        self.ingestor.add_ping(1, 30.0, 78.0, self.now)
+        self.ingestor.add_ping(2, 30.1, 78.1, self.now)
+
+        stats = self.ingestor.get_stats()
+        self.assertEqual(stats['received'], 3)
+        self.assertEqual(stats['duplicates'], 1)
+        self.assertEqual(stats['buffered'], 2)
+
+    @patch('ai.location_ingest.execute_values')
+    @patch('ai.location_ingest.psycopg2.connect')
+    def test_flush_writes_history_and_latest(self, mock_connect, mock_execute_values):
+        """Test that a flush writes all history and only the newest ping per team"""
+        mock_connect.return_value = MagicMock()
+        self.ingestor.add_ping(1, 30.0, 78.0, self.now - timedelta(seconds=10))
+        self.ingestor.add_ping(1, 30.2, 78.2, self.now)
+        self.ingestor.add_ping(2, 30.1, 78.1, self.now)
+
+        written = self.ingestor.flush()
+
+        self.assertEqual(written, 3)
+        history_rows = mock_execute_values.call_args_list[0][0][2]
+        latest_rows = mock_execute_values.call_args_list[1][0][2]
+        self.assertEqual(len(history_rows), 3)
+        self.assertEqual(latest_rows, [(1, 30.2, 78.2, self.now), (2, 30.1, 78.1, self.now)])
+        self.assertEqual(self.ingestor.pending_count(), 0)
+        self.assertEqual(self.ingestor.get_stats()['written'], 3)
+
+    @patch('ai.location_ingest.psycopg2.connect')
+    def test_failed_flush_keeps_pings(self, mock_connect):
+        """Test that pings stay buffered when the write fails"""
+        mock_connect.side_effect = psycopg2.OperationalError("db down")
+        self.ingestor.add_ping(1, 30.0, 78.0, self.now)
+
+        with self.assertRaises(psycopg2.OperationalError):
+            self.ingestor.flush()
+
+        self.assertEqual(self.ingestor.pending_count(), 1)
+        self.assertEqual(self.ingestor.get_stats()['errors'], 1)
+
+    @patch('ai.location_ingest.execute_values')
+    @patch('ai.location_ingest.psycopg2.connect')
+    def test_rejected_rows_are_dropped(self, mock_connect, mock_execute_values):
+        """Test that one unwritable ping does not block the rest of the batch"""
+        mock_execute_values.side_effect = psycopg2.IntegrityError("violates foreign key constraint")
+        cur = mock_connect.return_value.cursor.return_value
+
+        def execute(sql, params=None):
+            if params and params[0] == 99:
+                raise psycopg2.IntegrityError("violates foreign key constraint")
+        cur.execute.side_effect = execute
+        self.ingestor.add_ping(1, 30.0, 78.0, self.now)
+        self.ingestor.add_ping(99, 30.1, 78.1, self.now)
+
+        written = self.ingestor.flush()
+
+        stats = self.ingestor.get_stats()
+        self.assertEqual(written, 1)
+        self.assertEqual(stats['dropped'], 1)
+        self.assertEqual(stats['buffered'], 0)
+        self.assertIn('ROLLBACK TO SAVEPOINT location_ping', [call.args[0] for call in cur.execute.call_args_list])
+
+    def test_buffer_is_capped(self):
+        """Test that the oldest pings are dropped once the buffer is full"""
+        ingestor = LocationIngestor({'dbname': 'test'}, batch_size=100, max_buffered=3)
+        for i in range(5):
+            ingestor.add_ping(i, 30.0, 78.0, self.now)
+
+        stats = ingestor.get_stats()
+        self.assertEqual(stats['buffered'], 3)
+        self.assertEqual(stats['dropped'], 2)
+        self.assertEqual(sorted(key[0] for key in ingestor._buffer), [2, 3, 4])
+
+    def test_invalid_coordinates(self):
+        """Test error handling for invalid coordinates"""
+        with self.assertRaises(ValueError):
+            self.ingestor.add_ping(1, 120.0, 78.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from ai.notification_queue import SQLiteNotificationQueue, NotificationWorker
+
+class TestNotificationQueue(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'notifications.db')
+        self.queue = SQLiteNotificationQueue(self.path, max_attempts=2, lease_seconds=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_pending_survives_restart(self):
+        """Test that queued notifications are read back by a new queue instance"""
+        self.queue.enqueue('user1', 'Flood', 'Move to higher ground', {'zone': 'A'})
+        self.queue.enqueue('user2', 'Flood', 'Move to higher ground')
+
+        reopened = SQLiteNotificationQueue(self.path)
+        pending = reopened.get_pending('user1')
+
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0]['data'], {'zone': 'A'})
+        self.assertEqual(len(reopened.get_pending()), 2)
+
+    def test_idempotency_key_deduplicates(self):
+        """Test that a repeated idempotency key returns the original notification"""
+        first = self.queue.enqueue('user1', 'Alert', 'one', idempotency_key='alert-1')
+        second = self.queue.enqueue('user1', 'Alert', 'two', idempotency_key='alert-1')
+
+        self.assertEqual(first['id'], second['id'])
+        self.assertEqual(second['message'], 'one')
+        self.assertEqual(self.queue.get_stats()['pending'], 1)
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        """Test that a batch is leased to a single worker"""
+        for i in range(5):
+            self.queue.enqueue(f"user{i}", 'Alert', 'msg')
+
+        first = self.queue.claim_batch('worker-a', limit=3)
+        second = self.queue.claim_batch('worker-b', limit=10)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({n['id'] for n in first} & {n['id'] for n in second})
+        self.assertEqual(self.queue.get_pending(), [])
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test crash recovery: rows leased by a dead worker are delivered again"""
+        queue = SQLiteNotificationQueue(self.path, lease_seconds=-1)
+        notification = queue.enqueue('user1', 'Alert', 'msg')
+        queue.claim_batch('crashed-worker')
+
+        reclaimed = queue.claim_batch('worker-b')
+
+        self.assertEqual([n['id'] for n in reclaimed], [notification['id']])
+        self.assertEqual(reclaimed[0]['attempts'], 2)
+        self.assertFalse(queue.mark_sent(notification['id'], 'crashed-worker'))
+        self.assertTrue(queue.mark_sent(notification['id'], 'worker-b'))
+
+    def test_worker_retries_then_fails(self):
+        """Test that failed deliveries are retried up to max_attempts"""
+        notification = self.queue.enqueue('user1', 'Alert', 'msg')
+
+        def sender(notification):
+            raise RuntimeError("push gateway down")
+
+        worker = NotificationWorker(self.queue, sender)
+        self.assertEqual(worker.process_batch()['retrying'], 1)
+        self.assertEqual(worker.process_batch()['failed'], 1)
+
+        stored = self.queue.get_notification(notification['id'])
+        self.assertEqual(stored['status'], 'failed')
+        self.assertEqual(stored['last_error'], 'push gateway down')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from unittest.mock import patch
+from flask import Flask
+import profiler
+from instrumentation import instrumented
+from profiler import Profiler, collapsed, speedscope
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.profiler = Profiler(interval_ms=1, window_seconds=60, output_dir=self.tmp.name)
+        self.profiler._tag_codes = profiler._tagging_codes()
+        self.stop = threading.Event()
+
+    def tearDown(self):
+        self.stop.set()
+        self.profiler.stop()
+        self.tmp.cleanup()
+
+    def spawn(self, target):
+        started = threading.Event()
+
+        def run():
+            started.set()
+            target()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        started.wait()
+        return thread
+
+    def test_samples_are_tagged_with_service_method(self):
+        """Test that stacks under an instrumented method get its label as root"""
+        @instrumented('db', 'ResourceService.get_nearby_resources')
+        def busy():
+            while not self.stop.is_set():
+                sum(range(200))
+
+        self.spawn(busy)
+        for _ in range(20):
+            self.profiler.sample(exclude=threading.get_ident())
+
+        roots = {stack[0][0] for stack in self.profiler._counts}
+        self.assertIn('[ResourceService.get_nearby_resources]', roots)
+        tagged = [s for s in self.profiler._counts if s[0][0].startswith('[')]
+        self.assertTrue(any('busy' in frame[0] for frame in tagged[0]))
+
+    def test_idle_threads_are_skipped(self):
+        """Test that a thread blocked on an event contributes no samples"""
+        self.spawn(lambda: self.stop.wait())
+        self.profiler.sample(exclude=threading.get_ident())
+
+        self.assertFalse(any('<lambda>' in f[0] for s in self.profiler._counts for f in s))
+
+    def test_output_formats(self):
+        """Test collapsed and speedscope encodings of the same counts"""
+        counts = Counter({
+            (('main', 'app.py', 1), ('handler', 'app.py', 9)): 3,
+            (('main', 'app.py', 1), ('_calculate_distance', 'planner.py', 40)): 5
+        })
+
+        self.assertEqual(collapsed(counts), "main;_calculate_distance 5\nmain;handler 3\n")
+        document = speedscope(counts, 10.0, 'test')
+        profile = document['profiles'][0]
+        self.assertEqual(len(document['shared']['frames']), 3)
+        self.assertEqual(sorted(profile['weights']), [30.0, 50.0])
+        self.assertEqual(profile['endValue'], 80.0)
+
+    def test_start_stop_writes_window(self):
+        """Test that stopping flushes the partial window to a file"""
+        self.spawn(lambda: [sum(range(200)) for _ in iter(self.stop.is_set, True)])
+        self.profiler.start('speedscope')
+        while self.profiler.stats['samples'] < 5:
+            self.stop.wait(0.005)
+        path = self.profiler.stop()
+
+        self.assertFalse(self.profiler.running)
+        self.assertTrue(path.endswith('.speedscope.json'))
+        with open(path) as f:
+            self.assertEqual(json.load(f)['profiles'][0]['type'], 'sampled')
+
+    def test_runtime_toggle_endpoint(self):
+        """Test toggling over HTTP and the token check"""
+        app = Flask(__name__)
+        profiler.init_app(app)
+        client = app.test_client()
+
+        with patch('profiler.PROFILER', self.profiler):
+            started = client.post('/debug/profiler', json={'action': 'start'}).get_json()
+            stopped = client.post('/debug/profiler', json={'action': 'stop'}).get_json()
+            bad = client.post('/debug/profiler', json={'action': 'restart'})
+            with patch.dict(profiler.PROFILER_CONFIG, {'token': 's3cret'}):
+                denied = client.get('/debug/profiler')
+                allowed = client.get('/debug/profiler', headers={'X-Profiler-Token': 's3cret'})
+
+        self.assertTrue(started['running'])
+        self.assertFalse(stopped['running'])
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(denied.status_code, 403)
+        self.assertEqual(allowed.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
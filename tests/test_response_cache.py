@@ -0,0 +1,147 @@
+import gzip
+import json
+import unittest
+from unittest.mock import MagicMock
+from flask import Flask, jsonify
+import response_cache
+from response_cache import ResponseCache, init_cache_triggers, notify_invalidation
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.calls = 0
+        app = Flask(__name__)
+
+        @app.route('/api/community/partnerships', methods=['GET', 'POST'])
+        def partnerships():
+            self.calls += 1
+            return jsonify([{'id': i, 'name': f"Partner {i}", 'calls': self.calls} for i in range(20)])
+
+        @app.route('/api/gamification/user/<int:user_id>')
+        def user(user_id):
+            self.calls += 1
+            return jsonify({'error': 'User not found'}), 404
+
+        self.clock = FakeClock()
+        self.cache = ResponseCache(app.wsgi_app, clock=self.clock)
+        app.wsgi_app = self.cache
+        self.client = app.test_client()
+
+    def test_hit_skips_the_app(self):
+        """Test that a repeat request is answered from the cache"""
+        first = self.client.get('/api/community/partnerships')
+        second = self.client.get('/api/community/partnerships')
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(self.cache.get_stats()['hits'], 1)
+
+    def test_precomputed_encodings(self):
+        """Test that gzip and brotli bodies share one render and have distinct ETags"""
+        plain = self.client.get('/api/community/partnerships')
+        gzipped = self.client.get('/api/community/partnerships', headers={'Accept-Encoding': 'gzip'})
+        refused = self.client.get('/api/community/partnerships', headers={'Accept-Encoding': 'gzip;q=0'})
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(gzipped.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(gzipped.data), plain.data)
+        self.assertNotEqual(gzipped.headers['ETag'], plain.headers['ETag'])
+        self.assertNotIn('Content-Encoding', refused.headers)
+
+        if response_cache.brotli is not None:
+            br = self.client.get('/api/community/partnerships', headers={'Accept-Encoding': 'gzip, br'})
+            self.assertEqual(br.headers['Content-Encoding'], 'br')
+            self.assertEqual(response_cache.brotli.decompress(br.data), plain.data)
+
+    def test_conditional_get(self):
+        """Test that any encoding's ETag revalidates to a 304"""
+        first = self.client.get('/api/community/partnerships', headers={'Accept-Encoding': 'gzip'})
+        second = self.client.get('/api/community/partnerships', headers={'If-None-Match': first.headers['ETag']})
+        changed = self.client.get('/api/community/partnerships', headers={'If-None-Match': '"other"'})
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(self.calls, 1)
+
+    def test_ttl_expiry(self):
+        """Test that an entry is rendered again after its namespace TTL"""
+        self.client.get('/api/community/partnerships')
+        self.clock.now += 299
+        self.client.get('/api/community/partnerships')
+        self.clock.now += 2
+        refreshed = self.client.get('/api/community/partnerships')
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(json.loads(refreshed.data)[0]['calls'], 2)
+
+    def test_invalidate_namespace(self):
+        """Test that bumping a namespace version drops only its entries"""
+        self.client.get('/api/community/partnerships')
+        self.cache.invalidate('gamification')
+        self.client.get('/api/community/partnerships')
+        self.cache.invalidate('community')
+        self.client.get('/api/community/partnerships')
+
+        self.assertEqual(self.calls, 2)
+
+    def test_uncacheable_requests_pass_through(self):
+        """Test that writes and error responses are never stored"""
+        self.client.post('/api/community/partnerships')
+        self.client.post('/api/community/partnerships')
+        missing = self.client.get('/api/gamification/user/7')
+        self.client.get('/api/gamification/user/7')
+
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(self.calls, 4)
+        self.assertEqual(self.cache.get_stats()['entries'], 0)
+
+    def test_uncached_fills_release_their_lock(self):
+        """Test that misses that store nothing do not leave a fill lock behind"""
+        for user_id in range(50):
+            self.client.get(f'/api/gamification/user/{user_id}')
+
+        self.assertEqual(self.cache._fill_locks, {})
+
+    def test_max_entries(self):
+        """Test that the cache evicts when full"""
+        def app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'ok']
+
+        cache = ResponseCache(app, max_entries=4)
+        for i in range(10):
+            environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/predictions', 'QUERY_STRING': f"page={i}"}
+            cache(environ, lambda status, headers: None)
+
+        self.assertLessEqual(cache.get_stats()['entries'], 4)
+
+class TestCacheTriggers(unittest.TestCase):
+    def test_triggers_notify_with_namespace(self):
+        """Test that every invalidating table gets a trigger passing its namespace"""
+        cur = MagicMock()
+        init_cache_triggers(cur)
+        sql = ' '.join(call.args[0] for call in cur.execute.call_args_list)
+
+        for table, namespace in response_cache.INVALIDATING_TABLES.items():
+            self.assertIn(f"ON {table}", sql)
+            self.assertIn(f"notify_response_cache('{namespace}')", sql)
+
+    def test_notify_invalidation(self):
+        """Test explicit invalidation from application code"""
+        cur = MagicMock()
+        notify_invalidation(cur, 'gamification')
+        cur.execute.assert_called_once_with("SELECT pg_notify(%s, %s)", ('response_cache', 'gamification'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import time
+from ai.sms_fanout import SmsFanout, SmsProviderError, MockSmsProvider, RateLimiter
+
+class FlakyProvider:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = {}
+
+    def send(self, to, body):
+        self.calls[to] = self.calls.get(to, 0) + 1
+        if self.calls[to] <= len(self.failures):
+            raise self.failures[self.calls[to] - 1]
+        return {'message_id': f"SM{to}", 'to': to, 'status_code': 'queued'}
+
+class TestSmsFanout(unittest.TestCase):
+    def test_retries_throttled_sends(self):
+        """Test that 429 and 5xx responses are retried until they succeed"""
+        provider = FlakyProvider([SmsProviderError("throttled", 429), SmsProviderError("down", 503)])
+        fanout = SmsFanout(provider, max_workers=4, backoff_base=0.001)
+
+        summary = fanout.send_all(['+911', '+912'], "Alert")
+
+        self.assertEqual(summary['succeeded'], 2)
+        self.assertEqual(summary['retries'], 4)
+        self.assertTrue(all(result['attempts'] == 3 for result in summary['results']))
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 400 fails immediately"""
+        provider = FlakyProvider([SmsProviderError("invalid number", 400)])
+        fanout = SmsFanout(provider, backoff_base=0.001)
+
+        result = fanout.send_one('+91bad', "Alert")
+
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['attempts'], 1)
+        self.assertEqual(provider.calls['+91bad'], 1)
+
+    def test_streams_generator_recipients(self):
+        """Test lazy recipients with a per-recipient message"""
+        provider = MockSmsProvider(latency=0.001, seed=1)
+        fanout = SmsFanout(provider, max_workers=8)
+        recipients = ({'phone': f"+91{i:04d}", 'name': f"user{i}"} for i in range(200))
+
+        results = list(fanout.stream(recipients, lambda r: f"Hello {r['name']}"))
+
+        self.assertEqual(len(results), 200)
+        self.assertEqual(len({result['phone'] for result in results}), 200)
+        self.assertEqual(provider.sent, 200)
+
+    def test_rate_limiter_caps_throughput(self):
+        """Test that the token bucket spaces out sends beyond the burst"""
+        limiter = RateLimiter(rate_per_second=50, burst=5)
+        started = time.monotonic()
+        for _ in range(15):
+            limiter.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+import numpy as np
+from benchmarks.synthetic_data import (
+    LAT_RANGE, LON_RANGE, copy_buffer, counts_for_scale, generate, generate_chunk,
+    plan_chunks, sample_points
+)
+
+class TestSyntheticData(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.ctx = {
+            'seed': 7,
+            'anchor': datetime(2026, 7, 1),
+            'days': 30,
+            'refs': {'resources': (101, 500), 'response_teams': (11, 40)},
+            'layouts': {}
+        }
+
+    def test_points_are_clustered_in_state(self):
+        """Test that generated points stay in Uttarakhand around district centres"""
+        _, lat, lon = sample_points(np.random.default_rng(1), 5000)
+
+        self.assertTrue(((lat >= LAT_RANGE[0]) & (lat <= LAT_RANGE[1])).all())
+        self.assertTrue(((lon >= LON_RANGE[0]) & (lon <= LON_RANGE[1])).all())
+        near_dehradun = (abs(lat - 30.3165) < 0.2) & (abs(lon - 78.0322) < 0.2)
+        self.assertGreater(near_dehradun.mean(), 0.1)
+
+    def test_chunks_are_deterministic(self):
+        """Test that a chunk depends only on seed, table and chunk index"""
+        task = plan_chunks('incidents', 2500, 0, chunk_size=1000)[2]
+
+        self.assertEqual(task, ('incidents', 2, 2001, 500))
+        self.assertEqual(generate_chunk(task, self.ctx), generate_chunk(task, self.ctx))
+        other = generate_chunk(task, dict(self.ctx, seed=8))
+        self.assertNotEqual(generate_chunk(task, self.ctx)[1], other[1])
+
+    def test_children_reference_parent_ranges(self):
+        """Test that pings and requests reference the parent id ranges"""
+        _, pings = generate_chunk(('team_location_history', 0, 1, 2000), self.ctx)
+        _, requests = generate_chunk(('resource_requests', 0, 1, 2000), self.ctx)
+
+        self.assertTrue(all(11 <= row[0] <= 50 for row in pings))
+        self.assertTrue(all(101 <= row[1] <= 600 for row in requests))
+
+    def test_copy_format(self):
+        """Test COPY text encoding of nulls, floats and geometries"""
+        columns, rows = generate_chunk(('resources', 0, 1, 3), self.ctx)
+        lines = copy_buffer(rows + [(4, 'Tents', None, 'available', 'x')]).getvalue().splitlines()
+
+        self.assertEqual(columns, ['id', 'type', 'quantity', 'status', 'location'])
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].split('\t')[4].startswith('SRID=4326;POINT('))
+        self.assertEqual(lines[3].split('\t')[2], '\\N')
+
+    @patch('benchmarks.synthetic_data.psycopg2.connect')
+    def test_generate_copies_existing_tables(self, mock_connect):
+        """Test that generate loads existing tables in order and skips missing ones"""
+        cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+        state = {'last': None}
+
+        def execute(sql, params=None):
+            state['last'] = (sql, params)
+
+        def fetchone():
+            sql, params = state['last']
+            if 'to_regclass' in sql:
+                return (params[0] != 'shelters',)
+            return (0,)
+
+        cursor.execute.side_effect = execute
+        cursor.fetchone.side_effect = fetchone
+        cursor.fetchall.return_value = []
+
+        loaded = generate({}, counts_for_scale(1000), seed=3, workers=1,
+                          anchor=datetime(2026, 7, 1))
+
+        copied = [c.args[0].split(' (')[0] for c in cursor.copy_expert.call_args_list]
+        self.assertNotIn('shelters', loaded)
+        self.assertEqual(loaded['incidents'], 1000)
+        self.assertEqual(loaded['team_location_history'], 2000)
+        self.assertLess(copied.index('COPY response_teams'), copied.index('COPY team_location_history'))
+        statements = [' '.join(str(c.args[0]).split()) for c in cursor.execute.call_args_list]
+        self.assertIn('DELETE FROM resource_inventory_summary', statements)
+        self.assertTrue(any(s.startswith('INSERT INTO team_latest_locations') for s in statements))
+        self.assertIn('ANALYZE team_latest_locations', statements)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import psycopg2
+import requests
+from flask import Flask, jsonify
+import tracing
+from instrumentation import instrumented
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, vars=None):
+        self.executed.append(query)
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'traces.jsonl')
+        tracing.configure(enabled=True, sample_rate=1.0, exporters=[tracing.FileExporter(self.path)])
+        tracing.install()
+
+    def tearDown(self):
+        tracing.uninstall()
+        tracing.configure(enabled=False, exporters=[])
+        self.tmp.cleanup()
+
+    def read_traces(self):
+        self.assertTrue(tracing.flush())
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def create_app(self):
+        app = Flask(__name__)
+        tracing.init_app(app)
+
+        @instrumented('db', 'nearby')
+        def lookup():
+            cursor = tracing.traced_cursor_class(FakeCursor)()
+            cursor.execute("SELECT id\n  FROM resources")
+            return requests.get('http://weather.test/data?appid=secret', timeout=1).status_code
+
+        @app.route('/api/resources/<int:rid>')
+        def resource(rid):
+            return jsonify({'status': lookup()})
+
+        return app
+
+    def fake_send(self, adapter, request, **kwargs):
+        self.sent_headers = dict(request.headers)
+        response = requests.Response()
+        response.status_code = 200
+        response.request = request
+        return response
+
+    def test_request_trace_spans_services_db_and_http(self):
+        """Test that one request yields one trace with nested spans"""
+        with patch('requests.adapters.HTTPAdapter.send', autospec=True, side_effect=self.fake_send):
+            response = self.create_app().test_client().get('/api/resources/7')
+
+        trace = self.read_traces()[0]
+        spans = {s['name']: s for s in trace['spans']}
+        self.assertEqual(response.headers['X-Trace-Id'], trace['trace_id'])
+        self.assertEqual(trace['name'], 'GET /api/resources/<int:rid>')
+        self.assertEqual(spans['nearby']['parent_id'], spans['GET /api/resources/<int:rid>']['span_id'])
+        self.assertEqual(spans['db SELECT']['attributes']['db.statement'], 'SELECT id FROM resources')
+        self.assertEqual(spans['GET weather.test']['parent_id'], spans['nearby']['span_id'])
+        self.assertNotIn('secret', spans['GET weather.test']['attributes']['http.url'])
+        self.assertTrue(self.sent_headers['traceparent'].startswith(f"00-{trace['trace_id']}-"))
+        self.assertEqual([step['name'] for step in trace['critical_path']][:2],
+                         ['GET /api/resources/<int:rid>', 'nearby'])
+
+    def test_incoming_traceparent(self):
+        """Test that the caller's trace id and sampling flag are honoured"""
+        trace_id = 'ab' * 16
+        client = self.create_app().test_client()
+        with patch('requests.adapters.HTTPAdapter.send', autospec=True, side_effect=self.fake_send):
+            client.get('/api/resources/1', headers={'traceparent': f"00-{trace_id}-{'cd' * 8}-01"})
+            client.get('/api/resources/2', headers={'traceparent': f"00-{'ef' * 16}-{'cd' * 8}-00"})
+
+        traces = self.read_traces()
+        self.assertEqual([t['trace_id'] for t in traces], [trace_id])
+        self.assertEqual(traces[0]['spans'][0]['parent_id'], 'cd' * 8)
+
+    def test_no_spans_outside_a_trace(self):
+        """Test that hooks are pass-through when no trace is active"""
+        cursor = tracing.traced_cursor_class(FakeCursor)()
+        cursor.execute("SELECT 1")
+
+        with tracing.span('orphan') as span:
+            self.assertIsNone(span)
+        self.assertEqual(cursor.executed, ["SELECT 1"])
+        self.assertIsNone(tracing.current_span())
+
+    def test_connect_uses_tracing_connection(self):
+        """Test that patched psycopg2.connect opens traced connections"""
+        with patch('tracing._original_connect') as connect:
+            with tracing.start_trace('job'):
+                psycopg2.connect(host='db')
+
+        self.assertIs(connect.call_args.kwargs['connection_factory'], tracing.tracing_connection_class())
+        self.assertEqual([s['name'] for s in self.read_traces()[0]['spans']], ['job', 'db connect'])
+
+if __name__ == '__main__':
+    unittest.main()
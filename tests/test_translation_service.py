@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from ai.translation_memory import TranslationMemory
+from ai.translation_service import TranslationService, UI_TRANSLATIONS
+
+def fake_libretranslate(url, json, timeout):
+    response = MagicMock()
+    response.json.return_value = {
+        'translatedText': [f"<{json['target']}>{text}" for text in json['q']]
+    }
+    return response
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'memory.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_translations_persist(self):
+        """Test that translations are read back after a restart"""
+        memory = TranslationMemory(self.path)
+        memory.put_many({'Flood': 'बाढ़', 'Rain': 'बारिश'}, 'hi')
+        memory.close()
+
+        reopened = TranslationMemory(self.path)
+
+        self.assertEqual(reopened.get_many(['Flood', 'Rain', 'Snow'], 'hi'),
+                         {'Flood': 'बाढ़', 'Rain': 'बारिश'})
+        self.assertEqual(reopened.stats['db_hits'], 2)
+        self.assertEqual(reopened.get('Flood', 'hi'), 'बाढ़')
+        self.assertEqual(reopened.stats['lru_hits'], 1)
+
+    def test_lru_is_bounded(self):
+        """Test that the in-memory layer evicts least recently used entries"""
+        memory = TranslationMemory(lru_size=2)
+        memory.put_many({'a': '1', 'b': '2', 'c': '3'}, 'hi')
+
+        self.assertEqual(len(memory._lru), 2)
+        self.assertEqual(memory.get('a', 'hi'), '1')
+
+class TestBatchedTranslation(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.service = TranslationService(memory=TranslationMemory())
+
+    @patch('ai.translation_service.requests.post', side_effect=fake_libretranslate)
+    def test_nested_payload_is_one_request(self, mock_post):
+        """Test that unique strings in a nested payload go out in a single request"""
+        payload = {
+            'title': 'Flood warning',
+            'steps': ['Move uphill', 'Flood warning', {'note': 'Carry water'}],
+            'level': 3
+        }
+
+        translated = self.service.translate_dict(payload, 'hi')
+
+        mock_post.assert_called_once()
+        self.assertEqual(mock_post.call_args.kwargs['json']['q'],
+                         ['Flood warning', 'Move uphill', 'Carry water'])
+        self.assertEqual(translated, {
+            'title': '<hi>Flood warning',
+            'steps': ['<hi>Move uphill', '<hi>Flood warning', {'note': '<hi>Carry water'}],
+            'level': 3
+        })
+
+    @patch('ai.translation_service.requests.post', side_effect=fake_libretranslate)
+    def test_memory_avoids_repeat_requests(self, mock_post):
+        """Test that known strings are served from the translation memory"""
+        self.service.translate_batch(['Flood', 'Rain'], 'hi')
+        self.service.translate_batch(['Flood', 'Rain', 'Snow'], 'hi')
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(mock_post.call_args.kwargs['json']['q'], ['Snow'])
+
+    @patch('ai.translation_service.requests.post', side_effect=fake_libretranslate)
+    def test_large_batches_are_chunked(self, mock_post):
+        """Test that more strings than batch_size are split across requests"""
+        self.service.batch_size = 10
+        texts = [f"text {i}" for i in range(25)]
+
+        translated = self.service.translate_batch(texts, 'ur')
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(translated, [f"<ur>text {i}" for i in range(25)])
+
+    @patch('ai.translation_service.requests.post', side_effect=fake_libretranslate)
+    def test_ui_texts_single_round_trip(self, mock_post):
+        """Test that the UI catalogue for an uncurated language is one request"""
+        texts = self.service.translate_ui_texts({}, 'ur')
+
+        mock_post.assert_called_once()
+        self.assertEqual(texts['dashboard'], '<ur>Dashboard')
+        self.assertEqual(self.service.translate_ui_texts({}, 'hi'), UI_TRANSLATIONS['hi'])
+        mock_post.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
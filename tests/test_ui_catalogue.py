@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+import requests
+from unittest.mock import patch, MagicMock
+from ai.translation_memory import TranslationMemory
+from ai.translation_service import TranslationService, UI_TRANSLATIONS
+from ai.ui_catalogue import MmapCatalogue, build_catalogues, catalogue_path, write_catalogue
+from stubs.libretranslate_stub import create_app
+
+class TestMmapCatalogue(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        """Test that every written key is found by binary search"""
+        texts = {f"key_{i}": f"मान {i}" for i in range(300)}
+        path = os.path.join(self.tmpdir, 'ui_hi.cat')
+        write_catalogue(path, texts)
+
+        catalogue = MmapCatalogue(path)
+
+        self.assertEqual(len(catalogue), 300)
+        self.assertEqual(catalogue['key_42'], 'मान 42')
+        self.assertNotIn('missing', catalogue)
+        self.assertEqual(catalogue.to_dict(), texts)
+        catalogue.close()
+
+class TestCatalogueBuild(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.client = create_app().test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def post_to_stub(self, url, json, timeout):
+        response = MagicMock()
+        response.json.return_value = self.client.post('/translate', json=json).get_json()
+        return response
+
+    def test_built_catalogue_avoids_runtime_calls(self):
+        """Test that UI texts come from the mmap catalogue after a build"""
+        with patch('ai.translation_service.requests.post', side_effect=self.post_to_stub):
+            builder = TranslationService(memory=TranslationMemory(), catalogue_dir=self.tmpdir)
+            build_catalogues(self.tmpdir, builder, ['hi', 'ur'])
+
+        self.assertTrue(os.path.exists(catalogue_path(self.tmpdir, 'ur')))
+
+        service = TranslationService(memory=TranslationMemory(), catalogue_dir=self.tmpdir)
+        with patch('ai.translation_service.requests.post', side_effect=self.post_to_stub) as mock_post:
+            texts = service.translate_ui_texts({}, 'ur')
+            self.assertEqual(mock_post.call_count, 0)
+            self.assertEqual(texts['dashboard'], '[ur] Dashboard')
+            self.assertEqual(service.translate_ui_texts({}, 'hi'), UI_TRANSLATIONS['hi'])
+
+            texts = service.translate_ui_texts({'shelters': 'Shelters'}, 'ur')
+            self.assertEqual(mock_post.call_count, 1)
+            self.assertEqual(mock_post.call_args.kwargs['json']['q'], ['Shelters'])
+            self.assertEqual(texts['shelters'], '[ur] Shelters')
+
+        self.assertEqual(self.client.get('/stats').get_json()['requests'], 2)
+
+    def test_failed_translations_are_not_written(self):
+        """Test that English fallbacks from a failed build are translated at runtime"""
+        with patch('ai.translation_service.requests.post',
+                   side_effect=requests.exceptions.ConnectionError('down')):
+            builder = TranslationService(memory=TranslationMemory(), catalogue_dir=self.tmpdir)
+            written = build_catalogues(self.tmpdir, builder, ['hi', 'ur'])
+
+        self.assertEqual(written['ur'], 0)
+        self.assertEqual(written['hi'], len(UI_TRANSLATIONS['hi']))
+
+        service = TranslationService(memory=TranslationMemory(), catalogue_dir=self.tmpdir)
+        with patch('ai.translation_service.requests.post', side_effect=self.post_to_stub):
+            texts = service.translate_ui_texts({}, 'ur')
+        self.assertEqual(texts['dashboard'], '[ur] Dashboard')
+
+if __name__ == '__main__':
+    unittest.main()
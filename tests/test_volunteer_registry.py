@@ -0,0 +1,135 @@
+import json
+import math
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from ai.spatial_index import EARTH_RADIUS_KM, haversine_km
+from ai.volunteer_registry import Geocoder, VolunteerRegistry, iter_slots
+
+PLACES = {
+    'dehradun': (30.3165, 78.0322),
+    'vikas nagar': (30.4686, 77.7740),
+    'rishikesh': (30.0869, 78.2676),
+    'haldwani': (29.2183, 79.5130)
+}
+
+def volunteer(phone, location, skills, languages, availability='Full Time'):
+    return {'name': f"v{phone}", 'phone': phone, 'location': location, 'skills': skills,
+            'languages': languages, 'availability': availability}
+
+class TestGeocoder(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.session = MagicMock()
+        self.session.get.return_value.json.return_value = [{'lat': '30.4686', 'lon': '77.7740'}]
+        self.path = os.path.join(tempfile.mkdtemp(), 'geocodes.db')
+        self.geocoder = Geocoder(self.path, session=self.session, min_interval=0)
+
+    def test_each_place_is_looked_up_once(self):
+        """Test that repeat and differently-cased places hit the cache"""
+        first = self.geocoder.geocode('Vikas Nagar')
+        self.geocoder.geocode('  vikas  nagar ')
+        self.geocoder.geocode('Dehradun')
+
+        self.assertEqual(first, (30.4686, 77.7740))
+        self.assertEqual(self.session.get.call_count, 1)
+
+        reopened = Geocoder(self.path, session=self.session, min_interval=0)
+        self.assertEqual(reopened.geocode('vikas nagar'), first)
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_failures_are_not_cached(self):
+        """Test that a transient error is retried while 'not found' is remembered"""
+        self.session.get.side_effect = [ConnectionError("offline"), MagicMock(json=MagicMock(return_value=[]))]
+
+        self.assertIsNone(self.geocoder.geocode('Nowhere'))
+        self.assertIsNone(self.geocoder.geocode('Nowhere'))
+        self.assertIsNone(self.geocoder.geocode('Nowhere'))
+        self.assertEqual(self.session.get.call_count, 2)
+
+class TestVolunteerRegistry(unittest.TestCase):
+    def setUp(self):
+        """Set up test cases"""
+        self.registry = VolunteerRegistry(geocode=lambda place: PLACES.get(place.lower()))
+        self.registry.add(volunteer('9000000001', 'Dehradun', ['Rescue', 'Transportation'], ['English', 'Hindi']))
+        self.registry.add(volunteer('9000000002', 'vikas nagar', ['Rescue'], ['Hindi'], 'Emergency Only'))
+        self.registry.add(volunteer('9000000003', 'Rishikesh', ['Medical'], ['Hindi']))
+        self.registry.add(volunteer('9000000004', 'Dehradun', ['Rescue'], ['English'], 'Weekends'))
+        self.registry.add(volunteer('9000000005', 'Haldwani', ['Rescue'], ['Hindi']))
+
+    def test_combined_query(self):
+        """Test available Hindi-speaking rescuers within 30 km of Dehradun"""
+        results = self.registry.query(30.3165, 78.0322, 30, skills=['rescue'], languages=['hindi'],
+                                      availability=['full time', 'emergency only'])
+
+        self.assertEqual([v['phone'] for _, v in results], ['9000000001', '9000000002'])
+        self.assertEqual(results[0][0], 0.0)
+
+    def test_radius_edge_across_cell_boundary(self):
+        """Test that a volunteer just inside the radius in the next cell is found"""
+        # Due north of the query, just past the 30.25 cell boundary
+        north = (30.0253 + math.degrees(24.999 / EARTH_RADIUS_KM), 78.0)
+        registry = VolunteerRegistry(geocode=lambda place: north, cell_size_deg=0.05)
+        registry.add(volunteer('9000000009', 'Edge', ['Rescue'], ['Hindi']))
+
+        results = registry.query(30.0253, 78.0, 25)
+
+        self.assertEqual([v['phone'] for _, v in results], ['9000000009'])
+
+    def test_replace_and_remove(self):
+        """Test that re-adding a volunteer updates every index"""
+        self.registry.add(volunteer('+91 90000 00001', 'Haldwani', ['Medical'], ['Hindi']))
+
+        self.assertEqual(len(self.registry), 5)
+        self.assertEqual(self.registry.count(skills=['medical']), 2)
+        self.assertEqual(self.registry.query(30.3165, 78.0322, 5), [(0.0, self.registry.volunteers[3])])
+
+        self.assertTrue(self.registry.remove('+919000000003'))
+        self.assertEqual(self.registry.count(skills=['medical']), 1)
+        self.assertEqual(self.registry.facets()['skills'], {'medical': 1, 'rescue': 3})
+
+    def test_unknown_values_match_nothing(self):
+        """Test that a query on an unindexed value is empty"""
+        self.assertEqual(self.registry.query(skills=['firefighting']), [])
+        self.assertEqual(self.registry.count(languages=['hindi']), 4)
+
+    def test_matches_scan(self):
+        """Test indexed radius queries against a full scan"""
+        rng = random.Random(3)
+        places = {f"p{i}": (29.0 + rng.random() * 2, 78.0 + rng.random() * 2) for i in range(300)}
+        registry = VolunteerRegistry(geocode=places.get, cell_size_deg=0.05)
+        records = []
+        for i in range(2000):
+            record = volunteer(f"9{i:09d}", f"p{rng.randrange(300)}",
+                               rng.sample(['Rescue', 'Medical', 'Cooking', 'Driving'], 2),
+                               rng.sample(['Hindi', 'English', 'Garhwali'], 1),
+                               rng.choice(['Full Time', 'Weekends']))
+            registry.add(record)
+            records.append(record)
+
+        results = registry.query(30.0, 79.0, 20, skills=['rescue'], languages=['hindi'], availability=['full time'])
+
+        expected = {r['phone'] for r in records
+                    if 'Rescue' in r['skills'] and 'Hindi' in r['languages'] and r['availability'] == 'Full Time'
+                    and haversine_km(30.0, 79.0, *places[r['location']]) <= 20}
+        self.assertEqual({v['phone'] for _, v in results}, expected)
+        self.assertEqual([d for d, _ in results], sorted(d for d, _ in results))
+
+    def test_load(self):
+        """Test loading a volunteers.json file"""
+        path = os.path.join(tempfile.mkdtemp(), 'volunteers.json')
+        with open(path, 'w') as f:
+            json.dump([volunteer('9000000009', 'Dehradun', ['Rescue'], ['Hindi']), {'name': 'no contact'}], f)
+        registry = VolunteerRegistry(geocode=lambda place: PLACES.get(place.lower()))
+
+        self.assertEqual(registry.load(path), 1)
+
+    def test_iter_slots(self):
+        """Test set-bit enumeration"""
+        self.assertEqual(list(iter_slots(0b100101 | 1 << 200)), [0, 2, 5, 200])
+        self.assertEqual(list(iter_slots(0)), [])
+
+if __name__ == '__main__':
+    unittest.main()
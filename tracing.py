@@ -0,0 +1,474 @@
+"""Request-scoped tracing.
+
+A trace starts when a Flask request arrives (``init_app``) or when
+``start_trace`` is called. The active span lives in a context variable, so
+every span opened further down the call stack joins the same trace:
+functions decorated with ``traced`` (and ``instrumentation.instrumented``),
+psycopg2 cursors and ``requests`` sessions once ``install()`` has run.
+
+Outside a trace every hook is a single context-variable lookup. When the
+root span ends the whole trace is handed to a background thread and written
+by the configured exporters: JSON lines to a local file and/or Zipkin v2
+spans to a collector. Each exported trace carries its critical path, the
+chain of longest child spans from the root.
+
+    app = Flask(__name__)
+    tracing.init_app(app)
+
+    with tracing.start_trace('nightly-rollup'):
+        rebuild_rollup(cur)
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from config import TRACING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('usafe_span', default=None)
+
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+class Trace:
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or _new_id(16)
+        self.root = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: 'Span') -> None:
+        with self._lock:
+            self.spans.append(span)
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'attributes',
+                 'start', 'duration_ms', 'error', '_started')
+
+    def __init__(self, trace: Trace, name: str, kind: str, parent_id: Optional[str],
+                 attributes: Optional[Dict] = None):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start = time.time()
+        self.duration_ms = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        """W3C traceparent header for calls made inside this span"""
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        self.trace.add(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start': self.start,
+            'duration_ms': round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+def _open(span: Span):
+    return _current.set(span)
+
+def _close(span: Span, token, error: Optional[BaseException] = None) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Opened in a different context, e.g. a Flask teardown on another thread
+        _current.set(None)
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    span.finish()
+    if span is span.trace.root:
+        _submit(span.trace)
+
+class _ActiveSpan:
+    """Context manager making a span current for the enclosed block"""
+
+    __slots__ = ('span', '_token')
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _open(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _close(self.span, self._token, exc)
+        return False
+
+class _NullSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name: str, kind: str = 'internal', **attributes):
+    """Child span of the current span; a shared no-op outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        return _NULL_SPAN
+    return _ActiveSpan(Span(parent.trace, name, kind, parent.span_id, attributes))
+
+def traced(kind: str = 'internal', name: Optional[str] = None):
+    """Decorator running every call inside a child span"""
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None:
+                return fn(*args, **kwargs)
+            with _ActiveSpan(Span(parent.trace, label, kind, parent.span_id)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _root_span(name: str, kind: str, traceparent: Optional[str], attributes: Dict) -> Optional[Span]:
+    if not ENABLED:
+        return None
+    trace_id = parent_id = None
+    match = TRACEPARENT.match(traceparent or '')
+    if match:
+        # The caller already made the sampling decision
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:
+            return None
+    elif random.random() >= SAMPLE_RATE:
+        return None
+    trace = Trace(trace_id)
+    trace.root = Span(trace, name, kind, parent_id, attributes)
+    return trace.root
+
+def start_trace(name: str, kind: str = 'internal', traceparent: Optional[str] = None, **attributes):
+    """Root span for work outside a request, e.g. a CLI job or worker loop"""
+    if _current.get() is not None:
+        return span(name, kind, **attributes)
+    root = _root_span(name, kind, traceparent, attributes)
+    return _NULL_SPAN if root is None else _ActiveSpan(root)
+
+def critical_path(spans: List[Span], root: Span) -> List[Dict]:
+    """Follow the longest child from the root down to a leaf"""
+    children = {}
+    for s in spans:
+        children.setdefault(s.parent_id, []).append(s)
+    path = []
+    node = root
+    while node is not None:
+        path.append({'name': node.name, 'kind': node.kind, 'duration_ms': round(node.duration_ms, 3)})
+        kids = children.get(node.span_id)
+        node = max(kids, key=lambda s: s.duration_ms) if kids else None
+    return path
+
+def trace_record(trace: Trace) -> Dict:
+    root = trace.root
+    return {
+        'trace_id': trace.trace_id,
+        'name': root.name,
+        'start': root.start,
+        'duration_ms': round(root.duration_ms, 3),
+        'critical_path': critical_path(trace.spans, root),
+        'spans': [s.to_dict() for s in sorted(trace.spans, key=lambda s: s.start)]
+    }
+
+class FileExporter:
+    """Append one JSON line per trace"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, trace: Trace) -> None:
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(trace_record(trace), default=str) + '\n')
+
+class ZipkinExporter:
+    """POST spans in Zipkin v2 JSON, accepted by Zipkin, Jaeger and the OTel collector"""
+
+    KINDS = {'server': 'SERVER', 'http': 'CLIENT', 'db': 'CLIENT'}
+
+    def __init__(self, url: str, service_name: str = 'usafe', timeout: float = 2.0):
+        self.url = url
+        self.service_name = service_name
+        self.timeout = timeout
+        import requests
+        self.session = requests.Session()
+
+    def to_zipkin(self, trace: Trace) -> List[Dict]:
+        spans = []
+        for s in trace.spans:
+            tags = {k: str(v) for k, v in s.attributes.items()}
+            tags['usafe.kind'] = s.kind
+            if s.error:
+                tags['error'] = s.error
+            entry = {
+                'traceId': trace.trace_id,
+                'id': s.span_id,
+                'name': s.name,
+                'timestamp': int(s.start * 1_000_000),
+                'duration': max(1, int(s.duration_ms * 1000)),
+                'localEndpoint': {'serviceName': self.service_name},
+                'tags': tags
+            }
+            if s.parent_id:
+                entry['parentId'] = s.parent_id
+            if s.kind in self.KINDS:
+                entry['kind'] = self.KINDS[s.kind]
+            spans.append(entry)
+        return spans
+
+    def export(self, trace: Trace) -> None:
+        self.session.post(self.url, json=self.to_zipkin(trace), timeout=self.timeout).raise_for_status()
+
+ENABLED = TRACING_CONFIG['enabled']
+SAMPLE_RATE = TRACING_CONFIG['sample_rate']
+EXPORTERS = []
+stats = {'exported': 0, 'dropped': 0, 'failed': 0}
+
+_queue = queue.Queue(maxsize=1000)
+_worker = None
+_worker_lock = threading.Lock()
+
+def _export_loop() -> None:
+    while True:
+        trace = _queue.get()
+        try:
+            for exporter in list(EXPORTERS):
+                try:
+                    exporter.export(trace)
+                except Exception as e:
+                    stats['failed'] += 1
+                    logger.warning(f"Trace export to {type(exporter).__name__} failed: {e}")
+            stats['exported'] += 1
+        finally:
+            _queue.task_done()
+
+def _submit(trace: Trace) -> None:
+    global _worker
+    if not EXPORTERS:
+        return
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_export_loop, name='trace-exporter', daemon=True)
+                _worker.start()
+    try:
+        _queue.put_nowait(trace)
+    except queue.Full:
+        stats['dropped'] += 1
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait until queued traces have been exported"""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def configure(enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+              exporters: Optional[List] = None) -> None:
+    global ENABLED, SAMPLE_RATE
+    if enabled is not None:
+        ENABLED = enabled
+    if sample_rate is not None:
+        SAMPLE_RATE = sample_rate
+    if exporters is not None:
+        EXPORTERS[:] = exporters
+
+def default_exporters() -> List:
+    """Exporters named in TRACING_CONFIG"""
+    exporters = []
+    if TRACING_CONFIG['file']:
+        exporters.append(FileExporter(TRACING_CONFIG['file']))
+    if TRACING_CONFIG['collector_url']:
+        exporters.append(ZipkinExporter(TRACING_CONFIG['collector_url'], TRACING_CONFIG['service_name']))
+    return exporters
+
+# psycopg2
+
+def _statement(query) -> str:
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif not isinstance(query, str):
+        query = repr(query)
+    return ' '.join(query.split())[:500]
+
+def _db_span(parent: Span, operation: str, query) -> Span:
+    statement = _statement(query)
+    verb = statement.split(' ', 1)[0].upper() if statement else operation
+    return Span(parent.trace, f"db {verb}", 'db', parent.span_id,
+                {'db.operation': operation, 'db.statement': statement})
+
+class TracedCursorMixin:
+    def execute(self, query, vars=None):
+        parent = _current.get()
+        if parent is None:
+            return super().execute(query, vars)
+        with _ActiveSpan(_db_span(parent, 'execute', query)):
+            return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        parent = _current.get()
+        if parent is None:
+            return super().executemany(query, vars_list)
+        with _ActiveSpan(_db_span(parent, 'executemany', query)):
+            return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        parent = _current.get()
+        if parent is None:
+            return super().copy_expert(sql, file, size)
+        with _ActiveSpan(_db_span(parent, 'copy', sql)):
+            return super().copy_expert(sql, file, size)
+
+_cursor_classes = {}
+
+def traced_cursor_class(base):
+    """Subclass of a cursor class whose statements become spans"""
+    cls = _cursor_classes.get(base)
+    if cls is None:
+        cls = _cursor_classes[base] = type(f"Traced{base.__name__}", (TracedCursorMixin, base), {})
+    return cls
+
+_connection_class = None
+
+def tracing_connection_class():
+    """psycopg2 connection subclass handing out traced cursors"""
+    global _connection_class
+    if _connection_class is None:
+        import psycopg2.extensions
+
+        class TracingConnection(psycopg2.extensions.connection):
+            def cursor(self, *args, **kwargs):
+                factory = (kwargs.pop('cursor_factory', None) or self.cursor_factory
+                           or psycopg2.extensions.cursor)
+                kwargs['cursor_factory'] = traced_cursor_class(factory)
+                return super().cursor(*args, **kwargs)
+
+        _connection_class = TracingConnection
+    return _connection_class
+
+_original_connect = None
+_original_send = None
+
+def _traced_connect(*args, **kwargs):
+    if kwargs.get('connection_factory') is None:
+        kwargs['connection_factory'] = tracing_connection_class()
+    parent = _current.get()
+    if parent is None:
+        return _original_connect(*args, **kwargs)
+    with _ActiveSpan(Span(parent.trace, 'db connect', 'db', parent.span_id)):
+        return _original_connect(*args, **kwargs)
+
+# requests
+
+def _traced_send(self, request, **kwargs):
+    parent = _current.get()
+    if parent is None:
+        return _original_send(self, request, **kwargs)
+    url = urlsplit(request.url)
+    # The query string is left out: it carries API keys
+    attributes = {'http.method': request.method, 'http.url': f"{url.scheme}://{url.netloc}{url.path}"}
+    with _ActiveSpan(Span(parent.trace, f"{request.method} {url.netloc}", 'http',
+                          parent.span_id, attributes)) as active:
+        request.headers['traceparent'] = active.traceparent()
+        response = _original_send(self, request, **kwargs)
+        active.set_attribute('http.status_code', response.status_code)
+        return response
+
+_install_lock = threading.Lock()
+
+def install() -> None:
+    """Trace psycopg2 connections and requests sessions; safe to call twice"""
+    global _original_connect, _original_send
+    import psycopg2
+    import requests
+    with _install_lock:
+        if _original_connect is None:
+            _original_connect = psycopg2.connect
+            psycopg2.connect = _traced_connect
+        if _original_send is None:
+            _original_send = requests.Session.send
+            requests.Session.send = _traced_send
+        if not EXPORTERS:
+            EXPORTERS.extend(default_exporters())
+
+def uninstall() -> None:
+    global _original_connect, _original_send
+    import psycopg2
+    import requests
+    with _install_lock:
+        if _original_connect is not None:
+            psycopg2.connect = _original_connect
+            _original_connect = None
+        if _original_send is not None:
+            requests.Session.send = _original_send
+            _original_send = None
+
+# Flask
+
+def init_app(app):
+    """Open a root span per request and close it when the request is torn down"""
+    from flask import g, request
+
+    install()
+
+    @app.before_request
+    def _start_request_trace():
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        root = _root_span(f"{request.method} {route}", 'server', request.headers.get('traceparent'),
+                          {'http.method': request.method, 'http.route': route})
+        if root is not None:
+            g._usafe_trace = (root, _open(root))
+
+    @app.after_request
+    def _tag_response(response):
+        handle = g.get('_usafe_trace')
+        if handle is not None:
+            root = handle[0]
+            root.set_attribute('http.status_code', response.status_code)
+            response.headers['X-Trace-Id'] = root.trace.trace_id
+        return response
+
+    @app.teardown_request
+    def _end_request_trace(exc):
+        handle = g.pop('_usafe_trace', None)
+        if handle is not None:
+            _close(handle[0], handle[1], exc)
+
+    return app